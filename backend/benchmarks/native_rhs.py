@@ -0,0 +1,95 @@
+"""
+Binary EquaLab - Benchmark del RHS nativo de ODESolver
+Callback Python vs NativeRHS (con nombre y por árbol de Expression).
+
+Con un callable de Python, cada evaluación de f cruza pybind11 y convierte
+Eigen ↔ lista; RK4 lo hace 4 veces por paso. NativeRHS evalúa en C++ y el
+bucle entero corre sin el GIL. Se reporta µs por paso de RK4.
+
+Requiere el módulo compilado (engine/python/equacore con NATIVE_RHS).
+
+Uso (desde backend/):
+    python -m benchmarks.native_rhs
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from services import bio_models
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../engine/python"))
+import equacore as eq  # noqa: E402
+
+T_END = 50.0
+DT = 0.01
+Y0 = [-65.0, 0.05, 0.6, 0.32]
+
+
+def _us_per_step(solve):
+    tic = time.perf_counter()
+    res = solve()
+    elapsed = time.perf_counter() - tic
+    return 1e6 * elapsed / (len(res.t) - 1), np.asarray(res.y[-1])
+
+
+def _hh_expressions():
+    """Hodgkin-Huxley como árboles de Expression (parámetros como símbolos)."""
+    e = eq.expr
+    V, m, h, n = (e.sym(s) for s in ("V", "m", "h", "n"))
+
+    def lin(x, c):
+        return e.add(x, e.num(c))
+
+    def ratio(x):  # x / (1 − (1e-7 + e^(−x/10)))
+        return e.div(x, e.sub(e.num(1.0), e.add(e.num(1e-7), e.exp(e.div(e.neg(x), e.num(10.0))))))
+
+    def decay(x, c, s):  # e^(−(x + c)/s)
+        return e.exp(e.div(e.neg(lin(x, c)), e.num(s)))
+
+    a_m, b_m = e.mul(e.num(0.1), ratio(lin(V, 40))), e.mul(e.num(4.0), decay(V, 65, 18))
+    a_h = e.mul(e.num(0.07), decay(V, 65, 20))
+    b_h = e.div(e.num(1.0), e.add(e.num(1.0), decay(V, 35, 10)))
+    a_n, b_n = e.mul(e.num(0.01), ratio(lin(V, 55))), e.mul(e.num(0.125), decay(V, 65, 80))
+    I_Na = e.mul(e.mul(e.sym("g_Na"), e.mul(e.pow(m, e.num(3)), h)), e.sub(V, e.sym("E_Na")))
+    I_K = e.mul(e.mul(e.sym("g_K"), e.pow(n, e.num(4))), e.sub(V, e.sym("E_K")))
+    I_L = e.mul(e.sym("g_L"), e.sub(V, e.sym("E_L")))
+    dV = e.div(e.sub(e.sub(e.sub(e.sym("I_ext"), I_Na), I_K), I_L), e.sym("C_m"))
+
+    def gate(x, a, b):
+        return e.sub(e.mul(a, e.sub(e.num(1.0), x)), e.mul(b, x))
+
+    return [dV, gate(m, a_m, b_m), gate(h, a_h, b_h), gate(n, a_n, b_n)]
+
+
+def main():
+    if not getattr(eq, "NATIVE_RHS", False):
+        print("EquaCore sin NativeRHS: compile engine/ (cmake) para ejecutar este benchmark.")
+        return
+
+    params = bio_models.named_model_params("hodgkin_huxley", {})
+    f_py, _ = bio_models.named_model("hodgkin_huxley", params)
+    rk4 = eq.ODESolver.Method.RungeKutta4
+    cases = {
+        "callback Python": lambda: eq.ODESolver.solve(lambda t, y: f_py(t, np.asarray(y)),
+                                                      [0.0, T_END], Y0, DT, method=rk4),
+        "NativeRHS.named": lambda: eq.ODESolver.solve(eq.NativeRHS.named("hodgkin_huxley", params),
+                                                      [0.0, T_END], Y0, DT, method=rk4),
+        "NativeRHS.expr": lambda: eq.ODESolver.solve(
+            eq.NativeRHS.from_expressions(_hh_expressions(), ["V", "m", "h", "n"], params),
+            [0.0, T_END], Y0, DT, method=rk4),
+    }
+
+    print(f"Hodgkin-Huxley, RK4, {int(T_END / DT)} pasos\n")
+    base, ref = None, None
+    for name, solve in cases.items():
+        us, y_end = _us_per_step(solve)
+        base = base or us
+        ref = y_end if ref is None else ref
+        print(f"{name:<18} {us:>9.2f} µs/paso  ×{base / us:>6.1f}  |Δy_final| = {np.max(np.abs(y_end - ref)):.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Binary EquaLab - Prueba de carga del WebSocket PTI en tiempo real
+Cientos de clientes simulados contra `websocket_pti` dentro de un solo event loop.
+
+Cada cliente es un WebSocket falso (sin red) que recorre el handler real:
+envía la configuración, recibe frames y cada segundo inyecta parámetros. Una
+fracción de clientes es lenta (cada envío tarda SLOW_SEND_S) para forzar la
+fusión de frames. Se reporta:
+  - frames/s entregados por cliente (objetivo: ~60 los rápidos)
+  - frames/s de los clientes lentos (el resto se fusiona en el servidor)
+  - bytes por frame JSON y binario
+  - coste medio de un tick del hub y retraso del event loop (p50/p99)
+
+Uso (desde backend/):
+    python -m benchmarks.pti_realtime
+"""
+
+import asyncio
+import json
+
+import numpy as np
+from fastapi import WebSocketDisconnect
+
+from routers.septima import websocket_pti
+from services.pti_realtime import pti_hub
+
+SLOW_FRACTION = 0.1
+SLOW_SEND_S = 0.05
+PROBE_S = 0.005
+
+
+class SimulatedClient:
+    """Implementa lo que el handler usa de starlette.WebSocket."""
+
+    def __init__(self, config: dict, slow: bool = False, inject_every_s: float = 1.0):
+        self.config = config
+        self.slow = slow
+        self.inject_every_s = inject_every_s
+        self.frames = 0
+        self.bytes = 0
+        self.last = None
+        self.closed = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._sent_config = False
+
+    async def accept(self):
+        pass
+
+    async def receive_json(self):
+        if not self._sent_config:
+            self._sent_config = True
+            return self.config
+        # Hot-inject periódico hasta que se pida desconectar
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=self.inject_every_s)
+        except asyncio.TimeoutError:
+            return {"params": {"dose_mg": float(np.random.uniform(20, 80))}}
+        raise WebSocketDisconnect(code=1000)
+
+    async def _deliver(self, payload, size: int):
+        if self.slow:
+            await asyncio.sleep(SLOW_SEND_S)
+        self.frames += 1
+        self.bytes += size
+        self.last = payload
+
+    async def send_json(self, payload):
+        await self._deliver(payload, len(json.dumps(payload)))
+
+    async def send_bytes(self, payload: bytes):
+        await self._deliver(payload, len(payload))
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed.set()
+
+    def disconnect(self):
+        self._stop.set()
+
+
+async def _probe_lag(samples: list, stop: asyncio.Event):
+    """Retraso del event loop: cuánto se pasa un sleep de PROBE_S."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(PROBE_S)
+        samples.append(loop.time() - t0 - PROBE_S)
+
+
+async def run_load(n_clients: int, seconds: float, binary_fraction: float = 0.5) -> dict:
+    """Conecta `n_clients`, los mantiene `seconds` y devuelve el informe."""
+    clients = []
+    for i in range(n_clients):
+        config = {"y0": [150000.0, 1.0], "params": {"treatment": i % 4}, "dt": 0.1,
+                  "speed": 1.0 + (i % 3), "binary": i < binary_fraction * n_clients}
+        clients.append(SimulatedClient(config, slow=i % int(1 / SLOW_FRACTION) == 0))
+
+    lag, stop = [], asyncio.Event()
+    probe = asyncio.create_task(_probe_lag(lag, stop))
+    ticks0 = pti_hub.ticks
+    handlers = [asyncio.create_task(websocket_pti(c)) for c in clients]
+    await asyncio.sleep(seconds)
+    for c in clients:
+        c.disconnect()
+    await asyncio.gather(*handlers)
+    stop.set()
+    await probe
+
+    # Los pacientes que fallecen cierran su stream: el fps se mide sobre los vivos
+    alive = [c for c in clients if not c.closed.is_set()]
+    fast = [c for c in alive if not c.slow]
+    slow = [c for c in alive if c.slow]
+    ticks = pti_hub.ticks - ticks0
+
+    def per_frame(group):
+        return sum(c.bytes for c in group) / max(sum(c.frames for c in group), 1)
+
+    return {
+        "clients": n_clients,
+        "ticks_per_s": ticks / seconds,
+        "fast_fps": np.mean([c.frames for c in fast]) / seconds if fast else 0.0,
+        "slow_fps": np.mean([c.frames for c in slow]) / seconds if slow else 0.0,
+        "json_bytes": per_frame([c for c in clients if not c.config["binary"]]),
+        "binary_bytes": per_frame([c for c in clients if c.config["binary"]]),
+        "tick_ms": pti_hub.tick_ms,
+        "lag_p50_ms": 1000 * float(np.percentile(lag, 50)) if lag else 0.0,
+        "lag_p99_ms": 1000 * float(np.percentile(lag, 99)) if lag else 0.0,
+        "sessions_left": len(pti_hub.sessions),
+    }
+
+
+def main():
+    header = (f"{'clientes':>8} {'ticks/s':>8} {'fps rápidos':>12} {'fps lentos':>11} "
+              f"{'B JSON':>7} {'B bin':>6} {'tick (ms)':>10} {'lag p50':>8} {'lag p99':>8}")
+    print(header)
+    print("─" * len(header))
+    for n in (50, 200, 500):
+        r = asyncio.run(run_load(n, seconds=3.0))
+        print(f"{r['clients']:>8} {r['ticks_per_s']:>8.1f} {r['fast_fps']:>12.1f} {r['slow_fps']:>11.1f} "
+              f"{r['json_bytes']:>7.0f} {r['binary_bytes']:>6.0f} {r['tick_ms']:>10.3f} {r['lag_p50_ms']:>8.2f} {r['lag_p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
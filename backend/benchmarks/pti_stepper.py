@@ -0,0 +1,57 @@
+"""
+Binary EquaLab - Benchmark del stepper PTI
+N `_PythonPTIStepper` escalares frente a un `PTIStepper` vectorizado.
+
+Mismo caso para ambos: prednisona 80 mg partiendo de 30k plaquetas, 30 días
+con dt = 0.1 y riesgo hemorrágico activo. Para N grande el escalar se mide
+sobre SCALAR_CAP pacientes y se extrapola linealmente (marcado con *).
+
+Uso (desde backend/):
+    python -m benchmarks.pti_stepper
+"""
+
+import time
+
+from routers.septima import _PythonPTIStepper
+from services.pti_model import PTIStepper, pti_rng, pti_streams
+
+Y0 = [30000.0, 1.0]
+PARAMS = {"treatment": 1, "dose_mg": 80.0}
+DT = 0.1
+N_STEPS = 300
+SCALAR_CAP = 500
+
+
+def bench_scalar(n: int) -> float:
+    m = min(n, SCALAR_CAP)
+    streams = pti_streams(0, m)
+    tic = time.perf_counter()
+    for rng in streams:
+        stepper = _PythonPTIStepper(Y0, PARAMS, rng=rng)
+        for _ in range(N_STEPS):
+            stepper.step(DT)
+    return (time.perf_counter() - tic) * n / m
+
+
+def bench_vectorized(n: int) -> float:
+    stepper = PTIStepper(Y0, PARAMS, n, rng=pti_rng(0))
+    tic = time.perf_counter()
+    for _ in range(N_STEPS):
+        stepper.step(DT)
+    return time.perf_counter() - tic
+
+
+def main():
+    print(f"{N_STEPS} pasos de dt={DT} por paciente\n")
+    header = f"{'N':>7} {'escalar (ms)':>14} {'vectorizado (ms)':>17} {'aceleración':>12}"
+    print(header)
+    print("─" * len(header))
+    for n in (1, 100, 10_000):
+        scalar = bench_scalar(n)
+        vec = bench_vectorized(n)
+        mark = "*" if n > SCALAR_CAP else " "
+        print(f"{n:>7} {scalar * 1000:>13.1f}{mark} {vec * 1000:>17.1f} {scalar / vec:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
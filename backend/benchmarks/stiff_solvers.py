@@ -0,0 +1,96 @@
+"""
+Binary EquaLab - Benchmark de integradores rígidos de Séptima
+RK4 (paso fijo) vs RK45 vs Rosenbrock23 vs auto a igual precisión.
+
+Para cada modelo se calcula una referencia muy precisa y cada método se
+ajusta (dt a la mitad / rtol ÷ 10) hasta que el error final relativo baja de
+TARGET. Se reportan pasos, evaluaciones del RHS y tiempo.
+
+Uso (desde backend/):
+    python -m benchmarks.stiff_solvers
+"""
+
+import time
+
+import numpy as np
+
+from services import bio_models
+from services.ode_integrators import integrate_fixed, solve_ivp
+
+TARGET = 1e-4
+
+CASES = {
+    # Absorción casi instantánea: λ = −1000 frente a ke = 0.15
+    "pk_fast_absorption": (
+        bio_models.pk_rhs(1000.0, 0.15, 10.0), bio_models.pk_jac(1000.0, 0.15, 10.0),
+        0.0, 24.0, [500.0, 0.0],
+    ),
+    "pk_standard": (
+        bio_models.pk_rhs(1.0, 0.15, 10.0), bio_models.pk_jac(1.0, 0.15, 10.0),
+        0.0, 24.0, [500.0, 0.0],
+    ),
+    # g_Na ×10: la compuerta m se vuelve muy rápida
+    "hh_high_gNa": (
+        bio_models.hodgkin_huxley_rhs(1.0, 1200.0, 36.0, 0.3, 50.0, -77.0, -54.4, 10.0), None,
+        0.0, 20.0, [-65.0, 0.05, 0.6, 0.32],
+    ),
+}
+
+
+def _rel_err(y, ref):
+    return float(np.max(np.abs(y - ref) / np.maximum(np.abs(ref), 1e-6)))
+
+
+def _timed(fn):
+    tic = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - tic) * 1000
+
+
+def bench_rk4(f, t0, t1, y0, ref):
+    dt = (t1 - t0) / 10
+    while dt > 1e-6:
+        try:
+            with np.errstate(all="ignore"):
+                (t, Y), ms = _timed(lambda: integrate_fixed(f, t0, t1, y0, dt))
+            err = _rel_err(Y[-1], ref)
+        except (FloatingPointError, OverflowError):
+            err = np.inf
+        if err <= TARGET:
+            steps = len(t) - 1
+            return {"steps": steps, "n_rhs": 4 * steps, "ms": ms, "err": err, "setting": f"dt={dt:.3g}"}
+        dt /= 2
+    return None
+
+
+def bench_adaptive(method, f, jac, t0, t1, y0, ref):
+    for rtol in (1e-3, 1e-4, 1e-5, 1e-6, 1e-7, 1e-8, 1e-9):
+        sol, ms = _timed(lambda: solve_ivp(f, t0, t1, y0, method=method, rtol=rtol,
+                                           atol=rtol * 1e-3, jac=jac))
+        err = _rel_err(sol.y_end, ref)
+        if err <= TARGET:
+            return {"steps": sol.n_steps, "n_rhs": sol.n_rhs, "ms": ms, "err": err,
+                    "setting": f"rtol={rtol:g}"}
+    return None
+
+
+def main():
+    print(f"Precisión objetivo: error relativo final ≤ {TARGET:g}\n")
+    header = f"{'modelo':<20} {'método':<13} {'ajuste':<12} {'pasos':>8} {'RHS':>9} {'ms':>9} {'error':>10}"
+    print(header)
+    print("─" * len(header))
+    for name, (f, jac, t0, t1, y0) in CASES.items():
+        ref = solve_ivp(f, t0, t1, y0, method="RK45", rtol=1e-11, atol=1e-13).y_end
+        rows = [("RungeKutta4", bench_rk4(f, t0, t1, y0, ref))]
+        rows += [(m, bench_adaptive(m, f, jac, t0, t1, y0, ref)) for m in ("RK45", "Rosenbrock23", "auto")]
+        for method, r in rows:
+            if r is None:
+                print(f"{name:<20} {method:<13} {'—':<12} {'no converge':>8}")
+                continue
+            print(f"{name:<20} {method:<13} {r['setting']:<12} {r['steps']:>8} {r['n_rhs']:>9} "
+                  f"{r['ms']:>9.1f} {r['err']:>10.2e}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Optional
 from services.maxima_service import maxima
+from services.downsampling import downsample_indices
 import sys
 import os
 from celery.result import AsyncResult
@@ -558,6 +560,7 @@ class PlotRequest(BaseModel):
     x_min: float = -10.0
     x_max: float = 10.0
     points: int = 200
+    max_points: Optional[int] = Field(default=None, ge=3, description="Máximo de puntos devueltos (downsampling)")
 
 @router.post("/plot")
 async def plot_function(request: PlotRequest):
@@ -575,21 +578,27 @@ async def plot_function(request: PlotRequest):
         
         # Generate x values
         x_vals = np.linspace(request.x_min, request.x_max, request.points)
-        y_vals = []
+        y_arr = np.full(len(x_vals), np.nan)
         
-        for val in x_vals:
+        for i, val in enumerate(x_vals):
             try:
                 # Need to handle complex numbers and math domain errors
                 y = f_num(val)
                 # Check if result is real and finite
                 if np.isreal(y) and np.isfinite(y):
                     # Sp sympify converts to array sometimes, ensure float
-                    y_vals.append({"x": float(val), "y": float(y)})
-                else:
-                    y_vals.append({"x": float(val), "y": None})
+                    y_arr[i] = float(np.real(y))
             except Exception:
                 # Math domain error like sqrt(-1)
-                y_vals.append({"x": float(val), "y": None})
+                pass
+
+        # Downsampling LTTB: conserva picos y huecos (None) con menos puntos
+        if request.max_points and len(x_vals) > request.max_points:
+            idx = downsample_indices(x_vals, y_arr, request.max_points)
+            x_vals, y_arr = x_vals[idx], y_arr[idx]
+
+        y_vals = [{"x": float(xv), "y": float(yv) if np.isfinite(yv) else None}
+                  for xv, yv in zip(x_vals, y_arr)]
                 
         return {"expression": request.expression, "points": y_vals, "success": True}
         
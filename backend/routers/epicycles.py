@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import math
 import os
 import sys
+import time
+
+from services.array_codec import PackedArray
 
 router = APIRouter(prefix="/api/epicycles", tags=["Epicycles"])
 
@@ -47,6 +50,8 @@ def parse_expr(expr_str: str, sp, engine):
     transformations = standard_transformations + (implicit_multiplication_application, convert_xor)
     return sp_parse(expr_str, transformations=transformations)
 
+MAX_PATH_POINTS = 200_000
+
 # --- Modelos ---
 
 class Point(BaseModel):
@@ -54,7 +59,16 @@ class Point(BaseModel):
     y: float
 
 class FFTRequest(BaseModel):
-    points: List[Point]
+    points: List[Point] = []
+    packed_points: Optional[PackedArray] = None  # (N, 2) en lugar de `points`
+    max_coefficients: Optional[int] = Field(default=None, ge=1, description="Conservar solo los K círculos mayores")
+    energy_fraction: Optional[float] = Field(default=None, gt=0, le=1, description="Conservar la energía acumulada indicada")
+    signed_frequencies: Optional[bool] = None  # por defecto: True si se trunca
+    packed: bool = False  # devolver (K, 3) [freq, amplitude, phase] empaquetado
+    # Preparación del trazo antes de la DFT
+    smooth_iterations: int = Field(default=0, ge=0, le=100)
+    spline: bool = False                # interpolar con Catmull-Rom centrípeta
+    resample: Optional[int] = Field(default=None, ge=2, le=MAX_PATH_POINTS, description="N tras remuestreo por longitud de arco")
 
 class Coefficient(BaseModel):
     freq: int
@@ -63,13 +77,25 @@ class Coefficient(BaseModel):
 
 class FFTResponse(BaseModel):
     coefficients: List[Coefficient]
+    packed: Optional[PackedArray] = None
+    n_samples: Optional[int] = None     # N original (paso de animación 2π/N)
+    energy_kept: Optional[float] = None
+    metadata: Dict[str, Any] = {}
 
 class SmoothRequest(BaseModel):
-    points: List[Point]
-    iterations: int = 3
+    points: List[Point] = []
+    packed_points: Optional[PackedArray] = None
+    iterations: int = Field(default=3, ge=0, le=100)
+    spline: bool = False                 # Catmull-Rom tras el suavizado
+    samples_per_segment: int = Field(default=8, ge=1, le=64)
+    alpha: float = Field(default=0.5, ge=0, le=1)  # 0 uniforme, 0.5 centrípeta, 1 cordal
+    closed: bool = False
+    resample: Optional[int] = Field(default=None, ge=2, le=MAX_PATH_POINTS)
+    packed: bool = False
 
 class SmoothResponse(BaseModel):
     points: List[Point]
+    packed: Optional[PackedArray] = None
 
 class ParseParametricRequest(BaseModel):
     expression: str
@@ -78,61 +104,94 @@ class ParseParametricRequest(BaseModel):
 class ParseParametricResponse(BaseModel):
     points: List[Point]
 
+def _read_points(np, points, packed_points):
+    """(N, 2) float64 desde `packed_points` o la lista de `Point`."""
+    from services.array_codec import unpack_array
+    try:
+        if packed_points is not None:
+            xy = unpack_array(packed_points).astype(np.float64).reshape(-1, 2)
+        else:
+            xy = np.array([(pt.x, pt.y) for pt in points], dtype=np.float64).reshape(-1, 2)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Puntos inválidos: {e}")
+    if xy.shape[0] > MAX_PATH_POINTS:
+        raise HTTPException(status_code=400, detail=f"Trazo demasiado largo: máximo {MAX_PATH_POINTS} puntos")
+    return xy
+
+def _points_out(np, xy, packed: bool):
+    from services.array_codec import pack_array
+    if packed:
+        return {"points": [], "packed": pack_array(xy)}
+    return {"points": [{"x": x, "y": y} for x, y in xy.tolist()]}
+
 # --- Endpoints ---
 
 @router.post("/fft", response_model=FFTResponse)
 def compute_fft(request: FFTRequest):
+    """
+    DFT del trazo (x + iy) con NumPy, ordenada por amplitud (mayor círculo primero).
+
+    Es la misma transformación que computeDFTLocal del frontend:
+    re += x·cos(θ) + y·sin(θ),  im += y·cos(θ) − x·sin(θ)  ≡  (x + iy)·e^(−iθ).
+    """
     np, sp, engine = _get_deps()
-    
-    n = len(request.points)
+    from services.array_codec import pack_array
+    from services.fourier import fourier_coefficients, points_to_complex, prepare_path
+
+    tic = time.perf_counter()
+    xy = _read_points(np, request.points, request.packed_points)
+    if xy.shape[0] >= 2:
+        xy = prepare_path(xy, smooth_iterations=request.smooth_iterations,
+                          spline=request.spline, resample=request.resample, closed=True)
+
+    n = xy.shape[0]
     if n == 0:
-        return {"coefficients": []}
-        
-    # Convertir a complejo x + iy
-    # Pero notar el formato de computeDFTLocal en frontend:
-    # re += x * cos(angle) + y * sin(angle)
-    # im += y * cos(angle) - x * sin(angle)
-    # Esto es exactamente la transformacion de Fourier DFT estandar (x + iy) * e^(-i * angle)
-    
-    complex_pts = np.array([pt.x + 1j * pt.y for pt in request.points], dtype=np.complex128)
-    
-    # Calcular FFT (O(N log N))
-    fft_vals = np.fft.fft(complex_pts) / n
-    
-    coeffs = []
-    for k in range(n):
-        val = fft_vals[k]
-        amp = float(np.abs(val))
-        phase = float(np.angle(val))
-        coeffs.append(Coefficient(freq=k, amplitude=amp, phase=phase))
-        
-    # Ordenar por amplitud descendente (mayor círculo primero)
-    coeffs.sort(key=lambda c: c.amplitude, reverse=True)
-    
-    return {"coefficients": coeffs}
+        return {"coefficients": [], "n_samples": 0}
+
+    truncating = request.max_coefficients is not None or request.energy_fraction is not None
+    signed = truncating if request.signed_frequencies is None else request.signed_frequencies
+    freq, amp, phase, kept = fourier_coefficients(
+        points_to_complex(xy),
+        max_coefficients=request.max_coefficients,
+        energy_fraction=request.energy_fraction,
+        signed=signed,
+    )
+
+    out = {"n_samples": n, "energy_kept": kept}
+    if request.packed:
+        out["coefficients"] = []
+        out["packed"] = pack_array(np.column_stack([freq, amp, phase]))
+    else:
+        out["coefficients"] = [
+            {"freq": f, "amplitude": a, "phase": p}
+            for f, a, p in zip(freq.tolist(), amp.tolist(), phase.tolist())
+        ]
+    out["metadata"] = {
+        "kept": int(freq.shape[0]),
+        "signed_frequencies": signed,
+        "execution_time_ms": round((time.perf_counter() - tic) * 1000, 2),
+    }
+    return out
 
 @router.post("/smooth", response_model=SmoothResponse)
 def smooth_path(request: SmoothRequest):
-    pts = request.points
-    if len(pts) < 3:
-        return {"points": pts}
-        
-    current = pts
-    for _ in range(request.iterations):
-        new_pts = [current[0]]
-        for i in range(1, len(current) - 1):
-            prev = current[i - 1]
-            curr = current[i]
-            nxt = current[i + 1]
-            
-            x = 0.25 * prev.x + 0.5 * curr.x + 0.25 * nxt.x
-            y = 0.25 * prev.y + 0.5 * curr.y + 0.25 * nxt.y
-            new_pts.append(Point(x=x, y=y))
-            
-        new_pts.append(current[-1])
-        current = new_pts
-        
-    return {"points": current}
+    """
+    Suavizado 1-2-1 vectorizado, Catmull-Rom opcional y remuestreo por
+    longitud de arco a `resample` puntos.
+    """
+    np, sp, engine = _get_deps()
+    from services.fourier import catmull_rom, resample_arclength, smooth_polyline
+
+    xy = _read_points(np, request.points, request.packed_points)
+    if xy.shape[0] < 3:
+        return _points_out(np, xy, request.packed)
+
+    xy = smooth_polyline(xy, request.iterations)
+    if request.spline:
+        xy = catmull_rom(xy, request.samples_per_segment, closed=request.closed, alpha=request.alpha)
+    if request.resample:
+        xy = resample_arclength(xy, request.resample, closed=request.closed)
+    return _points_out(np, xy, request.packed)
 
 @router.post("/parse_parametric", response_model=ParseParametricResponse)
 def parse_parametric(request: ParseParametricRequest):
@@ -234,3 +293,54 @@ def preset_wave(request: PresetWaveRequest):
         coeffs.append(Coefficient(freq=freq, amplitude=amp, phase=phase))
         
     return {"coefficients": coeffs}
+
+class FramesRequest(BaseModel):
+    coefficients: List[Coefficient] = []
+    packed_coefficients: Optional[PackedArray] = None  # (K, 3) [freq, amplitude, phase]
+    n_frames: int = Field(default=600, ge=2, le=20_000)
+    include_chain: bool = True  # matriz (F, K+1, 2) con el centro de cada círculo
+
+class FramesResponse(BaseModel):
+    n_frames: int
+    n_circles: int
+    trace: PackedArray                   # (F, 2) float32 — punta del trazo
+    chain: Optional[PackedArray] = None  # (F, K+1, 2) float32
+    metadata: Dict[str, Any] = {}
+
+@router.post("/frames", response_model=FramesResponse)
+def epicycle_frames_endpoint(request: FramesRequest):
+    """
+    Evalúa la cadena de epiciclos para todos los frames de una vez
+    (t = 2π·f/F): el cliente solo reproduce arrays, sin sumar círculos por frame.
+    """
+    np, sp, engine = _get_deps()
+    from services.array_codec import pack_array, unpack_array
+    from services.fourier import MAX_FRAME_CELLS, epicycle_frames, epicycle_trace
+
+    tic = time.perf_counter()
+    try:
+        if request.packed_coefficients is not None:
+            table = unpack_array(request.packed_coefficients).astype(np.float64).reshape(-1, 3)
+        else:
+            table = np.array([(c.freq, c.amplitude, c.phase) for c in request.coefficients],
+                             dtype=np.float64).reshape(-1, 3)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Coeficientes inválidos: {e}")
+
+    k = table.shape[0]
+    if k == 0:
+        raise HTTPException(status_code=400, detail="Se requiere al menos un coeficiente")
+    if request.include_chain and request.n_frames * (k + 1) > MAX_FRAME_CELLS:
+        raise HTTPException(status_code=400, detail=f"Frames × círculos excede {MAX_FRAME_CELLS}; reduzca n_frames o use include_chain=false")
+
+    freq, amp, phase = table[:, 0], table[:, 1], table[:, 2]
+    out = {"n_frames": request.n_frames, "n_circles": k}
+    if request.include_chain:
+        chain = epicycle_frames(freq, amp, phase, request.n_frames)
+        tip = chain[:, -1]
+        out["chain"] = pack_array(np.stack([chain.real, chain.imag], axis=-1))
+    else:
+        tip = epicycle_trace(freq, amp, phase, request.n_frames)
+    out["trace"] = pack_array(np.column_stack([tip.real, tip.imag]))
+    out["metadata"] = {"execution_time_ms": round((time.perf_counter() - tic) * 1000, 2)}
+    return out
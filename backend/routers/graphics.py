@@ -4,6 +4,10 @@ from typing import List, Optional, Dict, Any
 import math
 import os
 import sys
+import time
+
+from services.array_codec import PackedArray
+from services.compiled_functions import compiled_cache
 
 router = APIRouter(prefix="/api/graphics", tags=["Graphics"])
 
@@ -52,6 +56,41 @@ def parse_expr(expr_str: str, sp, engine):
     transformations = standard_transformations + (implicit_multiplication_application, convert_xor)
     return sp_parse(expr_str, transformations=transformations)
 
+def compile_expr(expr_str: str, variables=("x",), complex_domain: bool = False):
+    """
+    Parsea y lambdifica `expr_str` una sola vez (caché LRU compartida).
+    Devuelve (expr_sympy, función_numpy).
+    """
+    np, sp, engine = _get_deps()
+
+    def build():
+        expr = parse_expr(expr_str, sp, engine)
+        if complex_domain:
+            expr = expr.subs(sp.Symbol('i'), sp.I)
+        symbols = [sp.Symbol(v) for v in variables]
+        return expr, sp.lambdify(symbols, expr, modules=['numpy', 'math'])
+
+    return compiled_cache.get_or_compile(("expr", expr_str, tuple(variables), complex_domain), build)
+
+MAX_DERIVATIVE_ORDER = 8
+
+def compile_derivative_family(expr_str: str, max_order: int):
+    """
+    f, f', …, f^(n) derivadas incrementalmente (cada una de la anterior) y
+    lambdificadas juntas con CSE: subexpresiones comunes como exp(x**2) se
+    evalúan una sola vez por punto. Devuelve (exprs, función → lista).
+    """
+    np, sp, engine = _get_deps()
+    x_sym = sp.Symbol('x')
+
+    def build():
+        exprs = [parse_expr(expr_str, sp, engine)]
+        for _ in range(max_order):
+            exprs.append(sp.diff(exprs[-1], x_sym))
+        return exprs, sp.lambdify(x_sym, exprs, modules=['numpy', 'math'], cse=True)
+
+    return compiled_cache.get_or_compile(("family", expr_str, max_order), build)
+
 # --- Modelos de Peticion ---
 
 class EvaluateRequest(BaseModel):
@@ -59,6 +98,7 @@ class EvaluateRequest(BaseModel):
     x_min: float
     x_max: float
     points: int = 400
+    max_points: Optional[int] = None
 
 class EvaluateResponse(BaseModel):
     x: List[float]
@@ -69,11 +109,56 @@ class DerivativeRequest(BaseModel):
     x_min: float
     x_max: float
     points: int = 400
+    max_points: Optional[int] = None
+    max_order: Optional[int] = None  # Si se indica: columnas f, f', …, f^(n)
 
 class DerivativeResponse(BaseModel):
     x: List[float]
     y: List[Optional[float]]
     derivative_expr: str
+    # Formato columnar (solo con max_order): columns[k] = f^(k) sobre x
+    orders: Optional[List[int]] = None
+    exprs: Optional[List[str]] = None
+    columns: Optional[List[List[Optional[float]]]] = None
+
+class GridRequest(BaseModel):
+    expression: str
+    mode: str = "surface"  # surface | implicit | complex
+    x_min: float = -10.0
+    x_max: float = 10.0
+    y_min: float = -10.0
+    y_max: float = 10.0
+    nx: int = 200
+    ny: int = 200
+    level: float = 0.0           # nivel de la curva implícita f(x,y) = level
+    include_values: bool = True  # en modo implicit, devolver también el campo
+
+class GridResponse(BaseModel):
+    x: List[float]
+    y: List[float]
+    mode: str
+    values: Optional[PackedArray] = None     # (ny, nx) float32 — surface/implicit
+    modulus: Optional[PackedArray] = None    # (ny, nx) float32 — complex
+    phase: Optional[PackedArray] = None      # (ny, nx) float32 — complex
+    rgb: Optional[PackedArray] = None        # (ny, nx, 3) uint8 — complex
+    contours: Optional[PackedArray] = None   # (n, 2, 2) float32 — implicit
+    metadata: Dict[str, Any] = {}
+
+class AnalyzeRequest(BaseModel):
+    expression: str
+    x_min: float = -10.0
+    x_max: float = 10.0
+    tasks: List[str] = ["roots", "extrema", "area"]
+    samples: int = 2000          # malla de detección de cambios de signo
+    time_budget_ms: float = 250.0  # presupuesto por tarea
+
+class AnalyzeResponse(BaseModel):
+    roots: Optional[List[float]] = None
+    extrema: Optional[List[Dict[str, Any]]] = None
+    area: Optional[float] = None
+    area_error: Optional[float] = None
+    truncated: Dict[str, bool] = {}
+    metadata: Dict[str, Any] = {}
 
 class ConvolutionRequest(BaseModel):
     f_expr: str
@@ -90,6 +175,33 @@ class ConvolutionResponse(BaseModel):
     area_y: List[float]
     current_val: float
 
+def _real_array(np, y_arr):
+    """Array float; valores con parte imaginaria se marcan como NaN."""
+    y_arr = np.asarray(y_arr)
+    if np.iscomplexobj(y_arr):
+        return np.where(np.abs(y_arr.imag) < 1e-12, y_arr.real, np.nan)
+    return y_arr.astype(float)
+
+def _finite_list(np, arr):
+    """Convierte NaN/Inf a None para JSON."""
+    return [float(v) if np.isfinite(v) else None for v in arr]
+
+def _get_numeric_analysis():
+    """src/core/numeric_analysis (compartido con el escritorio)."""
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    from src.core import numeric_analysis
+    return numeric_analysis
+
+def _decimate_curves(np, x_arr, curves, max_points):
+    """Aplica LTTB conjunto a todas las curvas (mismos índices de x)."""
+    if not max_points or len(x_arr) <= max_points:
+        return x_arr, curves
+    from services.downsampling import downsample_indices
+    idx = downsample_indices(x_arr, np.vstack(curves), max_points)
+    return x_arr[idx], [c[idx] for c in curves]
+
 # --- Endpoints ---
 
 @router.post("/evaluate", response_model=EvaluateResponse)
@@ -104,9 +216,8 @@ def evaluate_functions(request: EvaluateRequest):
     y_curves = []
     for expr_str in request.expressions:
         try:
-            expr = parse_expr(expr_str, sp, engine)
-            # Lambdify para evaluacion rapida
-            f = sp.lambdify(x_sym, expr, modules=['numpy', 'math'])
+            # Parseo + lambdify cacheados para evaluacion rapida
+            expr, f = compile_expr(expr_str)
             
             # Evaluar
             try:
@@ -115,57 +226,74 @@ def evaluate_functions(request: EvaluateRequest):
                 if np.isscalar(y_arr):
                     y_arr = np.full_like(x_arr, float(y_arr))
                 
-                # Convertir NaN o Inf a None para JSON
-                y_list = [float(val) if np.isfinite(val) else None for val in y_arr]
-                y_curves.append(y_list)
+                y_curves.append(_real_array(np, y_arr))
             except Exception:
                 # Si falla lambdify vectorizado, intentamos punto por punto
                 y_list = []
                 for x_val in x_list:
                     try:
-                        y = float(expr.subs(x_sym, x_val))
-                        y_list.append(y if np.isfinite(y) else None)
+                        y_list.append(float(expr.subs(x_sym, x_val)))
                     except Exception:
-                        y_list.append(None)
-                y_curves.append(y_list)
+                        y_list.append(np.nan)
+                y_curves.append(np.asarray(y_list, dtype=float))
         except Exception:
             # Falla al parsear, devolvemos vacio
-            y_curves.append([None] * request.points)
-            
-    return {"x": x_list, "y_curves": y_curves}
+            y_curves.append(np.full(request.points, np.nan))
+
+    if y_curves:
+        x_arr, y_curves = _decimate_curves(np, x_arr, y_curves, request.max_points)
+
+    # Convertir NaN o Inf a None para JSON
+    return {"x": x_arr.tolist(), "y_curves": [_finite_list(np, y) for y in y_curves]}
 
 @router.post("/derivative", response_model=DerivativeResponse)
 def evaluate_derivative(request: DerivativeRequest):
     np, sp, engine = _get_deps()
     x_sym = sp.Symbol('x')
+
+    max_order = request.max_order if request.max_order is not None else 1
+    if not 1 <= max_order <= MAX_DERIVATIVE_ORDER:
+        raise HTTPException(status_code=400, detail=f"max_order debe estar entre 1 y {MAX_DERIVATIVE_ORDER}")
     
     try:
-        expr = parse_expr(request.expression, sp, engine)
-        # Derivada analítica real
-        deriv = sp.diff(expr, x_sym)
+        # Derivadas analíticas reales, compiladas juntas (CSE)
+        exprs, family = compile_derivative_family(request.expression, max_order)
         
         x_arr = np.linspace(request.x_min, request.x_max, request.points)
-        f_prime = sp.lambdify(x_sym, deriv, modules=['numpy', 'math'])
         
         try:
-            y_arr = f_prime(x_arr)
-            if np.isscalar(y_arr):
-                y_arr = np.full_like(x_arr, float(y_arr))
-            y_list = [float(val) if np.isfinite(val) else None for val in y_arr]
+            cols = [_real_array(np, np.broadcast_to(c, x_arr.shape)) for c in family(x_arr)]
         except Exception:
-            y_list = []
-            for x_val in x_arr:
-                try:
-                    y = float(deriv.subs(x_sym, x_val))
-                    y_list.append(y if np.isfinite(y) else None)
-                except Exception:
-                    y_list.append(None)
-                    
+            cols = []
+            for e in exprs:
+                y_list = []
+                for x_val in x_arr:
+                    try:
+                        y_list.append(float(e.subs(x_sym, x_val)))
+                    except Exception:
+                        y_list.append(np.nan)
+                cols.append(np.asarray(y_list, dtype=float))
+
+        if request.max_order is None:
+            cols = cols[1:2]
+        x_arr, cols = _decimate_curves(np, x_arr, cols, request.max_points)
+
+        if request.max_order is None:
+            return {
+                "x": x_arr.tolist(),
+                "y": _finite_list(np, cols[0]),
+                "derivative_expr": str(exprs[1])
+            }
         return {
             "x": x_arr.tolist(),
-            "y": y_list,
-            "derivative_expr": str(deriv)
+            "y": _finite_list(np, cols[1]),
+            "derivative_expr": str(exprs[1]),
+            "orders": list(range(max_order + 1)),
+            "exprs": [str(e) for e in exprs],
+            "columns": [_finite_list(np, c) for c in cols],
         }
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -240,3 +368,120 @@ def evaluate_convolution(req: ConvolutionRequest):
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error en convolucion: {str(e)}")
+
+
+@router.post("/grid", response_model=GridResponse)
+def evaluate_grid_endpoint(req: GridRequest):
+    """
+    Evalúa una expresión sobre una malla 2-D en una pasada vectorizada.
+
+    Modos:
+      - surface:  z = f(x, y)                     → values
+      - implicit: f(x, y) = g(x, y)  (o f = 0)    → contours (+ values)
+      - complex:  w = f(z), z = x + iy            → modulus, phase, rgb
+    """
+    np, sp, engine = _get_deps()
+    from services.array_codec import pack_array
+    from services.grid_eval import (MAX_GRID_AXIS, MAX_GRID_POINTS, evaluate_grid,
+                                    marching_squares, domain_coloring)
+
+    if req.mode not in ("surface", "implicit", "complex"):
+        raise HTTPException(status_code=400, detail=f"Modo desconocido: '{req.mode}'")
+    if req.nx < 2 or req.ny < 2 or req.nx > MAX_GRID_AXIS or req.ny > MAX_GRID_AXIS:
+        raise HTTPException(status_code=400, detail=f"Resolución por eje debe estar entre 2 y {MAX_GRID_AXIS}")
+    if req.nx * req.ny > MAX_GRID_POINTS:
+        raise HTTPException(status_code=400, detail=f"Malla demasiado grande: máximo {MAX_GRID_POINTS} puntos")
+    if not (req.x_max > req.x_min and req.y_max > req.y_min):
+        raise HTTPException(status_code=400, detail="Rango inválido: se requiere x_min < x_max y y_min < y_max")
+
+    expr_str = req.expression
+    if req.mode == "implicit" and "=" in expr_str:
+        lhs, rhs = expr_str.split("=", 1)
+        expr_str = f"({lhs}) - ({rhs})"
+
+    tic = time.perf_counter()
+    try:
+        if req.mode == "complex":
+            _, func = compile_expr(expr_str, variables=("z",), complex_domain=True)
+        else:
+            _, func = compile_expr(expr_str, variables=("x", "y"))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error al parsear la expresión: {e}")
+
+    x = np.linspace(req.x_min, req.x_max, req.nx)
+    y = np.linspace(req.y_min, req.y_max, req.ny)
+    try:
+        field, tiles = evaluate_grid(func, x, y, complex_domain=(req.mode == "complex"))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error al evaluar la malla: {e}")
+
+    out = {"x": x.tolist(), "y": y.tolist(), "mode": req.mode}
+    if req.mode == "complex":
+        out["modulus"] = pack_array(np.abs(field))
+        out["phase"] = pack_array(np.angle(field))
+        out["rgb"] = pack_array(domain_coloring(field), dtype="uint8")
+    else:
+        if req.mode == "surface" or req.include_values:
+            out["values"] = pack_array(field)
+        if req.mode == "implicit":
+            out["contours"] = pack_array(marching_squares(x, y, field, req.level))
+
+    out["metadata"] = {
+        "tiles": tiles,
+        "points": req.nx * req.ny,
+        "execution_time_ms": round((time.perf_counter() - tic) * 1000, 2),
+    }
+    return out
+
+
+ANALYZE_TASKS = ("roots", "extrema", "area")
+MAX_ANALYZE_SAMPLES = 200_000
+MAX_ANALYZE_BUDGET_MS = 5000.0
+
+@router.post("/analyze", response_model=AnalyzeResponse)
+def analyze_function(req: AnalyzeRequest):
+    """
+    Raíces, extremos locales y área de f(x) en [x_min, x_max] sin SymPy solve/integrate.
+    Cada tarea tiene su presupuesto de tiempo: si se agota se devuelve lo hallado
+    con `truncated[tarea] = True`.
+    """
+    na = _get_numeric_analysis()
+    unknown = [t for t in req.tasks if t not in ANALYZE_TASKS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Tareas desconocidas: {unknown}. Use {list(ANALYZE_TASKS)}")
+    if not req.x_max > req.x_min:
+        raise HTTPException(status_code=400, detail="Rango inválido: se requiere x_min < x_max")
+    if not 3 <= req.samples <= MAX_ANALYZE_SAMPLES:
+        raise HTTPException(status_code=400, detail=f"samples debe estar entre 3 y {MAX_ANALYZE_SAMPLES}")
+    budget = min(max(req.time_budget_ms, 1.0), MAX_ANALYZE_BUDGET_MS)
+
+    try:
+        _, func = compile_expr(req.expression)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error al parsear la expresión: {e}")
+
+    out = {"truncated": {}}
+    timings = {}
+    try:
+        if "roots" in req.tasks:
+            res = na.find_roots(func, req.x_min, req.x_max, samples=req.samples, time_budget_ms=budget)
+            out["roots"] = res.roots
+            out["truncated"]["roots"] = res.truncated
+            timings["roots"] = res.elapsed_ms
+        if "extrema" in req.tasks:
+            res = na.find_extrema(func, req.x_min, req.x_max, samples=req.samples, time_budget_ms=budget)
+            out["extrema"] = [{"x": x, "y": y, "type": kind} for x, y, kind in res.extrema]
+            out["truncated"]["extrema"] = res.truncated
+            timings["extrema"] = res.elapsed_ms
+        if "area" in req.tasks:
+            res = na.integrate_area(func, req.x_min, req.x_max, time_budget_ms=budget)
+            finite = math.isfinite(res.area)
+            out["area"] = res.area if finite else None
+            out["area_error"] = res.abs_error if math.isfinite(res.abs_error) else None
+            out["truncated"]["area"] = res.truncated or not finite
+            timings["area"] = res.elapsed_ms
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error en el análisis numérico: {e}")
+
+    out["metadata"] = {"timings_ms": timings, "time_budget_ms": budget}
+    return out
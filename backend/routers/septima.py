@@ -4,28 +4,47 @@ Router de integración Séptima ↔ Bio-Engine de Binary
 
 Endpoints:
   GET  /api/septima/status           — Estado del motor C++
-  POST /api/septima/simulate         — ODE genérico (Euler / RK4)
+  POST /api/septima/simulate         — ODE genérico (modelos con nombre)
+  POST /api/septima/simulate/stream  — ODE genérico por bloques (NDJSON/binario, reanudable)
   POST /api/septima/bio/glucose      — Modelo Bergman (Glucosa-Insulina)
   POST /api/septima/bio/windkessel   — Modelo Windkessel 2-Elementos
   POST /api/septima/bio/neuron       — Hodgkin-Huxley (próximo sprint)
 """
 
 from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from pydantic import BaseModel, Field
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
 import asyncio
-from typing import List, Dict, Any
+import itertools
+import json
+from typing import List, Dict, Any, Optional
 import time
 import sys
 import math
 import os
 
+import numpy as np
+
+from pydantic import ValidationError
+from services.downsampling import downsample, downsample_indices, downsample_rows
+from services import bio_fit, bio_models, bio_sensitivity, bio_sweep, ode_compiler, pk_analytic, pti_model
+from services import ecg as ecg_model
+from services.pti_realtime import pti_hub
+from services.simulation_cache import make_key as simulation_key, simulation_cache
+from services.ode_integrators import (ADAPTIVE_METHODS, EVENT_DIRECTIONS, FIXED_STEP_METHODS, Checkpoint,
+                                      EventLog, FixedStepIntegrator, chunk_width, integrate_fixed, iter_chunks,
+                                      n_fixed_steps, output_times, solve_ivp, thin_indices, threshold_event)
+
 # ─── Carga del Motor C++ ────────────────────────────────────────────────────────
+# El paquete equacore se importa aunque falte el módulo compilado (_equacore):
+# lo que indica si el motor biomédico está disponible es NATIVE_BIO.
 try:
     sys.path.append(os.path.join(os.path.dirname(__file__), '../../engine/python'))
     import equacore as eq
-    HAS_NATIVE_ENGINE = True
+    HAS_NATIVE_ENGINE = bool(getattr(eq, "NATIVE_BIO", False))
 except ImportError:
     HAS_NATIVE_ENGINE = False
+if not HAS_NATIVE_ENGINE:
     print("WARNING: EquaCore C++ engine not found. Using Python fallback.")
 
 # ─── Router ─────────────────────────────────────────────────────────────────────
@@ -33,14 +52,58 @@ router = APIRouter(prefix="/api/septima", tags=["Séptima Integration"])
 
 # ─── DTOs ───────────────────────────────────────────────────────────────────────
 
-class ODESimulationRequest(BaseModel):
-    model: str = "user_defined"
+SOLVER_METHODS = FIXED_STEP_METHODS + ADAPTIVE_METHODS
+NATIVE_METHODS = FIXED_STEP_METHODS + ("RK45",)
+
+class EventSpec(BaseModel):
+    """Umbral y[state] = value vigilado durante la integración."""
+    name: str
+    state: int = Field(ge=0, description="Índice del estado en y")
+    value: float
+    direction: str = Field(default="both", description="up | down | both")
+    terminal: bool = Field(default=False, description="Detener la integración en el primer cruce")
+
+class SolverOptions(BaseModel):
+    """Opciones de integración comunes a todos los modelos ODE."""
+    method: str = Field(default="RungeKutta4", description=f"Integrador: {', '.join(SOLVER_METHODS)}")
+    rtol: float = Field(default=1e-6, gt=0, description="Tolerancia relativa (métodos adaptativos)")
+    atol: float = Field(default=1e-9, gt=0, description="Tolerancia absoluta (métodos adaptativos)")
+    t_eval: Optional[List[float]] = Field(default=None, description="Tiempos de salida (crecientes)")
+    n_out: Optional[int] = Field(default=None, ge=2, le=200_000, description="Número de puntos de salida equiespaciados")
+    max_step: Optional[float] = Field(default=None, gt=0, description="Paso máximo (métodos adaptativos)")
+    output_every: Optional[int] = Field(default=None, ge=1, description="Guardar 1 de cada k pasos (y el final)")
+    max_points: Optional[int] = Field(default=None, ge=3, description="Máximo de puntos devueltos (downsampling LTTB)")
+    events: Optional[List[EventSpec]] = Field(default=None, description="Umbrales a detectar (tiempos exactos en metadata.events)")
+
+    @model_validator(mode="after")
+    def _one_output_mode(self):
+        if self.output_every and (self.t_eval is not None or self.n_out):
+            raise ValueError("output_every no se combina con t_eval/n_out")
+        return self
+
+class ODESimulationRequest(SolverOptions):
+    model: str = Field(default="user_defined",
+                       description=f"user_defined (dy/dt = −y) o {', '.join(bio_models.NAMED_MODELS)}")
     t_start: float
     t_end: float
     dt: float
     y0: List[float]
     params: Dict[str, Any] = {}
-    method: str = "RungeKutta4"
+    equations: Optional[Dict[str, str]] = Field(
+        default=None, description='Sistema propio en orden de y0, p. ej. {"dx": "sigma*(y - x)", ...}')
+
+STREAM_FORMATS = ("ndjson", "binary")
+
+class StreamOptions(BaseModel):
+    """Salida por bloques de los endpoints /stream."""
+    chunk_size: int = Field(default=4096, ge=16, le=100_000,
+                            description="Muestras por bloque (adaptativos: ventanas de chunk_size·dt)")
+    format: str = Field(default="ndjson", description="ndjson | binary")
+    checkpoint: Optional[Dict[str, Any]] = Field(
+        default=None, description="Checkpoint de un bloque anterior: reanuda o alarga t_end sin recalcular")
+
+class ODEStreamRequest(ODESimulationRequest, StreamOptions):
+    pass
 
 class SimulationResult(BaseModel):
     t: List[float]
@@ -57,7 +120,7 @@ class BergmanParams(BaseModel):
     Ib: float = Field(default=7.0, description="Insulina basal (µU/mL)")
     n:  float = Field(default=0.142, description="Tasa de degradación de insulina")
 
-class GlucoseSimulationRequest(BaseModel):
+class GlucoseSimulationRequest(SolverOptions):
     t_start: float = 0.0
     t_end:   float = 240.0  # 4 horas en minutos
     dt:      float = 0.5
@@ -71,13 +134,14 @@ class GlucoseSimulationResult(BaseModel):
     X: List[float]
     I: List[float]
     engine: str
+    metadata: dict = {}
 
 class WindkesselParams(BaseModel):
     R:        float = Field(default=1.0,  description="Resistencia periférica (PRU)")
     C:        float = Field(default=1.2,  description="Compliance arterial (mL/mmHg)")
     P_venous: float = Field(default=5.0,  description="Presión venosa central (mmHg)")
 
-class WindkesselRequest(BaseModel):
+class WindkesselRequest(SolverOptions):
     t_start:    float = 0.0
     t_end:      float = 10.0  # segundos
     dt:         float = 0.01
@@ -85,31 +149,182 @@ class WindkesselRequest(BaseModel):
     params:     WindkesselParams = WindkesselParams()
     heart_rate: float = 75.0  # bpm
 
-# ─── Fallbacks Python puro ──────────────────────────────────────────────────────
-
-def _rk4_step(f, t, y, dt):
-    """Paso RK4 estándar en Python puro."""
-    k1 = f(t, y)
-    k2 = f(t + 0.5*dt, [yi + 0.5*dt*ki for yi, ki in zip(y, k1)])
-    k3 = f(t + 0.5*dt, [yi + 0.5*dt*ki for yi, ki in zip(y, k2)])
-    k4 = f(t + dt,     [yi + dt*ki      for yi, ki in zip(y, k3)])
-    return [yi + (dt/6)*(k1i + 2*k2i + 2*k3i + k4i)
-            for yi, k1i, k2i, k3i, k4i in zip(y, k1, k2, k3, k4)]
-
-
-def _solve_python(f, t_start, t_end, y0, dt):
-    """Solver RK4 en Python puro — fallback cuando C++ no está compilado."""
-    import math
-    steps = int(math.ceil((t_end - t_start) / dt))
-    t_vals = [t_start + i * dt for i in range(steps + 1)]
-    y_vals = [list(y0)]
-    y = list(y0)
-    t = t_start
-    for _ in range(steps):
-        y = _rk4_step(f, t, y, dt)
-        t += dt
-        y_vals.append(list(y))
-    return t_vals, y_vals
+# ─── Fallback NumPy ─────────────────────────────────────────────────────────────
+
+def _check_method(method: str):
+    if method not in SOLVER_METHODS:
+        raise HTTPException(status_code=400, detail=f"Método desconocido: '{method}'. Use {list(SOLVER_METHODS)}")
+
+
+def _event_log(opts: SolverOptions, n_states: int, extra=()) -> Optional[EventLog]:
+    """EventLog con los eventos propios del modelo (`extra`) y los umbrales de `opts.events`; None si no hay."""
+    events = list(extra)
+    for spec in opts.events or ():
+        if spec.direction not in EVENT_DIRECTIONS:
+            raise ValueError(f"Dirección de evento desconocida: '{spec.direction}'. Use {list(EVENT_DIRECTIONS)}")
+        if spec.state >= n_states:
+            raise ValueError(f"El evento '{spec.name}' vigila el estado {spec.state}; el sistema tiene {n_states}")
+        events.append(threshold_event(spec.name, spec.state, spec.value,
+                                      EVENT_DIRECTIONS[spec.direction], spec.terminal))
+    return EventLog(events) if events else None
+
+
+def _solve_numpy(f, t_start, t_end, y0, dt, opts: SolverOptions, max_step=None, jac=None,
+                 events: Optional[EventLog] = None, max_steps: int = 200_000):
+    """
+    Integra con NumPy según `opts.method`. Devuelve (t, Y (n, n_states), stats).
+
+    Los métodos adaptativos (RK45, Rosenbrock23, auto) deciden su propio paso
+    y usan su salida densa para t_eval/n_out; con paso fijo esos tiempos se
+    obtienen por interpolación lineal de la malla dt. `jac` es el jacobiano
+    analítico del modelo para Rosenbrock (si falta, diferencias finitas).
+    Con `events` los cruces van a stats["events"]; uno terminal acorta t.
+    `max_steps` acota los pasos de los adaptativos (RuntimeError al superarlo).
+    """
+    every = opts.output_every or 1
+    if opts.method in ADAPTIVE_METHODS:
+        caps = [v for v in (opts.max_step, max_step) if v]
+        sol = solve_ivp(f, t_start, t_end, y0, method=opts.method, rtol=opts.rtol, atol=opts.atol,
+                        t_eval=opts.t_eval, n_out=opts.n_out, jac=jac,
+                        max_step=min(caps) if caps else None, events=events, max_steps=max_steps)
+        idx = thin_indices(len(sol.t), every)
+        stats = sol.stats()
+        if events is not None:
+            stats.update(events.summary())
+        return sol.t[idx], sol.y[idx], stats
+
+    # Solo se guardan las muestras pedidas (cada k pasos o interpoladas en t_out)
+    t_out = output_times(t_start, t_end, opts.t_eval, opts.n_out)
+    t, Y = integrate_fixed(f, t_start, t_end, y0, dt, method=opts.method, output_every=every, t_eval=t_out,
+                           events=events)
+    steps = n_fixed_steps(t_start, t_end, dt)
+    if events is not None and events.terminated:
+        steps = n_fixed_steps(t_start, events.terminated["t"], dt)
+    stats = {"method": opts.method, "n_steps": steps,
+             "n_rhs": steps * (1 if opts.method == "Euler" else 4)}
+    if events is not None:
+        stats.update(events.summary())
+    return t, Y, stats
+
+
+def _numeric_params(params: Dict[str, Any]) -> Dict[str, float]:
+    """Parámetros de un sistema propio: todos numéricos (ValueError si no)."""
+    try:
+        return {k: float(v) for k, v in params.items()}
+    except (TypeError, ValueError):
+        raise ValueError("Los parámetros deben ser numéricos")
+
+
+def _native_columns(res, every: Optional[int] = None):
+    """(t, Y (n_estados, n) contiguo) desde un Result del motor C++, sin listas intermedias."""
+    t = np.asarray(res.t, dtype=float)
+    Y = np.asarray(res.y, dtype=float)
+    if every and every > 1:
+        idx = thin_indices(len(t), every)
+        t, Y = t[idx], Y[idx]
+    return t, np.ascontiguousarray(Y.T)
+
+
+def _serialize(t: np.ndarray, cols: np.ndarray, max_points):
+    """
+    (t, columnas (n_estados, n)) → listas JSON. El LTTB (≤ max_points, picos
+    conservados) indexa los arrays; la conversión a floats se hace una vez.
+    """
+    if max_points and len(t) > max_points:
+        idx = downsample_indices(t, cols, max_points)
+        t, cols = t[idx], cols[:, idx]
+    return t.tolist(), cols.tolist()
+
+
+def _cached_run(model: str, req: BaseModel, run):
+    """
+    `run() → (t, cols, meta)` o la misma corrida desde services/simulation_cache.
+
+    La clave es el modelo más la petición completa salvo max_points (solo
+    afecta al downsampling de la respuesta) y si hay motor C++ (los dos
+    caminos no dan resultados idénticos bit a bit). meta["cache"] = hit | miss.
+    """
+    key = simulation_key(model, {"request": req.model_dump(exclude={"max_points"}),
+                                 "native": HAS_NATIVE_ENGINE})
+    entry = simulation_cache.get(key)
+    if entry is not None:
+        arrays, meta = entry
+        return arrays["t"], arrays["cols"], {**meta, "cache": "hit"}
+    t, cols, meta = run()
+    simulation_cache.put(key, {"t": t, "cols": cols}, meta)
+    return t, cols, {**meta, "cache": "miss"}
+
+
+def _stream_checkpoint(req: StreamOptions, method: str, t_start: float, y0, width: float) -> Checkpoint:
+    """
+    Checkpoint de partida: el de la petición (mismo método, estados, t_start y
+    ancho de malla) o t_start/y0. Con otra malla el índice guardado apuntaría a
+    otro instante y la corrida retrocedería en el tiempo.
+    """
+    if req.format not in STREAM_FORMATS:
+        raise ValueError(f"format debe ser uno de {list(STREAM_FORMATS)}")
+    if req.checkpoint is None:
+        return Checkpoint.start(method, t_start, y0, width)
+    ck = Checkpoint.from_dict(req.checkpoint)
+    if ck.method != method:
+        raise ValueError(f"El checkpoint es de '{ck.method}'; la petición usa '{method}'")
+    if np.shape(ck.y) != np.shape(y0):
+        raise ValueError("El checkpoint no tiene la forma de y0")
+    if ck.origin != float(t_start):
+        raise ValueError(f"El checkpoint empieza en t={ck.origin}; la petición usa t_start={t_start}")
+    ck.check_width(width)
+    return ck
+
+
+async def _stream_response(chunks, fmt: str, head: dict) -> StreamingResponse:
+    """
+    Respuesta por bloques desde un iterador de (t, Y (n, n_estados), checkpoint).
+
+    ndjson: una línea JSON por mensaje ("meta", "chunk" con t, y por estado y
+    checkpoint, "end"). binary: por mensaje, longitud u32 LE + cabecera JSON +
+    float64 LE (t y luego cada estado, n valores cada uno). El primer bloque se
+    calcula antes de responder (los errores de entrada siguen siendo 400); uno
+    posterior llega como mensaje "error". Solo hay un bloque en memoria a la vez.
+    """
+    loop = asyncio.get_running_loop()
+    first = await loop.run_in_executor(None, next, chunks)
+
+    def encode(header: dict, t=None, cols=None):
+        if fmt == "ndjson":
+            if t is not None:
+                header = {**header, "t": t.tolist(), "y": cols.tolist()}
+            return (json.dumps(header) + "\n").encode()
+        payload = b"" if t is None else np.concatenate([t[None], cols]).astype("<f8").tobytes()
+        raw = json.dumps(header).encode()
+        return len(raw).to_bytes(4, "little") + raw + payload
+
+    def frames():
+        tic = time.perf_counter()
+        n_chunks = n_points = 0
+        last = None
+        yield encode({"type": "meta", **head})
+        try:
+            for t, Y, ck in itertools.chain([first], chunks):
+                cols = Y.reshape(len(t), -1).T
+                n_chunks, n_points, last = n_chunks + 1, n_points + len(t), ck
+                yield encode({"type": "chunk", "n": len(t), "n_states": len(cols),
+                              "checkpoint": ck.to_dict()}, t, cols)
+        except Exception as e:
+            # La cabecera HTTP ya salió: el error viaja en el flujo
+            yield encode({"type": "error", "detail": str(e)})
+            return
+        yield encode({"type": "end", "n_chunks": n_chunks, "n_points": n_points,
+                      "checkpoint": last.to_dict(),
+                      "execution_time_ms": round((time.perf_counter() - tic) * 1000, 2)})
+
+    media = "application/x-ndjson" if fmt == "ndjson" else "application/octet-stream"
+    return StreamingResponse(frames(), media_type=media)
+
+
+def _check_streamable(req: SolverOptions):
+    if req.t_eval is not None or req.n_out or req.events:
+        raise HTTPException(status_code=400,
+                            detail="El streaming no admite t_eval, n_out ni events; use output_every")
 
 
 # ─── Endpoints ──────────────────────────────────────────────────────────────────
@@ -121,42 +336,132 @@ async def engine_status():
         "engine_active": HAS_NATIVE_ENGINE,
         "engine_version": getattr(eq, "__version__", "1.0") if HAS_NATIVE_ENGINE else "mock",
         "supported_solvers": ["Euler", "RungeKutta4"],
+        "simulation_cache": simulation_cache.stats(),
+        "realtime_pti": pti_hub.stats(),
     }
 
 
+def _ode_system(req: ODESimulationRequest):
+    """
+    (f, jac, RHS nativo o None, extra) del sistema de `req`: ecuaciones propias
+    compiladas (services/ode_compiler) o modelo con nombre. Comprueba y0.
+    """
+    tic = time.perf_counter()
+    extra = {}
+    if req.equations:
+        params = _numeric_params(req.params)
+        system = ode_compiler.compile_system(req.equations, params)
+        extra = {"states": list(system.states), "system_key": system.key[:16],
+                 "compile_ms": round((time.perf_counter() - tic) * 1000, 3)}
+        n_states = len(system.states)
+        native = system.native(eq, params) if HAS_NATIVE_ENGINE else None
+        f, jac = system.rhs(params), system.jac(params)
+    else:
+        model = "decay" if req.model == "user_defined" else req.model
+        params = bio_models.named_model_params(model, req.params)
+        n_states = bio_models.NAMED_MODEL_STATES[model]
+        native = eq.NativeRHS.named(model, params) if HAS_NATIVE_ENGINE and getattr(eq, "NATIVE_RHS", False) else None
+        f, jac = bio_models.named_model(model, params)
+    if n_states is not None and len(req.y0) != n_states:
+        raise ValueError(f"El sistema tiene {n_states} estados; y0 tiene {len(req.y0)}")
+    return f, jac, native, extra
+
+
 @router.post("/simulate", response_model=SimulationResult)
 async def simulate_ode(req: ODESimulationRequest):
-    """Simulación ODE genérica — Euler o RK4."""
-    def system_func(t, y):
-        return [-v for v in y]  # Decaimiento exponencial simple por defecto
+    """
+    Simulación ODE genérica: sistema propio (`equations`) o modelo con nombre
+    (bio_models.NAMED_MODELS).
 
-    try:
+    Las ecuaciones se compilan una vez por sistema (services/ode_compiler) y
+    se reutilizan desde caché. "user_defined" sin ecuaciones conserva el
+    comportamiento histórico (decaimiento dy/dt = −y). Con motor C++ el RHS es
+    un `NativeRHS`: el bucle del integrador no vuelve a Python en ningún paso.
+    """
+    _check_method(req.method)
+
+    def run():
+        f, jac, native, extra = _ode_system(req)
         tic = time.perf_counter()
 
-        if HAS_NATIVE_ENGINE:
-            method_enum = eq.ODESolver.Method.RungeKutta4
-            if req.method == "Euler":
-                method_enum = eq.ODESolver.Method.Euler
-            res = eq.ODESolver.solve(system_func, [req.t_start, req.t_end],
-                                     req.y0, req.dt, method=method_enum)
-            t_list = list(res.t)
-            y_list = [list(row) for row in res.y]
-            engine = "cpp"
+        # El motor C++ no tiene integradores rígidos ni eventos: Rosenbrock/auto
+        # y las peticiones con `events` van por NumPy. Su paso fijo tampoco
+        # muestrea en t_eval/n_out: esa rejilla solo la da _solve_numpy
+        fixed_grid = req.method == "RK45" or (req.t_eval is None and req.n_out is None)
+        if native is not None and req.method in NATIVE_METHODS and not req.events and fixed_grid:
+            rhs = native
+            if req.method == "RK45":
+                opts = eq.ODESolver.AdaptiveOptions()
+                opts.rtol, opts.atol = req.rtol, req.atol
+                if req.max_step:
+                    opts.max_step = req.max_step
+                t_eval = req.t_eval if req.t_eval is not None else (
+                    np.linspace(req.t_start, req.t_end, req.n_out).tolist() if req.n_out else [])
+                res = eq.ODESolver.solve_adaptive(rhs, [req.t_start, req.t_end], req.y0, t_eval, opts)
+                stats = {"method": req.method, "n_steps": res.stats.n_steps,
+                         "n_rejected": res.stats.n_rejected, "n_rhs": res.stats.n_rhs}
+            else:
+                method_enum = eq.ODESolver.Method.RungeKutta4
+                if req.method == "Euler":
+                    method_enum = eq.ODESolver.Method.Euler
+                res = eq.ODESolver.solve(rhs, [req.t_start, req.t_end], req.y0, req.dt, method=method_enum)
+                stats = {"method": req.method, "n_steps": len(res.t) - 1}
+            t_arr, cols = _native_columns(res, req.output_every)
+            engine, rhs_kind = "cpp", "native"
         else:
-            t_list, y_vals = _solve_python(system_func, req.t_start, req.t_end, req.y0, req.dt)
-            # Transponer: y[estado][tiempo] → y[tiempo][estado]
-            n_states = len(req.y0)
-            y_list = [[row[s] for row in y_vals] for s in range(n_states)]
-            engine = "python_mock"
+            t_arr, Y, stats = _solve_numpy(f, req.t_start, req.t_end, req.y0, req.dt, req, jac=jac,
+                                           events=_event_log(req, len(req.y0)))
+            cols = Y.T
+            engine, rhs_kind = "python_numpy", "python"
+
+        solve_ms = (time.perf_counter() - tic) * 1000
+        # Coste por paso: lo que el RHS nativo debe bajar frente al callback Python
+        stats.update(rhs=rhs_kind, us_per_step=round(1000 * solve_ms / max(stats["n_steps"], 1), 3), **extra)
+        return t_arr, cols, {"engine": engine, **stats}
 
+    try:
+        tic = time.perf_counter()
+        t_arr, cols, meta = _cached_run("ode", req, run)
         elapsed_ms = (time.perf_counter() - tic) * 1000
+        t_list, y_list = _serialize(t_arr, cols, req.max_points)
 
         return SimulationResult(
             t=t_list,
             y=y_list,
             model=req.model,
-            metadata={"engine": engine, "execution_time_ms": round(elapsed_ms, 2)},
+            metadata={"execution_time_ms": round(elapsed_ms, 2), **meta},
         )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Simulation error: {e}")
+
+
+@router.post("/simulate/stream")
+async def simulate_ode_stream(req: ODEStreamRequest):
+    """
+    /simulate por bloques, en NumPy y sin caché: la memoria no depende de
+    t_end. Cada bloque trae su checkpoint; reenviarlo con el mismo sistema
+    (y otro t_end si se quiere alargar) continúa la corrida exactamente donde
+    quedó. Al reanudar no se repite el punto del checkpoint.
+    """
+    _check_method(req.method)
+    _check_streamable(req)
+    try:
+        f, jac, _, extra = _ode_system(req)
+        ck = _stream_checkpoint(req, req.method, req.t_start, req.y0,
+                                chunk_width(req.method, req.dt, req.chunk_size))
+        chunks = iter_chunks(f, req.t_end, ck, req.dt, req.chunk_size, req.output_every or 1,
+                             include_start=req.checkpoint is None, rtol=req.rtol, atol=req.atol, jac=jac,
+                             max_step=req.max_step)
+        head = {"model": req.model, "method": req.method, "n_states": len(req.y0), **extra}
+        return await _stream_response(chunks, req.format, head)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Simulation error: {e}")
 
@@ -172,21 +477,17 @@ async def simulate_glucose(req: GlucoseSimulationRequest):
         y[2] = I  — Insulina plasmática (µU/mL)
     """
     p = req.params
+    # Ecuaciones del Minimal Model de Bergman
+    bergman = bio_models.bergman_rhs(p.p1, p.p2, p.p3, p.Gb, p.Ib, p.n)
+    _check_method(req.method)
 
-    def bergman(t, y):
-        G, X, I = y[0], y[1], y[2]
-        # Ecuaciones del Minimal Model de Bergman
-        dG = -(p.p1 + X) * G + p.p1 * p.Gb
-        dX = -p.p2 * X + p.p3 * (I - p.Ib)
-        dI = -p.n * (I - p.Ib)
-        return [dG, dX, dI]
+    def run():
+        stats = {"method": "RungeKutta4"}
 
-    try:
-        time.perf_counter()
-
-        if HAS_NATIVE_ENGINE:
+        # El motor C++ solo integra con RK4 de paso fijo y sin eventos
+        if HAS_NATIVE_ENGINE and req.method == "RungeKutta4" and req.t_eval is None and req.n_out is None \
+                and not req.events:
             # Llamar al modelo C++ nativo (BioODESolver::simulate_glucose_insulin)
-            import numpy as np
             y0_np = np.array(req.y0)
             bp = eq.BergmanParams()
             bp.p1 = p.p1
@@ -198,22 +499,31 @@ async def simulate_glucose(req: GlucoseSimulationRequest):
             res = eq.BioODESolver.simulate_glucose_insulin(
                 req.t_start, req.t_end, req.dt, y0_np, bp
             )
-            t_list = list(res.t)
-            G_list = [row[0] for row in res.y]
-            X_list = [row[1] for row in res.y]
-            I_list = [row[2] for row in res.y]
+            t_arr, cols = _native_columns(res, req.output_every)
             engine = "cpp"
         else:
-            # Fallback Python puro
-            t_list, y_vals = _solve_python(bergman, req.t_start, req.t_end, req.y0, req.dt)
-            G_list = [row[0] for row in y_vals]
-            X_list = [row[1] for row in y_vals]
-            I_list = [row[2] for row in y_vals]
-            engine = "python_mock"
+            # Fallback NumPy
+            t_arr, Y, stats = _solve_numpy(bergman, req.t_start, req.t_end, req.y0, req.dt, req,
+                                           jac=bio_models.bergman_jac(p.p1, p.p2, p.p3, p.Gb, p.Ib, p.n),
+                                           events=_event_log(req, 3))
+            cols = Y.T
+            engine = "python_numpy"
 
+        return t_arr, cols, {"engine": engine, **stats}
+
+    try:
+        tic = time.perf_counter()
+        t_arr, cols, meta = _cached_run("glucose", req, run)
+        elapsed_ms = (time.perf_counter() - tic) * 1000
+        t_list, (G_list, X_list, I_list) = _serialize(t_arr, cols, req.max_points)
         return GlucoseSimulationResult(
-            t=t_list, G=G_list, X=X_list, I=I_list, engine=engine
+            t=t_list, G=G_list, X=X_list, I=I_list, engine=meta["engine"],
+            metadata={"execution_time_ms": round(elapsed_ms, 2), **meta},
         )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Glucose simulation error: {e}")
 
@@ -226,28 +536,17 @@ async def simulate_windkessel(req: WindkesselRequest):
     Ecuación: C·dP/dt = Q(t) - (P - P_venous)/R
     Variable de estado: y[0] = P (mmHg)
     """
-    import math
     p = req.params
-    cycle = 60.0 / req.heart_rate  # duración del ciclo en segundos
+    windkessel = bio_models.windkessel_rhs(p.R, p.C, p.P_venous, req.heart_rate)
+    _check_method(req.method)
+    # El flujo es nulo en diástole: sin tope, RK45 podría saltarse una sístole entera
+    systole = 0.3 * math.sqrt(60.0 / req.heart_rate)
 
-    def get_flow(t: float) -> float:
-        local_t = math.fmod(t, cycle)
-        systole = 0.3 * math.sqrt(cycle)
-        if local_t < systole:
-            return math.sin(math.pi * local_t / systole) * 500.0
-        return 0.0
+    def run():
+        stats = {"method": "RungeKutta4"}
 
-    def windkessel(t, y):
-        P = y[0]
-        Q = get_flow(t)
-        dP = (Q - (P - p.P_venous) / p.R) / p.C
-        return [dP]
-
-    try:
-        tic = time.perf_counter()
-
-        if HAS_NATIVE_ENGINE:
-            import numpy as np
+        if HAS_NATIVE_ENGINE and req.method == "RungeKutta4" and req.t_eval is None and req.n_out is None \
+                and not req.events:
             y0_np = np.array(req.y0)
             wp = eq.WindkesselParams()
             wp.R = p.R
@@ -256,19 +555,30 @@ async def simulate_windkessel(req: WindkesselRequest):
             res = eq.BioODESolver.simulate_windkessel(
                 req.t_start, req.t_end, req.dt, y0_np, wp, req.heart_rate
             )
-            t_list = list(res.t)
-            y_list = [[row[0] for row in res.y]]
+            t_arr, cols = _native_columns(res, req.output_every)
             engine = "cpp"
         else:
-            t_list, y_vals = _solve_python(windkessel, req.t_start, req.t_end, req.y0, req.dt)
-            y_list = [[row[0] for row in y_vals]]
-            engine = "python_mock"
+            t_arr, Y, stats = _solve_numpy(windkessel, req.t_start, req.t_end, req.y0, req.dt, req,
+                                           max_step=systole / 4, jac=bio_models.windkessel_jac(p.R, p.C),
+                                           events=_event_log(req, 1))
+            cols = Y.T
+            engine = "python_numpy"
+
+        return t_arr, cols, {"engine": engine, **stats}
 
+    try:
+        tic = time.perf_counter()
+        t_arr, cols, meta = _cached_run("windkessel", req, run)
         elapsed_ms = (time.perf_counter() - tic) * 1000
+        t_list, y_list = _serialize(t_arr, cols, req.max_points)
         return SimulationResult(
             t=t_list, y=y_list, model="windkessel",
-            metadata={"engine": engine, "execution_time_ms": round(elapsed_ms, 2)},
+            metadata={"execution_time_ms": round(elapsed_ms, 2), **meta},
         )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Windkessel simulation error: {e}")
 
@@ -285,7 +595,7 @@ class HHParams(BaseModel):
     E_L:  float = Field(default=-54.4,  description="Potencial de fuga (mV)")
     I_ext: float = Field(default=10.0,  description="Corriente externa aplicada (µA/cm²)")
 
-class NeuronSimulationRequest(BaseModel):
+class NeuronSimulationRequest(SolverOptions):
     t_start: float = 0.0
     t_end:   float = 100.0   # ms
     dt:      float = 0.025   # ms (paso HH recomendado)
@@ -294,6 +604,13 @@ class NeuronSimulationRequest(BaseModel):
         description="[V (mV), m, h, n] — valores de reposo de Squid Giant Axon"
     )
     params: HHParams = HHParams()
+    spike_threshold: float = Field(default=0.0, description="Umbral de V (mV) que cuenta un potencial de acción")
+
+
+def _upward_crossings(t: np.ndarray, v: np.ndarray, level: float) -> List[float]:
+    """Cruces ascendentes de `level` interpolados linealmente en la malla (salida del motor C++)."""
+    k = np.flatnonzero((v[:-1] < level) & (v[1:] >= level))
+    return (t[k] + (level - v[k]) * (t[k + 1] - t[k]) / (v[k + 1] - v[k])).tolist()
 
 
 @router.post("/bio/neuron", response_model=SimulationResult)
@@ -306,32 +623,20 @@ async def simulate_neuron(req: NeuronSimulationRequest):
         y[1] = m   — Variable de activación Na⁺
         y[2] = h   — Variable de inactivación Na⁺
         y[3] = n   — Variable de activación K⁺
+
+    Los potenciales de acción se detectan durante la integración (cruce
+    ascendente de `spike_threshold`): metadata.spike_times y firing_rate_hz.
     """
     p = req.params
+    hodgkin_huxley = bio_models.hodgkin_huxley_rhs(p.C_m, p.g_Na, p.g_K, p.g_L,
+                                                   p.E_Na, p.E_K, p.E_L, p.I_ext)
+    _check_method(req.method)
 
-    def alpha_m(V): return 0.1 * (V + 40) / (1 - (1e-7 + math.exp(-(V + 40) / 10))) if abs(V + 40) > 1e-4 else 1.0
-    def beta_m(V):  return 4.0 * math.exp(-(V + 65) / 18)
-    def alpha_h(V): return 0.07 * math.exp(-(V + 65) / 20)
-    def beta_h(V):  return 1.0 / (1 + math.exp(-(V + 35) / 10))
-    def alpha_n(V): return 0.01 * (V + 55) / (1 - (1e-7 + math.exp(-(V + 55) / 10))) if abs(V + 55) > 1e-4 else 0.1
-    def beta_n(V):  return 0.125 * math.exp(-(V + 65) / 80)
-
-    def hodgkin_huxley(t, y):
-        V, m, h, n = y[0], y[1], y[2], y[3]
-        I_Na = p.g_Na * m**3 * h * (V - p.E_Na)
-        I_K  = p.g_K  * n**4     * (V - p.E_K)
-        I_L  = p.g_L             * (V - p.E_L)
-        dV = (p.I_ext - I_Na - I_K - I_L) / p.C_m
-        dm = alpha_m(V) * (1 - m) - beta_m(V) * m
-        dh = alpha_h(V) * (1 - h) - beta_h(V) * h
-        dn = alpha_n(V) * (1 - n) - beta_n(V) * n
-        return [dV, dm, dh, dn]
-
-    try:
-        tic = time.perf_counter()
+    def run():
+        stats = {"method": "RungeKutta4"}
 
-        if HAS_NATIVE_ENGINE:
-            import numpy as np
+        if HAS_NATIVE_ENGINE and req.method == "RungeKutta4" and req.t_eval is None and req.n_out is None \
+                and not req.events:
             y0_np = np.array(req.y0)
             hhp = eq.HHParams()
             hhp.C_m = p.C_m; hhp.g_Na = p.g_Na; hhp.g_K = p.g_K; hhp.g_L = p.g_L
@@ -339,19 +644,38 @@ async def simulate_neuron(req: NeuronSimulationRequest):
             res = eq.BioODESolver.simulate_hodgkin_huxley(
                 req.t_start, req.t_end, req.dt, y0_np, hhp
             )
-            t_list = list(res.t)
-            y_list = [[row[i] for row in res.y] for i in range(4)]
+            t_arr, cols = _native_columns(res, req.output_every)
             engine = "cpp"
+            spikes, t_stop = _upward_crossings(t_arr, cols[0], req.spike_threshold), req.t_end
         else:
-            t_list, y_vals = _solve_python(hodgkin_huxley, req.t_start, req.t_end, req.y0, req.dt)
-            y_list = [[row[i] for row in y_vals] for i in range(4)]
-            engine = "python_mock"
+            spike = threshold_event("spike", 0, req.spike_threshold, direction=1)
+            log = _event_log(req, 4, extra=[spike])
+            t_arr, Y, stats = _solve_numpy(hodgkin_huxley, req.t_start, req.t_end, req.y0, req.dt, req,
+                                           events=log)
+            cols = Y.T
+            engine = "python_numpy"
+            spikes = [r["t"] for r in log.records if r["name"] == "spike"]
+            stats["events"] = [r for r in log.records if r["name"] != "spike"]
+            t_stop = log.terminated["t"] if log.terminated else req.t_end
+
+        duration_s = (t_stop - req.t_start) / 1000.0        # t en ms
+        stats.update(spike_times=spikes, n_spikes=len(spikes),
+                     firing_rate_hz=len(spikes) / duration_s if duration_s > 0 else 0.0)
+        return t_arr, cols, {"engine": engine, **stats}
 
+    try:
+        tic = time.perf_counter()
+        t_arr, cols, meta = _cached_run("neuron", req, run)
         elapsed_ms = (time.perf_counter() - tic) * 1000
+        t_list, y_list = _serialize(t_arr, cols, req.max_points)
         return SimulationResult(
             t=t_list, y=y_list, model="hodgkin_huxley",
-            metadata={"engine": engine, "execution_time_ms": round(elapsed_ms, 2)},
+            metadata={"execution_time_ms": round(elapsed_ms, 2), **meta},
         )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Hodgkin-Huxley simulation error: {e}")
 
@@ -359,11 +683,12 @@ async def simulate_neuron(req: NeuronSimulationRequest):
 # ─── ECG Fisiológico (derivado de HH cardíaco) ──────────────────────────────────
 
 class ECGRequest(BaseModel):
-    bpm: float = Field(default=72.0, description="Heart rate (beats per minute)")
-    duration_s: float = Field(default=5.0, description="Duration in seconds")
-    sample_rate: int = Field(default=500, description="Samples per second")
-    noise_level: float = Field(default=0.02, description="Gaussian noise amplitude")
+    bpm: float = Field(default=72.0, ge=20, le=300, description="Heart rate (beats per minute)")
+    duration_s: float = Field(default=5.0, gt=0, description="Duration in seconds")
+    sample_rate: int = Field(default=500, ge=50, le=5000, description="Samples per second")
+    noise_level: float = Field(default=0.02, ge=0, description="Gaussian noise amplitude")
     lead: str = Field(default="II", description="ECG lead (II, V1, aVR)")
+    max_points: Optional[int] = Field(default=None, ge=3, description="Máximo de puntos devueltos (downsampling LTTB)")
 
 @router.post("/bio/ecg")
 async def generate_ecg(req: ECGRequest):
@@ -372,94 +697,27 @@ async def generate_ecg(req: ECGRequest):
     
     Usa un modelo simplificado de potencial de acción cardíaco (nodo SA → aurículas →
     nodo AV → haz de His → Purkinje → ventrículos) para generar ondas P-QRS-T
-    con parámetros fisiológicamente correctos.
+    con parámetros fisiológicamente correctos. La señal se arma indexando la
+    plantilla de latido cacheada (services/ecg), sin bucle por muestra.
     
     Returns: { t: float[], ecg: float[], bpm: float, intervals: {} }
     """
-    import numpy as np
-    
-    period = 60.0 / req.bpm  # seconds per beat
-    n_samples = int(req.duration_s * req.sample_rate)
-    t = np.linspace(0, req.duration_s, n_samples)
-    ecg = np.zeros(n_samples)
-    
-    # Physiological intervals (in fraction of cardiac cycle)
-    # Based on standard ECG morphology at 72 bpm
-    bpm_factor = 72.0 / req.bpm  # Adjust intervals for heart rate
-    
-    for i, ti in enumerate(t):
-        phase = (ti % period) / period
-        v = 0.0
-        
-        # ─── P wave (atrial depolarization) ───
-        # SA node fires → atrial muscle depolarizes
-        p_start, p_end = 0.0, 0.09 * bpm_factor
-        if p_start <= phase < min(p_end, 1.0):
-            p_phase = (phase - p_start) / (p_end - p_start)
-            v = 0.12 * np.sin(np.pi * p_phase)
-        
-        # ─── PR segment (AV node delay) ───
-        elif phase < 0.16 * bpm_factor:
-            v = 0.005  # Isoelectric with tiny offset
-        
-        # ─── Q wave (septal depolarization) ───
-        q_start = 0.16 * bpm_factor
-        q_end = 0.19 * bpm_factor
-        if q_start <= phase < q_end:
-            q_phase = (phase - q_start) / (q_end - q_start)
-            v = -0.07 * np.sin(np.pi * q_phase)
-        
-        # ─── R wave (ventricular depolarization — massive) ───
-        r_start = 0.19 * bpm_factor
-        r_end = 0.25 * bpm_factor
-        if r_start <= phase < r_end:
-            r_phase = (phase - r_start) / (r_end - r_start)
-            v = 1.2 * np.sin(np.pi * r_phase)
-        
-        # ─── S wave (late ventricular depolarization) ───
-        s_start = 0.25 * bpm_factor
-        s_end = 0.30 * bpm_factor
-        if s_start <= phase < s_end:
-            s_phase = (phase - s_start) / (s_end - s_start)
-            v = -0.12 * np.sin(np.pi * s_phase)
-        
-        # ─── ST segment (plateau — all ventricle depolarized) ───
-        elif phase < 0.38 * bpm_factor:
-            v = 0.01  # Isoelectric
-        
-        # ─── T wave (ventricular repolarization) ───
-        t_start = 0.38 * bpm_factor
-        t_end = 0.62 * bpm_factor
-        if t_start <= phase < t_end:
-            t_phase = (phase - t_start) / (t_end - t_start)
-            v = 0.28 * np.sin(np.pi * t_phase)
-        
-        # ─── TP segment (diastole — resting) ───
-        elif phase >= t_end:
-            v = 0.0
-        
-        ecg[i] = v
-    
-    # Add physiological noise
-    if req.noise_level > 0:
-        ecg += np.random.normal(0, req.noise_level, n_samples)
-    
-    # Calculate intervals (ms)
-    pr_interval = (0.16 * bpm_factor) * period * 1000
-    qrs_duration = (0.30 - 0.16) * bpm_factor * period * 1000
-    qt_interval = (0.62 - 0.16) * bpm_factor * period * 1000
+    try:
+        n_samples = int(req.duration_s * req.sample_rate)
+        t = np.arange(n_samples) / req.sample_rate
+        ecg = ecg_model.synthesize(req.bpm, req.sample_rate, 0, n_samples, req.lead, req.noise_level)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if req.max_points and n_samples > req.max_points:
+        t, ecg = downsample(t, ecg, req.max_points)
     
     return {
         "t": t.tolist(),
         "ecg": ecg.tolist(),
         "bpm": req.bpm,
         "sample_rate": req.sample_rate,
-        "intervals": {
-            "PR_ms": round(pr_interval, 1),
-            "QRS_ms": round(qrs_duration, 1),
-            "QT_ms": round(qt_interval, 1),
-            "RR_ms": round(period * 1000, 1),
-        },
+        "intervals": ecg_model.ecg_intervals(req.bpm),
         "metadata": {
             "lead": req.lead,
             "engine": "physiological_hh_derived",
@@ -475,8 +733,10 @@ class PKParams(BaseModel):
     ke:  float = Field(default=0.15,   description="Tasa de eliminación (1/h)")
     Vd:  float = Field(default=10.0,   description="Volumen de distribución (L)")
     F:   float = Field(default=1.0,    description="Biodisponibilidad oral (0–1)")
+    Vmax: Optional[float] = Field(default=None, description="Eliminación saturable: velocidad máxima (mg/L/h); sustituye a ke")
+    Km:   Optional[float] = Field(default=None, description="Eliminación saturable: constante de Michaelis (mg/L)")
 
-class PKSimulationRequest(BaseModel):
+class PKSimulationRequest(SolverOptions):
     t_start:    float = 0.0
     t_end:      float = 24.0   # horas
     dt:         float = 0.05
@@ -485,6 +745,164 @@ class PKSimulationRequest(BaseModel):
     regimen:    str = "single"  # "single" | "multiple"
     interval_h: float = 8.0    # horas entre dosis (si regimen="multiple")
     n_doses:    int = 3
+    engine:     str = "auto"   # "auto" | "analytic" | "numeric"
+
+PK_ENGINES = ("auto", "analytic", "numeric")
+
+class PKStreamRequest(PKSimulationRequest, StreamOptions):
+    pass
+
+def _pk_dose_times(req: PKSimulationRequest) -> List[float]:
+    """Tiempos de dosis: t_start y, en régimen múltiple, cada interval_h."""
+    dose_times: List[float] = [req.t_start]
+    if req.regimen == "multiple":
+        for i in range(1, req.n_doses):
+            dose_times.append(req.t_start + i * req.interval_h)
+    return dose_times
+
+
+def _pk_nonlinear_model(p: PKParams, cols: Optional[Dict[str, Any]] = None):
+    """(rhs, jac) Michaelis-Menten si hay Vmax; None si la eliminación es lineal."""
+    if p.Vmax is None and p.Km is None:
+        return None
+    if p.Vmax is None or p.Km is None:
+        raise ValueError("La eliminación saturable necesita Vmax y Km")
+    v = cols or p.model_dump()
+    args = (v["ka"], v["Vmax"], v["Km"], v["Vd"])
+    return bio_models.pk_mm_rhs(*args), bio_models.pk_mm_jac(*args)
+
+
+def _pk_engine(req: PKSimulationRequest, nonlinear) -> str:
+    """'analytic' (superposición cerrada) o 'numeric' (integración por tramos)."""
+    if req.engine not in PK_ENGINES:
+        raise ValueError(f"engine debe ser uno de {list(PK_ENGINES)}")
+    if nonlinear is not None:
+        if req.engine == "analytic":
+            raise ValueError("La eliminación saturable (Vmax/Km) no tiene solución cerrada; use engine='numeric'")
+        return "numeric"
+    if req.events:
+        # Los cruces se buscan durante la integración
+        if req.engine == "analytic":
+            raise ValueError("Los eventos necesitan engine='numeric'")
+        return "numeric"
+    return "numeric" if req.engine == "numeric" else "analytic"
+
+
+def _pk_grid(req: PKSimulationRequest) -> np.ndarray:
+    """
+    Tiempos de salida del motor analítico: t_eval/n_out si se piden; si no, la
+    misma malla que la integración de paso fijo (pasos de dt reiniciados en cada
+    dosis, uno de cada output_every por tramo, más t_end).
+    """
+    t_out = output_times(req.t_start, req.t_end, req.t_eval, req.n_out)
+    if t_out is not None:
+        return t_out
+    sorted_doses = sorted(_pk_dose_times(req))
+    bounds = [req.t_start] + [d for d in sorted_doses[1:] if d < req.t_end] + [req.t_end]
+    every = req.output_every or 1
+    parts = []
+    for t0, t1 in zip(bounds[:-1], bounds[1:]):
+        steps = n_fixed_steps(t0, t1, req.dt)
+        parts.append(t0 + req.dt * np.arange(0, steps, every, dtype=float))
+    parts.append(np.array([req.t_end]))
+    return np.concatenate(parts)
+
+
+def _analytic_pk(dose0, ka, ke, Vd, req: PKSimulationRequest):
+    """Como `_integrate_pk`, pero exacto: (t, Y (n, *forma_estado), stats)."""
+    n_fixed_steps(req.t_start, req.t_end, req.dt)   # mismas validaciones de dt y del intervalo
+    t_arr = _pk_grid(req)
+    dose_times = sorted(_pk_dose_times(req))
+    Y = pk_analytic.pk_multidose(t_arr, dose_times, dose0, ka, ke, Vd)
+    return t_arr, Y, {"method": "analytic", "n_doses": len(dose_times)}
+
+
+def _integrate_pk(pk_odes, pk_jac, dose0, req: PKSimulationRequest, events: Optional[EventLog] = None,
+                  max_steps: int = 200_000):
+    """
+    Integra PK por tramos entre dosis. `dose0` escalar o (batch,) — en un
+    barrido cada escenario recibe su propia dosis en los mismos instantes.
+    `events` se comparte entre tramos; uno terminal corta la simulación.
+    Una dosis en t_end se aplica al estado final (continuo por la derecha,
+    como el motor analítico). `max_steps` es el total de pasos adaptativos
+    entre todos los tramos. Devuelve (t, Y (n, *forma_estado), stats).
+    """
+    adaptive = req.method in ADAPTIVE_METHODS
+    t_out = output_times(req.t_start, req.t_end, req.t_eval, req.n_out)
+    y_cur = np.stack(np.broadcast_arrays(np.asarray(dose0, dtype=float), 0.0), axis=-1).copy()
+    # Simulamos en tramos entre dosis (un mismo integrador y sus buffers)
+    integrator = None if adaptive else FixedStepIntegrator(pk_odes, y_cur.shape, req.method)
+    t_parts: List[np.ndarray] = []
+    y_parts: List[np.ndarray] = []
+    t_cur = req.t_start
+    stats = {"method": req.method, "n_steps": 0, "n_rhs": 0}
+    if adaptive:
+        stats["n_rejected"] = 0
+
+    sorted_doses = sorted(_pk_dose_times(req))
+    segments = [d for d in sorted_doses[1:] if d < req.t_end] + [req.t_end]
+
+    every = req.output_every or 1
+    stopped = False
+    for seg_end in segments:
+        # Salida por tramo: [t_cur, seg_end), el último cerrado
+        seg_eval = None
+        if t_out is not None:
+            last = seg_end == req.t_end
+            seg_eval = t_out[(t_out >= t_cur) & ((t_out <= seg_end) if last else (t_out < seg_end))]
+        if adaptive:
+            sol = solve_ivp(pk_odes, t_cur, seg_end, y_cur, method=req.method, rtol=req.rtol,
+                            atol=req.atol, t_eval=seg_eval, jac=pk_jac, max_step=req.max_step,
+                            events=events, max_steps=max(max_steps - stats["n_steps"] - stats["n_rejected"], 1))
+            stopped = events is not None and events.terminated is not None
+            for key in ("n_steps", "n_rhs", "n_rejected"):
+                stats[key] += getattr(sol, key)
+            if sol.extra.get("switched"):
+                stats.setdefault("stiff_at", sol.extra["stiff_at"])
+            # Al parar, el punto del evento cierra la salida
+            keep = len(sol.t) if t_out is not None or stopped else len(sol.t) - 1
+            if stopped:
+                idx = thin_indices(keep, every) if keep else np.arange(0)
+            else:
+                idx = thin_indices(keep, every)[:-1] if every > 1 and keep else np.arange(keep)
+            t_parts.append(sol.t[idx])
+            y_parts.append(sol.y[idx])
+            y_cur = sol.y_end.copy()
+        else:
+            if seg_eval is not None:
+                # seg_end se añade solo para continuar desde el estado final del tramo
+                t_seg, y_seg = integrator.integrate(t_cur, seg_end, y_cur, req.dt,
+                                                    t_eval=np.append(seg_eval, seg_end), events=events)
+            else:
+                t_seg, y_seg = integrator.integrate(t_cur, seg_end, y_cur, req.dt, output_every=every,
+                                                    events=events)
+            stopped = events is not None and events.terminated is not None
+            stats["n_steps"] += n_fixed_steps(t_cur, events.terminated["t"] if stopped else seg_end, req.dt)
+            cut = None if stopped else -1
+            t_parts.append(t_seg[:cut])
+            y_parts.append(y_seg[:cut])
+            y_cur = y_seg[-1].copy()
+        if stopped:
+            break
+        # Añadir dosis si corresponde
+        if seg_end in sorted_doses[1:]:
+            y_cur[..., 0] += dose0
+        t_cur = seg_end
+
+    if t_out is None and not stopped:
+        t_parts.append(np.array([req.t_end]))
+        y_parts.append(y_cur[None])
+
+    t_arr = np.concatenate(t_parts)
+    Y = np.concatenate(y_parts)
+    if not stopped and len(t_arr) and t_arr[-1] == req.t_end:
+        # La salida en t_end se tomó antes de la dosis de ese instante (si la hay)
+        Y[-1] = y_cur
+    if not adaptive:
+        stats["n_rhs"] = stats["n_steps"] * (1 if req.method == "Euler" else 4)
+    if events is not None:
+        stats.update(events.summary())
+    return t_arr, Y, stats
 
 
 @router.post("/bio/pharmacokinetics", response_model=SimulationResult)
@@ -498,50 +916,58 @@ async def simulate_pk(req: PKSimulationRequest):
     """
     p = req.params
     dose0 = req.dose_mg * p.F  # Dosis accesible sistémicamente
+    _check_method(req.method)
 
-    # Calcular tiempos de dosis adicionales para régimen múltiple
-    dose_times: List[float] = [req.t_start]
-    if req.regimen == "multiple":
-        for i in range(1, req.n_doses):
-            dose_times.append(req.t_start + i * req.interval_h)
-
-    def pk_odes(t, y):
-        A_gut, C_plasma = y[0], y[1]
-        dA_gut    = -p.ka * A_gut
-        dC_plasma = (p.ka * A_gut) / p.Vd - p.ke * C_plasma
-        return [dA_gut, dC_plasma]
+    def run():
+        nonlinear = _pk_nonlinear_model(p)
+        if _pk_engine(req, nonlinear) == "analytic":
+            t_arr, Y, stats = _analytic_pk(dose0, p.ka, p.ke, p.Vd, req)
+            return t_arr, Y.T, {"engine": "analytic", **stats}
+        f, jac = nonlinear or (bio_models.pk_rhs(p.ka, p.ke, p.Vd), bio_models.pk_jac(p.ka, p.ke, p.Vd))
+        t_arr, Y, stats = _integrate_pk(f, jac, dose0, req, events=_event_log(req, 2))
+        return t_arr, Y.T, {"engine": "python_numpy", **stats}
 
     try:
         tic = time.perf_counter()
-        # Simulamos en tramos entre dosis
-        t_full: List[float] = []
-        y_full: List[List[float]] = []
-        y_cur = [dose0, 0.0]
-        t_cur = req.t_start
-
-        sorted_doses = sorted(dose_times)
-        segments = sorted_doses[1:] + [req.t_end]
-
-        for seg_end in segments:
-            t_seg, y_seg = _solve_python(pk_odes, t_cur, seg_end, y_cur, req.dt)
-            t_full.extend(t_seg[:-1])
-            y_full.extend(y_seg[:-1])
-            # Añadir dosis si corresponde
-            if seg_end in sorted_doses[1:]:
-                y_cur = [y_seg[-1][0] + dose0, y_seg[-1][1]]
-            else:
-                y_cur = list(y_seg[-1])
-            t_cur = seg_end
-
-        t_full.append(req.t_end)
-        y_full.append(y_cur)
-
-        y_list = [[row[0] for row in y_full], [row[1] for row in y_full]]
+        t_arr, cols, meta = _cached_run("pk", req, run)
         elapsed_ms = (time.perf_counter() - tic) * 1000
+        t_full, y_list = _serialize(t_arr, cols, req.max_points)
         return SimulationResult(
             t=t_full, y=y_list, model="compartment_pk",
-            metadata={"engine": "python_mock", "execution_time_ms": round(elapsed_ms, 2)},
+            metadata={"execution_time_ms": round(elapsed_ms, 2), **meta},
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"PK simulation error: {e}")
+
+
+@router.post("/bio/pharmacokinetics/stream")
+async def simulate_pk_stream(req: PKStreamRequest):
+    """
+    PK por bloques con la solución cerrada: años de dosificación en memoria
+    constante. Malla uniforme t_start + k·dt·output_every (más t_end); solo
+    eliminación lineal. Checkpoints y reanudación como en /simulate/stream.
+    """
+    p = req.params
+    dose0 = req.dose_mg * p.F
+    _check_streamable(req)
+    try:
+        if _pk_engine(req, _pk_nonlinear_model(p)) != "analytic":
+            raise ValueError("El streaming de PK usa la solución cerrada: solo eliminación lineal y engine auto/analytic")
+        n_fixed_steps(req.t_start, req.t_end, req.dt)   # mismas validaciones de dt y del intervalo
+        dose_times = sorted(_pk_dose_times(req))
+        width = req.dt * (req.output_every or 1)
+        ck = _stream_checkpoint(req, "analytic", req.t_start, [dose0, 0.0], width)
+        chunks = pk_analytic.iter_pk_multidose(req.t_end, ck, width, dose_times,
+                                               dose0, p.ka, p.ke, p.Vd, req.chunk_size,
+                                               include_start=req.checkpoint is None)
+        head = {"model": "compartment_pk", "method": "analytic", "n_states": 2, "n_doses": len(dose_times)}
+        return await _stream_response(chunks, req.format, head)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PK simulation error: {e}")
 # ─── Servicios de Explicación (Séptima Pro) ──────────────────────────────────────
@@ -561,6 +987,9 @@ class PTISimulationRequest(BaseModel):
     y0: List[float] = Field(default=[150000.0, 1.0], description="[Plaquetas, Anticuerpos]")
     params: Dict[str, Any] = {}
     mode: str = "student" # student | family | research
+    max_points: Optional[int] = Field(default=None, ge=3, description="Máximo de puntos devueltos (downsampling LTTB)")
+    seed: Optional[int] = Field(default=None, ge=0, description="Semilla: reproduce la corrida bit a bit y permite cachearla")
+    stop_on_death: bool = Field(default=False, description="Detener la simulación al fallecer (hemorragia, trombosis o P < 10)")
 
 class PTIResponse(BaseModel):
     t: List[float]
@@ -577,33 +1006,72 @@ async def simulate_pti(req: PTISimulationRequest):
     """
     Simulación integral de PTI con explicaciones simbólicas y de IA.
     Usa motor C++ si disponible, fallback a Python stepper recalibrado.
+
+    Los umbrales clínicos (pti_model.pti_events) se detectan paso a paso con
+    el instante interpolado; metadata.events los lista junto con la muerte.
+    Con `stop_on_death` la simulación termina en ese instante.
     """
     try:
         tic = time.perf_counter()
         engine = "python_realistic"
         
         # ─── Simulación con Python stepper (modelo biológico recalibrado) ───
-        stepper = _PythonPTIStepper(req.y0, req.params)
-        dt = req.dt
-        n_steps = int((req.t_end - req.t_start) / dt)
-        
-        t_list = []
-        y_list = []
-        
-        for i in range(n_steps):
-            t_list.append(stepper.t)
-            y_list.append([stepper.P, stepper.A])
-            stepper.step(dt)
-        
-        # Final point
-        t_list.append(stepper.t)
-        y_list.append([stepper.P, stepper.A])
-        
-        # Verificaciones toxicológicas
-        is_dead = stepper.is_dead or any(row[0] < 10.0 for row in y_list)
-        has_thrombocytosis = any(row[0] > 600000.0 for row in y_list)
-        has_cushing = stepper.has_cushing
-        death_cause = stepper.death_cause
+        # Sin semilla cada corrida es un paciente distinto: solo se cachea con seed,
+        # pero la semilla fresca se devuelve para poder repetirla
+        seed = req.seed if req.seed is not None else pti_model.new_seed()
+
+        def run():
+            stepper = _PythonPTIStepper(req.y0, req.params, rng=pti_model.pti_rng(seed))
+            dt = req.dt
+            n_steps = int((req.t_end - req.t_start) / dt)
+            log = EventLog(pti_model.pti_events(stop_on_depletion=req.stop_on_death))
+            y_prev = np.array([stepper.P, stepper.A])
+            log.start(stepper.t, y_prev)
+
+            t_list = []
+            y_list = []
+            hit = None
+
+            for i in range(n_steps):
+                t_list.append(stepper.t)
+                y_list.append([stepper.P, stepper.A])
+                t_prev, was_dead = stepper.t, stepper.is_dead
+                stepper.step(dt)
+                y_new = np.array([stepper.P, stepper.A])
+                if stepper.death_cause == "HEMORRHAGE" and not was_dead:
+                    # Salto a P = 0, no un cruce: solo se registra la muerte
+                    log.record("death", stepper.t, y_new, terminal=req.stop_on_death, cause="HEMORRHAGE")
+                else:
+                    # Interpolación lineal dentro del paso (la malla del stepper)
+                    hit = log.step(t_prev, y_prev, stepper.t, y_new,
+                                   lambda s, a=y_prev, b=y_new: a + s * (b - a))
+                    if hit is None and stepper.is_dead and not was_dead:
+                        log.record("death", stepper.t, y_new, terminal=req.stop_on_death,
+                                   cause=stepper.death_cause)
+                if log.terminated:
+                    break
+                y_prev = y_new
+
+            # Final point (o el instante del evento terminal)
+            t_list.append(hit[0] if hit else stepper.t)
+            y_list.append(hit[1].tolist() if hit else [stepper.P, stepper.A])
+            outcome = {"is_dead": stepper.is_dead, "death_cause": stepper.death_cause,
+                       "has_cushing": stepper.has_cushing, **log.summary()}
+            return np.array(t_list), np.array(y_list).T, outcome
+
+        if req.seed is not None:
+            t_arr, cols, outcome = _cached_run("pti", req.model_copy(update={"mode": None}), run)
+        else:
+            t_arr, cols, outcome = run()
+        t_list, y_list = t_arr.tolist(), cols.T.tolist()
+
+        # Verificaciones toxicológicas: cruces detectados durante la simulación
+        crossed = {ev["name"] for ev in outcome["events"]}
+        is_dead = (outcome["is_dead"] or "platelets_depleted" in crossed
+                   or req.y0[0] < pti_model.P_DEPLETED)
+        has_thrombocytosis = "thrombocytosis" in crossed or req.y0[0] > pti_model.P_THROMBOCYTOSIS
+        has_cushing = outcome["has_cushing"]
+        death_cause = outcome["death_cause"]
         
         # Interpretación clínica
         p_initial = req.y0[0]
@@ -621,6 +1089,8 @@ async def simulate_pti(req: PTISimulationRequest):
         else:
             interpretation = f"Sin respuesta. PLT: {p_initial:.0f} → {p_final:.0f}/μL. Riesgo hemorrágico severo."
 
+        t_list, y_list = downsample_rows(t_list, y_list, req.max_points)
+
         # Explicación simbólica
         _symbolic_explainer = SymbolicExplainer()
         symbolic_steps = _symbolic_explainer.explain_pti(req.params)
@@ -650,10 +1120,14 @@ async def simulate_pti(req: PTISimulationRequest):
             metadata={
                 "engine": engine, 
                 "execution_time_ms": round(elapsed_ms, 2),
+                "cache": outcome.get("cache"),
+                "seed": seed,
                 "is_dead": is_dead,
                 "death_cause": death_cause,
                 "has_cushing": has_cushing,
-                "has_thrombocytosis": has_thrombocytosis
+                "has_thrombocytosis": has_thrombocytosis,
+                "events": outcome["events"],
+                "terminated_by": outcome["terminated_by"],
             }
         )
 
@@ -663,6 +1137,504 @@ async def simulate_pti(req: PTISimulationRequest):
         raise HTTPException(status_code=500, detail=f"PTI simulation error: {str(e)}")
 
 
+# ─── Ensemble Monte Carlo PTI ──────────────────────────────────────────────────
+
+MAX_ENSEMBLE_PATIENTS = 20_000
+
+class PTIEnsembleRequest(BaseModel):
+    n_patients: int = Field(default=1000, ge=1, le=MAX_ENSEMBLE_PATIENTS, description="Trayectorias independientes")
+    t_start: float = 0.0
+    t_end: float = 30.0  # días
+    dt: float = Field(default=0.1, gt=0)
+    y0: List[float] = Field(default=[150000.0, 1.0], description="[Plaquetas, Anticuerpos]")
+    params: Dict[str, Any] = {}
+    seed: Optional[int] = Field(default=None, ge=0, description="Semilla para reproducir el ensemble")
+    n_workers: int = Field(default=1, ge=1, le=pti_model.MAX_ENSEMBLE_WORKERS,
+                           description="Procesos; el resultado no depende de este valor")
+    quantiles: List[float] = Field(default=[0.05, 0.25, 0.5, 0.75, 0.95],
+                                   description="Bandas de plaquetas; claves p05, p50, p2.5…")
+    max_points: Optional[int] = Field(default=300, ge=3, description="Máximo de puntos por curva")
+
+class PTIEnsembleResponse(BaseModel):
+    t: List[float]
+    survival: List[float]
+    platelet_quantiles: Dict[str, List[Optional[float]]]
+    death_causes: Dict[str, float]
+    recovery: Dict[str, float]
+    median_death_day: Optional[float] = None
+    cushing_fraction: float
+    thrombocytosis_fraction: float
+    metadata: dict = {}
+
+
+def _quantile_key(q: float) -> str:
+    # Percentil sin redondear a entero: 0.02 → p02, 0.025 → p2.5 (no colisionan)
+    return f"p{round(q * 100, 6):02g}"
+
+
+@router.post("/bio/pti/ensemble", response_model=PTIEnsembleResponse)
+async def simulate_pti_ensemble(req: PTIEnsembleRequest):
+    """
+    N pacientes PTI estocásticos con los mismos parámetros, en un solo lote.
+
+    Una corrida de /bio/pti es una muestra del riesgo hemorrágico; aquí se
+    devuelve la distribución: supervivencia, causas de muerte, bandas de
+    cuantiles de plaquetas (entre los vivos) y tiempo hasta la recuperación.
+    """
+    if any(not 0.0 <= q <= 1.0 for q in req.quantiles):
+        raise HTTPException(status_code=400, detail="Los cuantiles deben estar en [0, 1]")
+    band_keys = [_quantile_key(q) for q in req.quantiles]
+    if len(set(band_keys)) != len(band_keys):
+        raise HTTPException(status_code=400, detail="Cuantiles repetidos")
+    if len(req.y0) != 2:
+        raise HTTPException(status_code=400, detail="y0 debe ser [Plaquetas, Anticuerpos]")
+    n_steps = int((req.t_end - req.t_start) / req.dt)
+    if (n_steps + 1) * req.n_patients * 2 > bio_sweep.MAX_SWEEP_CELLS:
+        raise HTTPException(status_code=400, detail="Ensemble demasiado grande: aumente dt o reduzca n_patients")
+
+    try:
+        tic = time.perf_counter()
+        seed = req.seed if req.seed is not None else pti_model.new_seed()
+        # Bloques de pacientes con flujos independientes: fuera del event loop
+        loop = asyncio.get_running_loop()
+        t_arr, Y, outcome = await loop.run_in_executor(None, lambda: pti_model.simulate_pti_ensemble(
+            req.y0, req.params, req.n_patients, req.t_start, req.t_end, req.dt, seed, req.n_workers))
+        stats = pti_model.ensemble_summary(t_arr, Y, outcome, req.quantiles)
+
+        bands = stats["platelet_quantiles"]
+        idx = downsample_indices(t_arr, np.vstack([stats["survival"], np.nan_to_num(bands)]), req.max_points)
+        band_lists = {key: [None if not np.isfinite(v) else v for v in row[idx].tolist()]
+                      for key, row in zip(band_keys, bands)}
+
+        elapsed_ms = (time.perf_counter() - tic) * 1000
+        return PTIEnsembleResponse(
+            t=t_arr[idx].tolist(),
+            survival=stats["survival"][idx].tolist(),
+            platelet_quantiles=band_lists,
+            death_causes=stats["death_causes"],
+            recovery=stats["recovery"],
+            median_death_day=stats["median_death_day"],
+            cushing_fraction=stats["cushing_fraction"],
+            thrombocytosis_fraction=stats["thrombocytosis_fraction"],
+            metadata={"engine": "python_numpy_batch", "n_patients": req.n_patients, "seed": seed,
+                      "execution_time_ms": round(elapsed_ms, 2)},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"PTI ensemble error: {e}")
+
+
+# ─── Barridos de parámetros ────────────────────────────────────────────────────
+
+# modelo → (request del modelo, campos escalares barribles además de params)
+SWEEP_MODELS = {
+    "glucose": (GlucoseSimulationRequest, ()),
+    "windkessel": (WindkesselRequest, ("heart_rate",)),
+    "neuron": (NeuronSimulationRequest, ()),
+    "pk": (PKSimulationRequest, ("dose_mg",)),
+    "pti": (PTISimulationRequest, ()),
+}
+SWEEP_OUTPUTS = ("summary", "trajectories")
+
+
+class SweepRequest(BaseModel):
+    model: str = Field(description=f"Modelo: {', '.join(SWEEP_MODELS)}")
+    params: Dict[str, Any] = Field(default={}, description="Parámetros base del modelo")
+    settings: Dict[str, Any] = Field(default={}, description="Resto del request del modelo: t_end, dt, y0, method, heart_rate, dose_mg, regimen…")
+    grid: Optional[Dict[str, List[float]]] = Field(default=None, description="Ejes del producto cartesiano")
+    overrides: Optional[List[Dict[str, float]]] = Field(default=None, description="Lista explícita de escenarios")
+    output: str = Field(default="summary", description="summary | trajectories")
+    max_points: Optional[int] = Field(default=200, ge=3, description="Puntos por trayectoria (downsampling LTTB común)")
+
+class SweepResponse(BaseModel):
+    model: str
+    n_scenarios: int
+    scenarios: List[Dict[str, float]]
+    states: List[str]
+    summary: Dict[str, List[Any]]
+    t: Optional[List[float]] = None
+    trajectories: Optional[List[List[List[float]]]] = None   # [escenario][estado][t]
+    metadata: dict = {}
+
+
+def _sweep_rows(model: str, base) -> Optional[int]:
+    """Tiempos que guardará el barrido; None si los decide el paso adaptativo."""
+    if model == "pti":
+        return int((base.t_end - base.t_start) / base.dt) + 1
+    t_out = output_times(base.t_start, base.t_end, base.t_eval, base.n_out)
+    if t_out is not None:
+        return len(t_out)
+    analytic = model == "pk" and _pk_engine(base, _pk_nonlinear_model(base.params)) == "analytic"
+    if analytic or base.method in FIXED_STEP_METHODS:
+        return n_fixed_steps(base.t_start, base.t_end, base.dt) + 1
+    return None
+
+
+def _run_sweep(model: str, base, cols: Dict[str, Any], batch: int, max_steps: int = 200_000):
+    """
+    Integra todos los escenarios como un lote. Devuelve (t, Y (n_t, batch, n), stats, contexto).
+    `max_steps` acota los pasos de los métodos adaptativos.
+    """
+    if model == "pti":
+        t_arr, Y, outcome = pti_model.simulate_pti_batch(base.y0, cols, batch, base.t_start, base.t_end, base.dt)
+        context = {"is_dead": outcome["is_dead"], "has_cushing": outcome["has_cushing"],
+                   "death_cause": [pti_model.DEATH_CAUSES[c] for c in outcome["death_cause"]]}
+        return t_arr, Y, {"method": "RungeKutta4", "n_steps": len(t_arr) - 1, "stochastic_events": False}, context
+
+    if model == "pk":
+        dose0 = np.broadcast_to(np.multiply(cols["dose_mg"], cols["F"]), (batch,))
+        nonlinear = _pk_nonlinear_model(base.params, cols)
+        if _pk_engine(base, nonlinear) == "analytic":
+            t_arr, Y, stats = _analytic_pk(dose0, cols["ka"], cols["ke"], cols["Vd"], base)
+        else:
+            f, jac = nonlinear or (bio_models.pk_rhs(cols["ka"], cols["ke"], cols["Vd"]),
+                                   bio_models.pk_jac(cols["ka"], cols["ke"], cols["Vd"]))
+            t_arr, Y, stats = _integrate_pk(f, jac, dose0, base, max_steps=max_steps)
+        return t_arr, Y, stats, {}
+
+    y0 = np.tile(np.asarray(base.y0, dtype=float), (batch, 1))
+    max_step, context = None, {}
+    if model == "glucose":
+        args = [cols[k] for k in ("p1", "p2", "p3", "Gb", "Ib", "n")]
+        f, jac = bio_models.bergman_rhs(*args), bio_models.bergman_jac(*args)
+        context["Gb"] = cols["Gb"]
+    elif model == "windkessel":
+        f = bio_models.windkessel_rhs(cols["R"], cols["C"], cols["P_venous"], cols["heart_rate"])
+        jac = bio_models.windkessel_jac(cols["R"], cols["C"])
+        max_step = 0.3 * math.sqrt(60.0 / float(np.max(cols["heart_rate"]))) / 4
+        context["heart_rate"] = cols["heart_rate"]
+    else:
+        f = bio_models.hodgkin_huxley_rhs(*(cols[k] for k in ("C_m", "g_Na", "g_K", "g_L", "E_Na", "E_K", "E_L", "I_ext")))
+        jac = None
+    t_arr, Y, stats = _solve_numpy(f, base.t_start, base.t_end, y0, base.dt, base, max_step=max_step, jac=jac,
+                                   max_steps=max_steps)
+    return t_arr, Y, stats, context
+
+
+@router.post("/sweep", response_model=SweepResponse)
+async def parameter_sweep(req: SweepRequest):
+    """
+    Barrido de parámetros de un modelo bio en una sola integración vectorizada.
+
+    Los escenarios salen de `grid` (producto cartesiano) y/o `overrides`; cada
+    uno es una fila del estado (batch, n_states). Siempre devuelve métricas
+    resumen por escenario y, con output="trajectories", las trayectorias con
+    un downsampling común a todos los escenarios.
+    """
+    if req.model not in SWEEP_MODELS:
+        raise HTTPException(status_code=400, detail=f"Modelo desconocido: '{req.model}'. Use {list(SWEEP_MODELS)}")
+    if req.output not in SWEEP_OUTPUTS:
+        raise HTTPException(status_code=400, detail=f"output debe ser uno de {list(SWEEP_OUTPUTS)}")
+    request_cls, scalar_keys = SWEEP_MODELS[req.model]
+
+    try:
+        base = request_cls(**{**req.settings, "params": req.params})
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Configuración base inválida: {e.errors()}")
+    if req.model != "pti":
+        _check_method(base.method)
+        if base.events:
+            raise HTTPException(status_code=400, detail="Los eventos solo se admiten en simulaciones individuales")
+
+    try:
+        tic = time.perf_counter()
+        scenarios = bio_sweep.expand_scenarios(req.grid, req.overrides)
+        batch = len(scenarios)
+        # Sin Vmax/Km (PK lineal) esas claves no existen y no son barribles
+        base_values = (dict(pti_model.PTI_DEFAULTS, **base.params) if req.model == "pti"
+                       else base.params.model_dump(exclude_none=True))
+        base_values.update({k: getattr(base, k) for k in scalar_keys})
+        cols = bio_sweep.scenario_columns(scenarios, base_values, list(base_values))
+
+        n_states = len(bio_sweep.STATE_NAMES[req.model])
+        n_t = _sweep_rows(req.model, base)
+        if n_t is not None and n_t * batch * n_states > bio_sweep.MAX_SWEEP_CELLS:
+            raise ValueError(f"Barrido demasiado grande: {n_t} pasos × {batch} escenarios "
+                             f"(máx {bio_sweep.MAX_SWEEP_CELLS} celdas); aumente dt o use n_out")
+        # Adaptativo sin t_eval/n_out: cada paso aceptado es una fila, así que
+        # el presupuesto de celdas se impone como tope de pasos
+        max_steps = 200_000
+        if n_t is None:
+            max_steps = min(max_steps, bio_sweep.MAX_SWEEP_CELLS // (batch * n_states) - 1)
+
+        try:
+            t_arr, Y, stats, context = _run_sweep(req.model, base, cols, batch, max_steps)
+        except RuntimeError as e:
+            if n_t is not None:
+                raise
+            raise ValueError(f"Barrido demasiado grande: más de {max_steps} pasos adaptativos × {batch} "
+                             f"escenarios (máx {bio_sweep.MAX_SWEEP_CELLS} celdas); use n_out o t_eval") from e
+        metrics = bio_sweep.summary_metrics(req.model, t_arr, Y, context)
+        summary = bio_sweep.metrics_to_lists(metrics)
+        if "death_cause" in context:
+            summary["death_cause"] = context["death_cause"]
+
+        t_out, trajectories = None, None
+        if req.output == "trajectories":
+            series = Y.reshape(len(t_arr), -1).T           # (batch·n_states, n_t)
+            idx = downsample_indices(t_arr, series, req.max_points)
+            t_out = t_arr[idx].tolist()
+            trajectories = Y[idx].transpose(1, 2, 0).tolist()
+
+        elapsed_ms = (time.perf_counter() - tic) * 1000
+        return SweepResponse(
+            model=req.model,
+            n_scenarios=batch,
+            scenarios=scenarios,
+            states=list(bio_sweep.STATE_NAMES[req.model]),
+            summary=summary,
+            t=t_out,
+            trajectories=trajectories,
+            metadata={"engine": "python_numpy_batch", "execution_time_ms": round(elapsed_ms, 2), **stats},
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sweep error: {e}")
+
+
+# ─── Análisis de sensibilidad ──────────────────────────────────────────────────
+
+class SensitivityRequest(BaseModel):
+    model: str = Field(description=f"Modelo: {', '.join(SWEEP_MODELS)}")
+    params: Dict[str, Any] = Field(default={}, description="Parámetros del modelo")
+    settings: Dict[str, Any] = Field(default={}, description="Resto del request del modelo: t_end, dt, y0, method, heart_rate, dose_mg, regimen…")
+    parameters: Optional[List[str]] = Field(default=None, description="Parámetros a analizar (por defecto todos los derivables)")
+    normalized: bool = Field(default=True, description="Coeficientes (p/y)·∂y/∂p en vez de ∂y/∂p")
+    max_points: Optional[int] = Field(default=300, ge=3, description="Puntos por serie (downsampling LTTB común)")
+
+class SensitivityResponse(BaseModel):
+    model: str
+    states: List[str]
+    parameters: List[str]
+    t: List[float]
+    y: List[List[float]]                                  # [estado][t]
+    sensitivities: Dict[str, Dict[str, List[float]]]     # {parámetro: {estado: serie}}
+    metadata: dict = {}
+
+
+def _sensitivity_problem(model: str, base):
+    """(modelo de sensibilidad, valores, y0, t_start, t_end, dosis) del request del modelo."""
+    if model == "pti":
+        # El stepper PTI cuenta el tiempo desde 0 (agotamiento medular, Cushing)
+        values = dict(pti_model.PTI_DEFAULTS, **base.params)
+        return "pti", values, base.y0, 0.0, base.t_end - base.t_start, ()
+    if model == "pk":
+        p = base.params
+        mm = _pk_nonlinear_model(p) is not None
+        doses = [(t, base.dose_mg) for t in _pk_dose_times(base)]
+        return "pk_mm" if mm else "pk", p.model_dump(exclude_none=True), [0.0, 0.0], base.t_start, base.t_end, doses
+    values = base.params.model_dump()
+    if model == "windkessel":
+        values["heart_rate"] = base.heart_rate
+    return model, values, base.y0, base.t_start, base.t_end, ()
+
+
+@router.post("/sensitivity", response_model=SensitivityResponse)
+async def sensitivity_analysis(req: SensitivityRequest):
+    """
+    Sensibilidad directa: ∂y/∂p de cada estado respecto a cada parámetro a lo
+    largo del tiempo, integrando el modelo y sus ecuaciones de sensibilidad
+    como un solo sistema (jacobianos simbólicos, compilados una vez por modelo).
+
+    Con normalized=true devuelve (p/y)·∂y/∂p: p. ej. 0.5 en plaquetas al día 30
+    respecto a destruction_rate significa que un 1 % más de destrucción da
+    un 0.5 % más de plaquetas ese día.
+    """
+    if req.model not in SWEEP_MODELS:
+        raise HTTPException(status_code=400, detail=f"Modelo desconocido: '{req.model}'. Use {list(SWEEP_MODELS)}")
+    request_cls, _ = SWEEP_MODELS[req.model]
+    try:
+        base = request_cls(**{**req.settings, "params": req.params})
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Configuración base inválida: {e.errors()}")
+    method = getattr(base, "method", "RungeKutta4")
+    _check_method(method)
+
+    try:
+        tic = time.perf_counter()
+        model, values, y0, t_start, t_end, doses = _sensitivity_problem(req.model, base)
+        t_arr, Y, S, stats = bio_sensitivity.forward_sensitivity(
+            model, values, y0, t_start, t_end, base.dt, req.parameters, method=method,
+            rtol=getattr(base, "rtol", 1e-6), atol=getattr(base, "atol", 1e-9), doses=doses)
+        if req.model == "pti":
+            t_arr = t_arr + base.t_start
+        system = bio_sensitivity.compile_sensitivity(model, req.parameters)
+        if req.normalized:
+            S = bio_sensitivity.normalized_sensitivity(Y, S, values, system.params)
+
+        # Un solo downsampling para estados y sensibilidades (mismos t en todas las series)
+        series = np.concatenate([Y.T, S.reshape(len(t_arr), -1).T])
+        idx = downsample_indices(t_arr, series, req.max_points)
+        elapsed_ms = (time.perf_counter() - tic) * 1000
+        return SensitivityResponse(
+            model=req.model,
+            states=list(system.states),
+            parameters=list(system.params),
+            t=t_arr[idx].tolist(),
+            y=Y[idx].T.tolist(),
+            sensitivities=bio_sensitivity.sensitivity_series(S[idx], system.states, system.params),
+            metadata={"engine": "python_sympy_forward", "system": model, "normalized": req.normalized,
+                      "execution_time_ms": round(elapsed_ms, 2), **stats},
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sensitivity error: {e}")
+
+
+# ─── Ajuste de parámetros a datos ──────────────────────────────────────────────
+
+class FitRequest(BaseModel):
+    model: str = Field(description=f"Modelo: {', '.join(SWEEP_MODELS)}")
+    params: Dict[str, Any] = Field(default={}, description="Valores iniciales (ajustados) y fijos (resto)")
+    settings: Dict[str, Any] = Field(default={}, description="Resto del request del modelo: y0, dt, method, dose_mg, regimen… (t_end por defecto: último dato)")
+    fit: Optional[List[str]] = Field(default=None, description="Parámetros a ajustar (por defecto todos los derivables)")
+    data: Dict[str, List[Optional[float]]] = Field(description='{"t": [...], "<estado>": [...]} — null = sin dato')
+    sigma: Optional[Dict[str, float]] = Field(default=None, description="Desviación del error por estado (por defecto, RMS de sus datos)")
+    bounds: Optional[Dict[str, List[float]]] = Field(default=None, description="[mín, máx] por parámetro (por defecto valor inicial ÷100 … ×100)")
+    n_starts: int = Field(default=1, ge=1, le=bio_fit.MAX_STARTS, description="Arranques (el primero es el valor inicial)")
+    n_workers: Optional[int] = Field(default=None, ge=1, le=bio_fit.MAX_WORKERS, description="Procesos del pool multi-start")
+    seed: Optional[int] = Field(default=None, ge=0, description="Semilla de los arranques aleatorios")
+    max_iter: int = Field(default=100, ge=1, le=1000)
+    time_budget_s: float = Field(default=10.0, gt=0, le=120, description="Presupuesto de tiempo total")
+
+class FitResponse(BaseModel):
+    model: str
+    parameters: Dict[str, Dict[str, Optional[float]]]   # {nombre: {value, stderr, ci_low, ci_high, initial}}
+    status: str
+    cost: float
+    rmse: Dict[str, float]
+    t: List[float]
+    fitted: Dict[str, List[float]]                       # curva ajustada en t
+    starts: List[Dict[str, Any]]
+    metadata: dict = {}
+
+
+def _fit_problem(req: FitRequest) -> "bio_fit.FitProblem":
+    """FitProblem a partir del request; ValueError ante datos o cotas inválidos."""
+    if "t" not in req.data:
+        raise ValueError("data necesita la columna 't'")
+    t_obs = np.asarray(req.data["t"], dtype=float)
+    if t_obs.ndim != 1 or t_obs.size < 2 or np.any(np.isnan(t_obs)) or np.any(np.diff(t_obs) < 0):
+        raise ValueError("data['t'] debe ser una lista creciente de al menos 2 tiempos")
+    request_cls, _ = SWEEP_MODELS[req.model]
+    try:
+        base = request_cls(**{"t_end": float(t_obs[-1]), **req.settings, "params": req.params})
+    except ValidationError as e:
+        raise ValueError(f"Configuración base inválida: {e.errors()}")
+    _check_method(getattr(base, "method", "RungeKutta4"))
+
+    model, values, y0, t_start, t_end, doses = _sensitivity_problem(req.model, base)
+    fit_names = bio_sensitivity.compile_sensitivity(model, req.fit).params
+    states = bio_sensitivity.SENSITIVITY_MODELS[model].states
+    observed = {}
+    for name, column in req.data.items():
+        if name == "t":
+            continue
+        if name not in states:
+            raise ValueError(f"Estado desconocido en data: '{name}'. Use {list(states)}")
+        if len(column) != len(t_obs):
+            raise ValueError(f"data['{name}'] debe tener {len(t_obs)} valores como data['t']")
+        observed[name] = np.array([np.nan if v is None else v for v in column], dtype=float)
+    if not observed or sum(int((~np.isnan(v)).sum()) for v in observed.values()) <= len(fit_names):
+        raise ValueError(f"Se necesitan más datos que parámetros a ajustar ({len(fit_names)})")
+
+    t_model = t_obs - (base.t_start - t_start)          # PTI integra desde 0
+    if t_model[0] < t_start or t_model[-1] > t_end:
+        raise ValueError("Los tiempos de data deben estar dentro de [t_start, t_end]")
+    sigma = dict(req.sigma or {})
+    for name, obs in observed.items():
+        scale = sigma.setdefault(name, float(np.sqrt(np.nanmean(obs ** 2))))
+        if not scale > 0:
+            raise ValueError(f"sigma de '{name}' debe ser positiva")
+
+    initial = np.array([values[k] for k in fit_names], dtype=float)
+    if np.any(initial <= 0):
+        raise ValueError(f"Solo se ajustan parámetros positivos: {[k for k, v in zip(fit_names, initial) if v <= 0]}")
+    bounds = req.bounds or {}
+    lower = np.array([bounds.get(k, [v / 100, v * 100])[0] for k, v in zip(fit_names, initial)])
+    upper = np.array([bounds.get(k, [v / 100, v * 100])[1] for k, v in zip(fit_names, initial)])
+    if np.any(lower <= 0) or np.any(lower > initial) or np.any(upper < initial):
+        raise ValueError("Cada cota debe ser [mín > 0, máx] y contener el valor inicial")
+
+    return bio_fit.FitProblem(
+        model=model, values=values, y0=list(y0), t_start=t_start, t_end=t_end, dt=base.dt,
+        fit=fit_names, t_obs=t_model, observed=observed, sigma=sigma, lower=lower, upper=upper,
+        method=getattr(base, "method", "RungeKutta4"), doses=tuple(doses), max_iter=req.max_iter,
+        deadline=time.time() + req.time_budget_s)
+
+
+@router.post("/fit", response_model=FitResponse)
+async def fit_parameters(req: FitRequest):
+    """
+    Ajusta parámetros de un modelo bio a datos (Levenberg-Marquardt ponderado).
+
+    Ejemplos: p1, p2, p3 de Bergman a una curva de tolerancia a la glucosa
+    (data = {"t": [...], "G": [...]}) o ka, ke, Vd a concentraciones
+    (data = {"t": [...], "C": [...]}). El jacobiano sale de las ecuaciones
+    de sensibilidad; con n_starts > 1 los arranques corren en un pool de
+    procesos dentro de `time_budget_s`. Devuelve IC 95 % asintóticos.
+    """
+    if req.model not in SWEEP_MODELS:
+        raise HTTPException(status_code=400, detail=f"Modelo desconocido: '{req.model}'. Use {list(SWEEP_MODELS)}")
+    try:
+        tic = time.perf_counter()
+        problem = _fit_problem(req)
+        # CPU durante segundos: fuera del event loop (el pool multi-start ya usa procesos)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None, lambda: bio_fit.fit(problem, req.n_starts, req.seed, req.n_workers))
+        best, ci = result["best"], result["confidence"]
+
+        initial = [problem.values[k] for k in problem.fit]
+        fitted_values = np.exp(best["theta"])
+        parameters = {
+            name: {"value": float(v), "initial": float(p0),
+                   **{key: (None if math.isnan(ci[key][j]) else float(ci[key][j]))
+                      for key in ("stderr", "ci_low", "ci_high")}}
+            for j, (name, v, p0) in enumerate(zip(problem.fit, fitted_values, initial))
+        }
+        values = {**problem.values, **dict(zip(problem.fit, fitted_values.tolist()))}
+        t_arr, Y, _, _ = bio_sensitivity.forward_sensitivity(
+            problem.model, values, problem.y0, problem.t_start, problem.t_end, problem.dt,
+            problem.fit, method=problem.method, doses=problem.doses)
+        states = bio_sensitivity.SENSITIVITY_MODELS[problem.model].states
+        rmse = {}
+        for name, obs in problem.observed.items():
+            keep = ~np.isnan(obs)
+            sim = np.interp(problem.t_obs[keep], t_arr, Y[:, states.index(name)])
+            rmse[name] = float(np.sqrt(np.mean((sim - obs[keep]) ** 2)))
+        idx = downsample_indices(t_arr, Y.T, 300)
+        offset = float(req.data["t"][0]) - float(problem.t_obs[0])
+        elapsed_ms = (time.perf_counter() - tic) * 1000
+        return FitResponse(
+            model=req.model,
+            parameters=parameters,
+            status=best["status"],
+            cost=best["cost"],
+            rmse=rmse,
+            t=(t_arr[idx] + offset).tolist(),
+            fitted={name: Y[idx, i].tolist() for i, name in enumerate(states)},
+            starts=[{"start": dict(zip(problem.fit, run["start"].tolist())), "cost": run["cost"],
+                     "status": run["status"], "n_iter": run["n_iter"]} for run in result["runs"]],
+            metadata={"engine": "levenberg_marquardt", "system": problem.model,
+                      "n_starts_completed": len(result["runs"]), "n_eval": best["n_eval"],
+                      "dof": ci["dof"], "execution_time_ms": round(elapsed_ms, 2)},
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Fit error: {e}")
+
+
 # ─── Endpoints de Explicación Educativa ──────────────────────────────────────────
 
 from services.symbolic_explainer import SymbolicExplainer
@@ -786,13 +1758,14 @@ class _PythonPTIStepper:
     P_CARRYING = 400000.0    # Max carrying capacity (homeostatic ceiling)
     LIFESPAN = 10.0          # Platelet lifespan (days)
     
-    def __init__(self, y0, params: dict):
+    def __init__(self, y0, params: dict, rng=None):
         self.P = float(y0[0])  # Platelets (/μL)
         self.A = float(y0[1])  # Antibodies (dimensionless)
         self.t = 0.0
         self.params = dict(params)
         self.is_dead = False
         self.death_cause = ""
+        self._rng = rng if rng is not None else pti_model.pti_rng()  # Philox propio: sin estado global
         
         # ─── Cushing tracking ───
         self._prednisone_days = 0.0      # Accumulated days on prednisone
@@ -873,10 +1846,9 @@ class _PythonPTIStepper:
             # Dosis muy altas (>100mg) por >7 días → inmunosupresión severa
             if dose_mg > 100 and self._prednisone_days > 7:
                 # Susceptible a infecciones oportunistas
-                import random
                 infection_risk = 0.02  # 2% daily risk
                 step_risk = 1.0 - (1.0 - infection_risk) ** 1.0  # per day
-                if random.random() < step_risk * (self.t - int(self.t) < 0.11):
+                if self._rng.random() < step_risk * (self.t - int(self.t) < 0.11):
                     if "INFECTION_RISK" not in [a.get("type") for a in self.alerts]:
                         self.alerts.append({
                             "type": "INFECTION_RISK",
@@ -932,7 +1904,6 @@ class _PythonPTIStepper:
         # En la vida real, pacientes con PLT baja tienen riesgo PROBABILÍSTICO
         # de eventos hemorrágicos fatales (hemorragia intracraneal, GI masiva).
         # La probabilidad aumenta exponencialmente con la severidad.
-        import random
         if self.P < 30000 and not self.is_dead:
             # Daily hemorrhage risk (converted to per-step probability)
             if self.P < 5000:
@@ -946,7 +1917,7 @@ class _PythonPTIStepper:
             
             # Convert daily risk to per-step probability
             step_risk = 1.0 - (1.0 - daily_risk) ** dt
-            if random.random() < step_risk:
+            if self._rng.random() < step_risk:
                 self.P = 0.0
                 self.is_dead = True
                 self.death_cause = "HEMORRHAGE"
@@ -962,80 +1933,131 @@ class _PythonPTIStepper:
         self.params.update(new_params)
 
 
+async def _pti_reader(websocket: WebSocket, session):
+    """Mensajes del cliente ({params, speed}) en su propia tarea: el envío no los sondea."""
+    try:
+        while True:
+            try:
+                msg = await websocket.receive_json()
+            except ValueError:
+                continue  # JSON mal formado: se ignora el mensaje, no la sesión
+            if isinstance(msg, dict):
+                try:
+                    pti_hub.update(session, params=msg.get("params"), speed=msg.get("speed"))
+                except ValueError:
+                    pass  # Inyección inválida: se conserva la configuración anterior
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        pti_hub.leave(session)
+
+
 @router.websocket("/realtime/pti")
 async def websocket_pti(websocket: WebSocket):
     """
-    Streaming en tiempo real a ~60 FPS usando Python PTI Stepper.
+    Streaming en tiempo real a ~60 FPS desde el hub compartido (services/pti_realtime).
     Protocolo:
-      1. Cliente envía config: { y0, params, dt }
-      2. Servidor emite frames: { t, y, is_dead }
-      3. Cliente puede enviar: { params: {...} } para hot-inject
+      1. Cliente envía config: { y0, params, dt, speed, binary, seed }
+         (seed: entero ≥ 0; si falta, el servidor elige una)
+      2. Servidor responde (JSON aun con binary=true): { type: "ready", seed, dt, binary }
+         — reenviar esa seed reproduce la sesión
+      3. Servidor emite frames: { t, y, is_dead, ... } (34 bytes si binary=true)
+      4. Cliente puede enviar: { params: {...}, speed } para hot-inject
+
+    Un solo ticker avanza a todos los pacientes conectados; si el cliente no
+    consume a tiempo, recibe el frame más reciente (los intermedios se fusionan).
     """
     await websocket.accept()
+    session, reader = None, None
 
     try:
         # Esperamos configuración inicial del cliente
         config = await websocket.receive_json()
-        
-        y0_list = config.get("y0", [250000.0, 0.0])
-        req_params = config.get("params", {})
-        dt = config.get("dt", 0.1)
-        speed = config.get("speed", 1.0)  # 0.5 = half speed, 2.0 = double speed
-
-        # Inicializar Stepper Python
-        stepper = _PythonPTIStepper(y0_list, req_params)
-
-        print(f"WS > Iniciando streaming PTI (dt={dt} días/frame, speed={speed}x, Python stepper)")
+        session = pti_hub.join(config.get("y0", [250000.0, 0.0]), config.get("params", {}),
+                               dt=config.get("dt", 0.1), speed=config.get("speed", 1.0),
+                               binary=bool(config.get("binary", False)), seed=config.get("seed"))
+        await websocket.send_json(session.ack())
+        reader = asyncio.create_task(_pti_reader(websocket, session))
 
         while True:
-            t_start_frame = time.perf_counter()
-            
-            # Recibir actualizaciones de parámetros en tiempo real
-            try:
-                msg = await asyncio.wait_for(websocket.receive_json(), timeout=0.001)
-                if "params" in msg:
-                    stepper.update_params(msg["params"])
-                    print(f"WS > Params actualizados: {list(msg['params'].keys())}")
-                if "speed" in msg:
-                    speed = float(msg["speed"])
-            except asyncio.TimeoutError:
-                pass
-                
-            # Avanzar simulación (multiple steps per frame if speed > 1)
-            steps_per_frame = max(1, int(speed))
-            for _ in range(steps_per_frame):
-                stepper.step(dt)
-                if stepper.is_dead:
-                    break
-
-            # Transmitir telemetría
-            new_alerts = stepper.alerts[-3:] if stepper.alerts else []
-            await websocket.send_json({
-                "t": round(stepper.t, 4),
-                "y": [float(stepper.P), float(stepper.A)],
-                "is_dead": stepper.is_dead,
-                "death_cause": stepper.death_cause if stepper.is_dead else None,
-                "has_cushing": stepper.has_cushing,
-                "prednisone_days": round(stepper._prednisone_days, 1),
-                "alerts": new_alerts
-            })
-
-            if stepper.is_dead:
-                print(f"WS > Paciente fallecido: {stepper.death_cause}. PLT={stepper.P:.0f}")
+            await session.ready.wait()
+            session.ready.clear()
+            if session.closed:
+                break
+            payload = session.encode(session.latest)
+            if session.binary:
+                await websocket.send_bytes(payload)
+            else:
+                await websocket.send_json(payload)
+            if session.finished:
+                # Paciente fallecido: el último frame lleva la causa; se cierra normal
+                await websocket.close(code=1000)
                 break
-
-            # Sincronización a ~60 FPS (ajustada por velocidad)
-            target_fps = 60.0
-            elapsed = time.perf_counter() - t_start_frame
-            sleep_time = max((1.0 / target_fps) - elapsed, 0.0)
-            await asyncio.sleep(sleep_time)
 
     except WebSocketDisconnect:
-        print("WS > Cliente de Séptima desconectado.")
+        pass
+    except (ValueError, TypeError, AttributeError) as e:
+        # Configuración inicial inválida
+        await websocket.close(code=1003, reason=str(e)[:120])
     except Exception as e:
         print(f"WS > Error crítico: {e}")
         try:
-            await websocket.close(code=1011, reason=str(e))
-        except:
+            await websocket.close(code=1011, reason=str(e)[:120])
+        except Exception:
             pass
+    finally:
+        if reader is not None:
+            reader.cancel()
+        if session is not None:
+            pti_hub.leave(session)
+
+
+# ─── ECG en vivo ────────────────────────────────────────────────────────────────
+
+MAX_ECG_CHUNK_MS = 1000
+
+@router.websocket("/realtime/ecg")
+async def websocket_ecg(websocket: WebSocket):
+    """
+    Monitor ECG en vivo: bloques de muestras al ritmo real.
+    Protocolo:
+      1. Cliente envía config: { bpm, sample_rate, lead, noise_level, chunk_ms, duration_s, binary }
+         (sin duration_s el stream no termina)
+      2. Servidor emite: { start, sample_rate, ecg: [...] } por bloque
+         (binary=true: float32 little-endian; el índice de muestra avanza len/4 por bloque)
 
+    La memoria es constante: plantilla cacheada + un bloque, dure lo que dure.
+    """
+    await websocket.accept()
+    try:
+        config = await websocket.receive_json()
+        req = ECGRequest(**{k: v for k, v in config.items() if k in ECGRequest.model_fields})
+        chunk_ms = min(max(float(config.get("chunk_ms", 100)), 10.0), MAX_ECG_CHUNK_MS)
+        chunk = max(1, int(req.sample_rate * chunk_ms / 1000))
+        binary = bool(config.get("binary", False))
+        duration = config.get("duration_s")
+        ecg_model.beat_template(req.bpm, req.sample_rate, req.lead)  # derivación inválida → 1003
+        chunks = ecg_model.ecg_chunks(req.bpm, req.sample_rate, chunk, req.lead, req.noise_level,
+                                      duration_s=float(duration) if duration is not None else None)
+    except WebSocketDisconnect:
+        return
+    except (ValueError, TypeError, AttributeError) as e:
+        await websocket.close(code=1003, reason=str(e)[:120])
+        return
+
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    try:
+        for start, block in chunks:
+            if binary:
+                await websocket.send_bytes(block.astype("<f4").tobytes())
+            else:
+                await websocket.send_json({"start": start, "sample_rate": req.sample_rate,
+                                           "ecg": block.tolist()})
+            # Ritmo real: el bloque siguiente sale cuando le toca a su primera muestra
+            delay = t0 + (start + len(block)) / req.sample_rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await websocket.close(code=1000)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
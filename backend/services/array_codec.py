@@ -0,0 +1,49 @@
+"""
+Binary EquaLab - Codificación compacta de arrays
+Serializa arrays NumPy como base64 (little-endian) en vez de listas JSON.
+
+Un array de 1e6 float32 ocupa ~5.3 MB en base64 frente a ~20 MB como lista
+de floats JSON, y el frontend lo decodifica con un `Float32Array` sin parsear.
+"""
+
+import base64
+from typing import List
+
+import numpy as np
+from pydantic import BaseModel
+
+PACKED_DTYPES = ("float32", "float64", "int32", "uint8")
+
+
+class PackedArray(BaseModel):
+    """Array empaquetado: bytes little-endian en base64 + forma."""
+    dtype: str = "float32"
+    shape: List[int]
+    data: str
+
+
+def pack_array(arr, dtype: str = "float32") -> dict:
+    """Empaqueta `arr` como dict compatible con `PackedArray`."""
+    if dtype not in PACKED_DTYPES:
+        raise ValueError(f"dtype no soportado: '{dtype}'. Use {PACKED_DTYPES}")
+    a = np.ascontiguousarray(arr, dtype=np.dtype(dtype).newbyteorder("<"))
+    return {
+        "dtype": dtype,
+        "shape": list(a.shape),
+        "data": base64.b64encode(a.tobytes()).decode("ascii"),
+    }
+
+
+def unpack_array(packed) -> np.ndarray:
+    """Inversa de `pack_array`; acepta `PackedArray` o dict."""
+    if isinstance(packed, BaseModel):
+        packed = packed.model_dump()
+    dtype = packed.get("dtype", "float32")
+    if dtype not in PACKED_DTYPES:
+        raise ValueError(f"dtype no soportado: '{dtype}'. Use {PACKED_DTYPES}")
+    raw = base64.b64decode(packed["data"])
+    arr = np.frombuffer(raw, dtype=np.dtype(dtype).newbyteorder("<"))
+    shape = tuple(packed.get("shape") or (arr.size,))
+    if int(np.prod(shape)) != arr.size:
+        raise ValueError(f"Forma {list(shape)} incompatible con {arr.size} elementos")
+    return arr.reshape(shape).astype(dtype)
@@ -0,0 +1,216 @@
+"""
+Binary EquaLab - Ajuste de parámetros de los modelos bio a datos
+Mínimos cuadrados ponderados con Levenberg-Marquardt.
+
+Residuos r_k = (y_modelo(t_k) − y_obs,k) / σ. El jacobiano no sale de
+diferencias finitas: cada evaluación integra el modelo junto con sus
+sensibilidades (services/bio_sensitivity), así que r y ∂r/∂p cuestan una
+sola integración del sistema aumentado. Se ajusta θ = log p (parámetros
+positivos, pasos relativos) dentro de cotas [lo, hi].
+
+Varios arranques (multi-start) log-uniformes dentro de las cotas reparten
+el trabajo en un pool de procesos; todos respetan un presupuesto de tiempo
+común y se queda el de menor coste. Los intervalos de confianza salen de la
+covarianza asintótica s²·(JᵀJ)⁻¹ en θ, así que son asimétricos en p.
+
+`synthetic_dataset` genera datos con ruido desde parámetros conocidos: el
+ajuste se puede probar sin red ni ficheros.
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services import bio_sensitivity
+
+Z_95 = 1.959963984540054
+MAX_STARTS = 32
+MAX_WORKERS = 8
+DEADLINE_GRACE_S = 5.0        # Margen del pool tras el plazo (última integración de cada arranque)
+
+
+@dataclass
+class FitProblem:
+    """Todo lo que un proceso del pool necesita para ajustar (picklable)."""
+    model: str                                   # modelo de bio_sensitivity
+    values: Dict[str, float]                     # valores de todos los parámetros
+    y0: List[float]
+    t_start: float
+    t_end: float
+    dt: float
+    fit: Tuple[str, ...]                         # parámetros a ajustar
+    t_obs: np.ndarray                            # (n_obs,)
+    observed: Dict[str, np.ndarray]              # estado → (n_obs,), NaN = sin dato
+    sigma: Dict[str, float]
+    lower: np.ndarray                            # cotas (n_fit,)
+    upper: np.ndarray
+    method: str = "RungeKutta4"
+    doses: Tuple[Tuple[float, float], ...] = ()
+    max_iter: int = 100
+    deadline: float = math.inf                   # time.time() absoluto
+
+    def residuals(self, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(r (n_res,), ∂r/∂θ (n_res, n_fit)) con θ = log p."""
+        p = np.exp(theta)
+        values = {**self.values, **dict(zip(self.fit, p.tolist()))}
+        t, Y, S, _ = bio_sensitivity.forward_sensitivity(
+            self.model, values, self.y0, self.t_start, self.t_end, self.dt, self.fit,
+            method=self.method, doses=self.doses)
+        states = bio_sensitivity.SENSITIVITY_MODELS[self.model].states
+        r_parts, J_parts = [], []
+        for name, obs in self.observed.items():
+            i = states.index(name)
+            keep = ~np.isnan(obs)
+            t_k = self.t_obs[keep]
+            sim = np.interp(t_k, t, Y[:, i])
+            sens = np.stack([np.interp(t_k, t, S[:, i, j]) for j in range(len(self.fit))], axis=-1)
+            r_parts.append((sim - obs[keep]) / self.sigma[name])
+            J_parts.append(sens * p / self.sigma[name])          # ∂/∂log p = p·∂/∂p
+        return np.concatenate(r_parts), np.concatenate(J_parts)
+
+
+def _safe_residuals(problem: FitProblem, theta: np.ndarray):
+    """Como `residuals`, pero una integración fallida o no finita da coste infinito."""
+    try:
+        with np.errstate(all="ignore"):
+            r, J = problem.residuals(theta)
+    except (ArithmeticError, ValueError):
+        return None, None, math.inf
+    if not (np.all(np.isfinite(r)) and np.all(np.isfinite(J))):
+        return None, None, math.inf
+    return r, J, 0.5 * float(r @ r)
+
+
+def levenberg_marquardt(problem: FitProblem, theta0: np.ndarray, ftol: float = 1e-10,
+                        xtol: float = 1e-10) -> dict:
+    """
+    LM con escalado de Marquardt (λ·diag(JᵀJ)) y θ recortado a las cotas.
+    Se detiene por convergencia, por max_iter o al vencer el presupuesto.
+    """
+    lo, hi = np.log(problem.lower), np.log(problem.upper)
+    theta = np.clip(np.asarray(theta0, dtype=float), lo, hi)
+    r, J, cost = _safe_residuals(problem, theta)
+    if r is None:
+        return {"theta": theta, "cost": math.inf, "status": "failed", "n_iter": 0, "n_eval": 1}
+    lam, n_eval, status = 1e-3, 1, "max_iter"
+    for it in range(problem.max_iter):
+        if time.time() > problem.deadline:
+            status = "time_budget"
+            break
+        g = J.T @ r
+        A = J.T @ J
+        d = np.maximum(np.diag(A), 1e-12)
+        accepted = False
+        while lam < 1e12 and time.time() <= problem.deadline:
+            try:
+                step = np.linalg.solve(A + lam * np.diag(d), -g)
+            except np.linalg.LinAlgError:
+                lam *= 10
+                continue
+            theta_new = np.clip(theta + step, lo, hi)
+            r_new, J_new, cost_new = _safe_residuals(problem, theta_new)
+            n_eval += 1
+            if cost_new < cost:
+                accepted = True
+                break
+            lam *= 4
+        if not accepted:
+            status = "converged" if lam >= 1e12 else "time_budget"
+            break
+        moved = np.linalg.norm(theta_new - theta)
+        improvement = cost - cost_new
+        theta, r, J, cost = theta_new, r_new, J_new, cost_new
+        lam = max(lam / 3, 1e-12)
+        if improvement <= ftol * max(cost, 1e-300) or moved <= xtol * (1 + np.linalg.norm(theta)):
+            status = "converged"
+            break
+    return {"theta": theta, "cost": cost, "r": r, "J": J, "status": status,
+            "n_iter": it + 1 if problem.max_iter else 0, "n_eval": n_eval}
+
+
+def _fit_one(problem: FitProblem, theta0: np.ndarray) -> dict:
+    """Un arranque (función de módulo: se ejecuta en los procesos del pool)."""
+    out = levenberg_marquardt(problem, theta0)
+    out["start"] = np.exp(np.asarray(theta0, dtype=float))
+    return out
+
+
+def start_points(problem: FitProblem, n_starts: int, seed: Optional[int] = None) -> List[np.ndarray]:
+    """θ iniciales: el valor dado y n_starts − 1 log-uniformes dentro de las cotas."""
+    if not 1 <= n_starts <= MAX_STARTS:
+        raise ValueError(f"n_starts debe estar entre 1 y {MAX_STARTS}")
+    lo, hi = np.log(problem.lower), np.log(problem.upper)
+    first = np.log([problem.values[k] for k in problem.fit])
+    rng = np.random.default_rng(seed)
+    return [first] + [rng.uniform(lo, hi) for _ in range(n_starts - 1)]
+
+
+def confidence(result: dict, n_fit: int) -> dict:
+    """Errores estándar e IC 95 % desde s²·(JᵀJ)⁻¹ (en θ = log p)."""
+    r, J = result["r"], result["J"]
+    dof = len(r) - n_fit
+    p = np.exp(result["theta"])
+    if dof <= 0:
+        nan = np.full(n_fit, np.nan)
+        return {"stderr": nan, "ci_low": nan, "ci_high": nan, "dof": dof, "s2": math.nan}
+    s2 = float(r @ r) / dof
+    try:
+        cov = s2 * np.linalg.pinv(J.T @ J)
+    except np.linalg.LinAlgError:
+        cov = np.full((n_fit, n_fit), np.nan)
+    se_theta = np.sqrt(np.maximum(np.diag(cov), 0.0))
+    return {"stderr": p * se_theta,                       # método delta: se(p) ≈ p·se(log p)
+            "ci_low": p * np.exp(-Z_95 * se_theta), "ci_high": p * np.exp(Z_95 * se_theta),
+            "dof": dof, "s2": s2}
+
+
+def fit(problem: FitProblem, n_starts: int = 1, seed: Optional[int] = None,
+        n_workers: Optional[int] = None) -> dict:
+    """
+    Multi-start: ajusta desde cada punto de `start_points` y devuelve el mejor
+    más todos los arranques. Con n_starts > 1 y n_workers > 1 usa un pool de
+    procesos; los arranques que no terminan antes del plazo se descartan.
+    """
+    starts = start_points(problem, n_starts, seed)
+    n_workers = min(n_workers or MAX_WORKERS, len(starts))
+    if n_workers <= 1:
+        runs = [_fit_one(problem, s) for s in starts]
+    else:
+        pool = ProcessPoolExecutor(max_workers=n_workers)
+        try:
+            futures = [pool.submit(_fit_one, problem, s) for s in starts]
+            # Cada arranque ya mira el plazo; el margen cubre la última integración
+            timeout = None if math.isinf(problem.deadline) else max(problem.deadline - time.time(), 0) + DEADLINE_GRACE_S
+            done, _ = wait(futures, timeout=timeout)
+            runs = [fut.result() for fut in futures if fut in done]
+        finally:
+            # Sin esperar a los rezagados (salir de un `with` los esperaría y el plazo no valdría):
+            # los pendientes se cancelan y los que corren terminan solos al ver el plazo
+            pool.shutdown(wait=False, cancel_futures=True)
+    runs = [run for run in runs if math.isfinite(run["cost"])]
+    if not runs:
+        raise ValueError("Ningún arranque produjo una simulación válida")
+    best = min(runs, key=lambda run: run["cost"])
+    return {"best": best, "runs": runs, "confidence": confidence(best, len(problem.fit))}
+
+
+def synthetic_dataset(model: str, values: Dict[str, float], y0, t_start: float, t_end: float,
+                      dt: float, t_obs: Sequence[float], states: Sequence[str],
+                      noise: float = 0.05, seed: Optional[int] = None,
+                      doses: Sequence[Tuple[float, float]] = ()) -> Dict[str, List[float]]:
+    """Observaciones con ruido gaussiano relativo (`noise`·|y|) desde parámetros conocidos."""
+    t, Y, _, _ = bio_sensitivity.forward_sensitivity(model, values, y0, t_start, t_end, dt, [],
+                                                     doses=doses)
+    spec = bio_sensitivity.SENSITIVITY_MODELS[model]
+    rng = np.random.default_rng(seed)
+    t_obs = np.asarray(t_obs, dtype=float)
+    data = {"t": t_obs.tolist()}
+    for name in states:
+        clean = np.interp(t_obs, t, Y[:, spec.states.index(name)])
+        data[name] = (clean + noise * np.abs(clean) * rng.standard_normal(len(t_obs))).tolist()
+    return data
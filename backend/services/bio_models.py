@@ -0,0 +1,233 @@
+"""
+Binary EquaLab - Modelos biomédicos de Séptima (NumPy)
+Lados derechos vectorizados para los integradores de services/ode_integrators.
+
+Cada fábrica devuelve f(t, y) → dy/dt. `y` es (n_states,) o (batch, n_states);
+los parámetros pueden ser escalares o arrays (batch,) que se emiten contra el
+lote, de modo que un barrido de parámetros es una sola integración.
+
+Para una sola trayectoria (y 1-D) los estados se leen como floats de Python:
+con 4 estados, cada ufunc de NumPy sobre un escalar cuesta más que `math`, y
+el RHS de Hodgkin-Huxley se llama 16 000 veces por simulación.
+
+Los `*_jac` son jacobianos analíticos ∂f/∂y para el integrador Rosenbrock,
+con forma (*y.shape, n). Hodgkin-Huxley no tiene: sus tasas se derivan mal a
+mano y el jacobiano por diferencias finitas cuesta solo 4 evaluaciones.
+"""
+
+import math
+
+import numpy as np
+
+
+def _states(y):
+    """Columnas de estado: floats si y es 1-D, vistas (batch,) si hay lote."""
+    if y.ndim == 1:
+        return y.tolist()
+    return [y[..., i] for i in range(y.shape[-1])]
+
+
+def _pack(y, values):
+    """Inversa de `_states`: array con la forma de `y`."""
+    if y.ndim == 1:
+        return np.array(values, dtype=float)
+    return np.stack(np.broadcast_arrays(*values), axis=-1)
+
+
+def _jac(y, rows):
+    """Ensambla J[..., i, j] a partir de filas de escalares o arrays (batch,)."""
+    n = len(rows)
+    J = np.zeros(y.shape[:-1] + (n, n))
+    for i, row in enumerate(rows):
+        for j, v in enumerate(row):
+            J[..., i, j] = v
+    return J
+
+
+def decay_rhs():
+    """dy/dt = −y (modelo por defecto de /simulate)."""
+    def f(t, y):
+        return -y
+    return f
+
+
+def decay_jac():
+    def jac(t, y):
+        return np.broadcast_to(-np.eye(y.shape[-1]), y.shape + (y.shape[-1],))
+    return jac
+
+
+def bergman_rhs(p1, p2, p3, Gb, Ib, n):
+    """Minimal Model de Bergman — estados [G, X, I]."""
+    def f(t, y):
+        G, X, I = _states(y)
+        dG = -(p1 + X) * G + p1 * Gb
+        dX = -p2 * X + p3 * (I - Ib)
+        dI = -n * (I - Ib)
+        return _pack(y, [dG, dX, dI])
+    return f
+
+
+def bergman_jac(p1, p2, p3, Gb, Ib, n):
+    def jac(t, y):
+        G, X, _ = _states(y)
+        return _jac(y, [[-(p1 + X), -G, 0.0],
+                        [0.0, -p2, p3],
+                        [0.0, 0.0, -n]])
+    return jac
+
+
+def cardiac_flow(t: float, heart_rate):
+    """
+    Flujo aórtico Q(t): semiseno durante la sístole (0.3·√ciclo), cero en diástole.
+    Con `heart_rate` array (batch,) devuelve un array (batch,).
+    """
+    if isinstance(heart_rate, np.ndarray):
+        cycle = 60.0 / heart_rate
+        local_t = np.fmod(t, cycle)
+        systole = 0.3 * np.sqrt(cycle)
+        return np.where(local_t < systole, np.sin(np.pi * local_t / systole) * 500.0, 0.0)
+    cycle = 60.0 / heart_rate
+    local_t = math.fmod(t, cycle)
+    systole = 0.3 * math.sqrt(cycle)
+    if local_t < systole:
+        return math.sin(math.pi * local_t / systole) * 500.0
+    return 0.0
+
+
+def windkessel_rhs(R, C, P_venous, heart_rate):
+    """Windkessel de 2 elementos — estado [P]."""
+    def f(t, y):
+        P, = _states(y)
+        Q = cardiac_flow(t, heart_rate)
+        return _pack(y, [(Q - (P - P_venous) / R) / C])
+    return f
+
+
+def windkessel_jac(R, C):
+    def jac(t, y):
+        return _jac(y, [[-1.0 / (R * C)]])
+    return jac
+
+
+def _rate_ratio(x, scale, limit):
+    """x / (1 − e^(−x/scale)) con su límite `limit` cuando x → 0 (0/0 evitable)."""
+    small = np.abs(x) <= 1e-4
+    safe = np.where(small, 1.0, x)
+    return np.where(small, limit, safe / (1 - (1e-7 + np.exp(-safe / scale))))
+
+
+def _hh_rates_scalar(V: float):
+    exp = math.exp
+    a_m = 0.1 * (V + 40) / (1 - (1e-7 + exp(-(V + 40) / 10))) if abs(V + 40) > 1e-4 else 1.0
+    a_n = 0.01 * (V + 55) / (1 - (1e-7 + exp(-(V + 55) / 10))) if abs(V + 55) > 1e-4 else 0.1
+    return (a_m, 4.0 * exp(-(V + 65) / 18),
+            0.07 * exp(-(V + 65) / 20), 1.0 / (1 + exp(-(V + 35) / 10)),
+            a_n, 0.125 * exp(-(V + 65) / 80))
+
+
+def hh_rates(V):
+    """(α_m, β_m, α_h, β_h, α_n, β_n) de Hodgkin-Huxley (V float o array)."""
+    if isinstance(V, float):
+        try:
+            return _hh_rates_scalar(V)
+        except OverflowError:
+            # Paso de prueba divergente: inf en NumPy para que el integrador lo rechace
+            V = np.array(V)
+    a_m = 0.1 * _rate_ratio(V + 40, 10.0, 10.0)
+    b_m = 4.0 * np.exp(-(V + 65) / 18)
+    a_h = 0.07 * np.exp(-(V + 65) / 20)
+    b_h = 1.0 / (1 + np.exp(-(V + 35) / 10))
+    a_n = 0.01 * _rate_ratio(V + 55, 10.0, 10.0)
+    b_n = 0.125 * np.exp(-(V + 65) / 80)
+    return a_m, b_m, a_h, b_h, a_n, b_n
+
+
+def hodgkin_huxley_rhs(C_m, g_Na, g_K, g_L, E_Na, E_K, E_L, I_ext):
+    """Hodgkin-Huxley — estados [V, m, h, n]."""
+    def f(t, y):
+        V, m, h, n = _states(y)
+        a_m, b_m, a_h, b_h, a_n, b_n = hh_rates(V)
+        I_Na = g_Na * m**3 * h * (V - E_Na)
+        I_K = g_K * n**4 * (V - E_K)
+        I_L = g_L * (V - E_L)
+        dV = (I_ext - I_Na - I_K - I_L) / C_m
+        dm = a_m * (1 - m) - b_m * m
+        dh = a_h * (1 - h) - b_h * h
+        dn = a_n * (1 - n) - b_n * n
+        return _pack(y, [dV, dm, dh, dn])
+    return f
+
+
+def pk_rhs(ka, ke, Vd):
+    """PK oral de 1 compartimento — estados [A_gut (mg), C_plasma (mg/L)]."""
+    def f(t, y):
+        A_gut, C = _states(y)
+        return _pack(y, [-ka * A_gut, (ka * A_gut) / Vd - ke * C])
+    return f
+
+
+def pk_jac(ka, ke, Vd):
+    def jac(t, y):
+        return _jac(y, [[-ka, 0.0],
+                        [ka / Vd, -ke]])
+    return jac
+
+
+def pk_mm_rhs(ka, Vmax, Km, Vd):
+    """PK oral con eliminación saturable (Michaelis-Menten): no lineal, sin solución cerrada."""
+    def f(t, y):
+        A_gut, C = _states(y)
+        return _pack(y, [-ka * A_gut, (ka * A_gut) / Vd - Vmax * C / (Km + C)])
+    return f
+
+
+def pk_mm_jac(ka, Vmax, Km, Vd):
+    def jac(t, y):
+        _, C = _states(y)
+        return _jac(y, [[-ka, 0.0],
+                        [ka / Vd, -Vmax * Km / (Km + C) ** 2]])
+    return jac
+
+
+# ─── Modelos con nombre para /simulate ─────────────────────────────────────────
+# Mismos nombres, estados y defaults que NativeRHS::named (engine/src/ode_rhs.cpp):
+# con motor C++ el RHS se evalúa allí sin volver a Python en cada paso.
+
+NAMED_MODELS = {
+    "decay": {},
+    "bergman": {"p1": 0.028, "p2": 0.025, "p3": 0.000013, "Gb": 80.0, "Ib": 7.0, "n": 0.142},
+    "pk_1cmt": {"ka": 1.0, "ke": 0.15, "Vd": 10.0},
+    "windkessel": {"R": 1.0, "C": 1.2, "P_venous": 5.0, "heart_rate": 75.0},
+    "hodgkin_huxley": {"C_m": 1.0, "g_Na": 120.0, "g_K": 36.0, "g_L": 0.3,
+                       "E_Na": 50.0, "E_K": -77.0, "E_L": -54.4, "I_ext": 10.0},
+}
+NAMED_MODEL_STATES = {"decay": None, "bergman": 3, "pk_1cmt": 2, "windkessel": 1, "hodgkin_huxley": 4}  # None: cualquiera
+
+
+def named_model_params(model: str, params: dict) -> dict:
+    """Defaults del modelo con `params` encima; claves desconocidas → ValueError."""
+    if model not in NAMED_MODELS:
+        raise ValueError(f"Modelo '{model}' no soportado. Use: {', '.join(NAMED_MODELS)}")
+    defaults = NAMED_MODELS[model]
+    unknown = sorted(set(params) - set(defaults))
+    if unknown:
+        raise ValueError(f"Parámetros desconocidos para '{model}': {unknown}")
+    try:
+        return {k: float(params.get(k, v)) for k, v in defaults.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"Los parámetros de '{model}' deben ser numéricos")
+
+
+def named_model(model: str, params: dict):
+    """(f, jac) NumPy del modelo con nombre; jac es None si no hay analítico."""
+    p = named_model_params(model, params)
+    if model == "decay":
+        return decay_rhs(), decay_jac()
+    if model == "bergman":
+        return bergman_rhs(**p), bergman_jac(**p)
+    if model == "pk_1cmt":
+        return pk_rhs(**p), pk_jac(**p)
+    if model == "windkessel":
+        return windkessel_rhs(p["R"], p["C"], p["P_venous"], p["heart_rate"]), windkessel_jac(p["R"], p["C"])
+    return hodgkin_huxley_rhs(**p), None
@@ -0,0 +1,269 @@
+"""
+Binary EquaLab - Sensibilidad directa (forward) de los modelos bio
+∂y/∂p a lo largo del tiempo en una sola integración, sin diferencias finitas.
+
+Para dy/dt = f(t, y, p) la matriz S = ∂y/∂p (n × m) cumple
+
+    dS/dt = ∂f/∂y · S + ∂f/∂p,    S(t0) = ∂y0/∂p
+
+y se integra junto con el estado como un único sistema aumentado de
+n + n·m ecuaciones. Las expresiones de f son las de services/bio_models y
+services/pti_model escritas en SymPy: ∂f/∂y y ∂f/∂p salen de derivar
+simbólicamente, y el sistema aumentado se lambdifica entero con CSE (una
+llamada por evaluación del RHS). Se compila una vez por (modelo, parámetros)
+y se guarda en `compiled_cache`.
+
+Lo que no es derivable queda como entrada numérica u(t) fuera de la
+derivación: el flujo aórtico del Windkessel (la frecuencia cardiaca no es
+parámetro de sensibilidad) y, en PTI, los factores de tratamiento. PTI es
+solo la parte determinista: sin hemorragia ni infección estocásticas y sin el
+recorte P ≥ 0 del stepper.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services import bio_models, pti_model
+from services.compiled_functions import compiled_cache
+from services.ode_integrators import (ADAPTIVE_METHODS, FixedStepIntegrator, n_fixed_steps,
+                                      solve_ivp)
+
+
+# ─── Modelos en SymPy ──────────────────────────────────────────────────────────
+# Cada función recibe los símbolos por nombre (estados, parámetros, entradas y t)
+# y devuelve las expresiones de dy/dt en el orden de los estados.
+
+def _glucose(s, sp):
+    G, X, I = s["G"], s["X"], s["I"]
+    return [-(s["p1"] + X) * G + s["p1"] * s["Gb"],
+            -s["p2"] * X + s["p3"] * (I - s["Ib"]),
+            -s["n"] * (I - s["Ib"])]
+
+
+def _pk(s, sp):
+    A = s["A_gut"]
+    return [-s["ka"] * A, s["ka"] * A / s["Vd"] - s["ke"] * s["C"]]
+
+
+def _pk_mm(s, sp):
+    A, C = s["A_gut"], s["C"]
+    return [-s["ka"] * A, s["ka"] * A / s["Vd"] - s["Vmax"] * C / (s["Km"] + C)]
+
+
+def _windkessel(s, sp):
+    return [(s["Q"] - (s["P"] - s["P_venous"]) / s["R"]) / s["C"]]
+
+
+def _neuron(s, sp):
+    V, m, h, n = s["V"], s["m"], s["h"], s["n"]
+    # Mismas tasas que bio_models.hh_rates (con el 1e-7 que evita el 0/0)
+    a_m = 0.1 * (V + 40) / (1 - (1e-7 + sp.exp(-(V + 40) / 10)))
+    b_m = 4.0 * sp.exp(-(V + 65) / 18)
+    a_h = 0.07 * sp.exp(-(V + 65) / 20)
+    b_h = 1.0 / (1 + sp.exp(-(V + 35) / 10))
+    a_n = 0.01 * (V + 55) / (1 - (1e-7 + sp.exp(-(V + 55) / 10)))
+    b_n = 0.125 * sp.exp(-(V + 65) / 80)
+    I_ion = (s["g_Na"] * m**3 * h * (V - s["E_Na"]) + s["g_K"] * n**4 * (V - s["E_K"])
+             + s["g_L"] * (V - s["E_L"]))
+    return [(s["I_ext"] - I_ion) / s["C_m"],
+            a_m * (1 - m) - b_m * m,
+            a_h * (1 - h) - b_h * h,
+            a_n * (1 - n) - b_n * n]
+
+
+def _pti(s, sp):
+    P, A, t = s["P"], s["A"], s["t"]
+    Pc2 = pti_model.P_CARRYING ** 2
+    production = s["production_rate"] * (1.0 + 1.5 * Pc2 / (Pc2 + P**2))
+    exhausted = sp.Piecewise((sp.Max(0.3, 1.0 - 0.03 * (t - 7)), (P < 15000) & (t > 7)), (1.0, True))
+    immune = s["destruction_rate"] * A * P / (s["Km"] + sp.Piecewise((P, P > 1), (1.0, True)))
+    severity = sp.Piecewise((((20000 - P) / 20000) ** 2 * (1.0 + 3.0 * (10000 - P) / 10000), P < 10000),
+                            (((20000 - P) / 20000) ** 2, P < 20000), (0.0, True))
+    dP = (production * exhausted * s["u_cushing"] - P / pti_model.LIFESPAN
+          - immune * s["u_dest"] - 5000.0 * severity)
+    dA = s["antibody_production"] * s["u_ab"] - 0.693 / s["antibody_half_life"] * A
+    return [dP, dA]
+
+
+def _windkessel_inputs(values):
+    heart_rate = values["heart_rate"]
+    return lambda t: [bio_models.cardiac_flow(t, heart_rate)]
+
+
+def _pti_inputs(values):
+    # Tratamiento constante: días de prednisona = t, sin rebote (prev_treatment = treatment)
+    p = pti_model.pti_params(values, 1)
+    f_dest, f_ab = float(p["f_dest"][0]), float(p["f_ab"][0])
+    cushing_dose = bool(p["cushing_dose"][0])
+    return lambda t: [f_dest, f_ab, 0.7 if cushing_dose and t > 14 else 1.0]
+
+
+@dataclass(frozen=True)
+class SensitivityModel:
+    states: Tuple[str, ...]
+    params: Tuple[str, ...]                  # parámetros derivables
+    equations: Callable = field(repr=False)
+    inputs: Tuple[str, ...] = ()             # entradas numéricas u(t), no derivadas
+    make_inputs: Optional[Callable] = field(default=None, repr=False)
+    dosed: bool = False                      # dosis orales: A_gut += dose·F en cada toma
+
+
+SENSITIVITY_MODELS = {
+    "glucose": SensitivityModel(("G", "X", "I"), ("p1", "p2", "p3", "Gb", "Ib", "n"), _glucose),
+    "pk": SensitivityModel(("A_gut", "C"), ("ka", "ke", "Vd", "F"), _pk, dosed=True),
+    "pk_mm": SensitivityModel(("A_gut", "C"), ("ka", "Vmax", "Km", "Vd", "F"), _pk_mm, dosed=True),
+    "windkessel": SensitivityModel(("P",), ("R", "C", "P_venous"), _windkessel,
+                                   ("Q",), _windkessel_inputs),
+    "neuron": SensitivityModel(("V", "m", "h", "n"),
+                               ("C_m", "g_Na", "g_K", "g_L", "E_Na", "E_K", "E_L", "I_ext"), _neuron),
+    "pti": SensitivityModel(("P", "A"), ("production_rate", "destruction_rate", "Km",
+                                         "antibody_production", "antibody_half_life"), _pti,
+                            ("u_dest", "u_ab", "u_cushing"), _pti_inputs),
+}
+
+
+# ─── Sistema aumentado compilado ───────────────────────────────────────────────
+
+@dataclass
+class SensitivitySystem:
+    """Estado + sensibilidades lambdificado (inmutable, compartido vía caché)."""
+    model: str
+    states: Tuple[str, ...]
+    params: Tuple[str, ...]                  # columnas de S, en este orden
+    _f: Callable = field(repr=False)
+
+    def rhs(self, values: Dict[str, float], inputs: Optional[Callable] = None):
+        """f(t, z) del sistema aumentado z = [y, S.ravel()] con los parámetros fijados."""
+        spec = SENSITIVITY_MODELS[self.model]
+        p = [float(values[k]) for k in spec.params]
+        F = self._f
+
+        def f(t, z):
+            u = inputs(t) if inputs is not None else []
+            try:
+                return np.array(F(t, *z.tolist(), *p, *u), dtype=float)
+            except (ArithmeticError, ValueError):
+                # exp desbordado en un paso de prueba: inf para que el integrador lo rechace
+                return np.full(z.shape, np.inf)
+        return f
+
+
+def _build(model: str, params: Tuple[str, ...]) -> SensitivitySystem:
+    import sympy as sp
+
+    spec = SENSITIVITY_MODELS[model]
+    names = ("t",) + spec.states + spec.params + spec.inputs
+    s = {name: sp.Symbol(name, real=True) for name in names}
+    f = sp.Matrix(spec.equations(s, sp))
+    n, m = len(spec.states), len(params)
+    S = sp.Matrix(n, m, lambda i, j: sp.Symbol(f"S_{i}_{j}", real=True))
+    dS = f.jacobian([s[k] for k in spec.states]) * S + f.jacobian([s[k] for k in params])
+
+    args = [s["t"]] + [s[k] for k in spec.states] + list(S) + [s[k] for k in spec.params + spec.inputs]
+    # Piecewise → `a if c else b` y Max → max: todo cabe en `math` (floats, sin ufuncs)
+    F = sp.lambdify(args, list(f) + list(dS), modules="math", cse=True)
+    return SensitivitySystem(model=model, states=spec.states, params=params, _f=F)
+
+
+def compile_sensitivity(model: str, params: Optional[Sequence[str]] = None) -> SensitivitySystem:
+    """Sistema aumentado desde caché; solo se deriva/lambdifica la primera vez."""
+    if model not in SENSITIVITY_MODELS:
+        raise ValueError(f"Modelo sin sensibilidad: '{model}'. Use {list(SENSITIVITY_MODELS)}")
+    allowed = SENSITIVITY_MODELS[model].params
+    params = tuple(params) if params else allowed
+    unknown = [k for k in params if k not in allowed]
+    if unknown:
+        raise ValueError(f"Parámetros sin sensibilidad en '{model}': {unknown}. Use {list(allowed)}")
+    if len(set(params)) != len(params):
+        raise ValueError("Parámetros repetidos")
+    return compiled_cache.get_or_compile(("sensitivity", model, params), lambda: _build(model, params))
+
+
+# ─── Integración ───────────────────────────────────────────────────────────────
+
+def forward_sensitivity(model: str, values: Dict[str, float], y0, t_start: float, t_end: float,
+                        dt: float, params: Optional[Sequence[str]] = None,
+                        method: str = "RungeKutta4", rtol: float = 1e-6, atol: float = 1e-9,
+                        doses: Sequence[Tuple[float, float]] = ()):
+    """
+    Integra estado y sensibilidades en la malla t_start + k·dt (más t_end).
+
+    `values` trae todos los valores numéricos del modelo (también los no
+    derivables, p. ej. heart_rate o treatment). `doses` = [(t, mg)] solo en
+    los modelos PK: y0 no incluye la primera toma y cada una suma mg·F a
+    A_gut (y mg a ∂A_gut/∂F). Devuelve (t (n_t,), Y (n_t, n), S (n_t, n, m), stats).
+    """
+    system = compile_sensitivity(model, params)
+    spec = SENSITIVITY_MODELS[model]
+    n, m = len(system.states), len(system.params)
+    y0 = np.asarray(y0, dtype=float)
+    if y0.shape != (n,):
+        raise ValueError(f"y0 debe tener {n} valores {list(system.states)}")
+    if doses and not spec.dosed:
+        raise ValueError(f"'{model}' no admite dosis")
+
+    inputs = spec.make_inputs(values) if spec.make_inputs else None
+    f = system.rhs(values, inputs)
+    z = np.concatenate([y0, np.zeros(n * m)])
+    F_col = system.params.index("F") if "F" in system.params else None
+
+    def dose(z, mg):
+        z[0] += mg * values.get("F", 1.0)
+        if F_col is not None:
+            z[n + F_col] += mg                  # S[0, F] = ∂A_gut/∂F
+
+    # Tramos entre dosis; una dosis en t_start forma parte del estado inicial
+    pending = sorted(doses)
+    while pending and pending[0][0] <= t_start:
+        dose(z, pending.pop(0)[1])
+    bounds = sorted({t for t, _ in pending if t < t_end})
+    segments = list(zip([t_start] + bounds, bounds + [t_end]))
+
+    adaptive = method in ADAPTIVE_METHODS
+    integrator = None if adaptive else FixedStepIntegrator(f, z.shape, method)
+    stats = {"method": method, "n_steps": 0, "n_rhs": 0}
+    t_parts, z_parts = [], []
+    for i, (t0, t1) in enumerate(segments):
+        steps = n_fixed_steps(t0, t1, dt)
+        if adaptive:
+            grid = np.append(t0 + dt * np.arange(steps), t1)
+            sol = solve_ivp(f, t0, t1, z, method=method, rtol=rtol, atol=atol, t_eval=grid)
+            t_seg, z_seg = sol.t, sol.y
+            stats["n_steps"] += sol.n_steps
+            stats["n_rhs"] += sol.n_rhs
+        else:
+            t_seg, z_seg = integrator.integrate(t0, t1, z, dt)
+            stats["n_steps"] += steps
+            stats["n_rhs"] += steps * (1 if method == "Euler" else 4)
+        last = i == len(segments) - 1
+        t_parts.append(t_seg if last else t_seg[:-1])
+        z_parts.append(z_seg if last else z_seg[:-1])
+        z = z_seg[-1].copy()
+        if not last:
+            for t_dose, mg in [d for d in pending if d[0] == t1]:
+                dose(z, mg)
+
+    t_arr, Z = np.concatenate(t_parts), np.concatenate(z_parts)
+    stats["n_equations"] = n + n * m
+    return t_arr, Z[:, :n], Z[:, n:].reshape(-1, n, m), stats
+
+
+def normalized_sensitivity(Y: np.ndarray, S: np.ndarray, values: Dict[str, float],
+                           params: Sequence[str]) -> np.ndarray:
+    """
+    Coeficientes (p_j / y_i)·∂y_i/∂p_j: cambio relativo del estado por cambio
+    relativo del parámetro. Donde |y_i| es despreciable frente a su máximo en
+    la trayectoria el cociente no tiene sentido y se devuelve 0.
+    """
+    p = np.array([float(values[k]) for k in params])
+    scale = np.abs(Y).max(axis=0, keepdims=True)
+    valid = np.abs(Y) > 1e-9 * scale
+    safe = np.where(valid, Y, 1.0)
+    return np.where(valid[:, :, None], S * p / safe[:, :, None], 0.0)
+
+
+def sensitivity_series(S: np.ndarray, states: Sequence[str], params: Sequence[str]) -> Dict[str, Dict[str, List[float]]]:
+    """{parámetro: {estado: serie}} a partir de S (n_t, n, m)."""
+    return {p: {s: S[:, i, j].tolist() for i, s in enumerate(states)} for j, p in enumerate(params)}
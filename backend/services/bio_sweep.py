@@ -0,0 +1,147 @@
+"""
+Binary EquaLab - Barridos de parámetros de Séptima
+Expansión de escenarios y métricas resumen por escenario.
+
+Un barrido se integra como un único lote (batch, n_states): aquí solo se
+construyen las columnas de parámetros (batch,) y se reducen las trayectorias
+(n_t, batch, n_states) a métricas, todo sobre arrays.
+"""
+
+import itertools
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services import pti_model
+
+MAX_SWEEP_SCENARIOS = 10_000
+MAX_SWEEP_CELLS = 50_000_000     # n_t × batch × n_states guardados (≈ 400 MB)
+
+STATE_NAMES = {
+    "glucose": ("G", "X", "I"),
+    "windkessel": ("P",),
+    "neuron": ("V", "m", "h", "n"),
+    "pk": ("A_gut", "C"),
+    "pti": ("P", "A"),
+}
+
+
+def expand_scenarios(grid: Optional[Dict[str, Sequence[float]]] = None,
+                     overrides: Optional[List[Dict[str, float]]] = None) -> List[Dict[str, float]]:
+    """
+    Producto cartesiano de `grid` combinado con cada entrada de `overrides`.
+
+    Solo grid → todas las combinaciones; solo overrides → la lista tal cual;
+    ambos → cada combinación del grid con cada override encima.
+    """
+    combos: List[Dict[str, float]] = [{}]
+    if grid:
+        keys = list(grid)
+        sizes = [len(grid[k]) for k in keys]
+        if any(s == 0 for s in sizes):
+            raise ValueError("Cada eje del grid necesita al menos un valor")
+        total = int(np.prod(sizes, dtype=np.int64))
+        if total > MAX_SWEEP_SCENARIOS:
+            raise ValueError(f"El grid genera {total} escenarios (máx {MAX_SWEEP_SCENARIOS})")
+        combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    if overrides:
+        combos = [{**c, **o} for c in combos for o in overrides]
+    if len(combos) > MAX_SWEEP_SCENARIOS:
+        raise ValueError(f"Demasiados escenarios: {len(combos)} (máx {MAX_SWEEP_SCENARIOS})")
+    return combos
+
+
+def scenario_columns(scenarios: List[Dict[str, float]], base: Dict[str, float],
+                     allowed: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Columnas (batch,) para las claves barridas; el resto queda escalar (base).
+    Las claves fuera de `allowed` son un error, no se ignoran en silencio.
+    """
+    keys = sorted({k for s in scenarios for k in s})
+    unknown = [k for k in keys if k not in allowed]
+    if unknown:
+        raise ValueError(f"Parámetros no barribles: {unknown}. Use {sorted(allowed)}")
+    values = dict(base)
+    for k in keys:
+        values[k] = np.array([float(s.get(k, base[k])) for s in scenarios])
+    return values
+
+
+# ─── Métricas ──────────────────────────────────────────────────────────────────
+
+def _trapezoid(t: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """∫ y dt por trapecios a lo largo del eje 0 (y: (n_t, batch))."""
+    dt = np.diff(t)[:, None]
+    return (dt * 0.5 * (y[1:] + y[:-1])).sum(axis=0)
+
+
+def _first_time(t: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Primer t donde `mask` (n_t, batch) es cierto; NaN si nunca."""
+    hit = mask.any(axis=0)
+    return np.where(hit, t[np.argmax(mask, axis=0)], np.nan)
+
+
+def summary_metrics(model: str, t: np.ndarray, Y: np.ndarray, context: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+    """
+    Métricas por escenario a partir de Y (n_t, batch, n_states).
+
+    Comunes: final/min/max de cada estado. Específicas del modelo:
+      glucose    → pico de G, AUC de G, tiempo hasta volver a ≤ Gb·1.1
+      windkessel → sistólica/diastólica/media del último ciclo
+      neuron     → nº de espigas (cruces de 0 mV) y frecuencia (Hz)
+      pk         → Tmax y AUC de C (Cmax = C_max)
+      pti        → P mínimo, tiempo hasta recuperar ≥ 150k, días < 20k, desenlace
+    """
+    context = context or {}
+    out: Dict[str, np.ndarray] = {}
+    for i, name in enumerate(STATE_NAMES[model]):
+        s = Y[..., i]
+        out[f"{name}_final"] = s[-1]
+        out[f"{name}_min"] = s.min(axis=0)
+        out[f"{name}_max"] = s.max(axis=0)
+
+    if model == "glucose":
+        G = Y[..., 0]
+        Gb = np.broadcast_to(context.get("Gb", 80.0), G.shape[1:])
+        out["G_peak_time"] = t[np.argmax(G, axis=0)]
+        out["G_auc"] = _trapezoid(t, G)
+        out["G_recovery_time"] = _first_time(t, G <= 1.1 * Gb)
+    elif model == "windkessel":
+        P = Y[..., 0]
+        cycle = 60.0 / np.broadcast_to(context.get("heart_rate", 75.0), P.shape[1:])
+        last = t[:, None] >= t[-1] - cycle
+        out["systolic"] = np.where(last, P, -np.inf).max(axis=0)
+        out["diastolic"] = np.where(last, P, np.inf).min(axis=0)
+        w = np.where(last[1:] & last[:-1], np.diff(t)[:, None], 0.0)
+        out["mean_pressure"] = (w * 0.5 * (P[1:] + P[:-1])).sum(axis=0) / np.maximum(w.sum(axis=0), 1e-300)
+    elif model == "neuron":
+        V = Y[..., 0]
+        spikes = ((V[:-1] < 0.0) & (V[1:] >= 0.0)).sum(axis=0)
+        duration_s = (t[-1] - t[0]) / 1000.0
+        out["spike_count"] = spikes
+        out["firing_rate_hz"] = spikes / duration_s if duration_s > 0 else np.zeros_like(spikes, dtype=float)
+    elif model == "pk":
+        C = Y[..., 1]
+        out["Tmax"] = t[np.argmax(C, axis=0)]
+        out["AUC"] = _trapezoid(t, C)
+    elif model == "pti":
+        P = Y[..., 0]
+        out["time_to_recovery"] = pti_model.recovery_times(t, P)
+        dt = np.diff(t)[:, None]
+        out["days_below_20k"] = (dt * (P[:-1] < 20000.0)).sum(axis=0)
+        for key in ("is_dead", "has_cushing"):
+            if key in context:
+                out[key] = context[key]
+    return out
+
+
+def metrics_to_lists(metrics: Dict[str, np.ndarray]) -> Dict[str, list]:
+    """Columnas JSON: NaN → None, enteros y booleanos conservan su tipo."""
+    out = {}
+    for key, arr in metrics.items():
+        arr = np.asarray(arr)
+        if arr.dtype.kind == "f":
+            out[key] = [None if not np.isfinite(v) else v for v in arr.tolist()]
+        else:
+            out[key] = arr.tolist()
+    return out
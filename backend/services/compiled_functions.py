@@ -0,0 +1,59 @@
+"""
+Binary EquaLab - Caché de funciones compiladas
+Evita re-parsear y re-lambdificar la misma expresión en cada petición.
+
+Parsear con SymPy + `lambdify` cuesta de 5 a 50 ms; evaluar la función
+resultante sobre miles de puntos cuesta menos de 1 ms. Al hacer pan/zoom el
+frontend repite las mismas expresiones, así que la clave es (tipo, expresión,
+variables) y el valor es la función NumPy lista para llamar.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class CompiledFunctionCache:
+    """LRU thread-safe de funciones compiladas."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compile(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        """Devuelve el valor cacheado para `key` o lo construye con `builder()`."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+        # Compilar fuera del lock: SymPy puede tardar y no debe bloquear a otros
+        value = builder()
+        with self._lock:
+            self.misses += 1
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize,
+                    "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Instancia compartida por los routers
+compiled_cache = CompiledFunctionCache()
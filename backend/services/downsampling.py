@@ -0,0 +1,184 @@
+"""
+Binary EquaLab - Downsampling de series
+Reducción de puntos que preserva la forma de la curva para gráficos.
+
+Un gráfico de ~1000 px no necesita 4000 muestras por estado, pero los picos
+(potenciales de acción, ondas R del ECG, asíntotas) deben sobrevivir.
+
+Métodos:
+  - lttb:   Largest-Triangle-Three-Buckets (Steinarsson, 2013)
+  - minmax: mínimo y máximo de cada bucket (totalmente vectorizado)
+
+Todas las series de un mismo resultado comparten los índices elegidos, de modo
+que `t` y cada estado siguen alineados.
+
+Huecos (NaN/inf, p. ej. una asíntota): ambos métodos los marcan sin salirse
+del presupuesto. LTTB da prioridad a un punto no finito en cada bucket que lo
+contenga (dos huecos dentro del mismo bucket se funden en uno); minmax reduce
+cada racha no finita a sus bordes y los descuenta de `max_points`.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def _as_series(ys) -> np.ndarray:
+    """Normaliza `ys` a una matriz (n_series, n) de float64."""
+    arr = np.asarray(ys, dtype=float)
+    if arr.ndim == 1:
+        arr = arr[None, :]
+    return arr
+
+
+def _normalized(ys: np.ndarray) -> np.ndarray:
+    """Escala cada serie a [0, 1] para que ninguna domine el área (NaN → 0)."""
+    finite = np.isfinite(ys)
+    lo = np.min(np.where(finite, ys, np.inf), axis=1, keepdims=True)
+    hi = np.max(np.where(finite, ys, -np.inf), axis=1, keepdims=True)
+    span = hi - lo
+    span = np.where(np.isfinite(span) & (span > 0), span, 1.0)
+    lo = np.where(np.isfinite(lo), lo, 0.0)
+    return np.where(finite, (ys - lo) / span, 0.0)
+
+
+def lttb_indices(x, ys, max_points: int) -> np.ndarray:
+    """
+    Índices seleccionados por LTTB.
+
+    Con varias series el área del triángulo se suma sobre todas (normalizadas),
+    así un pico en cualquier estado reclama su bucket. Un bucket con algún
+    punto no finito elige uno de ellos, de modo que ningún hueco desaparece
+    y el resultado sigue teniendo exactamente `max_points` índices.
+    """
+    x = np.asarray(x, dtype=float)
+    ys = _as_series(ys)
+    n = x.shape[0]
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    bad = ~np.isfinite(ys).all(axis=0)
+    yn = _normalized(ys)
+
+    # Buckets interiores: [edges[i], edges[i+1]) sobre los puntos 1..n-2
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:edges[-1]], edges[:-1]) / counts
+    avg_y = np.add.reduceat(yn[:, :edges[-1]], edges[:-1], axis=1) / counts
+
+    out = np.empty(max_points, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    last = max_points - 3
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i < last:
+            cx, cy = avg_x[i + 1], avg_y[:, i + 1]
+        else:
+            cx, cy = x[-1], yn[:, -1]
+        ax, ay = x[a], yn[:, a]
+        area = np.abs(
+            (ax - cx) * (yn[:, lo:hi] - ay[:, None])
+            - (ax - x[lo:hi]) * (cy - ay)[:, None]
+        ).sum(axis=0)
+        area[bad[lo:hi]] = np.inf
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _gap_edges(bad: np.ndarray) -> np.ndarray:
+    """Primer y último índice de cada racha de puntos no finitos."""
+    step = np.diff(bad.astype(np.int8))
+    starts = np.flatnonzero(step == 1) + 1
+    ends = np.flatnonzero(step == -1)
+    if bad[0]:
+        starts = np.r_[0, starts]
+    if bad[-1]:
+        ends = np.r_[ends, bad.size - 1]
+    return np.unique(np.concatenate([starts, ends]))
+
+
+def _thin(idx: np.ndarray, k: int) -> np.ndarray:
+    """`k` elementos de `idx` repartidos uniformemente (conserva los extremos)."""
+    if len(idx) <= k:
+        return idx
+    return idx[np.unique(np.linspace(0, len(idx) - 1, k).round().astype(np.int64))]
+
+
+def minmax_indices(x, ys, max_points: int) -> np.ndarray:
+    """
+    Índices del mínimo y máximo de cada serie en cada bucket.
+
+    Las rachas no finitas entran por sus bordes y consumen presupuesto (como
+    mucho la mitad); el resultado nunca supera `max_points` índices.
+    """
+    ys = _as_series(ys)
+    n_series, n = ys.shape
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+
+    # Huecos (NaN/inf) se conservan por sus bordes para no unir ramas separadas
+    bad = np.zeros(n, dtype=bool)
+    bad[1:n - 1] = ~np.isfinite(ys[:, 1:n - 1]).all(axis=0)
+    gaps = _thin(_gap_edges(bad), (max_points - 2) // 2) if bad.any() else np.empty(0, np.int64)
+
+    # Cada bucket aporta hasta 2 puntos por serie; reservamos extremos y huecos
+    n_buckets = max(1, (max_points - 2 - len(gaps)) // (2 * n_series))
+    size = int(np.ceil((n - 2) / n_buckets))
+    n_buckets = int(np.ceil((n - 2) / size))
+    inner = ys[:, 1:n - 1]
+    pad = n_buckets * size - inner.shape[1]
+
+    lo_vals = np.where(np.isfinite(inner), inner, np.inf)
+    hi_vals = np.where(np.isfinite(inner), inner, -np.inf)
+    lo_vals = np.pad(lo_vals, ((0, 0), (0, pad)), constant_values=np.inf)
+    hi_vals = np.pad(hi_vals, ((0, 0), (0, pad)), constant_values=-np.inf)
+    lo_vals = lo_vals.reshape(n_series, n_buckets, size)
+    hi_vals = hi_vals.reshape(n_series, n_buckets, size)
+
+    base = (np.arange(n_buckets) * size)[None, :]
+    picks = np.concatenate([
+        (base + lo_vals.argmin(axis=2)).ravel(),
+        (base + hi_vals.argmax(axis=2)).ravel(),
+    ]) + 1
+    picks = picks[(picks < n - 1) & ~bad[np.minimum(picks, n - 1)]]
+
+    idx = np.unique(np.concatenate([[0, n - 1], picks, gaps]))
+    if len(idx) > max_points:
+        # Muchas series para el presupuesto: se reparte lo elegido
+        idx = _thin(idx, max_points)
+    return idx
+
+
+def downsample_indices(x, ys, max_points: Optional[int], method: str = "lttb") -> np.ndarray:
+    """Índices a conservar para dibujar `ys` contra `x` con ≤ `max_points`."""
+    n = len(x)
+    if not max_points or max_points >= n:
+        return np.arange(n)
+    if method == "minmax":
+        return minmax_indices(x, ys, max_points)
+    if method == "lttb":
+        return lttb_indices(x, ys, max_points)
+    raise ValueError(f"Método de downsampling desconocido: '{method}'. Use {DOWNSAMPLE_METHODS}")
+
+
+def downsample(x, ys, max_points: Optional[int], method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """Devuelve (x, ys) reducidos; `ys` conserva su forma (n,) o (n_series, n)."""
+    x = np.asarray(x, dtype=float)
+    arr = np.asarray(ys, dtype=float)
+    idx = downsample_indices(x, arr, max_points, method)
+    return x[idx], arr[..., idx]
+
+
+def downsample_rows(t: Sequence[float], rows: Sequence[Sequence[float]],
+                    max_points: Optional[int], method: str = "lttb") -> Tuple[list, list]:
+    """Variante para resultados por filas: `rows[i]` es el estado completo en `t[i]`."""
+    if not max_points or len(t) <= max_points:
+        return list(t), [list(r) for r in rows]
+    t_arr = np.asarray(t, dtype=float)
+    y_arr = np.asarray(rows, dtype=float)
+    idx = downsample_indices(t_arr, y_arr.T, max_points, method)
+    return t_arr[idx].tolist(), y_arr[idx].tolist()
@@ -0,0 +1,155 @@
+"""
+Binary EquaLab - Síntesis de ECG por plantillas de latido
+Genera la señal de /bio/ecg (y su streaming) sin recorrer muestra a muestra.
+
+Cada latido es la misma secuencia de ondas P-QRS-T en fracción de ciclo
+(escaladas con la frecuencia), así que la señal es periódica en muestras:
+con un periodo de fs·60/bpm = p/q muestras, el patrón se repite exacto cada
+p muestras (q latidos). La plantilla de esas p muestras se calcula una vez
+por (bpm, sample_rate, derivación) con máscaras vectorizadas y se cachea;
+una señal de cualquier duración es `np.take(plantilla, k mod p)`.
+
+La plantilla tiene como mucho MAX_TEMPLATE_SAMPLES muestras (con menos
+latidos si hace falta) y la caché está acotada en bytes. Si la plantilla no
+compensa (más larga que la señal pedida) las fases se evalúan directamente:
+mismo resultado, bit a bit, sin reservar ni cachear nada.
+
+`ecg_chunks` recorre la señal por bloques con memoria constante (monitor en
+vivo de duración indefinida).
+"""
+
+from fractions import Fraction
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from services.simulation_cache import SimulationCache
+
+# Morfología a 72 lpm en fracción de ciclo (se escala con 72/bpm) y amplitud (mV)
+WAVES = (
+    # nombre, inicio, fin, amplitud (semiseno; constante en los segmentos isoeléctricos)
+    ("P", 0.00, 0.09, 0.12),
+    ("PR", 0.09, 0.16, 0.005),
+    ("Q", 0.16, 0.19, -0.07),
+    ("R", 0.19, 0.25, 1.2),
+    ("S", 0.25, 0.30, -0.12),
+    ("ST", 0.30, 0.38, 0.01),
+    ("T", 0.38, 0.62, 0.28),
+)
+ISOELECTRIC = ("PR", "ST")
+
+# Ganancia de cada onda respecto a DII (aVR ≈ DII invertida; V1: r pequeña, S profunda)
+LEAD_GAINS = {
+    "II": {},
+    "aVR": {"P": -0.8, "Q": 0.0, "R": -0.7, "S": -1.5, "T": -0.8, "PR": -1.0, "ST": -1.0},
+    "V1": {"P": 0.5, "Q": 0.0, "R": 0.25, "S": 8.0, "T": -0.5},
+}
+
+MAX_TEMPLATE_BEATS = 64      # Latidos por plantilla al aproximar p/q (deriva < 1/64 muestra)
+MAX_TEMPLATE_SAMPLES = 1 << 18              # 2 MB por plantilla (float64)
+TEMPLATE_CACHE_BYTES = 32 * 1024 * 1024
+
+_templates = SimulationCache(max_bytes=TEMPLATE_CACHE_BYTES)
+
+
+def ecg_intervals(bpm: float) -> dict:
+    """Intervalos PR, QRS, QT y RR (ms) de la morfología a `bpm`."""
+    period = 60.0 / bpm
+    bpm_factor = 72.0 / bpm
+    return {
+        "PR_ms": round(0.16 * bpm_factor * period * 1000, 1),
+        "QRS_ms": round((0.30 - 0.16) * bpm_factor * period * 1000, 1),
+        "QT_ms": round((0.62 - 0.16) * bpm_factor * period * 1000, 1),
+        "RR_ms": round(period * 1000, 1),
+    }
+
+
+def beat_waveform(phase: np.ndarray, bpm: float, lead: str = "II") -> np.ndarray:
+    """Voltaje (mV) en la fase `phase` ∈ [0, 1) del ciclo; segmentos contiguos y disjuntos."""
+    if lead not in LEAD_GAINS:
+        raise ValueError(f"Derivación desconocida: '{lead}'. Use {list(LEAD_GAINS)}")
+    gains = LEAD_GAINS[lead]
+    bpm_factor = 72.0 / bpm
+    conditions, values = [], []
+    for name, start, end, amplitude in WAVES:
+        start, end = start * bpm_factor, end * bpm_factor
+        amplitude *= gains.get(name, 1.0)
+        conditions.append((phase >= start) & (phase < end))
+        if name in ISOELECTRIC:
+            values.append(np.full_like(phase, amplitude))
+        else:
+            values.append(amplitude * np.sin(np.pi * (phase - start) / (end - start)))
+    # Fuera de las ondas (segmento TP, diástole): 0
+    return np.select(conditions, values, default=0.0)
+
+
+def _repeat(bpm: float, sample_rate: int) -> Tuple[int, int]:
+    """(p, q): la señal muestreada se repite cada p muestras = q latidos."""
+    if bpm <= 0 or sample_rate <= 0:
+        raise ValueError("bpm y sample_rate deben ser positivos")
+    samples_per_beat = Fraction(60 * sample_rate) / Fraction(bpm)
+    # Menos latidos (más deriva) antes que una plantilla de más de MAX_TEMPLATE_SAMPLES
+    max_beats = int(min(MAX_TEMPLATE_BEATS, max(1, MAX_TEMPLATE_SAMPLES // samples_per_beat)))
+    ratio = samples_per_beat.limit_denominator(max_beats)
+    return ratio.numerator, ratio.denominator
+
+
+def _phase(k: np.ndarray, p: int, q: int) -> np.ndarray:
+    """Fase exacta de la muestra k: (k·q mod p) / p."""
+    return (np.asarray(k, dtype=np.int64) * q % p) / p
+
+
+def beat_template(bpm: float, sample_rate: int, lead: str = "II") -> np.ndarray:
+    """Plantilla de p muestras (q latidos completos), de solo lectura."""
+    p, q = _repeat(bpm, sample_rate)
+    if p > MAX_TEMPLATE_SAMPLES:
+        raise ValueError(f"Latido de más de {MAX_TEMPLATE_SAMPLES} muestras: reduzca sample_rate o aumente bpm")
+    key = f"{bpm!r}|{sample_rate}|{lead}"
+    entry = _templates.get(key)
+    if entry is None:
+        entry = _templates.put(key, {"ecg": beat_waveform(_phase(np.arange(p), p, q), bpm, lead)})
+    return entry[0]["ecg"]
+
+
+def _uses_template(bpm: float, sample_rate: int, n: Optional[int]) -> bool:
+    """La plantilla compensa si cabe en el tope y la señal es al menos igual de larga."""
+    p, _ = _repeat(bpm, sample_rate)
+    return p <= MAX_TEMPLATE_SAMPLES and (n is None or p <= n)
+
+
+def _samples(bpm: float, sample_rate: int, start: int, n: int, lead: str, noise_level: float,
+             rng: Optional[np.random.Generator], template: bool) -> np.ndarray:
+    k = np.arange(start, start + n)
+    if template:
+        table = beat_template(bpm, sample_rate, lead)
+        ecg = np.take(table, k % len(table))
+    else:
+        ecg = beat_waveform(_phase(k, *_repeat(bpm, sample_rate)), bpm, lead)
+    if noise_level > 0:
+        ecg += (rng or np.random.default_rng()).normal(0.0, noise_level, n)
+    return ecg
+
+
+def synthesize(bpm: float, sample_rate: int, start: int, n: int, lead: str = "II",
+               noise_level: float = 0.0, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Muestras [start, start + n) de la señal (ruido gaussiano opcional)."""
+    return _samples(bpm, sample_rate, start, n, lead, noise_level, rng,
+                    _uses_template(bpm, sample_rate, n))
+
+
+def ecg_chunks(bpm: float, sample_rate: int, chunk_samples: int, lead: str = "II",
+               noise_level: float = 0.0, duration_s: Optional[float] = None,
+               rng: Optional[np.random.Generator] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    (índice de la primera muestra, bloque) sucesivos. Sin `duration_s` no
+    termina; la memoria no crece con la duración (plantilla acotada + un bloque).
+    """
+    rng = rng or np.random.default_rng()
+    total = None if duration_s is None else int(duration_s * sample_rate)
+    # La plantilla se decide por la duración total, no por bloque
+    template = _uses_template(bpm, sample_rate, total)
+    start = 0
+    while total is None or start < total:
+        n = chunk_samples if total is None else min(chunk_samples, total - start)
+        yield start, _samples(bpm, sample_rate, start, n, lead, noise_level, rng, template)
+        start += n
@@ -0,0 +1,208 @@
+"""
+Binary EquaLab - Series de Fourier para epiciclos
+Coeficientes de la DFT de un trazo cerrado z = x + iy, todo en NumPy.
+
+Un trazo a mano de 10k puntos produce 10k coeficientes, pero la animación
+solo necesita los dominantes: se ordenan por amplitud con `argsort` y se
+truncan por número (`max_coefficients`) o por energía acumulada
+(`energy_fraction`, Parseval: Σ|c_k|² = potencia media del trazo).
+
+Antes de la DFT el trazo puede suavizarse (1-2-1), interpolarse con
+Catmull-Rom y remuestrearse por longitud de arco a un N fijo.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def points_to_complex(xy) -> np.ndarray:
+    """(N, 2) → (N,) complejo x + iy."""
+    xy = np.asarray(xy, dtype=float)
+    if xy.ndim != 2 or xy.shape[1] != 2:
+        raise ValueError(f"Se esperaba un array (N, 2), recibido {list(xy.shape)}")
+    return xy[:, 0] + 1j * xy[:, 1]
+
+
+def signed_frequencies(n: int) -> np.ndarray:
+    """0, 1, …, ⌊N/2⌋, −(⌈N/2⌉−1), …, −1 (igual que np.fft.fftfreq · N)."""
+    return np.fft.fftfreq(n, d=1.0 / n).round().astype(np.int64)
+
+
+def fourier_coefficients(z, max_coefficients: Optional[int] = None,
+                         energy_fraction: Optional[float] = None,
+                         signed: bool = False):
+    """
+    DFT normalizada de `z` ordenada por amplitud descendente.
+
+    Devuelve (freq, amplitude, phase, energy_kept). Con `signed` las
+    frecuencias k > N/2 se expresan como k − N: idénticas en las N muestras,
+    pero el trazo reconstruido con pocos términos no oscila entre muestras,
+    lo que importa en cuanto se descartan coeficientes.
+    """
+    z = np.asarray(z, dtype=np.complex128)
+    n = z.shape[0]
+    if n == 0:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty, empty, 1.0
+
+    c = np.fft.fft(z) / n
+    amp = np.abs(c)
+    order = np.argsort(-amp, kind="stable")
+
+    keep = n
+    if energy_fraction is not None:
+        power = amp[order] ** 2
+        total = power.sum()
+        if total > 0:
+            cum = np.cumsum(power) / total
+            keep = int(np.searchsorted(cum, min(energy_fraction, 1.0) - 1e-12)) + 1
+    if max_coefficients is not None:
+        keep = min(keep, max_coefficients)
+    order = order[:max(keep, 1)]
+
+    freq = signed_frequencies(n)[order] if signed else order.astype(np.int64)
+    power_all = float(np.dot(amp, amp))
+    kept = float(np.dot(amp[order], amp[order]) / power_all) if power_all > 0 else 1.0
+    return freq, amp[order], np.angle(c[order]), kept
+
+
+# ─── Preparación del trazo ─────────────────────────────────────────────────────
+
+def smooth_polyline(xy, iterations: int = 3) -> np.ndarray:
+    """
+    Suavizado 1-2-1 (Laplaciano) sobre un array (N, 2), extremos fijos.
+    Cada iteración es una sola operación vectorizada sobre todo el trazo.
+    """
+    p = np.array(xy, dtype=float)
+    if p.shape[0] < 3:
+        return p
+    for _ in range(max(int(iterations), 0)):
+        p[1:-1] = 0.25 * p[:-2] + 0.5 * p[1:-1] + 0.25 * p[2:]
+    return p
+
+
+def catmull_rom(xy, samples_per_segment: int = 8, closed: bool = False,
+                alpha: float = 0.5) -> np.ndarray:
+    """
+    Spline de Catmull-Rom que pasa por todos los puntos de `xy` (N, 2).
+
+    `alpha` = 0 uniforme, 0.5 centrípeta (sin cúspides ni auto-intersecciones
+    en trazos a mano), 1 cordal. Formulación de Barry-Goldman evaluada para
+    todos los segmentos a la vez: (segmentos, muestras, 2).
+    """
+    p = np.asarray(xy, dtype=float)
+    n = p.shape[0]
+    if n < 2:
+        return p.copy()
+    if closed:
+        ext = np.concatenate([p[-1:], p, p[:2]])
+    else:
+        # Puntos fantasma reflejados para que la curva llegue a los extremos
+        ext = np.concatenate([2 * p[:1] - p[1:2], p, 2 * p[-1:] - p[-2:-1]])
+    n_seg = n if closed else n - 1
+    idx = np.arange(n_seg)
+    p0, p1, p2, p3 = (ext[idx + k][:, None, :] for k in range(4))
+
+    def knot(a, b):
+        d = np.linalg.norm(b - a, axis=-1, keepdims=True) ** alpha
+        return np.maximum(d, 1e-12)
+
+    t0 = np.zeros_like(p0[..., :1])
+    t1 = t0 + knot(p0, p1)
+    t2 = t1 + knot(p1, p2)
+    t3 = t2 + knot(p2, p3)
+
+    m = max(int(samples_per_segment), 1)
+    u = np.linspace(0.0, 1.0, m, endpoint=False)[None, :, None]
+    t = t1 + u * (t2 - t1)
+
+    a1 = ((t1 - t) * p0 + (t - t0) * p1) / (t1 - t0)
+    a2 = ((t2 - t) * p1 + (t - t1) * p2) / (t2 - t1)
+    a3 = ((t3 - t) * p2 + (t - t2) * p3) / (t3 - t2)
+    b1 = ((t2 - t) * a1 + (t - t0) * a2) / (t2 - t0)
+    b2 = ((t3 - t) * a2 + (t - t1) * a3) / (t3 - t1)
+    c = ((t2 - t) * b1 + (t - t1) * b2) / (t2 - t1)
+
+    out = c.reshape(-1, 2)
+    if not closed:
+        out = np.concatenate([out, p[-1:]])
+    return out
+
+
+def resample_arclength(xy, n: int, closed: bool = True) -> np.ndarray:
+    """
+    `n` puntos equiespaciados en longitud de arco sobre la poligonal `xy`.
+
+    El muestreo del ratón es irregular (denso al ir lento, escaso al ir rápido);
+    la DFT asume muestras equiespaciadas en el parámetro, así que sin esto los
+    tramos lentos inflan N y se gastan coeficientes de alta frecuencia.
+    """
+    p = np.asarray(xy, dtype=float)
+    if p.shape[0] < 2 or n < 2:
+        return p.copy()
+    if closed:
+        p = np.concatenate([p, p[:1]])
+    seg = np.linalg.norm(np.diff(p, axis=0), axis=1)
+    s = np.concatenate([[0.0], np.cumsum(seg)])
+    total = s[-1]
+    if total <= 0:
+        return np.repeat(p[:1], n, axis=0)
+    # Quitar tramos de longitud nula (np.interp requiere s creciente)
+    keep = np.concatenate([[True], seg > 0])
+    s, p = s[keep], p[keep]
+    target = np.linspace(0.0, total, n, endpoint=not closed)
+    return np.column_stack([np.interp(target, s, p[:, 0]), np.interp(target, s, p[:, 1])])
+
+
+def prepare_path(xy, smooth_iterations: int = 0, spline: bool = False,
+                 resample: Optional[int] = None, closed: bool = True) -> np.ndarray:
+    """Suavizado → Catmull-Rom → remuestreo por longitud de arco (cada paso opcional)."""
+    p = np.asarray(xy, dtype=float)
+    if smooth_iterations:
+        p = smooth_polyline(p, smooth_iterations)
+    if spline and p.shape[0] >= 3:
+        p = catmull_rom(p, closed=closed)
+    if resample:
+        p = resample_arclength(p, resample, closed=closed)
+    return p
+
+
+# ─── Trayectorias precalculadas ────────────────────────────────────────────────
+
+MAX_FRAME_CELLS = 8_000_000   # F × K máximo por petición (complejos → 128 MB)
+
+
+def _frame_blocks(freq, amp, phase, n_frames: int, chunk_cells: int):
+    """Genera (f0, f1, términos (f1−f0, K)) con amp·exp(i(freq·t + phase))."""
+    freq = np.asarray(freq, dtype=float)
+    c = np.asarray(amp, dtype=float) * np.exp(1j * np.asarray(phase, dtype=float))
+    t = 2 * np.pi * np.arange(n_frames) / n_frames
+    rows = max(1, chunk_cells // max(freq.shape[0], 1))
+    for f0 in range(0, n_frames, rows):
+        f1 = min(n_frames, f0 + rows)
+        yield f0, f1, c[None, :] * np.exp(1j * np.outer(t[f0:f1], freq))
+
+
+def epicycle_frames(freq, amp, phase, n_frames: int, chunk_cells: int = 1_000_000) -> np.ndarray:
+    """
+    Posiciones acumuladas de la cadena de epiciclos para `n_frames` instantes
+    t = 2π·f/F, f = 0..F−1 (el mismo t = freq·t + phase del frontend).
+
+    Devuelve un array complejo (F, K+1): columna 0 = origen, columna k = centro
+    del círculo k+1 (la última es la punta del trazo). Un producto exterior
+    freq ⊗ t y un cumsum, por bloques de frames para acotar la memoria.
+    """
+    k = len(freq)
+    out = np.zeros((n_frames, k + 1), dtype=np.complex128)
+    for f0, f1, terms in _frame_blocks(freq, amp, phase, n_frames, chunk_cells):
+        np.cumsum(terms, axis=1, out=out[f0:f1, 1:])
+    return out
+
+
+def epicycle_trace(freq, amp, phase, n_frames: int, chunk_cells: int = 1_000_000) -> np.ndarray:
+    """Solo la punta del trazo (F,) complejo, sin guardar la matriz F × K."""
+    out = np.empty(n_frames, dtype=np.complex128)
+    for f0, f1, terms in _frame_blocks(freq, amp, phase, n_frames, chunk_cells):
+        out[f0:f1] = terms.sum(axis=1)
+    return out
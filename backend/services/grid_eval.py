@@ -0,0 +1,159 @@
+"""
+Binary EquaLab - Evaluación de campos 2-D
+Motor de mallas para curvas implícitas f(x,y)=0, superficies z=f(x,y) y
+coloreado de dominio de funciones complejas (modo Complejos).
+
+La función compilada se evalúa por bloques de filas (tiles) para acotar la
+memoria de los temporales de NumPy en mallas grandes; cada bloque es una sola
+llamada vectorizada.
+"""
+
+import math
+from typing import Callable, Tuple
+
+import numpy as np
+
+MAX_GRID_AXIS = 2048             # Resolución máxima por eje
+MAX_GRID_POINTS = 1_000_000      # Puntos totales por petición
+GRID_TILE_POINTS = 65_536        # Puntos evaluados por bloque
+
+
+def _broadcast(value, shape, dtype) -> np.ndarray:
+    """lambdify devuelve escalares para expresiones constantes."""
+    arr = np.asarray(value, dtype=dtype)
+    if arr.shape != shape:
+        arr = np.broadcast_to(arr, shape)
+    return arr
+
+
+def evaluate_grid(func: Callable, x: np.ndarray, y: np.ndarray,
+                  complex_domain: bool = False,
+                  tile_points: int = GRID_TILE_POINTS) -> Tuple[np.ndarray, int]:
+    """
+    Evalúa `func` sobre la malla (y, x) → array (ny, nx).
+
+    Con `complex_domain` la función recibe z = x + iy y el resultado es complejo;
+    si no, recibe (X, Y) y el resultado es real (parte imaginaria ≠ 0 → NaN).
+    Devuelve (valores, número de tiles).
+    """
+    nx, ny = len(x), len(y)
+    dtype = np.complex128 if complex_domain else np.float64
+    out = np.empty((ny, nx), dtype=dtype)
+    rows = max(1, tile_points // max(nx, 1))
+    tiles = 0
+    with np.errstate(all="ignore"):
+        for r0 in range(0, ny, rows):
+            r1 = min(ny, r0 + rows)
+            X, Y = np.meshgrid(x, y[r0:r1])
+            if complex_domain:
+                vals = func(X + 1j * Y)
+                out[r0:r1] = _broadcast(vals, X.shape, np.complex128)
+            else:
+                vals = np.asarray(func(X, Y))
+                if np.iscomplexobj(vals):
+                    vals = np.where(np.abs(vals.imag) < 1e-12, vals.real, np.nan)
+                out[r0:r1] = _broadcast(vals, X.shape, np.float64)
+            tiles += 1
+    return out, tiles
+
+
+# ─── Marching squares ──────────────────────────────────────────────────────────
+#
+# Esquinas de la celda (j, i):  v0=(i, j)  v1=(i+1, j)  v2=(i+1, j+1)  v3=(i, j+1)
+# Aristas:  e0 = v0–v1 (abajo)  e1 = v1–v2 (derecha)  e2 = v3–v2 (arriba)  e3 = v0–v3 (izq.)
+# Caso = Σ 2^k · [v_k > nivel]. Casos 5/10 (silla) se desambiguan con el centro.
+
+_SEGMENTS = {
+    1: [(3, 0)], 2: [(0, 1)], 3: [(3, 1)], 4: [(1, 2)],
+    6: [(0, 2)], 7: [(3, 2)], 8: [(3, 2)], 9: [(0, 2)],
+    11: [(1, 2)], 12: [(3, 1)], 13: [(0, 1)], 14: [(3, 0)],
+    # Sillas — variante "centro bajo el nivel" (16/17 = centro sobre el nivel)
+    5: [(3, 0), (1, 2)], 10: [(0, 1), (2, 3)],
+    16: [(0, 1), (2, 3)], 17: [(3, 0), (1, 2)],
+}
+
+
+def _segment_table():
+    a = np.full((18, 2), -1, dtype=np.int64)
+    b = np.full((18, 2), -1, dtype=np.int64)
+    for case, segs in _SEGMENTS.items():
+        for k, (ea, eb) in enumerate(segs):
+            a[case, k], b[case, k] = ea, eb
+    return a, b
+
+
+_EDGE_A, _EDGE_B = _segment_table()
+
+
+def marching_squares(x: np.ndarray, y: np.ndarray, z: np.ndarray, level: float = 0.0) -> np.ndarray:
+    """
+    Extrae la curva de nivel z = `level` como segmentos (n, 2, 2) [[x0,y0],[x1,y1]].
+    Celdas con valores no finitos se omiten (asíntotas, dominios cortados).
+    """
+    z = np.asarray(z, dtype=float) - level
+    v0, v1 = z[:-1, :-1], z[:-1, 1:]
+    v2, v3 = z[1:, 1:], z[1:, :-1]
+    finite = np.isfinite(v0) & np.isfinite(v1) & np.isfinite(v2) & np.isfinite(v3)
+    case = ((v0 > 0) * 1 + (v1 > 0) * 2 + (v2 > 0) * 4 + (v3 > 0) * 8).astype(np.int64)
+    active = finite & (case != 0) & (case != 15)
+    if not active.any():
+        return np.empty((0, 2, 2))
+
+    j, i = np.nonzero(active)
+    c = case[j, i]
+    a0, a1, a2, a3 = v0[j, i], v1[j, i], v2[j, i], v3[j, i]
+    center_up = (a0 + a1 + a2 + a3) > 0
+    c = np.where((c == 5) & center_up, 16, c)
+    c = np.where((c == 10) & center_up, 17, c)
+
+    x0, x1 = x[i], x[i + 1]
+    y0, y1 = y[j], y[j + 1]
+
+    def _t(va, vb):
+        d = vb - va
+        return np.where(d != 0, -va / np.where(d != 0, d, 1.0), 0.5)
+
+    # Puntos de cruce sobre cada arista: (n_celdas, 4, 2)
+    edges = np.empty((len(c), 4, 2))
+    t0 = _t(a0, a1); edges[:, 0, 0] = x0 + t0 * (x1 - x0); edges[:, 0, 1] = y0
+    t1 = _t(a1, a2); edges[:, 1, 0] = x1;                  edges[:, 1, 1] = y0 + t1 * (y1 - y0)
+    t2 = _t(a3, a2); edges[:, 2, 0] = x0 + t2 * (x1 - x0); edges[:, 2, 1] = y1
+    t3 = _t(a0, a3); edges[:, 3, 0] = x0;                  edges[:, 3, 1] = y0 + t3 * (y1 - y0)
+
+    segments = []
+    rows = np.arange(len(c))
+    for k in range(2):
+        ea, eb = _EDGE_A[c, k], _EDGE_B[c, k]
+        ok = ea >= 0
+        if ok.any():
+            segments.append(np.stack([edges[rows[ok], ea[ok]], edges[rows[ok], eb[ok]]], axis=1))
+    return np.concatenate(segments) if segments else np.empty((0, 2, 2))
+
+
+# ─── Coloreado de dominio ──────────────────────────────────────────────────────
+
+def domain_coloring(w: np.ndarray) -> np.ndarray:
+    """
+    RGB uint8 (ny, nx, 3) para w = f(z): tono = arg(w), luminosidad = 2/π·atan|w|
+    (ceros negros, polos blancos). Puntos no finitos → gris neutro.
+    """
+    with np.errstate(all="ignore"):
+        hue = (np.angle(w) / (2 * math.pi)) % 1.0
+        light = (2 / math.pi) * np.arctan(np.abs(w))
+    bad = ~np.isfinite(w)
+    hue = np.where(bad, 0.0, hue)
+    light = np.where(bad, 0.5, light)
+    sat = np.where(bad, 0.0, 1.0)
+
+    # HSL → RGB vectorizado
+    chroma = (1 - np.abs(2 * light - 1)) * sat
+    hp = hue * 6.0
+    xc = chroma * (1 - np.abs(hp % 2 - 1))
+    zeros = np.zeros_like(chroma)
+    sector = np.floor(hp).astype(np.int64) % 6
+    r = np.choose(sector, [chroma, xc, zeros, zeros, xc, chroma])
+    g = np.choose(sector, [xc, chroma, chroma, xc, zeros, zeros])
+    b = np.choose(sector, [zeros, zeros, xc, chroma, chroma, xc])
+    m = light - chroma / 2
+    rgb = np.stack([r + m, g + m, b + m], axis=-1)
+    return np.clip(np.round(rgb * 255), 0, 255).astype(np.uint8)
@@ -0,0 +1,205 @@
+"""
+Binary EquaLab - Sistemas ODE definidos por el usuario
+Compila {"dx": "sigma*(y - x)", ...} una sola vez y lo deja en caché.
+
+Las ecuaciones se parsean con `EquaEngine` (acepta sen, raiz, ^, producto
+implícito…) y se lambdifican juntas con CSE, con los parámetros como
+argumentos: cambiar sigma o rho no recompila. La clave de caché es un hash del
+sistema (ecuaciones + nombres de parámetros), no de sus valores.
+
+El sistema compilado da:
+  - rhs(params)       → f(t, y) para services/ode_integrators (y 1-D o lote)
+  - jac(params)       → ∂f/∂y analítico (SymPy) para Rosenbrock
+  - native(eq, params)→ NativeRHS del motor C++ (None si algo no es traducible)
+"""
+
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.compiled_functions import compiled_cache
+
+MAX_EQUATIONS = 32
+MAX_EQUATION_LENGTH = 2000
+RESERVED_NAMES = ("t",)
+
+
+def state_name(key: str) -> str:
+    """'dx', 'dx/dt' o "x'" → 'x'; una clave sin prefijo d se toma tal cual."""
+    name = key.strip()
+    if name.endswith("/dt"):
+        name = name[:-3]
+    if name.endswith("'"):
+        name = name[:-1]
+    elif name.startswith("d") and len(name) > 1:
+        name = name[1:]
+    if not name.isidentifier():
+        raise ValueError(f"Nombre de estado inválido: '{key}'")
+    return name
+
+
+def system_key(equations: Dict[str, str], param_names) -> str:
+    """Hash estable del sistema: orden de ecuaciones y nombres de parámetros."""
+    payload = json.dumps({"eq": list(equations.items()), "params": sorted(param_names)},
+                         ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CompiledSystem:
+    """Sistema ODE parseado y lambdificado (inmutable, compartido vía caché)."""
+    key: str
+    states: Tuple[str, ...]
+    params: Tuple[str, ...]
+    exprs: tuple                       # SymPy, uno por estado
+    _f_math: Callable = field(repr=False)
+    _f_numpy: Callable = field(repr=False)
+    _jac: Callable = field(repr=False)
+    _native_tree: Optional[Callable] = field(default=None, repr=False)
+
+    def _param_values(self, values: Dict[str, float]) -> List[float]:
+        missing = [p for p in self.params if p not in values]
+        if missing:
+            raise ValueError(f"Faltan valores para los parámetros: {missing}")
+        return [values[p] for p in self.params]
+
+    def rhs(self, values: Dict[str, float]):
+        """f(t, y) con los parámetros fijados; mismo contrato que bio_models."""
+        p = self._param_values(values)
+        f_math, f_numpy = self._f_math, self._f_numpy
+        n = len(self.states)
+
+        def f(t, y):
+            if y.ndim == 1:
+                try:
+                    return np.array(f_math(t, *y.tolist(), *p), dtype=float)
+                except (ArithmeticError, ValueError):
+                    # log(0), √(−1)…: NumPy da inf/NaN y el integrador rechaza el paso
+                    with np.errstate(all="ignore"):
+                        return np.array(f_numpy(t, *y.tolist(), *p), dtype=float)
+            cols = f_numpy(t, *(y[..., i] for i in range(n)), *p)
+            return np.stack(np.broadcast_arrays(*cols), axis=-1).astype(float, copy=False)
+        return f
+
+    def jac(self, values: Dict[str, float]):
+        """∂f/∂y (*y.shape, n) analítico."""
+        p = self._param_values(values)
+        J, n = self._jac, len(self.states)
+
+        def jac(t, y):
+            rows = J(t, *(y[..., i] for i in range(n)), *p)
+            out = np.zeros(y.shape + (n,))
+            for i, row in enumerate(rows):
+                for j, v in enumerate(row):
+                    out[..., i, j] = v
+            return out
+        return jac
+
+    def native(self, eq, values: Dict[str, float]):
+        """NativeRHS de EquaCore con los parámetros plegados, o None si no se puede."""
+        if self._native_tree is None or not getattr(eq, "NATIVE_RHS", False):
+            return None
+        p = dict(zip(self.params, self._param_values(values)))
+        try:
+            trees = self._native_tree(eq)
+        except ValueError:
+            return None
+        return eq.NativeRHS.from_expressions(trees, list(self.states), p)
+
+
+def _to_equacore(expr, e):
+    """SymPy → árbol Expression de EquaCore (e = equacore.expr). ValueError si no cabe."""
+    import sympy as sp
+
+    if expr.is_Symbol:
+        return e.sym(expr.name)
+    if expr.is_Number or expr in (sp.pi, sp.E):
+        return e.num(float(expr))
+    args = [_to_equacore(a, e) for a in expr.args]
+    if expr.is_Add or expr.is_Mul:
+        op = e.add if expr.is_Add else e.mul
+        out = args[0]
+        for a in args[1:]:
+            out = op(out, a)
+        return out
+    if expr.is_Pow:
+        return e.pow(*args)
+    functions = {sp.sin: e.sin, sp.cos: e.cos, sp.tan: e.tan, sp.exp: e.exp,
+                 sp.log: e.log, sp.Abs: e.abs}
+    if expr.func in functions and len(args) == 1:
+        return functions[expr.func](args[0])
+    raise ValueError(f"'{expr.func.__name__}' no está en el motor nativo")
+
+
+def _equa_engine():
+    """EquaEngine nuevo de src/core (compartido con el escritorio)."""
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    from src.core.engine import EquaEngine
+    return EquaEngine()
+
+
+def _build(equations: Dict[str, str], param_names: Tuple[str, ...], key: str) -> CompiledSystem:
+    import sympy as sp
+
+    states = tuple(state_name(k) for k in equations)
+    if len(set(states)) != len(states):
+        raise ValueError(f"Estados repetidos: {list(states)}")
+    clash = (set(states) & set(param_names)) | (set(states + param_names) & set(RESERVED_NAMES))
+    if clash:
+        raise ValueError(f"Nombres en conflicto (estado/parámetro/t): {sorted(clash)}")
+
+    # Estados y parámetros mandan sobre constantes del parser (R, g, c, e…)
+    engine = _equa_engine()
+    symbols = {name: sp.Symbol(name) for name in states + param_names + RESERVED_NAMES}
+    engine.local_dict.update(symbols)
+
+    exprs = []
+    for key_name, text in equations.items():
+        expr = engine.parse_expression(text)
+        if isinstance(expr, str):
+            raise ValueError(f"{key_name}: {expr}")
+        unknown = sorted(s.name for s in expr.free_symbols if s.name not in symbols)
+        if unknown:
+            raise ValueError(f"{key_name}: símbolos sin definir {unknown}; decláralos en params")
+        if expr.has(sp.I):
+            raise ValueError(f"{key_name}: la ecuación no es real")
+        exprs.append(expr)
+
+    args = [symbols["t"]] + [symbols[s] for s in states] + [symbols[p] for p in param_names]
+    jac = sp.Matrix(exprs).jacobian([symbols[s] for s in states])
+    f_numpy = sp.lambdify(args, exprs, modules="numpy", cse=True)
+    f_math = sp.lambdify(args, exprs, modules="math", cse=True)
+    try:
+        f_math(*[0.5] * len(args))
+    except NameError:
+        f_math = f_numpy  # funciones sin equivalente en `math` (Heaviside, erf…)
+    except (ArithmeticError, ValueError):
+        pass
+    f_jac = sp.lambdify(args, jac.tolist(), modules="numpy", cse=True)
+
+    def native_tree(eq):
+        return [_to_equacore(expr, eq.expr) for expr in exprs]
+
+    return CompiledSystem(key=key, states=states, params=param_names, exprs=tuple(exprs),
+                          _f_math=f_math, _f_numpy=f_numpy, _jac=f_jac, _native_tree=native_tree)
+
+
+def compile_system(equations: Dict[str, str], param_names) -> CompiledSystem:
+    """Sistema compilado desde caché; solo se parsea/lambdifica la primera vez."""
+    if not equations:
+        raise ValueError("El sistema necesita al menos una ecuación")
+    if len(equations) > MAX_EQUATIONS:
+        raise ValueError(f"Demasiadas ecuaciones: {len(equations)} (máx {MAX_EQUATIONS})")
+    if any(len(text) > MAX_EQUATION_LENGTH for text in equations.values()):
+        raise ValueError(f"Ecuación demasiado larga (máx {MAX_EQUATION_LENGTH} caracteres)")
+    param_names = tuple(sorted(param_names))
+    key = system_key(equations, param_names)
+    return compiled_cache.get_or_compile(("ode_system", key),
+                                         lambda: _build(dict(equations), param_names, key))
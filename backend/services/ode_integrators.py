@@ -0,0 +1,903 @@
+"""
+Binary EquaLab - Integradores ODE en NumPy
+Fallback de Séptima cuando el motor C++ (equacore) no está compilado.
+
+El lado derecho recibe y devuelve ndarrays: f(t, y) → dy/dt con la forma de y.
+`y` puede ser (n_states,) o con dimensión de lote (batch, n_states): el mismo
+paso RK4 integra todas las trayectorias a la vez (barridos de parámetros,
+Monte Carlo).
+
+La salida se reserva completa antes de integrar y las etapas se combinan en
+un buffer fijo con operaciones in-place, sin listas ni zips por paso.
+
+Para modelos con escalas de tiempo muy distintas (colas planas de glucosa,
+espigas de Hodgkin-Huxley) está el Dormand-Prince 5(4) adaptativo con salida
+densa: el paso lo decide rtol/atol y la salida se interpola en los tiempos
+pedidos sin que el integrador tenga que pisarlos.
+
+Los problemas rígidos (PK con absorción casi instantánea, HH con g_Na alto)
+obligan a un RK explícito a pasos diminutos por estabilidad, no por precisión.
+Para ellos está el Rosenbrock 2(3) de `ode23s` (lineal-implícito: un jacobiano
+y una inversión de W = I − h·d·J por paso) y el modo "auto", que arranca con
+RK45 y cambia a Rosenbrock cuando el test de rigidez de Hairer lo detecta.
+
+Para horizontes largos, `iter_chunks` entrega la trayectoria por bloques con
+un `Checkpoint` reanudable: la memoria no crece con t_end.
+"""
+
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FIXED_STEP_METHODS = ("Euler", "RungeKutta4")
+ADAPTIVE_METHODS = ("RK45", "Rosenbrock23", "auto")
+
+RHS = Callable[[float, np.ndarray], np.ndarray]
+Jacobian = Callable[[float, np.ndarray], np.ndarray]
+
+
+def n_fixed_steps(t_start: float, t_end: float, dt: float) -> int:
+    """Pasos de tamaño `dt` para cubrir [t_start, t_end] (mismo criterio que el motor C++)."""
+    if dt <= 0:
+        raise ValueError("dt debe ser positivo")
+    if t_end < t_start:
+        raise ValueError("t_end debe ser mayor o igual que t_start")
+    return int(math.ceil((t_end - t_start) / dt - 1e-9))
+
+
+class FixedStepIntegrator:
+    """
+    Euler / RK4 de paso fijo con buffers de etapa reutilizables.
+
+    Los buffers dependen solo de la forma de `y`, así que una instancia puede
+    reutilizarse para varios tramos (p. ej. entre dosis en PK).
+    """
+
+    def __init__(self, f: RHS, shape, method: str = "RungeKutta4"):
+        if method not in FIXED_STEP_METHODS:
+            raise ValueError(f"Método desconocido: '{method}'. Use {FIXED_STEP_METHODS}")
+        self.f = f
+        self.method = method
+        self.k = np.empty((4,) + tuple(shape))   # k1..k4
+        self.tmp = np.empty(tuple(shape))        # y + c·dt·k
+        self._stages = tuple(self.k)             # vistas fijas k1..k4
+        self._k_flat = self.k.reshape(4, -1)
+        self._tmp_flat = self.tmp.reshape(-1)
+        self._weights_dt = None                  # (dt, dt/6·[1, 2, 2, 1])
+
+    def step(self, t: float, y: np.ndarray, dt: float, out: np.ndarray) -> np.ndarray:
+        """Escribe y(t + dt) en `out` (puede ser el mismo array que `y`)."""
+        f, tmp = self.f, self.tmp
+        k1, k2, k3, k4 = self._stages
+        if self.method == "Euler":
+            k1[...] = f(t, y)
+            np.multiply(k1, dt, out=tmp)
+            np.add(y, tmp, out=out)
+            return out
+
+        half = 0.5 * dt
+        k1[...] = f(t, y)
+        np.multiply(k1, half, out=tmp); tmp += y
+        k2[...] = f(t + half, tmp)
+        np.multiply(k2, half, out=tmp); tmp += y
+        k3[...] = f(t + half, tmp)
+        np.multiply(k3, dt, out=tmp); tmp += y
+        k4[...] = f(t + dt, tmp)
+        # y + dt/6·(k1 + 2k2 + 2k3 + k4) como un solo producto (4,) · (4, n)
+        if self._weights_dt is None or self._weights_dt[0] != dt:
+            self._weights_dt = (dt, np.array([1.0, 2.0, 2.0, 1.0]) * (dt / 6.0))
+        np.dot(self._weights_dt[1], self._k_flat, out=self._tmp_flat)
+        np.add(y, tmp, out=out)
+        return out
+
+    def integrate(self, t_start: float, t_end: float, y0, dt: float, output_every: int = 1,
+                  t_eval: Optional[np.ndarray] = None,
+                  events: Optional["EventLog"] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Integra de t_start a t_end. Devuelve (t (n_out,), Y (n_out, *shape)).
+        El último paso se recorta para terminar exactamente en t_end.
+
+        Solo se reserva y escribe lo que se devuelve: por defecto cada paso;
+        con `output_every` = k uno de cada k pasos (más el final); con `t_eval`
+        (creciente, dentro del intervalo; si no, ValueError) la interpolación
+        lineal entre los dos pasos que rodean cada tiempo pedido.
+
+        Con `events` cada paso se revisa con el interpolante de Hermite; un
+        evento terminal acaba la salida en su instante (último punto, salvo con
+        t_eval, donde solo quedan los tiempos pedidos anteriores).
+        """
+        y0 = np.asarray(y0, dtype=float)
+        steps = n_fixed_steps(t_start, t_end, dt)
+        t = t_start + dt * np.arange(steps + 1, dtype=float)
+        if steps:
+            t[-1] = t_end
+        if events is not None:
+            events.start(t_start, y0)
+        k1 = self.k[0]
+        if t_eval is None and output_every == 1:
+            Y = np.empty((steps + 1,) + y0.shape)
+            Y[0] = y0
+            for i in range(steps):
+                self.step(t[i], Y[i], t[i + 1] - t[i], out=Y[i + 1])
+                if events is not None:
+                    hit = events.step(t[i], Y[i], t[i + 1], Y[i + 1],
+                                      hermite_dense(self.f, t[i], Y[i], k1, t[i + 1], Y[i + 1]))
+                    if hit is not None:
+                        t = t[:i + 2].copy()
+                        t[-1], Y[i + 1] = hit
+                        return t, Y[:i + 2]
+            return t, Y
+        if output_every < 1:
+            raise ValueError("output_every debe ser ≥ 1")
+
+        if t_eval is not None:
+            t_out = output_times(t_start, t_end, t_eval, None)
+        else:
+            keep = np.arange(0, steps + 1, output_every)
+            if keep[-1] != steps:
+                keep = np.append(keep, steps)
+            t_out = t[keep]
+        Y = np.empty((len(t_out),) + y0.shape)
+        prev, cur = y0.copy(), np.empty_like(y0)
+        # Sin pasos (t_end == t_start) todo tiempo pedido es el estado inicial
+        j = np.searchsorted(t_out, t[0], side="right") if steps else len(t_out)
+        Y[:j] = y0
+        for i in range(steps):
+            t_next = t[i + 1]
+            self.step(t[i], prev, t_next - t[i], out=cur)
+            hit = None
+            if events is not None:
+                hit = events.step(t[i], prev, t_next, cur, hermite_dense(self.f, t[i], prev, k1, t_next, cur))
+                if hit is not None:
+                    t_next, cur[...] = hit
+            # Muestras en (t_i, t_{i+1}]: interpolación lineal (exacta en los nodos)
+            hi = np.searchsorted(t_out, t_next, side="right") if i + 1 < steps or hit is not None else len(t_out)
+            for jj in range(j, hi):
+                w = (t_out[jj] - t[i]) / (t_next - t[i])
+                np.multiply(cur - prev, w, out=Y[jj])
+                Y[jj] += prev
+            j = hi
+            if hit is not None:
+                t_out, Y = t_out[:hi], Y[:hi]
+                if t_eval is None and (hi == 0 or t_out[-1] < t_next):
+                    t_out, Y = np.append(t_out, t_next), np.concatenate([Y, cur[None]])
+                return t_out, Y
+            prev, cur = cur, prev
+        return t_out, Y
+
+
+def integrate_fixed(f: RHS, t_start: float, t_end: float, y0, dt: float,
+                    method: str = "RungeKutta4", output_every: int = 1,
+                    t_eval: Optional[np.ndarray] = None,
+                    events: Optional["EventLog"] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Atajo: (t, Y) con Y de forma (n_out, *y0.shape); ver `FixedStepIntegrator.integrate`."""
+    y0 = np.asarray(y0, dtype=float)
+    return FixedStepIntegrator(f, y0.shape, method).integrate(t_start, t_end, y0, dt,
+                                                              output_every=output_every, t_eval=t_eval,
+                                                              events=events)
+
+
+def thin_indices(n: int, every: int) -> np.ndarray:
+    """Índices 0, k, 2k, … y siempre el último (salidas ya calculadas, p. ej. RK45)."""
+    if every < 1:
+        raise ValueError("output_every debe ser ≥ 1")
+    idx = np.arange(0, n, every)
+    if n and idx[-1] != n - 1:
+        idx = np.append(idx, n - 1)
+    return idx
+
+
+# ─── Eventos ───────────────────────────────────────────────────────────────────
+# g(t, y) cambia de signo → evento. El cruce se busca en la salida densa del
+# paso recién aceptado (Illinois sobre s ∈ [0, 1]), no en la malla: el instante
+# es exacto hasta la precisión del interpolante, no hasta el paso. Un evento
+# terminal corta la integración en ese instante.
+
+EVENT_DIRECTIONS = {"up": 1, "down": -1, "both": 0}
+
+
+@dataclass
+class Event:
+    """Función de evento: cruce de cero de g(t, y) (y 1-D)."""
+    name: str
+    g: Callable[[float, np.ndarray], float]
+    direction: int = 0            # +1 solo subiendo, −1 solo bajando, 0 ambos
+    terminal: bool = False
+
+
+def threshold_event(name: str, index: int, value: float, direction: int = 0,
+                    terminal: bool = False) -> Event:
+    """Evento y[index] = value (umbral de un estado)."""
+    return Event(name, lambda t, y: y[index] - value, direction, terminal)
+
+
+def _locate_root(g: Callable[[float], float], ga: float, gb: float, tol: float = 1e-12,
+                 max_iter: int = 60) -> float:
+    """Raíz de g en [0, 1] con g(0)·g(1) ≤ 0 (regula falsi de Illinois)."""
+    a, b = 0.0, 1.0
+    if gb == 0.0:
+        return 1.0
+    c, side = 1.0, 0
+    for _ in range(max_iter):
+        c = (a * gb - b * ga) / (gb - ga)
+        gc = g(c)
+        if gc == 0.0 or b - a < tol:
+            break
+        if (gc > 0) == (gb > 0):
+            b, gb = c, gc
+            if side == -1:
+                ga *= 0.5
+            side = -1
+        else:
+            a, ga = c, gc
+            if side == 1:
+                gb *= 0.5
+            side = 1
+    return c
+
+
+class EventLog:
+    """
+    Eventos detectados durante una integración. El caller lo crea y lo pasa
+    al integrador; puede compartirse entre tramos (PK entre dosis): `start`
+    toma la línea base en cada tramo, así que un salto de estado no cuenta.
+    """
+
+    def __init__(self, events: Sequence[Event], max_records: int = 10_000):
+        self.events = list(events)
+        self.max_records = max_records
+        self.records: list = []
+        self.terminated: Optional[dict] = None
+        self._g: Optional[list] = None
+
+    def _eval(self, t: float, y: np.ndarray) -> list:
+        # Listas de floats: con pocos eventos, más baratas que un array por paso
+        return [float(ev.g(t, y)) for ev in self.events]
+
+    def start(self, t: float, y: np.ndarray):
+        if np.ndim(y) != 1:
+            raise ValueError("Los eventos solo se admiten en trayectorias individuales (y 1-D)")
+        self._g = self._eval(t, y)
+
+    def step(self, t0: float, y0: np.ndarray, t1: float, y1: np.ndarray,
+             dense: Callable[[float], np.ndarray]) -> Optional[Tuple[float, np.ndarray]]:
+        """
+        Revisa el paso [t0, t1]; `dense(s)` es el estado en t0 + s·(t1 − t0).
+        Devuelve (t, y) del primer evento terminal del paso, o None.
+        """
+        if self._g is None:
+            self.start(t0, y0)
+        g0, g1 = self._g, self._eval(t1, y1)
+        self._g = g1
+        h = t1 - t0
+        found = []
+        for k, (a, b) in enumerate(zip(g0, g1)):
+            if not ((a < 0 <= b) or (a > 0 >= b)):
+                continue
+            ev = self.events[k]
+            sign = 1 if b > a else -1
+            if ev.direction and ev.direction != sign:
+                continue
+            s = _locate_root(lambda s_: float(ev.g(t0 + s_ * h, dense(s_))), a, b)
+            found.append((s, k, sign))
+        for s, k, sign in sorted(found):
+            ev = self.events[k]
+            y_ev = np.array(dense(s), dtype=float)
+            record = {"name": ev.name, "t": float(t0 + s * h), "y": y_ev.tolist(),
+                      "direction": "up" if sign > 0 else "down"}
+            if len(self.records) < self.max_records:
+                self.records.append(record)
+            if ev.terminal:
+                self.terminated = record
+                self._g = self._eval(record["t"], y_ev)
+                return record["t"], y_ev
+        return None
+
+    def record(self, name: str, t: float, y: np.ndarray, terminal: bool = False, **info) -> dict:
+        """
+        Evento externo al integrador (p. ej. una muerte estocástica): no es un
+        cruce de g y suele saltar el estado, así que la línea base se toma de nuevo.
+        """
+        y = np.asarray(y, dtype=float)
+        record = {"name": name, "t": float(t), "y": y.tolist(), "direction": None, **info}
+        if len(self.records) < self.max_records:
+            self.records.append(record)
+        if terminal:
+            self.terminated = record
+        self.start(t, y)
+        return record
+
+    def summary(self) -> dict:
+        """Para los metadatos de las respuestas."""
+        return {"events": self.records,
+                "terminated_by": self.terminated["name"] if self.terminated else None}
+
+
+def hermite_dense(f: RHS, t0: float, y0: np.ndarray, f0: np.ndarray, t1: float,
+                  y1: np.ndarray) -> Callable[[float], np.ndarray]:
+    """
+    Interpolante cúbico de Hermite del paso; f(t1, y1) se evalúa solo si se usa.
+    No copia: debe usarse antes de que el integrador reescriba sus buffers.
+    """
+    h = t1 - t0
+    cache = []
+
+    def dense(s: float) -> np.ndarray:
+        if not cache:
+            cache.append(np.asarray(f(t1, y1), dtype=float))
+        f1 = cache[0]
+        s2, s3 = s * s, s * s * s
+        return ((2 * s3 - 3 * s2 + 1) * y0 + (s3 - 2 * s2 + s) * h * f0
+                + (3 * s2 - 2 * s3) * y1 + (s3 - s2) * h * f1)
+    return dense
+
+
+# ─── Dormand-Prince 5(4) ───────────────────────────────────────────────────────
+
+_DP_C = np.array([0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0])
+_DP_A = [
+    np.array([]),
+    np.array([1 / 5]),
+    np.array([3 / 40, 9 / 40]),
+    np.array([44 / 45, -56 / 15, 32 / 9]),
+    np.array([19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729]),
+    np.array([9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656]),
+    np.array([35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84]),
+]
+# b − b̂ (estimador de error, 7 etapas gracias a FSAL)
+_DP_E = np.array([71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+# Coeficientes de la salida densa de 4.º orden (Hairer, DOPRI5 contd5)
+_DP_D = np.array([-12715105075 / 11282082432, 0.0, 87487479700 / 32700410799,
+                  -10690763975 / 1880347072, 701980252875 / 199316789632,
+                  -1453857185 / 822651844, 69997945 / 29380423])
+
+
+@dataclass
+class ODESolution:
+    """Resultado de un integrador adaptativo."""
+    t: np.ndarray                 # (n_out,)
+    y: np.ndarray                 # (n_out, *shape)
+    y_end: np.ndarray             # estado en t_end (para encadenar tramos)
+    n_steps: int = 0
+    n_rejected: int = 0
+    n_rhs: int = 0
+    method: str = "RK45"
+    extra: dict = field(default_factory=dict)
+
+    def stats(self) -> dict:
+        return {"method": self.method, "n_steps": self.n_steps,
+                "n_rejected": self.n_rejected, "n_rhs": self.n_rhs, **self.extra}
+
+
+def _rms(x: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(np.square(x)))) if x.size else 0.0
+
+
+def initial_step(f: RHS, t0: float, y0: np.ndarray, f0: np.ndarray, order: int,
+                 rtol: float, atol: float, direction: float = 1.0) -> Tuple[float, int]:
+    """Paso inicial de Hairer-Nørsett-Wanner (II.4). Devuelve (h0, evaluaciones)."""
+    scale = atol + rtol * np.abs(y0)
+    d0, d1 = _rms(y0 / scale), _rms(f0 / scale)
+    h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+    y1 = y0 + direction * h0 * f0
+    f1 = f(t0 + direction * h0, y1)
+    d2 = _rms((f1 - f0) / scale) / h0
+    if d1 <= 1e-15 and d2 <= 1e-15:
+        h1 = max(1e-6, h0 * 1e-3)
+    else:
+        h1 = (0.01 / max(d1, d2)) ** (1.0 / (order + 1))
+    return min(100 * h0, h1), 1
+
+
+def output_times(t_start: float, t_end: float, t_eval: Optional[Sequence[float]],
+                  n_out: Optional[int]) -> Optional[np.ndarray]:
+    if t_eval is not None:
+        te = np.asarray(t_eval, dtype=float)
+        if te.ndim != 1 or np.any(np.diff(te) < 0):
+            raise ValueError("t_eval debe ser una lista creciente")
+        if te.size and (te[0] < t_start - 1e-12 or te[-1] > t_end + 1e-12):
+            raise ValueError("t_eval debe estar dentro de [t_start, t_end]")
+        # La tolerancia no debe dejar tiempos fuera del último paso: sin recorte
+        # la salida densa nunca los alcanza y quedarían filas sin inicializar
+        return np.clip(te, t_start, t_end)
+    if n_out is not None:
+        return np.linspace(t_start, t_end, max(int(n_out), 2))
+    return None
+
+
+def solve_dopri5(f: RHS, t_start: float, t_end: float, y0, rtol: float = 1e-6,
+                 atol: float = 1e-9, t_eval: Optional[Sequence[float]] = None,
+                 n_out: Optional[int] = None, h0: Optional[float] = None,
+                 max_step: Optional[float] = None, max_steps: int = 200_000,
+                 detect_stiffness: bool = False, events: Optional[EventLog] = None) -> ODESolution:
+    """
+    Dormand-Prince 5(4) con control de paso y salida densa.
+
+    Sin `t_eval` ni `n_out` devuelve los pasos aceptados; con ellos interpola
+    (polinomio de 4.º orden por paso) exactamente en esos tiempos. Con lote
+    (batch, n) el paso es común y el error es el RMS de todo el lote.
+
+    Con `detect_stiffness` se detiene en cuanto el problema se vuelve rígido
+    (h·ρ > 3.25 en 15 pasos aceptados seguidos, Hairer II.10); la solución
+    parcial llega hasta `y_end` y `extra["stiff_at"]` indica el instante.
+
+    Con `events` los cruces se localizan sobre la salida densa; un evento
+    terminal acaba la solución en su instante (ver `EventLog`).
+    """
+    y = np.array(y0, dtype=float)
+    if t_end < t_start:
+        raise ValueError("t_end debe ser mayor o igual que t_start")
+    t_out = output_times(t_start, t_end, t_eval, n_out)
+    span = t_end - t_start
+    max_step = span if not max_step or max_step <= 0 else min(max_step, span)
+
+    K = np.empty((7,) + y.shape)
+    K[0] = f(t_start, y)
+    n_rhs = 1
+    if span == 0:
+        t_arr = np.array([t_start]) if t_out is None else t_out
+        return ODESolution(t_arr, np.repeat(y[None], len(t_arr), axis=0), y.copy(), n_rhs=n_rhs)
+
+    if h0 is None:
+        h, extra = initial_step(f, t_start, y, K[0], 4, rtol, atol)
+        n_rhs += extra
+    else:
+        h = h0
+    h = min(max(h, 1e-12 * max(1.0, abs(t_start))), max_step)
+
+    if t_out is None:
+        ts, ys = [t_start], [y.copy()]
+    else:
+        Y = np.empty((len(t_out),) + y.shape)
+        j = int(np.searchsorted(t_out, t_start, side="right"))
+        Y[:j] = y  # tiempos pedidos en t_start
+    k_flat = K.reshape(7, -1)
+    t = t_start
+    n_steps = n_rejected = 0
+    safety, min_fac, max_fac = 0.9, 0.2, 10.0
+    ystage = np.empty_like(y)
+    y6 = np.empty_like(y) if detect_stiffness else None
+    stiff_steps = nonstiff_steps = 0
+
+    if events is not None:
+        events.start(t_start, y)
+    while t < t_end:
+        if n_steps + n_rejected >= max_steps:
+            raise RuntimeError(f"RK45: se excedió max_steps={max_steps} en t={t:.6g}")
+        h = min(h, max_step)
+        last = t + h >= t_end - 1e-12 * max(1.0, abs(t_end))
+        if last:
+            h = t_end - t
+        for i in range(1, 7):
+            np.dot(_DP_A[i], k_flat[:i], out=ystage.reshape(-1))
+            ystage *= h
+            ystage += y
+            K[i] = f(t + _DP_C[i] * h, ystage)
+            if i == 5 and y6 is not None:
+                y6[...] = ystage
+        n_rhs += 6
+        y_new = ystage.copy()              # etapa 7 = solución de 5.º orden (FSAL)
+
+        err_vec = (h * np.dot(_DP_E, k_flat)).reshape(y.shape)
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err = _rms(err_vec / scale)
+
+        if not np.isfinite(err):
+            n_rejected += 1
+            h *= min_fac
+            continue
+        if err > 1.0:
+            n_rejected += 1
+            h *= max(min_fac, safety * err ** -0.2)
+            continue
+
+        t_new = t_end if last else t + h
+        coef = []
+
+        def dense(theta, y=y, y_new=y_new, h=h):
+            # Polinomio de 4.º orden del paso; coeficientes solo si se interpola
+            if not coef:
+                dy = y_new - y
+                bspl = h * K[0] - dy
+                coef.extend((dy, bspl, dy - h * K[6] - bspl, h * np.tensordot(_DP_D, K, axes=1)))
+            dy, bspl, r4, r5 = coef
+            th1 = 1.0 - theta
+            return y + theta * (dy + th1 * (bspl + theta * (r4 + th1 * r5)))
+
+        hit = events.step(t, y, t_new, y_new, dense) if events is not None else None
+        if hit is not None:
+            t_new, y_new = hit
+        if t_out is not None:
+            j_end = int(np.searchsorted(t_out, t_new, side="right"))
+            if j_end > j:
+                Y[j:j_end] = dense(((t_out[j:j_end] - t) / h).reshape((-1,) + (1,) * y.ndim))
+                j = j_end
+        else:
+            ts.append(t_new)
+            ys.append(y_new)
+        if hit is not None:
+            n_steps += 1
+            if t_out is None:
+                return ODESolution(np.array(ts), np.stack(ys), y_new.copy(), n_steps, n_rejected, n_rhs)
+            return ODESolution(t_out[:j], Y[:j], y_new.copy(), n_steps, n_rejected, n_rhs)
+
+        if y6 is not None:
+            # Etapas 6 y 7 comparten t + h: ρ ≈ ‖f(y7) − f(y6)‖ / ‖y7 − y6‖
+            den = np.linalg.norm(y_new - y6)
+            if den > 0 and h * np.linalg.norm(K[6] - K[5]) / den > 3.25:
+                stiff_steps, nonstiff_steps = stiff_steps + 1, 0
+            else:
+                nonstiff_steps += 1
+                if nonstiff_steps >= 6:
+                    stiff_steps = 0
+
+        t, y = t_new, y_new
+        K[0] = K[6]
+        n_steps += 1
+        h *= min(max_fac, safety * max(err, 1e-10) ** -0.2)
+
+        if stiff_steps >= 15 and t < t_end:
+            extra = {"stiff_at": t}
+            if t_out is None:
+                return ODESolution(np.array(ts), np.stack(ys), y.copy(), n_steps, n_rejected, n_rhs,
+                                   extra=extra)
+            return ODESolution(t_out[:j], Y[:j], y.copy(), n_steps, n_rejected, n_rhs, extra=extra)
+
+    if t_out is None:
+        t_arr, Y = np.array(ts), np.stack(ys)
+    else:
+        t_arr = t_out
+    return ODESolution(t_arr, Y, y.copy(), n_steps, n_rejected, n_rhs)
+
+
+# ─── Rosenbrock 2(3) (ode23s) ──────────────────────────────────────────────────
+
+_ROS_D = 1.0 / (2.0 + math.sqrt(2.0))
+_ROS_E32 = 6.0 + math.sqrt(2.0)
+
+
+def fd_jacobian(f: RHS, t: float, y: np.ndarray, f0: np.ndarray) -> np.ndarray:
+    """
+    Jacobiano ∂f/∂y por diferencias hacia adelante: (*y.shape, n) con
+    J[..., i, j] = ∂f_i/∂y_j. Con lote se perturba la columna j de todas las
+    trayectorias a la vez, así que cuesta n evaluaciones de f, no batch·n.
+    """
+    n = y.shape[-1]
+    J = np.empty(y.shape + (n,))
+    yp = y.copy()
+    for j in range(n):
+        dy = 1.5e-8 * np.maximum(np.abs(y[..., j]), 1.0)
+        yp[..., j] = y[..., j] + dy
+        J[..., :, j] = (f(t, yp) - f0) / np.expand_dims(dy, -1)
+        yp[..., j] = y[..., j]
+    return J
+
+
+def solve_rosenbrock(f: RHS, t_start: float, t_end: float, y0, rtol: float = 1e-6,
+                     atol: float = 1e-9, t_eval: Optional[Sequence[float]] = None,
+                     n_out: Optional[int] = None, jac: Optional[Jacobian] = None,
+                     h0: Optional[float] = None, max_step: Optional[float] = None,
+                     max_steps: int = 200_000, events: Optional[EventLog] = None) -> ODESolution:
+    """
+    Rosenbrock 2(3) de Shampine-Reichelt (`ode23s`), L-estable.
+
+    `jac(t, y)` devuelve ∂f/∂y con forma (*y.shape, n); sin él se estima por
+    diferencias finitas (n evaluaciones extra por paso). ∂f/∂t siempre por
+    diferencias (1 evaluación). La salida densa es la interpolación de 2.º
+    orden del propio método. Con lote cada trayectoria tiene su W.
+    """
+    y = np.array(y0, dtype=float)
+    if t_end < t_start:
+        raise ValueError("t_end debe ser mayor o igual que t_start")
+    t_out = output_times(t_start, t_end, t_eval, n_out)
+    span = t_end - t_start
+    max_step = span if not max_step or max_step <= 0 else min(max_step, span)
+    method = "Rosenbrock23"
+
+    F0 = f(t_start, y)
+    n_rhs, n_jac = 1, 0
+    if span == 0:
+        t_arr = np.array([t_start]) if t_out is None else t_out
+        return ODESolution(t_arr, np.repeat(y[None], len(t_arr), axis=0), y.copy(),
+                           n_rhs=n_rhs, method=method)
+
+    if h0 is None:
+        h, extra = initial_step(f, t_start, y, F0, 2, rtol, atol)
+        n_rhs += extra
+    else:
+        h = h0
+    h = min(max(h, 1e-12 * max(1.0, abs(t_start))), max_step)
+
+    if t_out is None:
+        ts, ys = [t_start], [y.copy()]
+    else:
+        Y = np.empty((len(t_out),) + y.shape)
+        j = int(np.searchsorted(t_out, t_start, side="right"))
+        Y[:j] = y
+    eye = np.eye(y.shape[-1])
+    d = _ROS_D
+    t = t_start
+    n_steps = n_rejected = 0
+    safety, min_fac, max_fac = 0.9, 0.2, 5.0
+
+    def lin_solve(W_inv, b):
+        return np.matmul(W_inv, b[..., None])[..., 0]
+
+    if events is not None:
+        events.start(t_start, y)
+    J = None
+    while t < t_end:
+        if n_steps + n_rejected >= max_steps:
+            raise RuntimeError(f"Rosenbrock23: se excedió max_steps={max_steps} en t={t:.6g}")
+        if J is None:
+            # Jacobiano y ∂f/∂t una vez por punto aceptado (se reutilizan al rechazar)
+            if jac is not None:
+                J = np.asarray(jac(t, y), dtype=float)
+            else:
+                J = fd_jacobian(f, t, y, F0)
+                n_rhs += y.shape[-1]
+            n_jac += 1
+            dt_fd = 1.5e-8 * max(abs(t), 1.0)
+            dFdt = (f(t + dt_fd, y) - F0) / dt_fd
+            n_rhs += 1
+
+        h = min(h, max_step)
+        last = t + h >= t_end - 1e-12 * max(1.0, abs(t_end))
+        if last:
+            h = t_end - t
+        try:
+            W_inv = np.linalg.inv(eye - (h * d) * J)
+        except np.linalg.LinAlgError:
+            n_rejected += 1
+            h *= 0.5
+            continue
+
+        T = (h * d) * dFdt
+        k1 = lin_solve(W_inv, F0 + T)
+        F1 = f(t + 0.5 * h, y + (0.5 * h) * k1)
+        k2 = lin_solve(W_inv, F1 - k1) + k1
+        y_new = y + h * k2
+        F2 = f(t + h, y_new)
+        k3 = lin_solve(W_inv, F2 - _ROS_E32 * (k2 - F1) - 2.0 * (k1 - F0) + T)
+        n_rhs += 2
+
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err = _rms((h / 6.0) * (k1 - 2.0 * k2 + k3) / scale)
+        if not np.isfinite(err) or err > 1.0:
+            n_rejected += 1
+            h *= min_fac if not np.isfinite(err) else max(min_fac, safety * err ** (-1 / 3))
+            continue
+
+        t_new = t_end if last else t + h
+
+        def dense(s_, y=y, k1=k1, k2=k2, h=h):
+            return y + h * (s_ * (1 - s_) / (1 - 2 * d) * k1 + s_ * (s_ - 2 * d) / (1 - 2 * d) * k2)
+
+        hit = events.step(t, y, t_new, y_new, dense) if events is not None else None
+        if hit is not None:
+            t_new, y_new = hit
+        if t_out is not None:
+            j_end = int(np.searchsorted(t_out, t_new, side="right"))
+            if j_end > j:
+                Y[j:j_end] = dense(((t_out[j:j_end] - t) / h).reshape((-1,) + (1,) * y.ndim))
+                j = j_end
+        else:
+            ts.append(t_new)
+            ys.append(y_new)
+        if hit is not None:
+            t, y = t_new, y_new
+            n_steps += 1
+            if t_out is not None:
+                t_out, Y = t_out[:j], Y[:j]
+            break
+
+        t, y, F0 = t_new, y_new, F2
+        J = None
+        n_steps += 1
+        h *= min(max_fac, safety * max(err, 1e-10) ** (-1 / 3))
+
+    t_arr, Y = (np.array(ts), np.stack(ys)) if t_out is None else (t_out, Y)
+    return ODESolution(t_arr, Y, np.array(y, dtype=float), n_steps, n_rejected, n_rhs, method=method,
+                       extra={"n_jac": n_jac})
+
+
+def solve_ivp(f: RHS, t_start: float, t_end: float, y0, method: str = "RK45",
+              rtol: float = 1e-6, atol: float = 1e-9, t_eval: Optional[Sequence[float]] = None,
+              n_out: Optional[int] = None, jac: Optional[Jacobian] = None,
+              max_step: Optional[float] = None, events: Optional[EventLog] = None,
+              h0: Optional[float] = None, max_steps: int = 200_000) -> ODESolution:
+    """
+    Punto de entrada de los métodos adaptativos.
+
+    "auto" integra con RK45 y, si detecta rigidez, continúa con Rosenbrock23
+    desde ese instante; la solución concatena ambos tramos. `h0` es el paso
+    inicial (por defecto, la estimación de Hairer). `max_steps` (aceptados +
+    rechazados) acota también las filas de la salida; al superarlo, RuntimeError.
+    """
+    kw = dict(rtol=rtol, atol=atol, max_step=max_step, events=events)
+    if method == "RK45":
+        return solve_dopri5(f, t_start, t_end, y0, t_eval=t_eval, n_out=n_out, h0=h0, max_steps=max_steps, **kw)
+    if method == "Rosenbrock23":
+        return solve_rosenbrock(f, t_start, t_end, y0, t_eval=t_eval, n_out=n_out, jac=jac, h0=h0,
+                                max_steps=max_steps, **kw)
+    if method != "auto":
+        raise ValueError(f"Método desconocido: '{method}'. Use {ADAPTIVE_METHODS}")
+
+    t_out = output_times(t_start, t_end, t_eval, n_out)
+    first = solve_dopri5(f, t_start, t_end, y0, t_eval=t_out, detect_stiffness=True, h0=h0,
+                         max_steps=max_steps, **kw)
+    t_switch = first.extra.get("stiff_at")
+    if t_switch is None or (events is not None and events.terminated):
+        first.method = "auto"
+        first.extra["switched"] = False
+        return first
+
+    rest_eval = None if t_out is None else t_out[len(first.t):]
+    second = solve_rosenbrock(f, t_switch, t_end, first.y_end, t_eval=rest_eval, jac=jac,
+                              max_steps=max(max_steps - first.n_steps - first.n_rejected, 1), **kw)
+    skip = 1 if t_out is None else 0        # t_switch ya está en el primer tramo
+    return ODESolution(
+        np.concatenate([first.t, second.t[skip:]]),
+        np.concatenate([first.y, second.y[skip:]]),
+        second.y_end,
+        first.n_steps + second.n_steps,
+        first.n_rejected + second.n_rejected,
+        first.n_rhs + second.n_rhs,
+        method="auto",
+        extra={"switched": True, "stiff_at": t_switch, "n_jac": second.extra["n_jac"]},
+    )
+
+
+# ─── Salida por bloques ────────────────────────────────────────────────────────
+# Un generador en lugar de un array (n_pasos, n): cada bloque se entrega y se
+# suelta, así que un año de PK o horas de HH no crecen en memoria. La malla es
+# absoluta (nodos origin + k·dt; ventanas origin + k·span en los adaptativos):
+# seguir desde un checkpoint reproduce bit a bit la corrida sin cortes, y
+# alargar t_end continúa desde el último estado sin recalcular nada.
+
+@dataclass
+class Checkpoint:
+    """Estado reanudable de `iter_chunks` (serializable a JSON con `to_dict`)."""
+    method: str
+    t: float
+    y: List[float]
+    origin: float                 # inicio de la malla
+    index: int = 0                # último nodo (paso fijo) o ventana (adaptativos) ≤ t
+    h: Optional[float] = None     # último paso aceptado (adaptativos)
+    width: Optional[float] = None  # separación de la malla: dt o duración de la ventana
+
+    @classmethod
+    def start(cls, method: str, t_start: float, y0, width: Optional[float] = None) -> "Checkpoint":
+        return cls(method, float(t_start), np.asarray(y0, dtype=float).tolist(), float(t_start),
+                   width=None if width is None else float(width))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Checkpoint":
+        """Inversa de `to_dict`; claves o tipos inválidos → ValueError."""
+        try:
+            ck = cls(**data)
+            ck.t, ck.origin, ck.index = float(ck.t), float(ck.origin), int(ck.index)
+            ck.h = None if ck.h is None else float(ck.h)
+            ck.width = None if ck.width is None else float(ck.width)
+            ck.y = np.asarray(ck.y, dtype=float).tolist()
+        except (TypeError, ValueError):
+            raise ValueError("Checkpoint inválido: se esperan method, t, y, origin, index, h y width")
+        if ck.index < 0 or ck.t < ck.origin or (ck.width is not None and not ck.width > 0):
+            raise ValueError("Checkpoint inválido: t debe ser ≥ origin, index ≥ 0 y width > 0")
+        return ck
+
+    def check_width(self, width: float):
+        """
+        ValueError si la malla no es la del checkpoint: `index` cuenta nodos de
+        ancho `self.width`, y con otro ancho el siguiente nodo quedaría atrás.
+        """
+        if self.width is None or not math.isclose(self.width, width, rel_tol=1e-12):
+            raise ValueError(f"El checkpoint es de una malla de ancho {self.width}, no {width}: "
+                             "reanude con el mismo dt, output_every y chunk_size")
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+Chunk = Tuple[np.ndarray, np.ndarray, Checkpoint]
+
+
+def _next_node(origin: float, width: float, index: int, t_end: float) -> Tuple[float, bool]:
+    """(destino del paso, ¿es un nodo de la malla?); el nodo se recorta a t_end."""
+    node = origin + width * (index + 1)
+    if node <= t_end or node - t_end <= 1e-9 * width:
+        return min(node, t_end), True
+    return t_end, False
+
+
+def iter_fixed(f: RHS, t_end: float, checkpoint: Checkpoint, dt: float, chunk_size: int = 4096,
+               output_every: int = 1, include_start: bool = True) -> Iterator[Chunk]:
+    """
+    Euler/RK4 por bloques de hasta `chunk_size` muestras: (t, Y, checkpoint).
+    Mismos nodos y mismas operaciones que `integrate_fixed`, así que la
+    concatenación de los bloques es idéntica a su salida. Se guarda el nodo k
+    si k es múltiplo de `output_every`, y siempre t_end.
+    """
+    if dt <= 0 or chunk_size < 1 or output_every < 1:
+        raise ValueError("dt, chunk_size y output_every deben ser positivos")
+    if t_end < checkpoint.t:
+        raise ValueError("t_end debe ser mayor o igual que el t del checkpoint")
+    if checkpoint.width is not None:
+        checkpoint.check_width(dt)
+    y = np.array(checkpoint.y, dtype=float)
+    integrator = FixedStepIntegrator(f, y.shape, checkpoint.method)
+    t, index, origin = checkpoint.t, checkpoint.index, checkpoint.origin
+    cur = np.empty_like(y)
+
+    T, Y, n = np.empty(chunk_size), np.empty((chunk_size,) + y.shape), 0
+    if include_start:
+        T[0], Y[0], n = t, y, 1
+    while t < t_end:
+        t_next, on_grid = _next_node(origin, dt, index, t_end)
+        integrator.step(t, y, t_next - t, out=cur)
+        y, cur = cur, y
+        t = t_next
+        if on_grid:
+            index += 1
+        if t == t_end or (on_grid and index % output_every == 0):
+            T[n], Y[n] = t, y
+            n += 1
+            if n == chunk_size and t < t_end:
+                yield T, Y, Checkpoint(checkpoint.method, t, y.tolist(), origin, index, width=dt)
+                T, Y, n = np.empty(chunk_size), np.empty((chunk_size,) + y.shape), 0
+    yield T[:n], Y[:n], Checkpoint(checkpoint.method, t, y.tolist(), origin, index, width=dt)
+
+
+def iter_adaptive(f: RHS, t_end: float, checkpoint: Checkpoint, span: float, rtol: float = 1e-6,
+                  atol: float = 1e-9, jac: Optional[Jacobian] = None, max_step: Optional[float] = None,
+                  output_every: int = 1, include_start: bool = True) -> Iterator[Chunk]:
+    """
+    RK45/Rosenbrock23/auto por ventanas de duración `span`: un bloque por
+    ventana con sus pasos aceptados (1 de cada `output_every` y el final de la
+    ventana). Cada ventana arranca con el último paso de la anterior, así que
+    el coste de cortar es pequeño; "auto" vuelve a probar rigidez en cada una.
+    """
+    if span <= 0 or output_every < 1:
+        raise ValueError("span y output_every deben ser positivos")
+    if t_end < checkpoint.t:
+        raise ValueError("t_end debe ser mayor o igual que el t del checkpoint")
+    if checkpoint.width is not None:
+        checkpoint.check_width(span)
+    y = np.array(checkpoint.y, dtype=float)
+    t, index, origin, h = checkpoint.t, checkpoint.index, checkpoint.origin, checkpoint.h
+    if include_start:
+        yield np.array([t]), y[None].copy(), Checkpoint(checkpoint.method, t, y.tolist(), origin, index, h, span)
+    while t < t_end:
+        t_next, on_grid = _next_node(origin, span, index, t_end)
+        sol = solve_ivp(f, t, t_next, y, method=checkpoint.method, rtol=rtol, atol=atol, jac=jac,
+                        max_step=max_step, h0=h)
+        steps = np.diff(sol.t)
+        h = float(steps[-2:].max()) if steps.size else h     # el último paso se recorta a la ventana
+        t, y = t_next, sol.y_end
+        if on_grid:
+            index += 1
+        idx = thin_indices(len(sol.t) - 1, output_every) + 1  # sol.t[0] ya se entregó
+        yield sol.t[idx], sol.y[idx], Checkpoint(checkpoint.method, t, y.tolist(), origin, index, h, span)
+
+
+def chunk_width(method: str, dt: float, chunk_size: int) -> float:
+    """Ancho de la malla de `iter_chunks`: dt (paso fijo) o la ventana chunk_size·dt."""
+    return chunk_size * dt if method in ADAPTIVE_METHODS else dt
+
+
+def iter_chunks(f: RHS, t_end: float, checkpoint: Checkpoint, dt: float, chunk_size: int = 4096,
+                output_every: int = 1, include_start: bool = True, **adaptive) -> Iterator[Chunk]:
+    """
+    Bloques (t, Y, checkpoint) según `checkpoint.method`. Con paso fijo cada
+    bloque tiene `chunk_size` muestras; con los adaptativos cada ventana dura
+    chunk_size·dt (rtol, atol, jac, max_step en `adaptive`).
+    """
+    width = chunk_width(checkpoint.method, dt, chunk_size)
+    if checkpoint.method in FIXED_STEP_METHODS:
+        return iter_fixed(f, t_end, checkpoint, width, chunk_size, output_every, include_start)
+    if checkpoint.method in ADAPTIVE_METHODS:
+        return iter_adaptive(f, t_end, checkpoint, width, output_every=output_every,
+                             include_start=include_start, **adaptive)
+    raise ValueError(f"Método desconocido: '{checkpoint.method}'. Use {FIXED_STEP_METHODS + ADAPTIVE_METHODS}")
@@ -0,0 +1,509 @@
+"""
+Binary EquaLab - Modelo PTI vectorizado (N pacientes a la vez)
+Misma biología que `_PythonPTIStepper` de routers/septima, sobre arrays.
+
+Cada parámetro puede ser escalar o array (N,), de modo que un barrido de
+tratamientos o dosis es una sola integración. Las ramas por tratamiento del
+stepper escalar se expresan con máscaras (`np.where`).
+
+`PTIStepper` replica al stepper: RK4 con `t` y días de prednisona congelados
+al inicio del paso, recorte a ≥ 0 y muerte por trombocitosis (> 1.5 M/μL).
+Con un `rng` se añaden la hemorragia fatal y la alerta de infección
+estocásticas (una sola extracción uniforme por paso para todo el lote); sin
+él la simulación es determinista.
+
+Los números aleatorios salen de Philox (generador por contador) sembrado con
+una SeedSequence: cada simulación, sesión o bloque de ensemble tiene su flujo
+(`SeedSequence.spawn`), nada comparte estado global y la misma semilla da la
+misma trayectoria bit a bit.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from services.ode_integrators import Event, threshold_event
+
+P_NORMAL = 250000.0      # Recuento normal (/μL)
+P_CARRYING = 400000.0    # Techo homeostático
+LIFESPAN = 10.0          # Vida media plaquetaria (días)
+P_THROMBOSIS = 1500000.0
+P_RECOVERY = 150000.0         # Umbral de remisión
+P_THROMBOCYTOSIS = 600000.0
+P_BLEEDING_RISK = 20000.0     # Sangrado espontáneo
+P_SEVERE_BLEEDING = 10000.0   # Hemorragia mucocutánea → intracraneal
+P_DEPLETED = 10.0             # Plaquetas agotadas: incompatible con la vida
+
+# Parámetros de `_deriv` y sus valores por defecto
+PTI_DEFAULTS = {
+    "production_rate": 30000.0,
+    "destruction_rate": 120000.0,
+    "Km": 30000.0,
+    "antibody_production": 0.22,
+    "antibody_half_life": 21.0,
+    "treatment": 0,
+    "treatment_efficacy": 0.8,
+    "dose_mg": 60.0,
+    "ivig_doses": 2,
+    "splenectomy_success": 1.0,
+}
+
+DEATH_NONE, DEATH_HEMORRHAGE, DEATH_THROMBOSIS = 0, 1, 2
+DEATH_CAUSES = ("", "HEMORRHAGE", "THROMBOSIS")
+
+# Riesgo diario de hemorragia fatal por tramo de plaquetas (mismo que el stepper)
+HEMORRHAGE_BANDS = np.array([5000.0, 10000.0, 20000.0, 30000.0])
+HEMORRHAGE_DAILY_RISK = np.array([0.15, 0.08, 0.03, 0.005, 0.0])
+
+
+# ─── Números aleatorios ────────────────────────────────────────────────────────
+
+ENSEMBLE_BLOCK = 1024          # pacientes por flujo aleatorio del ensemble
+MAX_ENSEMBLE_WORKERS = 8
+
+Seed = Union[None, int, np.random.SeedSequence]
+
+
+def new_seed() -> int:
+    """Semilla fresca (entropía del sistema) que se puede devolver al cliente."""
+    # 53 bits: cabe exacta en un número de JavaScript
+    return int(np.random.SeedSequence().entropy) & (2**53 - 1)
+
+
+def pti_rng(seed: Seed = None) -> np.random.Generator:
+    """Generador Philox independiente; `seed` None → entropía fresca."""
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return np.random.Generator(np.random.Philox(seed))
+
+
+def pti_streams(seed: Seed, n: int) -> List[np.random.Generator]:
+    """n flujos independientes derivados de `seed` (SeedSequence.spawn)."""
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [pti_rng(child) for child in seed.spawn(n)]
+
+
+# Philox4x64-10 (Salmon et al., SC'11) en NumPy: multiplicadores y constantes de Weyl
+_PHILOX_M = np.array([[0xD2E7470EE14C6C93], [0xCA5A826395121157]], dtype=np.uint64)
+_PHILOX_W = np.array([[0x9E3779B97F4A7C15], [0xBB67AE8584CAA73B]], dtype=np.uint64)
+_MASK32, _S32 = np.uint64(0xFFFFFFFF), np.uint64(32)
+_M_LO, _M_HI = _PHILOX_M & _MASK32, _PHILOX_M >> _S32
+
+
+def _philox_blocks(counter: np.ndarray, key: np.ndarray) -> np.ndarray:
+    """
+    Bloques Philox4x64-10 de muchos flujos a la vez: counter (4, m) y key (2, m)
+    uint64 → (4, m). El producto 64×64 → 128 bits se arma con mitades de 32.
+    """
+    even, odd, key = counter[0::2], counter[1::2], key.copy()    # (c0, c2), (c1, c3)
+    for r in range(10):
+        if r:
+            key += _PHILOX_W
+        lo32, hi32 = even & _MASK32, even >> _S32
+        ll, lh, hl = _M_LO * lo32, _M_LO * hi32, _M_HI * lo32
+        mid = (ll >> _S32) + (lh & _MASK32) + (hl & _MASK32)
+        hi = _M_HI * hi32 + (lh >> _S32) + (hl >> _S32) + (mid >> _S32)
+        lo = (mid << _S32) | (ll & _MASK32)
+        # (c0, c1, c2, c3) ← (hi1 ^ c1 ^ k0, lo1, hi0 ^ c3 ^ k1, lo0)
+        even, odd = hi[::-1] ^ odd ^ key, lo[::-1]
+    out = np.empty_like(counter)
+    out[0::2], out[1::2] = even, odd
+    return out
+
+
+class PhiloxStreams:
+    """
+    Un flujo Philox por paciente, todos avanzados en bloque (sin bucle por
+    paciente). El flujo i reproduce bit a bit `pti_rng(seed_i)`: cada
+    `uniforms` entrega a los activos las dos uniformes de `random(2)` y deja
+    intactos a los demás, así que un flujo solo avanza cuando su paciente da
+    un paso.
+    """
+
+    __slots__ = ("key", "counter", "buffer", "half")
+
+    def __init__(self, seeds: List[Seed]):
+        n = len(seeds)
+        self.key = np.zeros((2, n), dtype=np.uint64)
+        self.counter = np.zeros((4, n), dtype=np.uint64)
+        self.buffer = np.zeros((4, n), dtype=np.uint64)   # último bloque: 2 pasos de 2 uniformes
+        self.half = np.zeros(n, dtype=bool)               # ¿queda la segunda mitad del bloque?
+        for i, seed in enumerate(seeds):
+            self.seed(i, seed)
+
+    def __len__(self):
+        return self.half.shape[0]
+
+    def seed(self, i: int, seed: Seed = None):
+        """Reinicia el flujo `i` (misma clave que Philox(SeedSequence(seed)))."""
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.key[:, i] = seed.generate_state(2, np.uint64)
+        self.counter[:, i] = 0
+        self.half[i] = False
+
+    def resize(self, n: int):
+        """Conserva los primeros flujos; los nuevos, con entropía fresca."""
+        grown = PhiloxStreams([None] * max(n - len(self), 0))
+        for name in self.__slots__:
+            setattr(self, name, np.concatenate([getattr(self, name)[..., :n], getattr(grown, name)], axis=-1))
+
+    def uniforms(self, active: Optional[np.ndarray] = None) -> np.ndarray:
+        """(2, N) uniformes en [0, 1); 1.0 (sin evento) para quien no está activo."""
+        n = len(self)
+        idx = np.arange(n) if active is None else np.flatnonzero(active)
+        second = self.half[idx]
+        fresh = idx[~second]
+        if fresh.size:
+            counter = self.counter[:, fresh]
+            counter[0] += np.uint64(1)
+            counter[1] += counter[0] == 0                 # acarreo, como numpy
+            self.counter[:, fresh] = counter
+            self.buffer[:, fresh] = _philox_blocks(counter, self.key[:, fresh])
+        first = np.where(second, 2, 0)
+        words = self.buffer[np.stack([first, first + 1]), idx]
+        self.half[idx] = ~second
+        u = np.ones((2, n))
+        # Igual que Generator.random: 53 bits altos · 2⁻⁵³
+        u[:, idx] = (words >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+        return u
+
+
+def pti_events(stop_on_depletion: bool = False) -> List[Event]:
+    """Umbrales clínicos de P vigilados durante la simulación (estado [P, A])."""
+    return [
+        threshold_event("bleeding_risk", 0, P_BLEEDING_RISK, direction=-1),
+        threshold_event("severe_bleeding", 0, P_SEVERE_BLEEDING, direction=-1),
+        threshold_event("platelets_depleted", 0, P_DEPLETED, direction=-1, terminal=stop_on_depletion),
+        threshold_event("thrombocytosis", 0, P_THROMBOCYTOSIS, direction=1),
+    ]
+
+
+def pti_params(params: Dict, n: int) -> Dict[str, np.ndarray]:
+    """Completa `params` con los defaults y emite cada valor a un array (n,)."""
+    out = {}
+    for key, default in PTI_DEFAULTS.items():
+        value = np.asarray(params.get(key, default), dtype=float)
+        out[key] = np.broadcast_to(value, (n,)).astype(float)
+    out["treatment"] = out["treatment"].astype(np.int64)
+    out["ivig_doses"] = np.floor(out["ivig_doses"])
+
+    # Factores de tratamiento: no dependen del estado, se calculan una vez
+    treatment, efficacy = out["treatment"], out["treatment_efficacy"]
+    pred, ivig, splen = treatment == 1, treatment == 2, treatment == 3
+    pred_factor = np.minimum(out["dose_mg"] / 60.0, 2.0)
+    ivig_factor = np.minimum(out["ivig_doses"] / 2.0, 2.5)
+    out["on_prednisone"] = pred
+    out["f_dest"] = np.select(
+        [pred, ivig, splen],
+        [np.maximum(0.1, 1.0 - efficacy * 0.7 * pred_factor),
+         np.maximum(0.05, 1.0 - efficacy * 0.8 * ivig_factor),
+         np.maximum(0.05, 1.0 - 0.85 * out["splenectomy_success"])],
+        default=1.0,
+    )
+    out["f_ab"] = np.where(pred, np.maximum(0.1, 1.0 - efficacy * 0.6 * pred_factor), 1.0)
+    out["cushing_dose"] = pred & (out["dose_mg"] >= 60)
+    out["ab_clearance"] = 0.693 / out["antibody_half_life"]
+    return out
+
+
+def pti_derivatives(P, A, t, pred_days, prev_treatment, p):
+    """
+    dP/dt, dA/dt y máscara de Cushing para N pacientes.
+
+    `t` y `pred_days` son los del inicio del paso (igual que el stepper);
+    `p` viene de `pti_params` (con los factores de tratamiento ya calculados).
+    """
+
+    # 1. Producción medular con retroalimentación de TPO
+    tpo_feedback = P_CARRYING ** 2 / (P_CARRYING ** 2 + P ** 2)
+    production = p["production_rate"] * (1.0 + 1.5 * tpo_feedback)
+    # 2. Senescencia
+    senescence = P / LIFESPAN
+    # 3. Destrucción autoinmune (Michaelis-Menten)
+    immune = p["destruction_rate"] * A * P / (p["Km"] + np.maximum(P, 1.0))
+    # 4. Sangrado por trombocitopenia severa
+    severity = np.where(P < 20000, ((20000 - P) / 20000) ** 2, 0.0)
+    severity = np.where(P < 10000, severity * (1.0 + 3.0 * (10000 - P) / 10000), severity)
+    bleeding = 5000.0 * severity
+    # 4b. Agotamiento medular tras 7 días con P < 15k
+    exhausted = (P < 15000) & (t > 7)
+    production = np.where(exhausted, production * np.maximum(0.3, 1.0 - 0.03 * np.maximum(t - 7, 0.0)),
+                          production)
+
+    # 5. Tratamientos — Cushing iatrogénico: prednisona ≥ 60 mg más de 14 días
+    cushing = p["cushing_dose"] & (pred_days > 14)
+    production = np.where(cushing, production * 0.7, production)
+
+    # 6. Rebote al suspender prednisona tras > 7 días
+    rebound = np.where((prev_treatment == 1) & ~p["on_prednisone"] & (pred_days > 7), 1.5, 1.0)
+
+    dP = production - senescence - immune * p["f_dest"] - bleeding
+    dA = p["antibody_production"] * p["f_ab"] * rebound - p["ab_clearance"] * A
+    return dP, dA, cushing
+
+
+def hemorrhage_step_risk(P: np.ndarray, dt: float) -> np.ndarray:
+    """Probabilidad de hemorragia fatal en un paso `dt` (días) según P."""
+    daily = HEMORRHAGE_DAILY_RISK[np.searchsorted(HEMORRHAGE_BANDS, P, side="right")]
+    return 1.0 - (1.0 - daily) ** dt
+
+
+# Inmunosupresión severa (prednisona > 100 mg más de 7 días): alerta de infección
+INFECTION_DAILY_RISK = 0.02
+
+
+class PTIStepper:
+    """
+    Stepper PTI de N pacientes con estado en arrays (struct-of-arrays).
+
+    Equivale a N `_PythonPTIStepper`: P, A, días de prednisona, tratamiento
+    previo y desenlace son arrays (N,); el reloj `t` es común y acumula dt
+    igual que el stepper escalar. Los pacientes muertos quedan congelados.
+
+    Con `rng` cada paso hace una sola extracción (2, N): fila 0 para la
+    hemorragia fatal, fila 1 para la alerta de infección. Sin `rng` el paso
+    es determinista (sin eventos estocásticos). `rng` también puede ser un
+    `PhiloxStreams` con un flujo por paciente (sesiones en tiempo real): cada
+    uno avanza solo cuando su paciente da un paso, así que su trayectoria no
+    depende de los demás.
+
+    Para sesiones en tiempo real (services/pti_realtime) `t` y `dt` pueden ser
+    arrays (N,): cada paciente lleva su reloj, `active` elige quién avanza en
+    el paso y `reset`/`resize` reciclan o añaden huecos.
+    """
+
+    __slots__ = ("n", "t", "P", "A", "params", "pred_days", "prev_treatment",
+                 "is_dead", "death_cause", "death_time", "has_cushing",
+                 "infection_alert", "infection_time", "rng", "_raw_params")
+
+    # Estado por paciente (lo que `reset` reinicia y `resize` conserva)
+    STATE = ("P", "A", "pred_days", "prev_treatment", "is_dead", "death_cause", "death_time",
+             "has_cushing", "infection_alert", "infection_time")
+
+    def __init__(self, y0, params: Dict, n: int = 1,
+                 rng: Union[None, np.random.Generator, "PhiloxStreams"] = None):
+        y0 = np.broadcast_to(np.asarray(y0, dtype=float), (n, 2))
+        self.n = n
+        self.t = 0.0
+        self.P = y0[:, 0].copy()
+        self.A = y0[:, 1].copy()
+        self._raw_params = dict(params)
+        self.params = pti_params(self._raw_params, n)
+        self.pred_days = np.zeros(n)
+        self.prev_treatment = np.zeros(n, dtype=np.int64)
+        self.is_dead = np.zeros(n, dtype=bool)
+        self.death_cause = np.zeros(n, dtype=np.int8)
+        self.death_time = np.full(n, np.nan)
+        self.has_cushing = np.zeros(n, dtype=bool)
+        self.infection_alert = np.zeros(n, dtype=bool)
+        self.infection_time = np.full(n, np.nan)
+        self.rng = rng
+
+    def update_params(self, new_params: Dict):
+        """Inyección en caliente (escalares o arrays (N,)), como en el stepper escalar."""
+        self._raw_params.update(new_params)
+        self.params = pti_params(self._raw_params, self.n)
+
+    def reset(self, idx, y0, t: float = 0.0):
+        """Paciente nuevo en los huecos `idx` (reloj por paciente: `t` pasa a array)."""
+        if np.ndim(self.t) == 0:
+            self.t = np.full(self.n, float(self.t))
+        self.t[idx] = t
+        self.P[idx], self.A[idx] = y0[0], y0[1]
+        self.pred_days[idx] = 0.0
+        self.prev_treatment[idx] = 0
+        self.is_dead[idx] = False
+        self.death_cause[idx] = DEATH_NONE
+        self.death_time[idx] = np.nan
+        self.has_cushing[idx] = False
+        self.infection_alert[idx] = False
+        self.infection_time[idx] = np.nan
+
+    def resize(self, n: int, params: Dict):
+        """Cambia a `n` huecos conservando los primeros; `params` debe venir con arrays (n,)."""
+        fresh = PTIStepper(np.zeros(2), params, n, rng=self.rng)
+        keep = min(n, self.n)
+        for name in self.STATE:
+            getattr(fresh, name)[:keep] = getattr(self, name)[:keep]
+        fresh.t = np.zeros(n)
+        fresh.t[:keep] = np.broadcast_to(self.t, (self.n,))[:keep]
+        for name in ("n", "t", "params", "_raw_params") + self.STATE:
+            setattr(self, name, getattr(fresh, name))
+        if isinstance(self.rng, PhiloxStreams):
+            self.rng.resize(n)
+
+    def _uniforms(self, active: Optional[np.ndarray]) -> np.ndarray:
+        """(2, N) uniformes del paso; con flujos por paciente, 1.0 (sin evento) para quien no avanza."""
+        if isinstance(self.rng, PhiloxStreams):
+            return self.rng.uniforms(active)
+        return self.rng.random((2, self.n))
+
+    def step(self, dt, active: Optional[np.ndarray] = None):
+        """Un paso RK4 de `dt` (escalar o (N,)); con `active` solo avanzan esos pacientes."""
+        p, t = self.params, self.t
+        P, A, pred_days, prev = self.P, self.A, self.pred_days, self.prev_treatment
+
+        k1p, k1a, c1 = pti_derivatives(P, A, t, pred_days, prev, p)
+        k2p, k2a, _ = pti_derivatives(P + 0.5 * dt * k1p, A + 0.5 * dt * k1a, t, pred_days, prev, p)
+        k3p, k3a, _ = pti_derivatives(P + 0.5 * dt * k2p, A + 0.5 * dt * k2a, t, pred_days, prev, p)
+        k4p, k4a, _ = pti_derivatives(P + dt * k3p, A + dt * k3a, t, pred_days, prev, p)
+
+        alive = ~self.is_dead
+        if active is not None:
+            alive = alive & active
+            self.prev_treatment = np.where(active, p["treatment"], prev)
+            self.t = np.where(active, t + dt, t)
+        else:
+            self.prev_treatment = p["treatment"]
+            self.t = t + dt
+        self.has_cushing |= c1 & alive
+        self.P = np.where(alive, np.maximum(0.0, P + (dt / 6) * (k1p + 2 * k2p + 2 * k3p + k4p)), P)
+        self.A = np.where(alive, np.maximum(0.0, A + (dt / 6) * (k1a + 2 * k2a + 2 * k3a + k4a)), A)
+        self.pred_days = np.where(alive & p["on_prednisone"], pred_days + dt, pred_days)
+
+        if self.rng is not None:
+            u = self._uniforms(active)
+            # Infección oportunista: solo se evalúa en el primer décimo de cada día
+            immuno = alive & p["on_prednisone"] & (p["dose_mg"] > 100) & (pred_days > 7)
+            infected = immuno & ~self.infection_alert & (t - np.floor(t) < 0.11) & (u[1] < INFECTION_DAILY_RISK)
+            self.infection_alert |= infected
+            self.infection_time = np.where(infected, t, self.infection_time)
+
+            bleed = alive & (self.P < HEMORRHAGE_BANDS[-1]) & (u[0] < hemorrhage_step_risk(self.P, dt))
+            self._kill(bleed, DEATH_HEMORRHAGE)
+            self.P = np.where(bleed, 0.0, self.P)
+            alive = alive & ~bleed
+
+        self._kill(alive & (self.P > P_THROMBOSIS), DEATH_THROMBOSIS)
+
+    def _kill(self, mask: np.ndarray, cause: int):
+        self.is_dead |= mask
+        self.death_cause[mask] = cause
+        self.death_time = np.where(mask, self.t, self.death_time)
+
+    def outcome(self, t_offset: float = 0.0) -> Dict[str, np.ndarray]:
+        """Desenlace por paciente; `t_offset` traslada los tiempos al eje del caller."""
+        return {"is_dead": self.is_dead.copy(), "death_cause": self.death_cause.copy(),
+                "death_time": self.death_time + t_offset, "has_cushing": self.has_cushing.copy()}
+
+
+def simulate_pti_batch(y0, params: Dict, n: int, t_start: float, t_end: float, dt: float,
+                       rng: Optional[np.random.Generator] = None):
+    """
+    Integra N pacientes con `PTIStepper` de paso `dt` (mismos n_pasos que /bio/pti).
+
+    Devuelve (t (S+1,), Y (S+1, N, 2), outcome) con outcome = {"is_dead",
+    "death_cause" (códigos DEATH_*), "death_time" (NaN si sobrevive),
+    "has_cushing"}. Los pacientes muertos quedan congelados en su último
+    estado (P = 0 tras una hemorragia).
+    """
+    if dt <= 0:
+        raise ValueError("dt debe ser positivo")
+    stepper = PTIStepper(y0, params, n, rng=rng)
+    n_steps = int((t_end - t_start) / dt)
+
+    Y = np.empty((n_steps + 1, n, 2))
+    Y[0, :, 0], Y[0, :, 1] = stepper.P, stepper.A
+    for i in range(n_steps):
+        stepper.step(dt)
+        Y[i + 1, :, 0], Y[i + 1, :, 1] = stepper.P, stepper.A
+
+    t_arr = t_start + dt * np.arange(n_steps + 1)
+    return t_arr, Y, stepper.outcome(t_start)
+
+
+# ─── Ensemble Monte Carlo ──────────────────────────────────────────────────────
+
+
+def _ensemble_block(y0, params: Dict, n: int, t_start: float, t_end: float, dt: float,
+                    stream: np.random.SeedSequence):
+    """Un bloque del ensemble con su propio flujo (función de módulo: corre en el pool)."""
+    return simulate_pti_batch(y0, params, n, t_start, t_end, dt, rng=pti_rng(stream))
+
+
+def simulate_pti_ensemble(y0, params: Dict, n: int, t_start: float, t_end: float, dt: float,
+                          seed: Seed = None, n_workers: int = 1):
+    """
+    Como `simulate_pti_batch`, en bloques de ENSEMBLE_BLOCK pacientes con un
+    flujo derivado de `seed` cada uno. El bloque b usa siempre el hijo b de
+    la semilla: el resultado es el mismo con 1 o con n_workers procesos.
+    """
+    sizes = [min(ENSEMBLE_BLOCK, n - i) for i in range(0, n, ENSEMBLE_BLOCK)]
+    if not sizes:
+        raise ValueError("n debe ser positivo")
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    jobs = [(y0, params, size, t_start, t_end, dt, child) for size, child in zip(sizes, seed.spawn(len(sizes)))]
+    n_workers = min(n_workers, len(jobs), MAX_ENSEMBLE_WORKERS)
+    if n_workers <= 1:
+        blocks = [_ensemble_block(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            blocks = list(pool.map(_ensemble_block, *zip(*jobs)))
+    t_arr = blocks[0][0]
+    Y = np.concatenate([b[1] for b in blocks], axis=1)
+    outcome = {key: np.concatenate([b[2][key] for b in blocks]) for key in blocks[0][2]}
+    return t_arr, Y, outcome
+
+
+def recovery_times(t: np.ndarray, P: np.ndarray) -> np.ndarray:
+    """
+    Tiempo hasta la recuperación (P ≥ 150k) tras la primera caída por debajo
+    de 150k, por paciente (P: (n_t, N)). NaN si nunca cae o nunca se recupera.
+    """
+    below = P < P_RECOVERY
+    has_below = below.any(axis=0)
+    first_below = np.where(has_below, np.argmax(below, axis=0), len(t))
+    after = np.arange(len(t))[:, None] > first_below[None, :]
+    back = (P >= P_RECOVERY) & after
+    hit = back.any(axis=0)
+    return np.where(hit, t[np.argmax(back, axis=0)], np.nan)
+
+
+def ensemble_summary(t: np.ndarray, Y: np.ndarray, outcome: Dict,
+                     quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)) -> Dict:
+    """
+    Estadísticas de N trayectorias estocásticas (Y: (n_t, N, 2)).
+
+      survival            fracción viva en cada t (Kaplan-Meier sin censura)
+      platelet_quantiles  cuantiles de P entre los vivos en cada t (NaN sin vivos)
+      death_causes        fracción por causa (incluye "ALIVE")
+      recovery            `recovery_times`: fracción, media, mediana, IQR
+    """
+    n = Y.shape[1]
+    death_time = outcome["death_time"]
+    # Vivo en t ⇔ no hay muerte registrada en o antes de t
+    alive = ~(death_time[None, :] <= t[:, None] + 1e-12)
+    survival = alive.mean(axis=1)
+
+    P = np.where(alive, Y[..., 0], np.nan)
+    bands = np.full((len(quantiles), len(t)), np.nan)
+    rows = alive.any(axis=1)
+    if rows.any():
+        bands[:, rows] = np.nanquantile(P[rows], quantiles, axis=1)
+
+    ttr = recovery_times(t, Y[..., 0])
+    recovery = {"fraction": float(np.isfinite(ttr).mean()) if n else 0.0}
+    ttr = ttr[np.isfinite(ttr)]
+    if ttr.size:
+        q25, q50, q75 = np.quantile(ttr, [0.25, 0.5, 0.75])
+        recovery.update(mean_days=float(ttr.mean()), median_days=float(q50),
+                        p25_days=float(q25), p75_days=float(q75))
+
+    codes = np.bincount(outcome["death_cause"], minlength=len(DEATH_CAUSES)) / max(n, 1)
+    causes = {"ALIVE": float(codes[DEATH_NONE])}
+    causes.update({DEATH_CAUSES[c]: float(codes[c]) for c in (DEATH_HEMORRHAGE, DEATH_THROMBOSIS)})
+    dead_t = death_time[np.isfinite(death_time)]
+
+    return {
+        "survival": survival,
+        "platelet_quantiles": bands,
+        "death_causes": causes,
+        "recovery": recovery,
+        "median_death_day": float(np.median(dead_t)) if dead_t.size else None,
+        "cushing_fraction": float(outcome["has_cushing"].mean()) if n else 0.0,
+        "thrombocytosis_fraction": float((Y[..., 0] > P_THROMBOCYTOSIS).any(axis=0).mean()) if n else 0.0,
+    }
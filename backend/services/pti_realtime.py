@@ -0,0 +1,290 @@
+"""
+Binary EquaLab - Tiempo real PTI con un solo ticker para todas las sesiones
+Hub detrás de /api/septima/realtime/pti.
+
+Antes cada WebSocket tenía su propio bucle (sondeo de receive_json con
+timeout de 1 ms, un frame JSON por tick y un sleep para 60 FPS): con 200
+alumnos conectados el event loop se iba en temporizadores. Ahora:
+
+  - `PTIHub` mantiene a todos los pacientes en un único `pti_model.PTIStepper`
+    (un hueco por sesión, reloj y dt por hueco) y lo avanza desde una sola
+    tarea a `fps` ticks por segundo.
+  - Cada tick construye los frames de todas las sesiones de una vez (array
+    estructurado `FRAME_DTYPE`) y deja en cada sesión solo el último: si el
+    cliente va atrasado, los frames intermedios se fusionan (`dropped`).
+  - El router lee los mensajes del cliente en otra tarea y envía frames
+    cuando la sesión tiene uno nuevo; no hay sondeo ni sleep por conexión.
+  - Cada hueco tiene su propio flujo Philox (`seed` en la configuración): el
+    azar de una sesión no depende de las demás ni del ritmo del ticker.
+
+Frame binario (opcional, `{"binary": true}` en la configuración): los 34
+bytes little-endian de `FRAME_DTYPE`:
+    t f64 | P f64 | A f64 | prednisone_days f32 | infection_t f32 (NaN si no)
+    | flags u8 (bit 0 fallecido, bit 1 Cushing, bit 2 infección) | death_cause u8
+"""
+
+import asyncio
+import math
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from services import pti_model
+
+DEFAULT_FPS = 60.0
+MAX_SPEED = 50.0           # Pasos por frame: una sesión no puede frenar el ticker de todas
+INITIAL_CAPACITY = 64
+
+FLAG_DEAD, FLAG_CUSHING, FLAG_INFECTION = 1, 2, 4
+
+FRAME_DTYPE = np.dtype([
+    ("t", "<f8"), ("P", "<f8"), ("A", "<f8"),
+    ("prednisone_days", "<f4"), ("infection_t", "<f4"),
+    ("flags", "u1"), ("death_cause", "u1"),
+])
+
+INFECTION_ALERT_MSG = "Inmunosupresión severa: riesgo de infección oportunista"
+
+
+def decode_frame(data: bytes) -> np.void:
+    """Frame binario → registro de `FRAME_DTYPE` (para clientes y tests)."""
+    return np.frombuffer(data, dtype=FRAME_DTYPE, count=1)[0]
+
+
+def frame_to_json(frame: np.void) -> dict:
+    """Registro → el frame JSON histórico ({t, y, is_dead, death_cause, ...})."""
+    flags = int(frame["flags"])
+    is_dead = bool(flags & FLAG_DEAD)
+    alerts = []
+    if flags & FLAG_INFECTION:
+        alerts.append({"type": "INFECTION_RISK", "t": float(frame["infection_t"]), "msg": INFECTION_ALERT_MSG})
+    return {
+        "t": round(float(frame["t"]), 4),
+        "y": [float(frame["P"]), float(frame["A"])],
+        "is_dead": is_dead,
+        "death_cause": pti_model.DEATH_CAUSES[frame["death_cause"]] if is_dead else None,
+        "has_cushing": bool(flags & FLAG_CUSHING),
+        "prednisone_days": round(float(frame["prednisone_days"]), 1),
+        "alerts": alerts,
+    }
+
+
+def _clean_params(params: Optional[Dict]) -> Dict[str, float]:
+    """Solo los parámetros del modelo, numéricos (ValueError si no)."""
+    out = {}
+    for key, value in (params or {}).items():
+        if key in pti_model.PTI_DEFAULTS:
+            try:
+                out[key] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Parámetro '{key}' no numérico")
+    return out
+
+
+def _clean_speed(speed) -> float:
+    speed = float(speed)
+    if not math.isfinite(speed) or speed < 0:
+        raise ValueError("speed debe ser un número ≥ 0")
+    return min(speed, MAX_SPEED)
+
+
+def _clean_seed(seed) -> int:
+    # JSON solo trae int/float/str/bool: se exige un entero de verdad, sin truncar
+    if seed is None:
+        return pti_model.new_seed()
+    if isinstance(seed, bool) or not isinstance(seed, (int, np.integer)):
+        raise ValueError("seed debe ser un entero no negativo")
+    if seed < 0:
+        raise ValueError("seed debe ser un entero no negativo")
+    return int(seed)
+
+
+class PTISession:
+    """Una conexión: su hueco en el stepper y el último frame pendiente de enviar."""
+
+    __slots__ = ("slot", "dt", "speed", "binary", "seed", "latest", "ready", "finished", "closed",
+                 "frames", "dropped", "_credit")
+
+    def __init__(self, slot: int, dt: float, speed: float, binary: bool, seed: Optional[int] = None):
+        self.slot = slot
+        self.dt = dt
+        self.speed = speed
+        self.binary = binary
+        self.seed = seed           # Semilla del flujo Philox del hueco
+        self.latest: Optional[np.void] = None
+        self.ready = asyncio.Event()
+        self.finished = False      # Paciente fallecido: queda el último frame
+        self.closed = False        # Cliente desconectado
+        self.frames = 0
+        self.dropped = 0
+        self._credit = 0.0         # Pasos fraccionarios acumulados (speed < 1)
+
+    def publish(self, frame: np.void):
+        # Si el anterior no se envió aún, se sustituye: el cliente recibe el más reciente
+        if self.ready.is_set():
+            self.dropped += 1
+        self.latest = frame
+        self.frames += 1
+        self.ready.set()
+
+    def ack(self) -> Dict:
+        """Primer mensaje (siempre JSON): la semilla efectiva permite repetir la sesión."""
+        return {"type": "ready", "seed": self.seed, "dt": self.dt, "binary": self.binary}
+
+    def encode(self, frame: np.void):
+        return frame.tobytes() if self.binary else frame_to_json(frame)
+
+
+class PTIHub:
+    """Todas las sesiones PTI en un stepper vectorizado, avanzado por un solo ticker."""
+
+    def __init__(self, fps: float = DEFAULT_FPS, capacity: int = INITIAL_CAPACITY):
+        self.period = 1.0 / fps
+        self._raw = {k: np.full(capacity, float(v)) for k, v in pti_model.PTI_DEFAULTS.items()}
+        self.stepper = pti_model.PTIStepper(np.zeros(2), self._raw, capacity,
+                                            rng=pti_model.PhiloxStreams([None] * capacity))
+        self.stepper.t = np.zeros(capacity)
+        self.sessions: Dict[int, PTISession] = {}
+        self._free = list(range(capacity - 1, -1, -1))
+        self._occupied = np.zeros(capacity, dtype=bool)
+        self._dt = np.zeros(capacity)
+        self._params_dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self.ticks = 0
+        self.tick_ms = 0.0         # Media móvil del coste de un tick
+
+    # ─── Sesiones ───
+
+    def join(self, y0, params: Optional[Dict] = None, dt: float = 0.1, speed: float = 1.0,
+             binary: bool = False, seed: Optional[int] = None) -> PTISession:
+        """
+        Registra una sesión (ValueError si la configuración no es válida) y
+        arranca el ticker. Con `seed` (y sin cambios de parámetros en caliente)
+        la trayectoria es reproducible; sin ella se usa una semilla fresca, que
+        queda en `session.seed` y viaja al cliente en `session.ack()`.
+        """
+        dt = float(dt)
+        seed = _clean_seed(seed)
+        if not math.isfinite(dt) or dt <= 0:
+            raise ValueError("dt debe ser positivo")
+        y0 = [float(v) for v in y0]
+        if len(y0) != 2:
+            raise ValueError("y0 debe ser [Plaquetas, Anticuerpos]")
+        params, speed = _clean_params(params), _clean_speed(speed)
+
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        for key, default in pti_model.PTI_DEFAULTS.items():
+            self._raw[key][slot] = params.get(key, default)
+        self._params_dirty = True
+        self.stepper.reset(slot, y0)
+        self.stepper.rng.seed(slot, seed)
+        self._occupied[slot] = True
+        self._dt[slot] = dt
+
+        session = PTISession(slot, dt, speed, binary, seed)
+        self.sessions[slot] = session
+        self._ensure_ticker()
+        return session
+
+    def update(self, session: PTISession, params: Optional[Dict] = None, speed=None):
+        """Inyección en caliente; se aplica al inicio del siguiente tick."""
+        if session.closed or session.finished:
+            return
+        if params:
+            for key, value in _clean_params(params).items():
+                self._raw[key][session.slot] = value
+            self._params_dirty = True
+        if speed is not None:
+            session.speed = _clean_speed(speed)
+
+    def leave(self, session: PTISession):
+        """Libera el hueco y despierta a quien espere frames de la sesión."""
+        session.closed = True
+        session.ready.set()
+        if self.sessions.get(session.slot) is session:
+            self._release(session)
+
+    def _release(self, session: PTISession):
+        del self.sessions[session.slot]
+        self._occupied[session.slot] = False
+        self._free.append(session.slot)
+
+    def _grow(self):
+        n = self.stepper.n
+        for key, arr in self._raw.items():
+            self._raw[key] = np.concatenate([arr, np.full(n, float(pti_model.PTI_DEFAULTS[key]))])
+        self.stepper.resize(2 * n, self._raw)
+        self._occupied = np.concatenate([self._occupied, np.zeros(n, dtype=bool)])
+        self._dt = np.concatenate([self._dt, np.zeros(n)])
+        self._free.extend(range(2 * n - 1, n - 1, -1))
+        self._params_dirty = False
+
+    # ─── Ticker ───
+
+    def tick(self):
+        """Avanza cada sesión según su speed y publica un frame por sesión que avanzó."""
+        if not self.sessions:
+            return
+        tic = time.perf_counter()
+        st = self.stepper
+        if self._params_dirty:
+            st.update_params(self._raw)
+            self._params_dirty = False
+
+        steps = np.zeros(st.n, dtype=np.int64)
+        for slot, session in self.sessions.items():
+            session._credit += session.speed
+            k = int(session._credit)
+            session._credit -= k
+            steps[slot] = k
+
+        for k in range(int(steps.max())):
+            st.step(self._dt, active=self._occupied & (steps > k))
+
+        frames = np.empty(st.n, dtype=FRAME_DTYPE)
+        frames["t"], frames["P"], frames["A"] = st.t, st.P, st.A
+        frames["prednisone_days"] = st.pred_days
+        frames["infection_t"] = st.infection_time
+        frames["flags"] = (st.is_dead * FLAG_DEAD) | (st.has_cushing * FLAG_CUSHING) \
+            | (st.infection_alert * FLAG_INFECTION)
+        frames["death_cause"] = st.death_cause
+
+        for slot in np.flatnonzero(steps > 0):
+            session = self.sessions[slot]
+            session.publish(frames[slot])
+            if st.is_dead[slot]:
+                session.finished = True
+                self._release(session)
+
+        self.ticks += 1
+        self.tick_ms += 0.05 * ((time.perf_counter() - tic) * 1000 - self.tick_ms)
+
+    def _ensure_ticker(self):
+        # Otro event loop (p. ej. TestClient) deja la tarea anterior huérfana
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        """Un solo temporizador para todas las sesiones; termina cuando no queda ninguna."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while self.sessions:
+            self.tick()
+            deadline += self.period
+            delay = deadline - loop.time()
+            if delay < 0:
+                # Atrasados (tick caro o loop ocupado): no recuperar a ráfagas
+                deadline, delay = loop.time(), 0.0
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {"sessions": len(self.sessions), "capacity": self.stepper.n, "ticks": self.ticks,
+                "tick_ms": round(self.tick_ms, 3), "fps": round(1.0 / self.period, 1)}
+
+
+# Hub compartido por el router
+pti_hub = PTIHub()
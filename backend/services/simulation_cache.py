@@ -0,0 +1,186 @@
+"""
+Binary EquaLab - Caché de simulaciones deterministas de Séptima
+Evita re-integrar la misma simulación (casos clínicos, explicaciones) una y otra vez.
+
+La clave es un hash del modelo y de la petición canonicalizada (parámetros,
+y0, intervalo, dt, método, opciones de salida); lo que solo afecta a la
+presentación (max_points, modo de la narrativa) queda fuera. El valor son los
+arrays del integrador más un dict de metadatos.
+
+El límite es en bytes, no en entradas: una corrida de Hodgkin-Huxley a
+dt = 0.025 pesa cientos de veces más que una de glucosa. Con `directory` cada
+entrada se guarda también como `<clave>.npz` y sobrevive a reinicios.
+Las corridas estocásticas (PTI) solo se cachean con semilla explícita.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+
+Entry = Tuple[Dict[str, np.ndarray], Dict[str, Any]]
+
+
+def _canonical(value):
+    """Forma JSON estable: floats enteros como int, arrays como listas, claves ordenadas."""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (bool, np.bool_)) or value is None or isinstance(value, str):
+        return value
+    # 1 y 1.0 comparten clave, pero los enteros no pasan por float: las semillas
+    # por encima de 2**53 colisionarían
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return int(value) if float(value).is_integer() else float(value)
+    return str(value)
+
+
+def _json_scalar(value):
+    """Escalares NumPy en metadatos (np.int64 de las estadísticas del integrador)."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} no es serializable")
+
+
+def make_key(model: str, request: Dict[str, Any]) -> str:
+    """sha256 de (modelo, petición canonicalizada)."""
+    payload = json.dumps([model, _canonical(request)], separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SimulationCache:
+    """LRU thread-safe acotado por bytes, con persistencia opcional en .npz."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, directory: Optional[str] = None,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._data: "OrderedDict[str, Tuple[Entry, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ─── Memoria ───
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._insert(key, entry)
+        return entry
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None) -> Entry:
+        """Guarda copias de solo lectura (quien lee no puede alterar la caché)."""
+        frozen = {}
+        for name, arr in arrays.items():
+            arr = np.array(arr, copy=True)
+            arr.flags.writeable = False
+            frozen[name] = arr
+        entry = (frozen, dict(meta or {}))
+        self._insert(key, entry)
+        self._save(key, entry)
+        return entry
+
+    def _insert(self, key: str, entry: Entry):
+        size = sum(a.nbytes for a in entry[0].values())
+        if size > self.max_bytes:
+            return  # Más grande que toda la caché: no desalojar todo por una entrada
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            self._data[key] = (entry, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, old) = self._data.popitem(last=False)
+                self._bytes -= old
+
+    # ─── Disco ───
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _save(self, key: str, entry: Entry):
+        if not self.directory:
+            return
+        arrays, meta = entry
+        tmp = self._path(key) + ".tmp"
+        try:
+            with open(tmp, "wb") as fh:
+                np.savez(fh, __meta__=np.array(json.dumps(meta, default=_json_scalar)), **arrays)
+            os.replace(tmp, self._path(key))
+            self._prune_disk()
+        except (OSError, TypeError, ValueError):
+            # Disco lleno o metadatos no serializables: la caché en memoria basta
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _load(self, key: str) -> Optional[Entry]:
+        if not self.directory or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with np.load(self._path(key), allow_pickle=False) as npz:
+                meta = json.loads(str(npz["__meta__"]))
+                arrays = {name: npz[name] for name in npz.files if name != "__meta__"}
+        except (OSError, ValueError, KeyError):
+            return None
+        for arr in arrays.values():
+            arr.flags.writeable = False
+        return arrays, meta
+
+    def _prune_disk(self):
+        """Borra los .npz más antiguos si el directorio supera max_disk_bytes."""
+        files = [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith(".npz")]
+        stats = sorted(((os.path.getmtime(f), os.path.getsize(f), f) for f in files))
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in stats:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    # ─── Utilidades ───
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "directory": self.directory}
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Instancia compartida por los routers (SEPTIMA_CACHE_DIR activa la persistencia)
+simulation_cache = SimulationCache(
+    max_bytes=int(os.getenv("SEPTIMA_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    directory=os.getenv("SEPTIMA_CACHE_DIR") or None,
+)
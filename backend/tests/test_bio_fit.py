@@ -0,0 +1,72 @@
+import math
+import time
+
+import numpy as np
+import pytest
+
+from services import bio_fit
+
+PK_TRUE = {"ka": 1.5, "ke": 0.2, "Vd": 12.0, "F": 1.0}
+PK_START = {"ka": 1.0, "ke": 0.15, "Vd": 10.0, "F": 1.0}
+T_OBS = [0.5, 1, 2, 3, 4, 6, 8, 10, 12, 16, 20, 24]
+DOSES = ((0.0, 500.0),)
+
+
+def _stuck_fit(problem, theta0):
+    time.sleep(3.0)   # un arranque que no mira el plazo
+
+
+def _pk_problem(noise, seed=0, start=PK_START, **kw):
+    data = bio_fit.synthetic_dataset("pk", PK_TRUE, [0.0, 0.0], 0.0, 24.0, 0.05, T_OBS, ["C"],
+                                     noise=noise, seed=seed, doses=DOSES)
+    observed = {"C": np.array(data["C"])}
+    fit = ("ka", "ke", "Vd")
+    return bio_fit.FitProblem(
+        model="pk", values=dict(start), y0=[0.0, 0.0], t_start=0.0, t_end=24.0, dt=0.05, fit=fit,
+        t_obs=np.array(data["t"]), observed=observed, sigma={"C": 1.0},
+        lower=np.array([start[k] / 100 for k in fit]), upper=np.array([start[k] * 100 for k in fit]),
+        doses=DOSES, **kw)
+
+
+def test_recovers_parameters_with_confidence_intervals():
+    exact = bio_fit.fit(_pk_problem(noise=0.0))
+    assert exact["best"]["status"] == "converged"
+    assert np.allclose(np.exp(exact["best"]["theta"]), [1.5, 0.2, 12.0], rtol=1e-6)
+
+    noisy = bio_fit.fit(_pk_problem(noise=0.03, seed=3))
+    ci = noisy["confidence"]
+    assert ci["dof"] == len(T_OBS) - 3
+    assert np.all(ci["ci_low"] < [1.5, 0.2, 12.0]) and np.all([1.5, 0.2, 12.0] < ci["ci_high"])
+    assert np.all(ci["ci_low"] < np.exp(noisy["best"]["theta"]))
+
+
+def test_multistart_in_process_pool_keeps_best():
+    # Arranque lejano (ka < ke: rama "flip-flop") más arranques aleatorios en 2 procesos
+    problem = _pk_problem(noise=0.0, start={**PK_START, "ka": 0.05, "ke": 0.9})
+    result = bio_fit.fit(problem, n_starts=4, seed=1, n_workers=2)
+    assert len(result["runs"]) == 4
+    costs = [run["cost"] for run in result["runs"]]
+    assert result["best"]["cost"] == min(costs) < 1e-12
+    assert np.allclose(np.exp(result["best"]["theta"]), [1.5, 0.2, 12.0], rtol=1e-5)
+
+
+def test_time_budget_and_degenerate_cases():
+    problem = _pk_problem(noise=0.05, max_iter=1000, deadline=time.time())
+    tic = time.perf_counter()
+    result = bio_fit.fit(problem)
+    assert result["best"]["status"] == "time_budget" and time.perf_counter() - tic < 1.0
+    # Tantos datos como parámetros: sin grados de libertad no hay intervalos
+    best = {"theta": np.zeros(2), "r": np.zeros(2), "J": np.eye(2)}
+    assert all(math.isnan(v) for v in bio_fit.confidence(best, 2)["stderr"])
+    with pytest.raises(ValueError):
+        bio_fit.start_points(problem, bio_fit.MAX_STARTS + 1)
+
+
+def test_pool_does_not_wait_past_the_deadline(monkeypatch):
+    monkeypatch.setattr(bio_fit, "_fit_one", _stuck_fit)
+    monkeypatch.setattr(bio_fit, "DEADLINE_GRACE_S", 0.1)
+    problem = _pk_problem(noise=0.0, deadline=time.time() + 0.2)
+    tic = time.perf_counter()
+    with pytest.raises(ValueError):
+        bio_fit.fit(problem, n_starts=4, seed=0, n_workers=2)
+    assert time.perf_counter() - tic < 1.5
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from services import bio_models, bio_sensitivity, pti_model
+from services.ode_integrators import integrate_fixed
+
+BERGMAN = {"p1": 0.028, "p2": 0.025, "p3": 0.000013, "Gb": 80.0, "Ib": 7.0, "n": 0.142}
+PK = {"ka": 1.0, "ke": 0.15, "Vd": 10.0, "F": 0.8}
+PK_DOSES = [(0.0, 500.0), (8.0, 500.0), (16.0, 500.0)]
+
+
+@pytest.mark.parametrize("model, values, y0, t_end, dt, doses", [
+    ("glucose", BERGMAN, [300.0, 0.0, 50.0], 240.0, 0.5, ()),
+    ("pk", PK, [0.0, 0.0], 24.0, 0.05, PK_DOSES),
+])
+def test_matches_finite_differences(model, values, y0, t_end, dt, doses):
+    t, Y, S, stats = bio_sensitivity.forward_sensitivity(model, values, y0, 0.0, t_end, dt, doses=doses)
+    assert stats["n_equations"] == len(y0) * (1 + len(values))
+    for j, name in enumerate(bio_sensitivity.SENSITIVITY_MODELS[model].params):
+        h = values[name] * 1e-6
+        _, Y2, _, _ = bio_sensitivity.forward_sensitivity(model, {**values, name: values[name] + h},
+                                                          y0, 0.0, t_end, dt, [name], doses=doses)
+        assert np.allclose((Y2 - Y) / h, S[:, :, j], rtol=1e-4, atol=1e-6 * np.abs(S[:, :, j]).max())
+
+
+def test_state_matches_the_simulators():
+    # Windkessel: mismo RK4 que /bio/windkessel
+    values = {"R": 1.0, "C": 1.2, "P_venous": 5.0, "heart_rate": 75.0}
+    t, Y, _, _ = bio_sensitivity.forward_sensitivity("windkessel", values, [80.0], 0.0, 5.0, 0.01)
+    _, ref = integrate_fixed(bio_models.windkessel_rhs(1.0, 1.2, 5.0, 75.0), 0.0, 5.0, [80.0], 0.01)
+    assert np.allclose(Y, ref)
+    # PTI determinista con IVIG (factor de destrucción como entrada u(t)); con P alto no
+    # intervienen las ramas que dependen de t, donde el stepper congela t en cada paso
+    params = dict(pti_model.PTI_DEFAULTS, treatment=2)
+    t, Y, S, _ = bio_sensitivity.forward_sensitivity("pti", params, [150000.0, 1.0], 0.0, 30.0, 0.1)
+    _, ref, _ = pti_model.simulate_pti_batch([150000.0, 1.0], params, 1, 0.0, 30.0, 0.1)
+    assert np.allclose(Y, ref[:, 0], rtol=1e-12)
+    assert S[-1, 0, 1] < 0 < S[-1, 0, 0]      # más destrucción → menos plaquetas
+    # El sistema aumentado se deriva una sola vez por (modelo, parámetros)
+    assert bio_sensitivity.compile_sensitivity("pti") is bio_sensitivity.compile_sensitivity("pti")
+
+
+def test_normalized_coefficients():
+    t, Y, S, _ = bio_sensitivity.forward_sensitivity("pk", PK, [0.0, 0.0], 0.0, 24.0, 0.05,
+                                                     ["Vd", "F"], doses=PK_DOSES)
+    N = bio_sensitivity.normalized_sensitivity(Y, S, PK, ["Vd", "F"])
+    # C ∝ F/Vd exactamente: coeficientes −1 y +1 (salvo en t0, donde C = 0 → 0)
+    assert np.allclose(N[1:, 1, 0], -1.0) and np.allclose(N[1:, 1, 1], 1.0)
+    assert N[0, 1, 0] == 0.0
+    with pytest.raises(ValueError):
+        bio_sensitivity.compile_sensitivity("pk", ["Km"])
+    with pytest.raises(ValueError):
+        bio_sensitivity.forward_sensitivity("glucose", BERGMAN, [300.0, 0.0], 0.0, 10.0, 0.5)
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from routers.septima import NeuronSimulationRequest, PKSimulationRequest, _PythonPTIStepper, _run_sweep, _sweep_rows
+from services import bio_models, bio_sweep, pti_model
+from services.ode_integrators import integrate_fixed
+
+
+def test_expand_scenarios_grid_and_overrides():
+    combos = bio_sweep.expand_scenarios({"ka": [0.5, 1.0], "ke": [0.1, 0.2, 0.3]}, [{"F": 0.8}, {"F": 1.0}])
+    assert len(combos) == 12
+    assert combos[0] == {"ka": 0.5, "ke": 0.1, "F": 0.8}
+    with pytest.raises(ValueError):
+        bio_sweep.expand_scenarios({"ka": list(range(200)), "ke": list(range(200))})
+    with pytest.raises(ValueError):
+        bio_sweep.scenario_columns([{"bogus": 1.0}], {"ka": 1.0}, ["ka"])
+
+
+def test_batched_sweep_matches_individual_runs():
+    scenarios = bio_sweep.expand_scenarios({"ka": [0.5, 1.0, 4.0]})
+    cols = bio_sweep.scenario_columns(scenarios, {"ka": 1.0, "ke": 0.15, "Vd": 10.0}, ["ka", "ke", "Vd"])
+    f = bio_models.pk_rhs(cols["ka"], cols["ke"], cols["Vd"])
+    t, Y = integrate_fixed(f, 0.0, 24.0, np.tile([500.0, 0.0], (3, 1)), 0.05)
+    metrics = bio_sweep.summary_metrics("pk", t, Y)
+    for i, s in enumerate(scenarios):
+        _, single = integrate_fixed(bio_models.pk_rhs(s["ka"], 0.15, 10.0), 0.0, 24.0, [500.0, 0.0], 0.05)
+        assert np.allclose(Y[:, i], single)
+        assert metrics["C_max"][i] == pytest.approx(single[:, 1].max())
+    # Absorción más rápida → pico antes
+    assert np.all(np.diff(metrics["Tmax"]) < 0)
+
+
+def test_pti_batch_treatment_masks():
+    params = {"treatment": np.array([0, 1, 2, 3]), "dose_mg": 80.0}
+    t, Y, outcome = pti_model.simulate_pti_batch([150000.0, 1.0], params, 4, 0.0, 30.0, 0.1)
+    assert Y.shape == (301, 4, 2) and t[-1] == pytest.approx(30.0)
+    P_final = Y[-1, :, 0]
+    assert P_final[0] < 20000 < P_final[1]          # prednisona frente a sin tratamiento
+    assert outcome["has_cushing"].tolist() == [False, True, False, False]
+    single_t, single_Y, _ = pti_model.simulate_pti_batch([150000.0, 1.0], {"treatment": 2, "dose_mg": 80.0},
+                                                         1, 0.0, 30.0, 0.1)
+    assert np.allclose(single_Y[:, 0], Y[:, 2])
+
+
+def test_pti_ensemble_seeded_and_consistent():
+    def run(seed):
+        rng = np.random.default_rng(seed)
+        t, Y, outcome = pti_model.simulate_pti_batch([30000.0, 1.0], {"treatment": 2}, 2000,
+                                                     0.0, 60.0, 0.1, rng=rng)
+        return t, Y, outcome, pti_model.ensemble_summary(t, Y, outcome, [0.05, 0.5, 0.95])
+
+    t, Y, outcome, summary = run(7)
+    _, Y2, outcome2, _ = run(7)
+    assert np.array_equal(Y, Y2) and np.array_equal(outcome["death_time"], outcome2["death_time"], equal_nan=True)
+    survival = summary["survival"]
+    assert survival[0] == 1.0 and np.all(np.diff(survival) <= 0)
+    assert sum(summary["death_causes"].values()) == pytest.approx(1.0)
+    assert summary["death_causes"]["HEMORRHAGE"] > 0          # arranca en 30k: riesgo real
+    # Recuperación: solo cuenta tras haber caído por debajo de 150k
+    ttr = pti_model.recovery_times(np.arange(4.0), np.array([[150e3], [100e3], [160e3], [170e3]]))
+    assert ttr.tolist() == [2.0]
+
+
+class _NoEvents:
+    """rng del stepper escalar que nunca dispara un evento estocástico."""
+    def random(self):
+        return 1.0
+
+
+def test_pti_stepper_hot_params_and_scalar_parity():
+    stepper = pti_model.PTIStepper([150000.0, 1.0], {"treatment": np.array([1, 1]), "dose_mg": 80.0}, 2)
+    scalar = _PythonPTIStepper([150000.0, 1.0], {"treatment": 1, "dose_mg": 80.0}, rng=_NoEvents())
+    for i in range(200):
+        if i == 100:
+            # Suspender prednisona solo al paciente 1 → rebote de anticuerpos
+            stepper.update_params({"treatment": np.array([1, 0])})
+            scalar.update_params({"treatment": 0})
+        stepper.step(0.1)
+        scalar.step(0.1)
+    assert stepper.t == scalar.t
+    assert stepper.P[1] == pytest.approx(scalar.P, rel=1e-12)
+    assert stepper.pred_days.tolist() == pytest.approx([20.0, 10.0])
+    assert stepper.has_cushing.tolist() == [True, False] and not stepper.is_dead.any()
+
+
+def test_seeded_streams_bit_identical_and_independent():
+    def scalar_run(seed):
+        stepper = _PythonPTIStepper([15000.0, 1.0], {"treatment": 2}, rng=pti_model.pti_rng(seed))
+        trace = []
+        for _ in range(600):
+            stepper.step(0.1)
+            trace.append((stepper.P, stepper.A, stepper.death_cause))
+        return trace
+
+    assert scalar_run(11) == scalar_run(11)
+    death_steps = {[cause for _, _, cause in scalar_run(seed)].index("HEMORRHAGE") for seed in range(6)}
+    assert len(death_steps) > 1                                   # el azar sí actúa
+    # Ensemble por bloques: mismo resultado con 1 o varios procesos, bloques distintos entre sí
+    kw = dict(y0=[30000.0, 1.0], params={"treatment": 2}, n=2 * pti_model.ENSEMBLE_BLOCK + 10,
+              t_start=0.0, t_end=20.0, dt=0.1, seed=3)
+    _, Y1, out1 = pti_model.simulate_pti_ensemble(**kw)
+    _, Y2, out2 = pti_model.simulate_pti_ensemble(**kw, n_workers=3)
+    assert np.array_equal(Y1, Y2) and np.array_equal(out1["death_time"], out2["death_time"], equal_nan=True)
+    block = pti_model.ENSEMBLE_BLOCK
+    assert not np.array_equal(Y1[:, :block], Y1[:, block:2 * block])
+
+
+def test_adaptive_sweep_rows_are_bounded():
+    assert _sweep_rows("neuron", NeuronSimulationRequest(t_end=50.0, dt=0.01)) == 5001
+    assert _sweep_rows("neuron", NeuronSimulationRequest(method="RK45", n_out=300)) == 300
+    assert _sweep_rows("pk", PKSimulationRequest(method="RK45")) is not None    # motor analítico: malla dt
+    assert _sweep_rows("neuron", NeuronSimulationRequest(method="RK45")) is None
+    # Sin n_out, el tope de pasos acota las filas guardadas
+    base = NeuronSimulationRequest(method="RK45", t_end=50.0, rtol=1e-9, atol=1e-12)
+    cols = bio_sweep.scenario_columns([{}, {}], base.params.model_dump(), list(base.params.model_dump()))
+    with pytest.raises(RuntimeError):
+        _run_sweep("neuron", base, cols, 2, max_steps=50)
+
+
+def test_philox_streams_match_per_patient_generators():
+    streams = pti_model.PhiloxStreams([5, 6, 7])
+    gens = [pti_model.pti_rng(s) for s in (5, 6, 7)]
+    mask_rng = np.random.default_rng(0)
+    for k in range(40):
+        if k == 20:
+            streams.resize(5)                      # crecer no altera los flujos existentes
+            streams.seed(4, 9)
+            gens += [None, pti_model.pti_rng(9)]
+        active = mask_rng.random(len(streams)) < 0.6
+        u = streams.uniforms(active)
+        for i, g in enumerate(gens):
+            if g is not None:
+                assert u[:, i].tolist() == (g.random(2).tolist() if active[i] else [1.0, 1.0])
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from services.downsampling import downsample, downsample_rows, lttb_indices, minmax_indices
+
+
+def test_lttb_keeps_spike_and_endpoints():
+    t = np.linspace(0.0, 100.0, 4001)
+    v = np.sin(t)
+    v[2345] = 40.0
+    idx = lttb_indices(t, v, 500)
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == 4000
+    assert 2345 in idx
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_minmax_keeps_extrema_of_every_series():
+    t = np.linspace(0.0, 1.0, 10000)
+    ys = np.vstack([np.sin(40 * t), np.cos(40 * t)])
+    ys[1, 7777] = -9.0
+    idx = minmax_indices(t, ys, 400)
+    assert len(idx) <= 400
+    assert 7777 in idx
+
+
+def test_gaps_survive_downsampling():
+    x = np.linspace(-5, 5, 2001)
+    with np.errstate(divide="ignore"):
+        y = np.where(np.abs(x) < 1e-9, np.nan, 1.0 / x)
+    _, y_ds = downsample(x, y, 100)
+    assert np.isnan(y_ds).any()
+
+
+def test_row_layout_and_passthrough():
+    t, rows = downsample_rows([0, 1, 2], [[1, 2], [3, 4], [5, 6]], None)
+    assert t == [0, 1, 2] and rows == [[1, 2], [3, 4], [5, 6]]
+    t, rows = downsample_rows(list(range(100)), [[i, -i] for i in range(100)], 10)
+    assert len(t) == len(rows) == 10
+
+
+def test_non_finite_points_count_against_budget():
+    x = np.linspace(0.0, 1.0, 5000)
+    y = np.sin(30 * x)
+    y[::3] = np.nan                      # miles de huecos aislados
+    y[1000:1400] = np.inf                # y una racha larga
+    for pick in (lttb_indices, minmax_indices):
+        idx = pick(x, y, 200)
+        assert len(idx) <= 200
+        assert not np.isfinite(y[idx]).all()
+
+
+def test_plot_request_rejects_budgets_below_three():
+    from pydantic import ValidationError
+
+    from routers.cas import PlotRequest
+
+    assert PlotRequest(expression="x", max_points=3).max_points == 3
+    for bad in (0, 2, -5):
+        with pytest.raises(ValidationError):
+            PlotRequest(expression="x", max_points=bad)
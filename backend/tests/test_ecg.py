@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from services import ecg
+
+
+def test_every_wave_present_in_its_segment():
+    fs, bpm = 1000, 60
+    beat = ecg.synthesize(bpm, fs, 0, fs)  # un latido exacto
+    f = 72.0 / bpm
+
+    def seg(a, b):
+        return beat[int(a * f * fs) + 1:int(b * f * fs)]
+
+    # Antes el `elif` del ST pisaba P, Q y R con 0.01
+    assert seg(0.0, 0.09).max() == pytest.approx(0.12, abs=1e-3)
+    assert seg(0.16, 0.19).min() == pytest.approx(-0.07, abs=1e-3)
+    assert seg(0.19, 0.25).max() == pytest.approx(1.2, abs=1e-3)
+    assert seg(0.25, 0.30).min() == pytest.approx(-0.12, abs=1e-3)
+    assert np.allclose(seg(0.30, 0.38), 0.01) and np.allclose(seg(0.62, 1.0), 0.0)
+    assert ecg.synthesize(bpm, fs, 0, fs, lead="aVR").min() < -0.8
+
+
+def test_template_is_cached_and_exactly_periodic():
+    template = ecg.beat_template(72.0, 500, "II")
+    assert ecg.beat_template(72.0, 500, "II") is template and not template.flags.writeable
+    # 72 lpm a 500 Hz: 416.6 muestras por latido → se repite cada 1250 (3 latidos)
+    assert len(template) == 1250
+    k = np.arange(1250)
+    # Con fase en coma flotante, una muestra justo en un borde puede caer al segmento vecino
+    assert np.allclose(template, ecg.beat_waveform((k / 500.0 % (60 / 72)) / (60 / 72), 72.0), atol=0.011)
+    with pytest.raises(ValueError):
+        ecg.beat_template(72.0, 500, "I")
+
+
+def test_chunks_match_one_shot_synthesis():
+    full = ecg.synthesize(95.0, 250, 0, 2500)
+    parts = list(ecg.ecg_chunks(95.0, 250, chunk_samples=333, duration_s=10.0))
+    assert [start for start, _ in parts] == list(range(0, 2500, 333))
+    assert np.array_equal(np.concatenate([block for _, block in parts]), full)
+    # Sin duración el generador no termina y cada bloque sigue la misma plantilla
+    stream = ecg.ecg_chunks(95.0, 250, chunk_samples=100)
+    for _ in range(1000):
+        start, block = next(stream)
+    assert np.array_equal(block, ecg.synthesize(95.0, 250, start, 100))
+
+
+def test_templates_are_bounded_and_direct_path_matches():
+    # Un latido de 2 millones de muestras: sin plantilla, solo lo pedido
+    assert len(ecg.synthesize(0.0137, 500, 10**9, 1000)) == 1000
+    with pytest.raises(ValueError):
+        ecg.beat_template(0.0137, 500)
+    for bpm, fs in ((20.0, 5000), (33.3, 4999)):
+        p, _ = ecg._repeat(bpm, fs)
+        assert p <= ecg.MAX_TEMPLATE_SAMPLES
+        # Plantilla (p ≤ n) y evaluación directa (p > n) dan las mismas muestras
+        full = ecg.synthesize(bpm, fs, 0, 12445 + p)
+        assert np.array_equal(ecg.synthesize(bpm, fs, 12345, 100), full[12345:12445])
+    for bpm in np.linspace(20, 300, 200):
+        ecg.beat_template(float(bpm), 5000)
+    assert ecg._templates.stats()["bytes"] <= ecg.TEMPLATE_CACHE_BYTES
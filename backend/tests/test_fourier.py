@@ -0,0 +1,62 @@
+import numpy as np
+
+from services.fourier import (catmull_rom, epicycle_frames, epicycle_trace, fourier_coefficients,
+                              resample_arclength, signed_frequencies, smooth_polyline)
+
+
+def _trace(n=512):
+    t = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    return 100 * np.exp(1j * t) + 10 * np.exp(-3j * t) + 1 * np.exp(7j * t)
+
+
+def test_coefficients_sorted_and_complete():
+    freq, amp, phase, kept = fourier_coefficients(_trace())
+    assert len(freq) == 512
+    assert np.all(np.diff(amp) <= 1e-12)
+    assert freq[0] == 1 and abs(amp[0] - 100) < 1e-9
+    assert abs(kept - 1.0) < 1e-12
+
+
+def test_truncation_by_count_and_energy():
+    freq, amp, _, _ = fourier_coefficients(_trace(), max_coefficients=2, signed=True)
+    assert freq.tolist() == [1, -3]
+    freq, _, _, kept = fourier_coefficients(_trace(), energy_fraction=0.999, signed=True)
+    assert freq.tolist() == [1, -3]
+    assert kept >= 0.999
+
+
+def test_signed_frequencies_match_fftfreq():
+    assert signed_frequencies(6).tolist() == [0, 1, 2, -3, -2, -1]
+
+
+def test_smooth_polyline_keeps_endpoints_and_matches_kernel():
+    xy = np.random.default_rng(0).normal(size=(50, 2))
+    out = smooth_polyline(xy, iterations=1)
+    assert np.array_equal(out[[0, -1]], xy[[0, -1]])
+    assert np.allclose(out[10], 0.25 * xy[9] + 0.5 * xy[10] + 0.25 * xy[11])
+
+
+def test_catmull_rom_interpolates_control_points():
+    xy = np.array([[0, 0], [1, 2], [3, 3], [4, 0], [2, -1]], dtype=float)
+    out = catmull_rom(xy, samples_per_segment=4, closed=True)
+    assert out.shape == (20, 2)
+    assert np.allclose(out[::4], xy)
+
+
+def test_resample_arclength_is_uniform():
+    # Cuadrado muestreado de forma muy desigual
+    xy = np.array([[0, 0], [0.01, 0], [0.02, 0], [1, 0], [1, 1], [0, 1]], dtype=float)
+    out = resample_arclength(xy, 40, closed=True)
+    step = np.linalg.norm(np.diff(np.vstack([out, out[:1]]), axis=0), axis=1)
+    assert out.shape == (40, 2)
+    assert np.allclose(step, 0.1)
+
+
+def test_epicycle_frames_reconstruct_trace():
+    z = _trace(256)
+    freq, amp, phase, _ = fourier_coefficients(z, signed=True)
+    chain = epicycle_frames(freq, amp, phase, 256, chunk_cells=5000)
+    assert chain.shape == (256, 257)
+    assert np.all(chain[:, 0] == 0)
+    assert np.allclose(chain[:, -1], z)
+    assert np.allclose(epicycle_trace(freq, amp, phase, 256, chunk_cells=5000), z)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import sympy as sp
+
+from routers.graphics import DerivativeRequest, compile_derivative_family, evaluate_derivative
+from services.compiled_functions import compiled_cache
+
+EXPR = "exp(x**2)*sin(3*x)"
+
+
+def test_every_order_matches_sympy():
+    x = sp.Symbol("x")
+    f = sp.exp(x**2) * sp.sin(3 * x)
+    res = evaluate_derivative(DerivativeRequest(expression=EXPR, x_min=-1.0, x_max=1.0, points=41, max_order=4))
+    assert res["orders"] == [0, 1, 2, 3, 4]
+    xs = np.asarray(res["x"])
+    for k, col in enumerate(res["columns"]):
+        expected = sp.lambdify(x, sp.diff(f, x, k), "numpy")(xs)
+        assert np.allclose(col, expected, rtol=1e-10, atol=1e-10)
+        assert sp.simplify(sp.sympify(res["exprs"][k]) - sp.diff(f, x, k)) == 0
+    assert res["y"] == res["columns"][1]
+
+
+def test_family_is_compiled_once():
+    compiled_cache.clear()
+    first = compile_derivative_family(EXPR, 3)
+    for _ in range(3):
+        evaluate_derivative(DerivativeRequest(expression=EXPR, x_min=0.0, x_max=1.0, points=10, max_order=3))
+    assert compile_derivative_family(EXPR, 3) is first
+    assert compiled_cache.stats()["misses"] == 1
+
+
+def test_legacy_shape_without_max_order():
+    res = evaluate_derivative(DerivativeRequest(expression="x**3", x_min=0.0, x_max=2.0, points=5))
+    assert set(res) == {"x", "y", "derivative_expr"}
+    assert res["derivative_expr"] == "3*x**2"
+    assert res["y"] == pytest.approx([3 * v**2 for v in res["x"]])
@@ -0,0 +1,46 @@
+import numpy as np
+
+from services.array_codec import pack_array, unpack_array
+from services.compiled_functions import CompiledFunctionCache
+from services.grid_eval import domain_coloring, evaluate_grid, marching_squares
+
+
+def test_circle_contour_lies_on_circle():
+    x = np.linspace(-3, 3, 121)
+    y = np.linspace(-3, 3, 101)
+    z, tiles = evaluate_grid(lambda X, Y: X**2 + Y**2 - 4, x, y, tile_points=1000)
+    assert tiles > 1
+    seg = marching_squares(x, y, z)
+    assert len(seg) > 50
+    r = np.hypot(seg[..., 0], seg[..., 1])
+    assert np.abs(r - 2).max() < 0.01
+
+
+def test_contour_skips_non_finite_cells():
+    x = np.linspace(-1, 1, 11)
+    z = np.tile(x, (11, 1))
+    z[:, 5] = np.nan
+    assert len(marching_squares(x, x, z)) == 0
+
+
+def test_domain_coloring_zero_is_dark_and_pole_is_light():
+    w = np.array([[0.0 + 0j, 1e9 + 0j]])
+    rgb = domain_coloring(w)
+    assert rgb.shape == (1, 2, 3)
+    assert rgb[0, 0].max() == 0 and rgb[0, 1].min() >= 250
+
+
+def test_pack_roundtrip():
+    a = np.arange(12, dtype=float).reshape(3, 4)
+    assert np.array_equal(unpack_array(pack_array(a, "float64")), a)
+
+
+def test_cache_compiles_once():
+    cache = CompiledFunctionCache(maxsize=2)
+    calls = []
+    for _ in range(3):
+        cache.get_or_compile("k", lambda: calls.append(1) or len(calls))
+    assert calls == [1] and cache.stats()["hits"] == 2
+    cache.get_or_compile("a", lambda: 1)
+    cache.get_or_compile("b", lambda: 2)
+    assert len(cache) == 2
@@ -0,0 +1,41 @@
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.numeric_analysis import find_extrema, find_roots, integrate_area
+
+
+def test_roots_of_transcendental_function():
+    res = find_roots(lambda x: np.sin(x) - 0.5 * x, -10, 10)
+    assert len(res.roots) == 3
+    assert min(abs(r) for r in res.roots) < 1e-12
+    for r in res.roots:
+        assert abs(math.sin(r) - 0.5 * r) < 1e-10
+
+
+def test_poles_are_not_reported_as_roots():
+    res = find_roots(lambda x: np.tan(x), -4, 4)
+    assert np.allclose(sorted(res.roots), [-math.pi, 0.0, math.pi], atol=1e-9)
+
+
+def test_extrema_classified():
+    res = find_extrema(lambda x: x**3 - 3 * x, -3, 3)
+    kinds = {round(x, 6): kind for x, _, kind in res.extrema}
+    assert kinds == {-1.0: "max", 1.0: "min"}
+
+
+def test_area_gauss_kronrod():
+    res = integrate_area(lambda x: np.exp(-x**2), -10, 10)
+    assert abs(res.area - math.sqrt(math.pi)) < 1e-9
+    assert not res.truncated
+    assert abs(integrate_area(lambda x: x, 2, 0).area + 2) < 1e-12
+
+
+def test_time_budget_is_honoured():
+    res = integrate_area(lambda x: np.sin(1 / x), 1e-6, 1, abs_tol=0, rel_tol=0, time_budget_ms=20)
+    assert res.truncated
+    assert res.elapsed_ms < 500
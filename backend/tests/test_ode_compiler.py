@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from services import ode_compiler
+from services.compiled_functions import compiled_cache
+from services.ode_integrators import fd_jacobian, solve_ivp
+
+LORENZ = {"dx": "sigma*(y - x)", "dy": "x*(rho - z) - y", "dz": "x y - beta z"}
+PARAMS = {"sigma": 10.0, "rho": 28.0, "beta": 8.0 / 3.0}
+
+
+def test_system_compiled_once_and_reused():
+    first = ode_compiler.compile_system(LORENZ, PARAMS)
+    misses = compiled_cache.stats()["misses"]
+    # Otros valores (y otro orden de params) → mismo sistema compilado
+    again = ode_compiler.compile_system(dict(LORENZ), ["rho", "beta", "sigma"])
+    assert again is first and compiled_cache.stats()["misses"] == misses
+    assert first.states == ("x", "y", "z")
+
+
+def test_rhs_and_jacobian_scalar_and_batch():
+    system = ode_compiler.compile_system(LORENZ, PARAMS)
+    f, jac = system.rhs(PARAMS), system.jac(PARAMS)
+    assert np.allclose(f(0.0, np.array([1.0, 2.0, 3.0])), [10.0, 23.0, -6.0])
+    Y = np.array([[1.0, 2.0, 3.0], [-4.0, 0.5, 20.0]])
+    assert np.allclose(f(0.0, Y)[1], f(0.0, Y[1]))
+    assert np.allclose(jac(0.0, Y), fd_jacobian(f, 0.0, Y, f(0.0, Y)), atol=1e-5)
+    # Mismo resultado con el jacobiano analítico que con el de diferencias finitas
+    a = solve_ivp(f, 0.0, 0.5, [1.0, 1.0, 1.0], method="Rosenbrock23", jac=jac, rtol=1e-6, atol=1e-9)
+    b = solve_ivp(f, 0.0, 0.5, [1.0, 1.0, 1.0], method="Rosenbrock23", rtol=1e-6, atol=1e-9)
+    assert np.allclose(a.y_end, b.y_end, rtol=1e-6)
+
+
+def test_spanish_parser_names_and_errors():
+    # sen/raiz del parser del proyecto; R y g son parámetros, no constantes físicas
+    system = ode_compiler.compile_system({"dP": "-P/(R*C) + g*sen(t)", "q'": "raiz(P)"}, ["R", "C", "g"])
+    f = system.rhs({"R": 2.0, "C": 0.5, "g": 0.0})
+    assert system.states == ("P", "q") and np.allclose(f(0.0, np.array([4.0, 0.0])), [-4.0, 2.0])
+    for equations, params in (({"dx": "x + w"}, []), ({"dx": "x", "x'": "1"}, []),
+                              ({"dt": "1"}, []), ({"dx": "x +* 2"}, [])):
+        with pytest.raises(ValueError):
+            ode_compiler.compile_system(equations, params)
+    with pytest.raises(ValueError):
+        system.rhs({"R": 1.0})
@@ -0,0 +1,226 @@
+import math
+
+import numpy as np
+import pytest
+
+from services import bio_models
+from services.ode_integrators import (Checkpoint, EventLog, FixedStepIntegrator, fd_jacobian,
+                                      integrate_fixed, iter_chunks, n_fixed_steps, solve_dopri5, solve_ivp,
+                                      solve_rosenbrock, thin_indices, threshold_event)
+
+
+def test_rk4_decay_matches_exponential():
+    t, Y = integrate_fixed(bio_models.decay_rhs(), 0.0, 2.0, [1.0, 3.0], 0.01)
+    assert t[-1] == 2.0 and Y.shape == (201, 2)
+    assert np.allclose(Y[:, 0], np.exp(-t), atol=1e-9)
+    t, Y = integrate_fixed(bio_models.decay_rhs(), 0.0, 1.0, [1.0], 0.001, method="Euler")
+    assert abs(Y[-1, 0] - math.exp(-1)) < 1e-3
+
+
+def test_last_step_lands_on_t_end():
+    assert n_fixed_steps(0.0, 10.0, 0.01) == 1000
+    t, _ = integrate_fixed(bio_models.decay_rhs(), 0.0, 1.05, [1.0], 0.1)
+    assert len(t) == 12 and t[-1] == 1.05
+
+
+def test_batch_equals_individual_runs():
+    I_ext = np.array([0.0, 5.0, 10.0])
+    y0 = np.tile([-65.0, 0.05, 0.6, 0.32], (3, 1))
+    hh = lambda I: bio_models.hodgkin_huxley_rhs(1.0, 120.0, 36.0, 0.3, 50.0, -77.0, -54.4, I)
+    _, batch = integrate_fixed(hh(I_ext), 0.0, 20.0, y0, 0.025)
+    for i, I in enumerate(I_ext):
+        _, single = integrate_fixed(hh(float(I)), 0.0, 20.0, y0[i], 0.025)
+        assert np.allclose(batch[:, i], single, rtol=1e-10, atol=1e-10)
+
+
+def test_hh_rates_scalar_and_vector_agree():
+    V = np.array([-80.0, -55.0, -40.0, -40.00005, 0.0, 30.0])
+    vec = bio_models.hh_rates(V)
+    for j, v in enumerate(V.tolist()):
+        assert np.allclose([r[j] for r in vec], bio_models.hh_rates(v))
+
+
+def test_integrator_reuses_buffers_across_segments():
+    integ = FixedStepIntegrator(bio_models.pk_rhs(1.0, 0.15, 10.0), (2,))
+    _, a = integ.integrate(0.0, 8.0, [500.0, 0.0], 0.05)
+    _, b = integ.integrate(8.0, 16.0, a[-1] + [500.0, 0.0], 0.05)
+    assert a[-1, 1] > 0 and b[-1, 1] > a[-1, 1]
+
+
+def test_dopri5_dense_output_hits_t_eval():
+    t_eval = [0.0, 0.3, 1.7, 5.0]
+    sol = solve_dopri5(bio_models.decay_rhs(), 0.0, 5.0, [1.0], rtol=1e-8, atol=1e-10, t_eval=t_eval)
+    assert sol.t.tolist() == t_eval
+    assert np.allclose(sol.y[:, 0], np.exp(-sol.t), atol=1e-7)
+    assert sol.n_rhs == 6 * (sol.n_steps + sol.n_rejected) + 2
+
+
+def test_t_eval_within_tolerance_of_t_end_is_filled():
+    # 1 + 5e-13 entra por la tolerancia de output_times: se recorta a t_end
+    for method in ("RK45", "Rosenbrock23"):
+        sol = solve_ivp(bio_models.decay_rhs(), 0.0, 1.0, [1.0], method=method, t_eval=[0.5, 1.0 + 5e-13])
+        assert sol.t.tolist() == [0.5, 1.0]
+        assert np.allclose(sol.y[:, 0], np.exp(-sol.t), rtol=1e-4)
+
+
+def test_dopri5_hh_fewer_steps_than_fixed_rk4():
+    hh = bio_models.hodgkin_huxley_rhs(1.0, 120.0, 36.0, 0.3, 50.0, -77.0, -54.4, 10.0)
+    y0 = [-65.0, 0.05, 0.6, 0.32]
+    t, ref = integrate_fixed(hh, 0.0, 50.0, y0, 0.0025)
+    sol = solve_dopri5(hh, 0.0, 50.0, y0, rtol=1e-7, atol=1e-9, n_out=11)
+    assert sol.n_steps < n_fixed_steps(0.0, 50.0, 0.0025) // 4
+    assert np.allclose(sol.y, ref[::2000], atol=1e-3)
+
+
+def _pk_exact(t, ka, ke, Vd, dose):
+    return dose * ka / (Vd * (ka - ke)) * (np.exp(-ke * t) - np.exp(-ka * t))
+
+
+def test_rosenbrock_stiff_pk_matches_analytic():
+    ka, ke, Vd = 1000.0, 0.15, 10.0
+    f = bio_models.pk_rhs(ka, ke, Vd)
+    sol = solve_rosenbrock(f, 0.0, 24.0, [500.0, 0.0], rtol=1e-7, atol=1e-10,
+                           jac=bio_models.pk_jac(ka, ke, Vd), n_out=25)
+    assert np.allclose(sol.y[1:, 1], _pk_exact(sol.t[1:], ka, ke, Vd, 500.0), rtol=1e-4)
+    explicit = solve_dopri5(f, 0.0, 24.0, [500.0, 0.0], rtol=1e-7, atol=1e-10)
+    assert sol.n_steps * 3 < explicit.n_steps
+
+
+def test_auto_switches_only_when_stiff():
+    stiff = solve_ivp(bio_models.pk_rhs(1000.0, 0.15, 10.0), 0.0, 24.0, [500.0, 0.0],
+                      method="auto", n_out=49)
+    assert stiff.extra["switched"] and stiff.t.shape == (49,) and stiff.y.shape == (49, 2)
+    assert abs(stiff.y_end[1] - _pk_exact(24.0, 1000.0, 0.15, 10.0, 500.0)) < 1e-3
+    mild = solve_ivp(bio_models.pk_rhs(1.0, 0.15, 10.0), 0.0, 24.0, [500.0, 0.0], method="auto")
+    assert not mild.extra["switched"]
+
+
+def test_analytic_jacobians_match_finite_differences():
+    cases = [
+        (bio_models.bergman_rhs(0.03, 0.02, 1e-5, 90.0, 10.0, 0.1),
+         bio_models.bergman_jac(0.03, 0.02, 1e-5, 90.0, 10.0, 0.1), [200.0, 0.01, 50.0]),
+        (bio_models.pk_rhs(1.0, 0.15, 10.0), bio_models.pk_jac(1.0, 0.15, 10.0), [500.0, 3.0]),
+        (bio_models.windkessel_rhs(1.0, 1.5, 5.0, 72.0), bio_models.windkessel_jac(1.0, 1.5), [80.0]),
+    ]
+    for f, jac, y in cases:
+        y = np.tile(y, (2, 1))
+        assert np.allclose(jac(0.1, y), fd_jacobian(f, 0.1, y, f(0.1, y)), atol=1e-6)
+
+
+def test_named_models_defaults_and_validation():
+    f, jac = bio_models.named_model("pk_1cmt", {"ka": 2.0})
+    assert np.allclose(f(0.0, np.array([500.0, 0.0])), [-1000.0, 100.0])
+    assert bio_models.named_model("hodgkin_huxley", {})[1] is None
+    for model, params in (("pk_1cmt", {"kx": 1.0}), ("lorenz", {}), ("bergman", {"p1": "alto"})):
+        with pytest.raises(ValueError):
+            bio_models.named_model(model, params)
+
+
+def test_fixed_step_stores_only_requested_samples():
+    f, y0 = bio_models.hodgkin_huxley_rhs(1.0, 120.0, 36.0, 0.3, 50.0, -77.0, -54.4, 10.0), [-65.0, 0.05, 0.6, 0.32]
+    t, Y = integrate_fixed(f, 0.0, 20.0, y0, 0.01)
+    t_k, Y_k = integrate_fixed(f, 0.0, 20.0, y0, 0.01, output_every=7)
+    idx = thin_indices(len(t), 7)
+    assert idx[-1] == len(t) - 1 and np.array_equal(t_k, t[idx]) and np.array_equal(Y_k, Y[idx])
+    t_eval = np.array([0.0, 3.333, 3.333, 12.0, 20.0])
+    _, Y_e = integrate_fixed(f, 0.0, 20.0, y0, 0.01, t_eval=t_eval)
+    ref = np.column_stack([np.interp(t_eval, t, Y[:, i]) for i in range(4)])
+    assert Y_e.shape == (5, 4) and np.allclose(Y_e, ref, rtol=0, atol=1e-12)
+    # Sin pasos todo t_eval es y0; fuera del intervalo se rechaza
+    _, Y_0 = integrate_fixed(f, 5.0, 5.0, y0, 0.01, t_eval=[5.0, 5.0 + 1e-13])
+    assert np.array_equal(Y_0, [y0, y0])
+    with pytest.raises(ValueError):
+        integrate_fixed(f, 5.0, 5.0, y0, 0.01, t_eval=[5.0, 6.0])
+
+
+def test_threshold_events_located_inside_steps():
+    # y = e^(−t) cruza 1/2 en ln 2 y 1/10 en ln 10, lejos de la malla dt = 0.1
+    for method in ("RungeKutta4", "RK45", "Rosenbrock23", "auto"):
+        log = EventLog([threshold_event("half", 0, 0.5, direction=-1),
+                        threshold_event("rise", 0, 0.5, direction=1),
+                        threshold_event("tenth", 0, 0.1)])
+        if method == "RungeKutta4":
+            integrate_fixed(bio_models.decay_rhs(), 0.0, 3.0, [1.0], 0.1, events=log)
+        else:
+            solve_ivp(bio_models.decay_rhs(), 0.0, 3.0, [1.0], method=method, rtol=1e-8, atol=1e-10,
+                      jac=bio_models.decay_jac(), events=log)
+        assert [r["name"] for r in log.records] == ["half", "tenth"]
+        assert abs(log.records[0]["t"] - math.log(2)) < 1e-5 and log.records[0]["direction"] == "down"
+        assert abs(log.records[1]["t"] - math.log(10)) < 1e-5 and log.summary()["terminated_by"] is None
+
+
+def test_terminal_event_truncates_every_output_mode():
+    f, t_hit = bio_models.decay_rhs(), math.log(4)
+    make = lambda: EventLog([threshold_event("quarter", 0, 0.25, terminal=True)])
+    log = make()
+    t, Y = integrate_fixed(f, 0.0, 5.0, [1.0], 0.01, events=log)
+    assert abs(t[-1] - t_hit) < 1e-9 and abs(Y[-1, 0] - 0.25) < 1e-9 and np.all(t[:-1] < t_hit)
+    t, _ = integrate_fixed(f, 0.0, 5.0, [1.0], 0.01, output_every=10, events=make())
+    assert abs(t[-1] - t_hit) < 1e-9
+    t, _ = integrate_fixed(f, 0.0, 5.0, [1.0], 0.01, t_eval=np.linspace(0.0, 5.0, 11), events=make())
+    assert np.allclose(t, [0.0, 0.5, 1.0])
+    log = make()
+    sol = solve_dopri5(f, 0.0, 5.0, [1.0], rtol=1e-8, atol=1e-10, events=log)
+    assert abs(sol.t[-1] - t_hit) < 1e-6 and abs(sol.y_end[0] - 0.25) < 1e-6
+    assert log.terminated["name"] == "quarter"
+    with pytest.raises(ValueError):
+        integrate_fixed(f, 0.0, 1.0, np.ones((2, 1)), 0.1, events=make())
+
+
+def test_hh_spike_times_agree_across_methods():
+    f = bio_models.hodgkin_huxley_rhs(1.0, 120.0, 36.0, 0.3, 50.0, -77.0, -54.4, 10.0)
+    y0 = [-65.0, 0.05, 0.6, 0.32]
+    spikes = {}
+    for method in ("RungeKutta4", "RK45"):
+        log = EventLog([threshold_event("spike", 0, 0.0, direction=1)])
+        if method == "RungeKutta4":
+            integrate_fixed(f, 0.0, 100.0, y0, 0.01, events=log)
+        else:
+            solve_ivp(f, 0.0, 100.0, y0, method=method, rtol=1e-8, atol=1e-10, events=log)
+        spikes[method] = np.array([r["t"] for r in log.records])
+    assert len(spikes["RK45"]) == 7 and np.allclose(spikes["RungeKutta4"], spikes["RK45"], atol=1e-4)
+
+
+def _concat(chunks):
+    chunks = list(chunks)
+    return (np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks]),
+            [c[2] for c in chunks])
+
+
+def test_fixed_step_chunks_resume_bit_identical():
+    f = bio_models.hodgkin_huxley_rhs(1.0, 120.0, 36.0, 0.3, 50.0, -77.0, -54.4, 10.0)
+    y0 = [-65.0, 0.05, 0.6, 0.32]
+    for every in (1, 7):
+        t, Y = integrate_fixed(f, 0.0, 30.005, y0, 0.01, output_every=every)
+        t_c, Y_c, cks = _concat(iter_chunks(f, 30.005, Checkpoint.start("RungeKutta4", 0.0, y0), 0.01,
+                                            chunk_size=200, output_every=every))
+        assert np.array_equal(t_c, t) and np.array_equal(Y_c, Y) and len(cks) >= 3
+    # Reanudar desde un bloque intermedio (vía JSON) y alargar t_end sin recalcular
+    t, Y = integrate_fixed(f, 0.0, 45.0, y0, 0.01)
+    head = list(iter_chunks(f, 30.005, Checkpoint.start("RungeKutta4", 0.0, y0), 0.01, chunk_size=1000))
+    resumed = Checkpoint.from_dict(head[1][2].to_dict())
+    t_r, Y_r, _ = _concat(iter_chunks(f, 45.0, resumed, 0.01, chunk_size=1000, include_start=False))
+    assert np.array_equal(np.concatenate([head[0][0], head[1][0], t_r]), t)
+    assert np.array_equal(np.concatenate([head[0][1], head[1][1], Y_r]), Y)
+    with pytest.raises(ValueError):
+        Checkpoint.from_dict({"t": 1.0})
+    # Otra malla: el índice guardado apuntaría atrás en el tiempo
+    assert resumed.width == 0.01
+    with pytest.raises(ValueError):
+        next(iter_chunks(f, 45.0, resumed, 0.005, chunk_size=1000))
+
+
+def test_adaptive_chunks_resume_and_match_single_run():
+    f = bio_models.hodgkin_huxley_rhs(1.0, 120.0, 36.0, 0.3, 50.0, -77.0, -54.4, 10.0)
+    y0 = [-65.0, 0.05, 0.6, 0.32]
+    sol = solve_ivp(f, 0.0, 40.0, y0, method="RK45", rtol=1e-8, atol=1e-10)
+    kw = dict(dt=0.01, chunk_size=500, rtol=1e-8, atol=1e-10)
+    chunks = list(iter_chunks(f, 40.0, Checkpoint.start("RK45", 0.0, y0), **kw))
+    t, Y, cks = _concat(chunks)
+    assert t[0] == 0.0 and t[-1] == 40.0 and np.all(np.diff(t) > 0)
+    assert [ck.t for ck in cks[1:]] == [5.0, 10.0, 15.0, 20.0, 25.0, 30.0, 35.0, 40.0]
+    assert np.allclose(Y[-1], sol.y[-1], rtol=0, atol=1e-4)
+    _, Y_r, _ = _concat(iter_chunks(f, 40.0, cks[3], include_start=False, **kw))
+    assert np.array_equal(Y_r, np.concatenate([c[1] for c in chunks[4:]]))
+    with pytest.raises(ValueError):
+        next(iter_chunks(f, 40.0, cks[3], include_start=False, **{**kw, "chunk_size": 100}))
@@ -0,0 +1,92 @@
+import time
+
+import numpy as np
+
+from routers.septima import PKSimulationRequest, _analytic_pk, _integrate_pk
+from services import bio_models, pk_analytic
+from services.ode_integrators import Checkpoint, integrate_fixed
+
+
+def _bateman(t, dose, ka, ke, Vd):
+    return dose * ka / (Vd * (ka - ke)) * (np.exp(-ke * t) - np.exp(-ka * t))
+
+
+def test_matches_rk4_across_doses():
+    ka, ke, Vd, dose = 1.2, 0.2, 15.0, 400.0
+    dose_times = [0.0, 6.0, 12.0, 18.0]
+    t = np.linspace(0.0, 30.0, 301)
+    Y = pk_analytic.pk_multidose(t, dose_times, dose, ka, ke, Vd)
+    # Referencia: RK4 fino por tramos, sumando la dosis al cruzar cada instante
+    y, t_ref, Y_ref = np.array([dose, 0.0]), [], []
+    for t0, t1 in zip(dose_times, dose_times[1:] + [30.0]):
+        ts, ys = integrate_fixed(bio_models.pk_rhs(ka, ke, Vd), t0, t1, y, 0.001)
+        t_ref.append(ts[:-1]); Y_ref.append(ys[:-1])
+        y = ys[-1] + [dose, 0.0]
+    t_ref, Y_ref = np.concatenate(t_ref + [[30.0]]), np.concatenate(Y_ref + [ys[-1:]])
+    ref = np.stack([np.interp(t, t_ref, Y_ref[:, i]) for i in range(2)], axis=-1)
+    assert np.allclose(Y, ref, atol=1e-3)
+    # Continuo por la derecha: en el instante de una dosis ya está sumada
+    assert Y[60, 0] > Y[59, 0] + dose * 0.9
+
+
+def test_equal_rates_and_batches():
+    t = np.linspace(0.0, 48.0, 97)
+    # ka == ke: límite dose·ka/Vd·t·e^{−k·t} sin 0/0
+    Y = pk_analytic.pk_multidose(t, [0.0], 100.0, 0.3, 0.3, 10.0)
+    assert np.all(np.isfinite(Y))
+    assert np.allclose(Y[:, 1], 100.0 * 0.3 / 10.0 * t * np.exp(-0.3 * t))
+    near = pk_analytic.pk_multidose(t, [0.0, 12.0], 100.0, 0.3 + 1e-9, 0.3, 10.0)
+    assert np.allclose(near, pk_analytic.pk_multidose(t, [0.0, 12.0], 100.0, 0.3, 0.3, 10.0))
+    # Lote (batch,): cada escenario coincide con su cálculo escalar
+    ka = np.array([0.5, 1.0, 2.0])
+    Yb = pk_analytic.pk_multidose(t, [0.0, 12.0, 24.0], 200.0, ka, 0.1, 20.0)
+    assert Yb.shape == (97, 3, 2)
+    for i, k in enumerate(ka):
+        assert np.allclose(Yb[:, i], pk_analytic.pk_multidose(t, [0.0, 12.0, 24.0], 200.0, k, 0.1, 20.0))
+
+
+def test_one_year_hourly_regimen_is_exact_and_fast():
+    ka, ke, Vd, dose = 1.0, 0.15, 10.0, 500.0
+    dose_times = np.arange(0.0, 8760.0, 8.0)
+    t = np.arange(0.0, 8761.0)
+    tic = time.perf_counter()
+    Y = pk_analytic.pk_multidose(t, dose_times, dose, ka, ke, Vd)
+    assert time.perf_counter() - tic < 0.5
+    # Superposición explícita de las 1095 respuestas de Bateman en algunos tiempos
+    for ti in (5.0, 100.0, 4321.0, 8760.0):
+        tau = ti - dose_times[dose_times <= ti]
+        assert np.isclose(Y[int(ti), 1], _bateman(tau, dose, ka, ke, Vd).sum(), rtol=1e-10)
+    # Estado estacionario (8 h tras la última dosis): valle C_ss,min teórico
+    r = np.exp(-ke * 8.0), np.exp(-ka * 8.0)
+    trough = dose * ka / (Vd * (ka - ke)) * (r[0] / (1 - r[0]) - r[1] / (1 - r[1]))
+    assert np.isclose(Y[8760, 1], trough, rtol=1e-10)
+
+
+def test_chunked_stream_matches_and_extends():
+    ka, ke, Vd, dose = 1.0, 0.15, 10.0, 500.0
+    dose_times = np.arange(0.0, 24 * 30, 8.0)
+    start = Checkpoint.start("analytic", 0.0, [dose, 0.0])
+    chunks = list(pk_analytic.iter_pk_multidose(24 * 30 - 0.01, start, 0.05, dose_times, dose, ka, ke, Vd,
+                                                chunk_size=1000))
+    t = np.concatenate([c[0] for c in chunks])
+    Y = np.concatenate([c[1] for c in chunks])
+    assert len(chunks) == 15 and t[-1] == 24 * 30 - 0.01
+    assert np.allclose(Y, pk_analytic.pk_multidose(t, dose_times, dose, ka, ke, Vd), rtol=0, atol=1e-12)
+    # Alargar: sigue en la malla, sin repetir t_end ni dejar huecos
+    ck = chunks[-1][2]
+    more = list(pk_analytic.iter_pk_multidose(24 * 30 + 0.1, ck, 0.05, dose_times, dose, ka, ke, Vd,
+                                              include_start=False))
+    assert np.allclose(more[0][0], [24 * 30, 24 * 30 + 0.05, 24 * 30 + 0.1])
+
+
+def test_dose_at_t_end_reaches_final_state():
+    p = {"ka": 1.0, "ke": 0.15, "Vd": 10.0}
+    f, jac = bio_models.pk_rhs(**p), bio_models.pk_jac(**p)
+    base = dict(t_end=16.0, dt=0.05, regimen="multiple", interval_h=8.0, n_doses=3)
+    for extra in ({}, {"n_out": 5}, {"method": "RK45"}, {"method": "RK45", "n_out": 5}):
+        req = PKSimulationRequest(**base, **extra)
+        t, Y, _ = _integrate_pk(f, jac, 500.0, req)
+        _, Y_exact, _ = _analytic_pk(500.0, p["ka"], p["ke"], p["Vd"], req)
+        assert t[-1] == 16.0
+        assert Y[-1, 0] > 500.0
+        assert np.allclose(Y[-1], Y_exact[-1], rtol=1e-5)
@@ -0,0 +1,127 @@
+import asyncio
+
+import numpy as np
+
+from services import pti_model
+from services.pti_realtime import PTIHub, decode_frame, frame_to_json
+
+
+def test_hub_matches_batch_stepper_and_speed():
+    async def scenario():
+        hub = PTIHub()
+        a = hub.join([150000.0, 1.0], {"treatment": 2}, dt=0.1, speed=1.0)
+        b = hub.join([80000.0, 1.5], {"treatment": 1, "dose_mg": 40}, dt=0.05, speed=2.0)
+        c = hub.join([150000.0, 1.0], {}, dt=0.1, speed=0.5)
+        for _ in range(10):
+            hub.tick()
+        for s in (a, b, c):
+            hub.leave(s)
+        return a, b, c
+
+    a, b, c = asyncio.run(scenario())
+    # Cada sesión sigue su propia trayectoria (sin eventos estocásticos en este rango)
+    for session, y0, params, dt, steps in ((a, [150000.0, 1.0], {"treatment": 2}, 0.1, 10),
+                                           (b, [80000.0, 1.5], {"treatment": 1, "dose_mg": 40}, 0.05, 20)):
+        _, Y, _ = pti_model.simulate_pti_batch(y0, params, 1, 0.0, steps * dt, dt)
+        frame = frame_to_json(session.latest)
+        assert np.allclose(frame["y"], Y[-1, 0])
+        assert abs(frame["t"] - steps * dt) < 1e-9
+    # speed 0.5: un paso cada dos ticks
+    assert c.frames == 5 and abs(frame_to_json(c.latest)["t"] - 0.5) < 1e-9
+
+
+def test_frames_coalesce_and_binary_round_trip():
+    async def scenario():
+        hub = PTIHub(capacity=1)
+        s = hub.join([150000.0, 1.0], {}, dt=0.1, binary=True)
+        extra = hub.join([150000.0, 1.0], {}, dt=0.1)  # obliga a crecer el stepper
+        for _ in range(3):
+            hub.tick()   # nadie consume: se queda solo el último
+        counts = (hub.stepper.n, s.frames, s.dropped)
+        hub.leave(extra)
+        hub.leave(s)
+        return counts, s
+
+    (capacity, frames, dropped), s = asyncio.run(scenario())
+    assert capacity == 2 and frames == 3 and dropped == 2
+    data = s.encode(s.latest)
+    frame = decode_frame(data)
+    assert len(data) == 34
+    assert abs(frame["t"] - 0.3) < 1e-9 and frame_to_json(frame) == frame_to_json(s.latest)
+
+
+def test_seeded_sessions_reproducible_regardless_of_neighbours():
+    async def scenario():
+        hub = PTIHub(capacity=2)
+        a = hub.join([15000.0, 1.0], {}, dt=0.1, seed=42)
+        b = hub.join([15000.0, 1.0], {}, dt=0.1, speed=3.0, seed=42)
+        c = hub.join([15000.0, 1.0], {}, dt=0.1, seed=7)   # obliga a crecer el stepper
+        P = {s.slot: [] for s in (a, b, c)}
+        for _ in range(300):
+            hub.tick()
+            for s in (a, b, c):
+                P[s.slot].append(float(s.latest["P"]))
+        for s in (a, b, c):
+            hub.leave(s)
+        return a, b, c, P
+
+    a, b, c, P = asyncio.run(scenario())
+    # b va 3 veces más rápido: sus frames son los pasos 3, 6, 9… de a
+    n = min(len(P[a.slot]) // 3, 50)
+    assert P[b.slot][:n] == P[a.slot][2:3 * n:3]
+    assert a.seed == 42 and c.seed == 7 and P[c.slot] != P[a.slot]
+
+
+def test_hundreds_of_sessions_step_and_coalesce_deterministically():
+    speeds = (0.5, 1.0, 2.0, 3.0)
+    n_ticks = 20
+
+    async def scenario():
+        hub = PTIHub()
+        sessions = [hub.join([150000.0, 1.0], {"treatment": i % 4}, dt=0.1, speed=speeds[i % 4],
+                             binary=i % 2 == 0, seed=i) for i in range(300)]
+        slots = np.array([s.slot for s in sessions])
+        expected = np.array([speeds[i % 4] for i in range(300)])
+        per_tick = []
+        for _ in range(n_ticks):
+            t0 = hub.stepper.t[slots].copy()
+            hub.tick()
+            per_tick.append(np.rint((hub.stepper.t[slots] - t0) / 0.1))
+            for s in sessions[::3]:
+                s.ready.clear()      # consumidores al día: envían cada frame
+        capacity = hub.stepper.n
+        for s in sessions:
+            hub.leave(s)
+        return hub, sessions, expected, np.array(per_tick), capacity
+
+    hub, sessions, speed, per_tick, capacity = asyncio.run(scenario())
+    assert capacity >= 300 and not hub.sessions
+    # Pasos por tick según speed (0.5: uno cada dos ticks)
+    assert np.array_equal(per_tick.sum(axis=0), np.floor(speed * n_ticks))
+    assert np.all(per_tick[:, speed >= 1] == speed[speed >= 1])
+    for i, s in enumerate(sessions):
+        assert s.frames == (n_ticks // 2 if speed[i] < 1 else n_ticks)
+        # Sin consumir, solo queda el último frame: el resto se cuenta como fusionado
+        assert s.dropped == (0 if i % 3 == 0 else s.frames - 1)
+        assert abs(float(s.latest["t"]) - 0.1 * np.floor(speed[i] * n_ticks)) < 1e-9
+
+
+def test_seed_must_be_integer_and_is_acknowledged():
+    async def scenario():
+        hub = PTIHub(capacity=2)
+        for bad in (1.5, 7.0, "7", True, -1):
+            try:
+                hub.join([15000.0, 1.0], {}, seed=bad)
+            except ValueError:
+                continue
+            raise AssertionError(f"seed={bad!r} aceptada")
+        fresh = hub.join([15000.0, 1.0], {}, binary=True)
+        fixed = hub.join([15000.0, 1.0], {}, seed=np.int64(9))
+        acks = fresh.ack(), fixed.ack()
+        for s in (fresh, fixed):
+            hub.leave(s)
+        return fresh, acks
+
+    fresh, (ack_fresh, ack_fixed) = asyncio.run(scenario())
+    assert ack_fresh == {"type": "ready", "seed": fresh.seed, "dt": 0.1, "binary": True}
+    assert isinstance(ack_fresh["seed"], int) and ack_fixed["seed"] == 9
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from routers import septima
+
+
+def test_native_fixed_step_honours_n_out(monkeypatch):
+    # El paso fijo del motor C++ solo devuelve la rejilla de dt: con n_out debe ir por NumPy
+    class NoFixedStep:
+        class ODESolver:
+            def solve(*args, **kwargs):
+                raise AssertionError("el paso fijo nativo ignora n_out")
+
+    real = septima._ode_system
+    monkeypatch.setattr(septima, "HAS_NATIVE_ENGINE", True)
+    monkeypatch.setattr(septima, "eq", NoFixedStep, raising=False)
+    monkeypatch.setattr(septima, "_ode_system", lambda req: (*real(req)[:2], object(), {}))
+    septima.simulation_cache.clear()
+
+    req = septima.ODESimulationRequest(model="decay", t_start=0.0, t_end=1.0, dt=0.01, y0=[1.0],
+                                       method="RungeKutta4", n_out=7)
+    res = asyncio.run(septima.simulate_ode(req))
+    assert len(res.t) == 7 and all(len(col) == 7 for col in res.y)
+    assert res.metadata["engine"] == "python_numpy"
+
+
+def test_ensemble_bands_keep_fractional_percentiles():
+    req = septima.PTIEnsembleRequest(n_patients=20, t_end=2.0, seed=3, quantiles=[0.02, 0.025, 0.5])
+    res = asyncio.run(septima.simulate_pti_ensemble(req))
+    assert list(res.platelet_quantiles) == ["p02", "p2.5", "p50"]
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(septima.simulate_pti_ensemble(req.model_copy(update={"quantiles": [0.5, 0.5]})))
+    assert exc.value.status_code == 400
+
+
+def test_fit_seed_must_be_non_negative():
+    data = {"t": [0.0, 1.0], "y": [1.0, 0.5]}
+    assert septima.FitRequest(model="decay", data=data, seed=0).seed == 0
+    with pytest.raises(ValidationError):
+        septima.FitRequest(model="decay", data=data, seed=-1)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from services.simulation_cache import SimulationCache, make_key
+
+
+def _arrays(n):
+    return {"t": np.linspace(0.0, 1.0, n), "cols": np.ones((2, n))}
+
+
+def test_key_is_canonical():
+    a = make_key("ode", {"y0": [1, 0], "params": {"k": 1, "b": 2.0}})
+    b = make_key("ode", {"params": {"b": 2, "k": 1.0}, "y0": [1.0, 0.0]})
+    assert a == b
+    assert a != make_key("ode", {"y0": [1, 0], "params": {"k": 1, "b": 2.5}})
+    assert a != make_key("pk", {"y0": [1, 0], "params": {"k": 1, "b": 2.0}})
+
+
+def test_large_integer_seeds_keep_distinct_keys():
+    assert make_key("pti", {"seed": 2**60}) != make_key("pti", {"seed": 2**60 + 1})
+    assert make_key("pti", {"seed": np.uint64(2**63 + 1)}) == make_key("pti", {"seed": 2**63 + 1})
+    assert make_key("pti", {"seed": 7}) == make_key("pti", {"seed": 7.0})
+
+
+def test_evicts_by_bytes_lru():
+    entry_bytes = 3 * 8 * 100  # t + 2 columnas de 100 floats
+    cache = SimulationCache(max_bytes=2 * entry_bytes)
+    cache.put("a", _arrays(100))
+    cache.put("b", _arrays(100))
+    assert cache.get("a") is not None  # "b" pasa a ser la menos reciente
+    cache.put("c", _arrays(100))
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.stats()["bytes"] == 2 * entry_bytes
+    # Una entrada mayor que toda la caché no vacía la caché
+    cache.put("big", _arrays(1000))
+    assert len(cache) == 2
+    # Los arrays cacheados son de solo lectura
+    with pytest.raises(ValueError):
+        cache.get("a")[0]["t"][0] = 5.0
+
+
+def test_npz_persistence_round_trip(tmp_path):
+    arrays = _arrays(50)
+    SimulationCache(directory=str(tmp_path)).put("k", arrays, {"engine": "python_numpy", "n_steps": np.int64(49)})
+    # Otra instancia (p. ej. tras reiniciar el servidor) lee el .npz
+    fresh = SimulationCache(directory=str(tmp_path))
+    loaded, meta = fresh.get("k")
+    assert np.array_equal(loaded["cols"], arrays["cols"]) and np.array_equal(loaded["t"], arrays["t"])
+    assert meta == {"engine": "python_numpy", "n_steps": 49}
+    assert fresh.stats()["disk_hits"] == 1 and fresh.get("k") is not None
+    assert fresh.stats()["hits"] == 1
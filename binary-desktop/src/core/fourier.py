@@ -0,0 +1,59 @@
+"""
+Utilidades NumPy para el modo Epiciclos del escritorio.
+Los trazos se manejan como arrays complejos z = x + iy (igual que EpicyclesWidget).
+
+La implementacion es la del backend (backend/services/fourier.py), compartida
+como binary-cli: aqui solo se adapta complejo <-> (N, 2).
+"""
+import os
+import sys
+
+import numpy as np
+
+# Shared Logic Import
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+backend_path = os.path.join(project_root, "backend")
+if backend_path not in sys.path:
+    sys.path.append(backend_path)
+
+from services import fourier as _shared  # noqa: E402
+
+
+def _xy(z):
+    z = np.asarray(z, dtype=np.complex128)
+    return np.column_stack([z.real, z.imag])
+
+
+def _z(xy):
+    return _shared.points_to_complex(xy)
+
+
+def smooth_path(z, iterations=3):
+    """Suavizado 1-2-1 vectorizado, extremos fijos."""
+    return _z(_shared.smooth_polyline(_xy(z), iterations))
+
+
+def catmull_rom(z, samples_per_segment=8, closed=True, alpha=0.5):
+    """Catmull-Rom centripeta (Barry-Goldman) evaluada para todos los segmentos a la vez."""
+    return _z(_shared.catmull_rom(_xy(z), samples_per_segment, closed=closed, alpha=alpha))
+
+
+def resample_arclength(z, n, closed=True):
+    """n puntos equiespaciados en longitud de arco (corrige el muestreo irregular del raton)."""
+    return _z(_shared.resample_arclength(_xy(z), n, closed=closed))
+
+
+def dft_coefficients(z):
+    """DFT normalizada ordenada por amplitud: (freq, amp, phase) con frecuencias con signo."""
+    freq, amp, phase, _ = _shared.fourier_coefficients(z, signed=True)
+    return freq, amp, phase
+
+
+def epicycle_frames(freq, amp, phase, n_frames):
+    """
+    Centros acumulados de la cadena para t = 2*pi*f/F: array complejo (F, K+1),
+    columna 0 = origen, ultima columna = punta. Calculado por bloques de frames
+    para acotar la memoria intermedia.
+    """
+    return _shared.epicycle_frames(freq, amp, phase, n_frames)
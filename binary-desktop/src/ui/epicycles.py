@@ -1,10 +1,14 @@
-import math
 import numpy as np
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                                QLabel)
 from PySide6.QtCore import Qt, QTimer, QPointF
 from PySide6.QtGui import QPainter, QPen, QColor, QPainterPath
 
+from src.core import fourier
+
+# Puntos del trazo tras el remuestreo por longitud de arco (= numero de epiciclos)
+RESAMPLE_POINTS = 512
+
 class EpicyclesWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -13,8 +17,10 @@ class EpicyclesWidget(QWidget):
         # State
         self.drawing = True
         self.path_points = []  # List of complex numbers
-        self.fourier_coeffs = [] # List of {'freq', 'amp', 'phase', 'complex'}
-        self.time = 0.0
+        self.fourier_coeffs = [] # List of {'freq', 'amp', 'phase', 're', 'im'}
+        self.frames = None       # (F, K+1) complejo: centros de la cadena por frame
+        self.radii = None        # (K,) amplitudes, mismo orden que las columnas
+        self.frame = 0
         self.trail = []
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.animate)
@@ -88,7 +94,7 @@ class EpicyclesWidget(QWidget):
             self.compute_dft()
             self.btnAction.setText("Editar / Dibujar")
             self.statusLabel.setText(f"Animando {len(self.fourier_coeffs)} epiciclos...")
-            self.time = 0
+            self.frame = 0
             self.trail = []
             self.timer.start(16) # ~60 FPS
         else:
@@ -103,69 +109,43 @@ class EpicyclesWidget(QWidget):
     def reset(self):
         self.path_points = []
         self.fourier_coeffs = []
+        self.frames = None
+        self.radii = None
         self.trail = []
-        self.time = 0
+        self.frame = 0
         if not self.drawing:
             self.toggle_mode() # Go back to drawing
         self.update()
 
     def smooth_path(self, iterations=3):
-        """Apply simple Laplacian smoothing to reduce hand jitter"""
+        """
+        Suavizado 1-2-1 vectorizado, Catmull-Rom centripeta y remuestreo por
+        longitud de arco: N fijo sin importar la velocidad del raton.
+        """
         if len(self.path_points) < 3:
             return
-            
-        points = self.path_points
-        
-        # Iterative smoothing (Average neighbors)
-        for _ in range(iterations):
-            new_points = [points[0]] # Keep start
-            
-            for i in range(1, len(points) - 1):
-                # P_new = 0.25*prev + 0.5*curr + 0.25*next
-                prev_p = points[i-1]
-                curr_p = points[i]
-                next_p = points[i+1]
-                
-                avg_x = 0.25 * prev_p.real + 0.5 * curr_p.real + 0.25 * next_p.real
-                avg_y = 0.25 * prev_p.imag + 0.5 * curr_p.imag + 0.25 * next_p.imag
-                
-                new_points.append(complex(avg_x, avg_y))
-            
-            new_points.append(points[-1]) # Keep end
-            points = new_points
-            
-        self.path_points = points
+        z = fourier.smooth_path(self.path_points, iterations)
+        z = fourier.catmull_rom(z, closed=True)
+        self.path_points = list(fourier.resample_arclength(z, RESAMPLE_POINTS, closed=True))
 
     def compute_dft(self):
-        """Discrete Fourier Transform"""
-        x = np.array(self.path_points)
-        N = len(x)
-        X = []
-        
-        # Compute DFT
-        # Or simply use numpy fft?
-        # Numpy FFT gives 0 to N-1 freqs. We usually want -N/2 to N/2 for epicycles center-stability
-        # But let's stick to standard definition first
-        
-        # Using numpy.fft which is super fast
-        fft_vals = np.fft.fft(x) / N
-        
-        for k in range(N):
-            amp = abs(fft_vals[k])
-            phase = np.angle(fft_vals[k])
-            freq = k
-            X.append({'re': fft_vals[k].real, 'im': fft_vals[k].imag, 
-                      'freq': freq, 'amp': amp, 'phase': phase})
-        
-        # Sort by amplitude (draw biggest circles first for better visualization)
-        X.sort(key=lambda item: item['amp'], reverse=True)
-        self.fourier_coeffs = X
+        """DFT (numpy.fft) + precalculo de todos los frames de la animacion."""
+        freq, amp, phase = fourier.dft_coefficients(self.path_points)
+        c = amp * np.exp(1j * phase)
+        self.fourier_coeffs = [
+            {'re': r, 'im': i, 'freq': f, 'amp': a, 'phase': ph}
+            for r, i, f, a, ph in zip(c.real.tolist(), c.imag.tolist(), freq.tolist(),
+                                      amp.tolist(), phase.tolist())
+        ]
+        # Un frame por muestra: mismo paso dt = 2*pi/N que antes, pero la suma
+        # de la cadena se hace una sola vez (producto exterior + cumsum)
+        self.frames = fourier.epicycle_frames(freq, amp, phase, len(freq))
+        self.radii = amp
 
     def animate(self):
-        dt = 2 * math.pi / len(self.fourier_coeffs)
-        self.time += dt
-        if self.time > 2 * math.pi:
-            self.time = 0
+        self.frame += 1
+        if self.frame >= len(self.frames):
+            self.frame = 0
             self.trail = [] # Reset trail or keep loop? Loop trail
         
         self.update()
@@ -187,55 +167,31 @@ class EpicyclesWidget(QWidget):
                     path.lineTo(p.real, p.imag)
                 painter.drawPath(path)
                 
-        else:
-            # Draw Epicycles
-            # Center? No, DFT reconstructs absolute coordinates if handled right
+        elif self.frames is not None:
+            # Draw Epicycles from the precomputed chain of this frame
+            centers = self.frames[self.frame]
             
-            # Start point (usually 0,0 but first term is constant offset 0 freq)
-            # Actually with FFT, the terms sum up to position
+            # Circles: only visible ones (radius > 1 px)
+            big = np.flatnonzero(self.radii > 1)
+            painter.setPen(QPen(QColor(255, 255, 255, 30), 1)) # Faint white
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            for cx, cy, r in zip(centers.real[big].tolist(),
+                               centers.imag[big].tolist(), self.radii[big].tolist()):
+                painter.drawEllipse(QPointF(cx, cy), r, r)
             
-            x = 0
-            y = 0
-            
-            # Draw circles
-            for eps in self.fourier_coeffs:
-                prev_x = x
-                prev_y = y
-                
-                freq = eps['freq']
-                radius = eps['amp']
-                phase = eps['phase']
-                
-                # Setup angle: freq * t + phase
-                angle = freq * self.time + phase
-                
-                dx = radius * math.cos(angle)
-                dy = radius * math.sin(angle)
-                
-                x += dx
-                y += dy
-                
-                # Draw Circle
-                if radius > 1: # Optimization: don't draw tiny circles
-                    painter.setPen(QPen(QColor(255, 255, 255, 30), 1)) # Faint white
-                    painter.setBrush(Qt.BrushStyle.NoBrush)
-                    painter.drawEllipse(QPointF(prev_x, prev_y), radius, radius)
-                
-                # Draw Radius Line
-                if radius > 1:
-                    painter.setPen(QPen(QColor(255, 255, 255, 50), 1))
-                    painter.drawLine(QPointF(prev_x, prev_y), QPointF(x, y))
+            # Radius lines: the whole chain as a single polyline
+            painter.setPen(QPen(QColor(255, 255, 255, 50), 1))
+            chain = centers[:big[-1] + 2] if big.size else centers[-1:]
+            painter.drawPolyline([QPointF(x, y) for x, y in zip(chain.real.tolist(), chain.imag.tolist())])
             
             # Draw Trail
+            tip = centers[-1]
+            x, y = tip.real, tip.imag
             self.trail.append(QPointF(x, y))
             
             if len(self.trail) > 1:
                 painter.setPen(QPen(QColor("#EA580C"), 2)) # Aurora Orange
-                path = QPainterPath()
-                path.moveTo(self.trail[0])
-                for p in self.trail[1:]:
-                    path.lineTo(p)
-                painter.drawPath(path)
+                painter.drawPolyline(self.trail)
             
             # Draw Pen Tip
             painter.setPen(Qt.PenStyle.NoPen)
@@ -0,0 +1,51 @@
+#pragma once
+
+#include <map>
+#include <string>
+#include <vector>
+#include <Eigen/Dense>
+
+#include "equacore/expression.hpp"
+#include "ode_solvers.hpp"
+
+namespace equacore {
+
+    // Right-hand side evaluated entirely in C++.
+    //
+    // ODESolver::solve with a Python callable crosses the pybind11 boundary
+    // (and converts Eigen <-> list) on every evaluation of f. A NativeRHS is
+    // built once from Python and then handed to the solver, so the RK loop
+    // never calls back into the interpreter.
+    //
+    // Two sources:
+    //   - named(): built-in models (decay, bergman, pk_1cmt, windkessel,
+    //     hodgkin_huxley), same equations as backend/services/bio_models.py
+    //   - fromExpressions(): one Expression tree per state, compiled to a flat
+    //     postfix program. Parameters are folded into constants, so a step
+    //     only touches t, y and a small value stack.
+    class NativeRHS {
+    public:
+        static NativeRHS named(const std::string& model, const std::map<std::string, double>& params = {});
+        static std::vector<std::string> namedModels();
+
+        // Symbols allowed in the equations: "t", the state names and the
+        // parameter names. Anything else throws std::invalid_argument.
+        static NativeRHS fromExpressions(const std::vector<Expr>& equations,
+                                         const std::vector<std::string>& states,
+                                         const std::map<std::string, double>& params = {});
+
+        Eigen::VectorXd operator()(double t, const Eigen::VectorXd& y) const { return f_(t, y); }
+        const SystemFunc& func() const { return f_; }
+        size_t dim() const { return dim_; }
+        const std::string& name() const { return name_; }
+
+    private:
+        NativeRHS(std::string name, size_t dim, SystemFunc f) :
+            name_(std::move(name)), dim_(dim), f_(std::move(f)) {}
+
+        std::string name_;
+        size_t dim_;
+        SystemFunc f_;
+    };
+
+} // namespace equacore
@@ -15,12 +15,33 @@ namespace equacore {
         enum class Method {
             Euler,
             RungeKutta4,
-            RungeKutta45 // Adaptive (Future implementation)
+            RungeKutta45 // Adaptive Dormand-Prince 5(4), see solveAdaptive
+        };
+
+        // Step-size control for RungeKutta45
+        struct AdaptiveOptions {
+            double rtol;
+            double atol;
+            double h0;          // 0 = automatic initial step (Hairer)
+            double max_step;    // 0 = unbounded (t_end - t_start)
+            size_t max_steps;
+
+            AdaptiveOptions() :
+                rtol(1e-6), atol(1e-9), h0(0.0), max_step(0.0), max_steps(200000) {}
+        };
+
+        struct Stats {
+            size_t n_steps;     // Accepted steps
+            size_t n_rejected;
+            size_t n_rhs;       // Evaluations of f
+
+            Stats() : n_steps(0), n_rejected(0), n_rhs(0) {}
         };
 
         struct Result {
             Eigen::VectorXd t;          // Time points
             std::vector<Eigen::VectorXd> y; // State vectors at each time point
+            Stats stats;
         };
 
         // Solve IVP (Initial Value Problem)
@@ -29,6 +50,13 @@ namespace equacore {
         // dt: time step (fixed for now)
         static Result solve(SystemFunc f, const Eigen::Vector2d& t_span, const Eigen::VectorXd& y0, double dt, Method method = Method::RungeKutta4);
 
+        // Adaptive Dormand-Prince 5(4) with dense output.
+        // t_eval empty: returns every accepted step.
+        // t_eval given (increasing, inside t_span): interpolates exactly there.
+        static Result solveAdaptive(SystemFunc f, const Eigen::Vector2d& t_span, const Eigen::VectorXd& y0,
+                                    const std::vector<double>& t_eval = {},
+                                    const AdaptiveOptions& options = AdaptiveOptions());
+
     private:
         static Eigen::VectorXd stepEuler(SystemFunc f, double t, const Eigen::VectorXd& y, double dt);
         static Eigen::VectorXd stepRK4(SystemFunc f, double t, const Eigen::VectorXd& y, double dt);
@@ -23,6 +23,15 @@ except ImportError:
     # Fallback biomédico si fuera necesario (por ahora no hay fallback Python para ODEs complejos)
     pass
 
+# 1b. RHS nativo para ODESolver (sin callbacks a Python). Builds antiguos del
+#     módulo no lo traen, por eso va aparte y no tumba NATIVE_BIO.
+NATIVE_RHS = False
+try:
+    from ._equacore import NativeRHS, Expression, sym as expr
+    NATIVE_RHS = True
+except ImportError:
+    pass
+
 # 2. Intento de carga del motor Simbólico (GiNaC)
 try:
     from ._equacore import (
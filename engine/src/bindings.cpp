@@ -8,6 +8,7 @@
 
 #include "equacore/linear.hpp"
 #include "ode_solvers.hpp" // OLD generics
+#include "ode_rhs.hpp"     // Native RHS (no Python callbacks)
 #include "ode.hpp"         // NEW BioODESolver
 
 namespace py = pybind11;
@@ -250,11 +251,68 @@ PYBIND11_MODULE(_equacore, m) {
     py::enum_<ODESolver::Method>(generic_solver, "Method")
         .value("Euler", ODESolver::Method::Euler)
         .value("RungeKutta4", ODESolver::Method::RungeKutta4)
+        .value("RungeKutta45", ODESolver::Method::RungeKutta45)
         .export_values();
+    py::class_<ODESolver::AdaptiveOptions>(generic_solver, "AdaptiveOptions")
+        .def(py::init<>())
+        .def_readwrite("rtol", &ODESolver::AdaptiveOptions::rtol)
+        .def_readwrite("atol", &ODESolver::AdaptiveOptions::atol)
+        .def_readwrite("h0", &ODESolver::AdaptiveOptions::h0)
+        .def_readwrite("max_step", &ODESolver::AdaptiveOptions::max_step)
+        .def_readwrite("max_steps", &ODESolver::AdaptiveOptions::max_steps);
+    py::class_<ODESolver::Stats>(generic_solver, "Stats")
+        .def_readonly("n_steps", &ODESolver::Stats::n_steps)
+        .def_readonly("n_rejected", &ODESolver::Stats::n_rejected)
+        .def_readonly("n_rhs", &ODESolver::Stats::n_rhs);
     py::class_<ODESolver::Result>(generic_solver, "Result")
         .def_readonly("t", &ODESolver::Result::t)
-        .def_readonly("y", &ODESolver::Result::y);
-    generic_solver.def_static("solve", &ODESolver::solve);
+        .def_readonly("y", &ODESolver::Result::y)
+        .def_readonly("stats", &ODESolver::Result::stats);
+    // NativeRHS overloads go first: the std::function caster would otherwise
+    // accept a NativeRHS as a Python callable and call back on every step.
+    py::class_<NativeRHS>(m, "NativeRHS")
+        .def_static("named", &NativeRHS::named, "Built-in model evaluated in C++",
+            py::arg("model"), py::arg("params") = std::map<std::string, double>())
+        .def_static("named_models", &NativeRHS::namedModels)
+        .def_static("from_expressions", &NativeRHS::fromExpressions,
+            "Compile one Expression per state into a native RHS (parameters folded as constants)",
+            py::arg("equations"), py::arg("states"), py::arg("params") = std::map<std::string, double>())
+        .def("__call__", &NativeRHS::operator(), py::arg("t"), py::arg("y"))
+        .def_property_readonly("dim", &NativeRHS::dim)
+        .def_property_readonly("name", &NativeRHS::name);
+
+    auto check_dim = [](const NativeRHS& rhs, const Eigen::VectorXd& y0) {
+        if (rhs.dim() != 0 && static_cast<size_t>(y0.size()) != rhs.dim()) {
+            throw py::value_error("y0 has " + std::to_string(y0.size()) + " states, model '" +
+                                  rhs.name() + "' expects " + std::to_string(rhs.dim()));
+        }
+    };
+    generic_solver.def_static("solve", [check_dim](const NativeRHS& rhs, const Eigen::Vector2d& t_span,
+                                                   const Eigen::VectorXd& y0, double dt, ODESolver::Method method) {
+            check_dim(rhs, y0);
+            py::gil_scoped_release release;
+            return ODESolver::solve(rhs.func(), t_span, y0, dt, method);
+        },
+        py::arg("f"), py::arg("t_span"), py::arg("y0"), py::arg("dt"),
+        py::arg("method") = ODESolver::Method::RungeKutta4);
+    generic_solver.def_static("solve_adaptive", [check_dim](const NativeRHS& rhs, const Eigen::Vector2d& t_span,
+                                                            const Eigen::VectorXd& y0, const std::vector<double>& t_eval,
+                                                            const ODESolver::AdaptiveOptions& options) {
+            check_dim(rhs, y0);
+            py::gil_scoped_release release;
+            return ODESolver::solveAdaptive(rhs.func(), t_span, y0, t_eval, options);
+        },
+        py::arg("f"), py::arg("t_span"), py::arg("y0"),
+        py::arg("t_eval") = std::vector<double>(),
+        py::arg("options") = ODESolver::AdaptiveOptions());
+    generic_solver.def_static("solve", &ODESolver::solve,
+        py::arg("f"), py::arg("t_span"), py::arg("y0"), py::arg("dt"),
+        py::arg("method") = ODESolver::Method::RungeKutta4);
+    generic_solver.def_static("solve_adaptive", &ODESolver::solveAdaptive,
+        "Dormand-Prince 5(4) with step control and dense output at t_eval",
+        py::arg("f"), py::arg("t_span"), py::arg("y0"),
+        py::arg("t_eval") = std::vector<double>(),
+        py::arg("options") = ODESolver::AdaptiveOptions());
     
     // --- Utils ---
     m.def("is_prime", &is_prime);
@@ -0,0 +1,248 @@
+#include "ode_rhs.hpp"
+#include <array>
+#include <cmath>
+#include <memory>
+#include <stdexcept>
+
+namespace equacore {
+
+    namespace {
+
+        double param(const std::map<std::string, double>& params, const std::string& key, double fallback) {
+            auto it = params.find(key);
+            return it != params.end() ? it->second : fallback;
+        }
+
+        // ─── Built-in models (mirror backend/services/bio_models.py) ───
+
+        SystemFunc decay(const std::map<std::string, double>&) {
+            return [](double, const Eigen::VectorXd& y) -> Eigen::VectorXd { return -y; };
+        }
+
+        SystemFunc bergman(const std::map<std::string, double>& p) {
+            const double p1 = param(p, "p1", 0.028), p2 = param(p, "p2", 0.025), p3 = param(p, "p3", 0.000013);
+            const double Gb = param(p, "Gb", 80.0), Ib = param(p, "Ib", 7.0), n = param(p, "n", 0.142);
+            return [=](double, const Eigen::VectorXd& y) -> Eigen::VectorXd {
+                Eigen::VectorXd dy(3);
+                dy[0] = -(p1 + y[1]) * y[0] + p1 * Gb;
+                dy[1] = -p2 * y[1] + p3 * (y[2] - Ib);
+                dy[2] = -n * (y[2] - Ib);
+                return dy;
+            };
+        }
+
+        SystemFunc pk1cmt(const std::map<std::string, double>& p) {
+            const double ka = param(p, "ka", 1.0), ke = param(p, "ke", 0.15), Vd = param(p, "Vd", 10.0);
+            return [=](double, const Eigen::VectorXd& y) -> Eigen::VectorXd {
+                Eigen::VectorXd dy(2);
+                dy[0] = -ka * y[0];
+                dy[1] = ka * y[0] / Vd - ke * y[1];
+                return dy;
+            };
+        }
+
+        SystemFunc windkessel(const std::map<std::string, double>& p) {
+            const double R = param(p, "R", 1.0), C = param(p, "C", 1.2), Pv = param(p, "P_venous", 5.0);
+            const double cycle = 60.0 / param(p, "heart_rate", 75.0);
+            const double systole = 0.3 * std::sqrt(cycle);
+            return [=](double t, const Eigen::VectorXd& y) -> Eigen::VectorXd {
+                const double local_t = std::fmod(t, cycle);
+                const double Q = local_t < systole ? std::sin(M_PI * local_t / systole) * 500.0 : 0.0;
+                Eigen::VectorXd dy(1);
+                dy[0] = (Q - (y[0] - Pv) / R) / C;
+                return dy;
+            };
+        }
+
+        SystemFunc hodgkinHuxley(const std::map<std::string, double>& p) {
+            const double C_m = param(p, "C_m", 1.0), g_Na = param(p, "g_Na", 120.0), g_K = param(p, "g_K", 36.0);
+            const double g_L = param(p, "g_L", 0.3), E_Na = param(p, "E_Na", 50.0), E_K = param(p, "E_K", -77.0);
+            const double E_L = param(p, "E_L", -54.4), I_ext = param(p, "I_ext", 10.0);
+            return [=](double, const Eigen::VectorXd& y) -> Eigen::VectorXd {
+                const double V = y[0], m = y[1], h = y[2], n = y[3];
+                // x / (1 - e^(-x/10)) with its removable singularity at x = 0
+                auto ratio = [](double x) { return std::abs(x) > 1e-4 ? x / (1 - (1e-7 + std::exp(-x / 10))) : 10.0; };
+                const double a_m = 0.1 * ratio(V + 40), b_m = 4.0 * std::exp(-(V + 65) / 18);
+                const double a_h = 0.07 * std::exp(-(V + 65) / 20), b_h = 1.0 / (1 + std::exp(-(V + 35) / 10));
+                const double a_n = 0.01 * ratio(V + 55), b_n = 0.125 * std::exp(-(V + 65) / 80);
+                const double I_Na = g_Na * m * m * m * h * (V - E_Na);
+                const double I_K = g_K * n * n * n * n * (V - E_K);
+                const double I_L = g_L * (V - E_L);
+                Eigen::VectorXd dy(4);
+                dy[0] = (I_ext - I_Na - I_K - I_L) / C_m;
+                dy[1] = a_m * (1 - m) - b_m * m;
+                dy[2] = a_h * (1 - h) - b_h * h;
+                dy[3] = a_n * (1 - n) - b_n * n;
+                return dy;
+            };
+        }
+
+        struct NamedModel {
+            const char* name;
+            size_t dim;
+            SystemFunc (*build)(const std::map<std::string, double>&);
+        };
+
+        const std::array<NamedModel, 5> NAMED_MODELS = {{
+            {"decay", 0, decay},
+            {"bergman", 3, bergman},
+            {"pk_1cmt", 2, pk1cmt},
+            {"windkessel", 1, windkessel},
+            {"hodgkin_huxley", 4, hodgkinHuxley},
+        }};
+
+        // ─── Expression tree -> postfix program ───
+
+        enum class OpCode { Const, Load, Add, Sub, Mul, Div, Pow, Sin, Cos, Tan, Exp, Log, Sqrt, Abs,
+                            Asin, Acos, Atan, Sinh, Cosh, Tanh };
+
+        struct Instr {
+            OpCode op;
+            double value;   // Const
+            int slot;       // Load: 0 = t, 1..n = y
+        };
+
+        constexpr size_t MAX_STACK = 64;
+
+        struct Program {
+            std::vector<Instr> code;
+            size_t depth = 0;
+        };
+
+        OpCode functionCode(const std::string& name) {
+            static const std::map<std::string, OpCode> codes = {
+                {"sin", OpCode::Sin}, {"cos", OpCode::Cos}, {"tan", OpCode::Tan}, {"exp", OpCode::Exp},
+                {"log", OpCode::Log}, {"sqrt", OpCode::Sqrt}, {"abs", OpCode::Abs}, {"asin", OpCode::Asin},
+                {"acos", OpCode::Acos}, {"atan", OpCode::Atan}, {"sinh", OpCode::Sinh},
+                {"cosh", OpCode::Cosh}, {"tanh", OpCode::Tanh},
+            };
+            auto it = codes.find(name);
+            if (it == codes.end()) throw std::invalid_argument("Unknown function: " + name);
+            return it->second;
+        }
+
+        // Emits `expr` and returns the stack depth it needs
+        size_t emit(const Expr& expr, const std::map<std::string, int>& slots,
+                    const std::map<std::string, double>& params, std::vector<Instr>& code) {
+            switch (expr->type()) {
+                case Expression::Type::NUMBER:
+                    code.push_back({OpCode::Const, std::static_pointer_cast<Number>(expr)->value(), 0});
+                    return 1;
+                case Expression::Type::SYMBOL: {
+                    const auto& name = std::static_pointer_cast<Symbol>(expr)->name();
+                    auto s = slots.find(name);
+                    if (s != slots.end()) {
+                        code.push_back({OpCode::Load, 0.0, s->second});
+                        return 1;
+                    }
+                    auto p = params.find(name);
+                    if (p != params.end()) {
+                        code.push_back({OpCode::Const, p->second, 0});
+                        return 1;
+                    }
+                    throw std::invalid_argument("Unknown symbol '" + name + "' in ODE right-hand side");
+                }
+                case Expression::Type::ADD:
+                case Expression::Type::SUBTRACT:
+                case Expression::Type::MULTIPLY:
+                case Expression::Type::DIVIDE:
+                case Expression::Type::POWER: {
+                    auto bin = std::static_pointer_cast<BinaryOp>(expr);
+                    const size_t dl = emit(bin->left(), slots, params, code);
+                    const size_t dr = emit(bin->right(), slots, params, code);
+                    static const std::map<Expression::Type, OpCode> ops = {
+                        {Expression::Type::ADD, OpCode::Add}, {Expression::Type::SUBTRACT, OpCode::Sub},
+                        {Expression::Type::MULTIPLY, OpCode::Mul}, {Expression::Type::DIVIDE, OpCode::Div},
+                        {Expression::Type::POWER, OpCode::Pow},
+                    };
+                    code.push_back({ops.at(expr->type()), 0.0, 0});
+                    return std::max(dl, dr + 1);
+                }
+                case Expression::Type::FUNCTION: {
+                    auto fn = std::static_pointer_cast<Function>(expr);
+                    const size_t d = emit(fn->arg(), slots, params, code);
+                    code.push_back({functionCode(fn->name()), 0.0, 0});
+                    return d;
+                }
+                default:
+                    throw std::invalid_argument("Unsupported node in ODE right-hand side: " + expr->toString());
+            }
+        }
+
+        double run(const Program& prog, double t, const Eigen::VectorXd& y) {
+            std::array<double, MAX_STACK> stack;
+            size_t sp = 0;
+            for (const Instr& ins : prog.code) {
+                switch (ins.op) {
+                    case OpCode::Const: stack[sp++] = ins.value; break;
+                    case OpCode::Load:  stack[sp++] = ins.slot == 0 ? t : y[ins.slot - 1]; break;
+                    case OpCode::Add:   --sp; stack[sp - 1] += stack[sp]; break;
+                    case OpCode::Sub:   --sp; stack[sp - 1] -= stack[sp]; break;
+                    case OpCode::Mul:   --sp; stack[sp - 1] *= stack[sp]; break;
+                    case OpCode::Div:   --sp; stack[sp - 1] /= stack[sp]; break;
+                    case OpCode::Pow:   --sp; stack[sp - 1] = std::pow(stack[sp - 1], stack[sp]); break;
+                    case OpCode::Sin:   stack[sp - 1] = std::sin(stack[sp - 1]); break;
+                    case OpCode::Cos:   stack[sp - 1] = std::cos(stack[sp - 1]); break;
+                    case OpCode::Tan:   stack[sp - 1] = std::tan(stack[sp - 1]); break;
+                    case OpCode::Exp:   stack[sp - 1] = std::exp(stack[sp - 1]); break;
+                    case OpCode::Log:   stack[sp - 1] = std::log(stack[sp - 1]); break;
+                    case OpCode::Sqrt:  stack[sp - 1] = std::sqrt(stack[sp - 1]); break;
+                    case OpCode::Abs:   stack[sp - 1] = std::abs(stack[sp - 1]); break;
+                    case OpCode::Asin:  stack[sp - 1] = std::asin(stack[sp - 1]); break;
+                    case OpCode::Acos:  stack[sp - 1] = std::acos(stack[sp - 1]); break;
+                    case OpCode::Atan:  stack[sp - 1] = std::atan(stack[sp - 1]); break;
+                    case OpCode::Sinh:  stack[sp - 1] = std::sinh(stack[sp - 1]); break;
+                    case OpCode::Cosh:  stack[sp - 1] = std::cosh(stack[sp - 1]); break;
+                    case OpCode::Tanh:  stack[sp - 1] = std::tanh(stack[sp - 1]); break;
+                }
+            }
+            return stack[0];
+        }
+
+    } // namespace
+
+    NativeRHS NativeRHS::named(const std::string& model, const std::map<std::string, double>& params) {
+        for (const auto& m : NAMED_MODELS) {
+            if (model == m.name) return NativeRHS(m.name, m.dim, m.build(params));
+        }
+        throw std::invalid_argument("Unknown native model: " + model);
+    }
+
+    std::vector<std::string> NativeRHS::namedModels() {
+        std::vector<std::string> names;
+        for (const auto& m : NAMED_MODELS) names.emplace_back(m.name);
+        return names;
+    }
+
+    NativeRHS NativeRHS::fromExpressions(const std::vector<Expr>& equations,
+                                         const std::vector<std::string>& states,
+                                         const std::map<std::string, double>& params) {
+        if (equations.size() != states.size()) {
+            throw std::invalid_argument("Need exactly one equation per state");
+        }
+        std::map<std::string, int> slots = {{"t", 0}};
+        for (size_t i = 0; i < states.size(); ++i) {
+            if (!slots.emplace(states[i], static_cast<int>(i) + 1).second) {
+                throw std::invalid_argument("Duplicate state name: " + states[i]);
+            }
+        }
+
+        auto programs = std::make_shared<std::vector<Program>>(equations.size());
+        for (size_t i = 0; i < equations.size(); ++i) {
+            Program& prog = (*programs)[i];
+            prog.depth = emit(equations[i], slots, params, prog.code);
+            if (prog.depth > MAX_STACK) {
+                throw std::invalid_argument("Equation for '" + states[i] + "' is nested too deeply");
+            }
+        }
+
+        const size_t n = states.size();
+        SystemFunc f = [programs, n](double t, const Eigen::VectorXd& y) -> Eigen::VectorXd {
+            Eigen::VectorXd dy(n);
+            for (size_t i = 0; i < n; ++i) dy[i] = run((*programs)[i], t, y);
+            return dy;
+        };
+        return NativeRHS("expressions", n, std::move(f));
+    }
+
+} // namespace equacore
@@ -1,6 +1,8 @@
 #include "ode_solvers.hpp"
+#include <algorithm>
 #include <cmath>
 #include <iostream>
+#include <stdexcept>
 
 namespace equacore {
 
@@ -30,7 +32,7 @@ namespace equacore {
                 case Method::RungeKutta4:
                     current_y = stepRK4(f, current_t, current_y, dt);
                     break;
-                default: // Default to RK4
+                default: // Default to RK4 (RungeKutta45 goes through solveAdaptive)
                     current_y = stepRK4(f, current_t, current_y, dt);
                     break;
             }
@@ -41,6 +43,158 @@ namespace equacore {
             result.y.push_back(current_y);
         }
 
+        result.stats.n_steps = steps;
+        result.stats.n_rhs = steps * (method == Method::Euler ? 1 : 4);
+        return result;
+    }
+
+    namespace {
+
+        // Dormand-Prince 5(4) tableau (FSAL)
+        const double DP_C[7] = {0.0, 1.0 / 5, 3.0 / 10, 4.0 / 5, 8.0 / 9, 1.0, 1.0};
+        const double DP_A[7][6] = {
+            {0, 0, 0, 0, 0, 0},
+            {1.0 / 5, 0, 0, 0, 0, 0},
+            {3.0 / 40, 9.0 / 40, 0, 0, 0, 0},
+            {44.0 / 45, -56.0 / 15, 32.0 / 9, 0, 0, 0},
+            {19372.0 / 6561, -25360.0 / 2187, 64448.0 / 6561, -212.0 / 729, 0, 0},
+            {9017.0 / 3168, -355.0 / 33, 46732.0 / 5247, 49.0 / 176, -5103.0 / 18656, 0},
+            {35.0 / 384, 0, 500.0 / 1113, 125.0 / 192, -2187.0 / 6784, 11.0 / 84},
+        };
+        // Error weights: b5 - b4
+        const double DP_E[7] = {71.0 / 57600, 0, -71.0 / 16695, 71.0 / 1920,
+                                -17253.0 / 339200, 22.0 / 525, -1.0 / 40};
+        // Dense output (Hairer, contd5)
+        const double DP_D[7] = {-12715105075.0 / 11282082432.0, 0, 87487479700.0 / 32700410799.0,
+                                -10690763975.0 / 1880347072.0, 701980252875.0 / 199316789632.0,
+                                -1453857185.0 / 822651844.0, 69997945.0 / 29380423.0};
+
+        double rmsNorm(const Eigen::VectorXd& v) {
+            return v.size() ? std::sqrt(v.squaredNorm() / static_cast<double>(v.size())) : 0.0;
+        }
+
+    } // namespace
+
+    ODESolver::Result ODESolver::solveAdaptive(SystemFunc f, const Eigen::Vector2d& t_span, const Eigen::VectorXd& y0,
+                                               const std::vector<double>& t_eval, const AdaptiveOptions& options) {
+        const double t_start = t_span[0];
+        const double t_end = t_span[1];
+        const double span = t_end - t_start;
+        if (span < 0) {
+            throw std::invalid_argument("t_end must be >= t_start");
+        }
+        for (size_t i = 0; i < t_eval.size(); ++i) {
+            if ((i > 0 && t_eval[i] < t_eval[i - 1]) ||
+                t_eval[i] < t_start - 1e-12 || t_eval[i] > t_end + 1e-12) {
+                throw std::invalid_argument("t_eval must be increasing and inside t_span");
+            }
+        }
+        const bool dense = !t_eval.empty();
+        const double max_step = options.max_step > 0 ? std::min(options.max_step, span) : span;
+        const double rtol = options.rtol, atol = options.atol;
+
+        Result result;
+        std::vector<double> ts;
+        Eigen::VectorXd y = y0;
+        std::vector<Eigen::VectorXd> k(7);
+        k[0] = f(t_start, y);
+        result.stats.n_rhs = 1;
+
+        size_t j = 0;  // Next t_eval index
+        auto emit = [&](double t, const Eigen::VectorXd& v) {
+            ts.push_back(t);
+            result.y.push_back(v);
+        };
+        if (dense) {
+            while (j < t_eval.size() && t_eval[j] <= t_start) emit(t_eval[j++], y);
+        } else {
+            emit(t_start, y);
+        }
+        if (span == 0) {
+            while (dense && j < t_eval.size()) emit(t_eval[j++], y);
+            result.t = Eigen::Map<Eigen::VectorXd>(ts.data(), ts.size());
+            return result;
+        }
+
+        // Initial step (Hairer, Solving ODEs I, II.4)
+        double h = options.h0;
+        if (h <= 0) {
+            Eigen::VectorXd scale = atol + rtol * y.array().abs();
+            double d0 = rmsNorm((y.array() / scale.array()).matrix());
+            double d1 = rmsNorm((k[0].array() / scale.array()).matrix());
+            double h0 = (d0 < 1e-5 || d1 < 1e-5) ? 1e-6 : 0.01 * d0 / d1;
+            Eigen::VectorXd f1 = f(t_start + h0, y + h0 * k[0]);
+            result.stats.n_rhs++;
+            double d2 = rmsNorm(((f1 - k[0]).array() / scale.array()).matrix()) / h0;
+            double h1 = std::max(d1, d2) <= 1e-15 ? std::max(1e-6, h0 * 1e-3)
+                                                  : std::pow(0.01 / std::max(d1, d2), 1.0 / 5.0);
+            h = std::min(100 * h0, h1);
+        }
+        h = std::min(std::max(h, 1e-12 * std::max(1.0, std::abs(t_start))), max_step);
+
+        const double safety = 0.9, min_factor = 0.2, max_factor = 10.0;
+        double t = t_start;
+        Eigen::VectorXd y_new, err;
+        bool rejected_last = false;
+
+        while (t < t_end) {
+            if (result.stats.n_steps + result.stats.n_rejected >= options.max_steps) {
+                throw std::runtime_error("solveAdaptive: max_steps exceeded");
+            }
+            h = std::min(h, t_end - t);
+            for (int s = 1; s < 7; ++s) {
+                Eigen::VectorXd ys = y;
+                for (int r = 0; r < s; ++r) {
+                    if (DP_A[s][r] != 0.0) ys += (h * DP_A[s][r]) * k[r];
+                }
+                if (s == 6) y_new = ys;  // Stage 7 evaluates at the 5th-order solution
+                k[s] = f(t + DP_C[s] * h, ys);
+            }
+            result.stats.n_rhs += 6;
+
+            err = Eigen::VectorXd::Zero(y.size());
+            for (int s = 0; s < 7; ++s) {
+                if (DP_E[s] != 0.0) err += (h * DP_E[s]) * k[s];
+            }
+            Eigen::VectorXd scale = atol + rtol * y.array().abs().max(y_new.array().abs());
+            double err_norm = rmsNorm((err.array() / scale.array()).matrix());
+
+            if (err_norm <= 1.0) {
+                double t_new = t + h;
+                if (dense) {
+                    // 4th-order continuous extension over [t, t_new]
+                    Eigen::VectorXd dy = y_new - y;
+                    Eigen::VectorXd bspl = h * k[0] - dy;
+                    Eigen::VectorXd r4 = dy - h * k[6] - bspl;
+                    Eigen::VectorXd r5 = Eigen::VectorXd::Zero(y.size());
+                    for (int s = 0; s < 7; ++s) {
+                        if (DP_D[s] != 0.0) r5 += (h * DP_D[s]) * k[s];
+                    }
+                    while (j < t_eval.size() && (t_eval[j] <= t_new || t_new >= t_end)) {
+                        double theta = (t_eval[j] - t) / h;
+                        double theta1 = 1.0 - theta;
+                        emit(t_eval[j++], y + theta * (dy + theta1 * (bspl + theta * (r4 + theta1 * r5))));
+                    }
+                } else {
+                    emit(t_new, y_new);
+                }
+                double factor = err_norm == 0.0 ? max_factor
+                    : std::min(max_factor, safety * std::pow(err_norm, -0.2));
+                if (rejected_last) factor = std::min(factor, 1.0);
+                t = t_new;
+                y = y_new;
+                k[0] = k[6];  // FSAL
+                h = std::min(h * factor, max_step);
+                rejected_last = false;
+                result.stats.n_steps++;
+            } else {
+                h *= std::max(min_factor, safety * std::pow(err_norm, -0.2));
+                rejected_last = true;
+                result.stats.n_rejected++;
+            }
+        }
+
+        result.t = Eigen::Map<Eigen::VectorXd>(ts.data(), ts.size());
         return result;
     }
 
@@ -0,0 +1,270 @@
+"""
+Analisis numerico de funciones graficables de Binary EquaLab.
+Raices, extremos y area sin SymPy: muestreo denso vectorizado + refinamiento.
+
+Compartido por el escritorio (GraphingWidget) y el backend (/api/graphics/analyze).
+Todas las rutinas respetan un presupuesto de tiempo y devuelven lo encontrado
+hasta ese momento, de modo que nunca bloquean la UI con funciones trascendentes.
+
+  - Raices:  cambios de signo en una malla densa -> Brent
+  - Extremos: mismo esquema sobre la derivada numerica (diferencias centrales)
+  - Area:    cuadratura adaptativa Gauss-Kronrod (G7-K15)
+"""
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_SAMPLES = 2000
+DEFAULT_BUDGET_MS = 250.0
+
+
+@dataclass
+class RootsResult:
+    roots: List[float] = field(default_factory=list)
+    truncated: bool = False
+    elapsed_ms: float = 0.0
+
+
+@dataclass
+class ExtremaResult:
+    # (x, y, "max" | "min")
+    extrema: List[Tuple[float, float, str]] = field(default_factory=list)
+    truncated: bool = False
+    elapsed_ms: float = 0.0
+
+
+@dataclass
+class AreaResult:
+    area: float = float("nan")
+    abs_error: float = float("inf")
+    evaluations: int = 0
+    truncated: bool = False
+    elapsed_ms: float = 0.0
+
+
+class _Budget:
+    """Reloj de presupuesto (ms) compartido por una operacion."""
+
+    def __init__(self, budget_ms: Optional[float]):
+        self.t0 = time.perf_counter()
+        self.limit = None if budget_ms is None else self.t0 + budget_ms / 1000.0
+
+    def expired(self) -> bool:
+        return self.limit is not None and time.perf_counter() > self.limit
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.t0) * 1000, 3)
+
+
+def vectorize(f: Callable) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Envuelve una funcion lambdificada para que siempre devuelva un array float
+    de la forma de la entrada: constantes -> broadcast, complejos -> NaN.
+    """
+    def g(x):
+        x = np.asarray(x, dtype=float)
+        with np.errstate(all="ignore"):
+            y = np.asarray(f(x))
+        if np.iscomplexobj(y):
+            y = np.where(np.abs(y.imag) < 1e-12, y.real, np.nan)
+        y = np.asarray(y, dtype=float)
+        if y.shape != x.shape:
+            y = np.broadcast_to(y, x.shape).copy()
+        return y
+    return g
+
+
+def brent(f: Callable[[float], float], a: float, b: float, fa: float, fb: float,
+          xtol: float = 1e-12, maxiter: int = 100) -> float:
+    """Metodo de Brent (biseccion + secante + interpolacion cuadratica inversa)."""
+    if fa == 0.0:
+        return a
+    if fb == 0.0:
+        return b
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(maxiter):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2.0 * np.finfo(float).eps * abs(b) + 0.5 * xtol
+        m = 0.5 * (c - b)
+        if abs(m) <= tol or fb == 0.0:
+            return b
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                p, q = 2.0 * m * s, 1.0 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2.0 * m * q * (q - r) - (b - a) * (r - 1.0))
+                q = (q - 1.0) * (r - 1.0) * (s - 1.0)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2.0 * p < min(3.0 * m * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+        a, fa = b, fb
+        b += d if abs(d) > tol else (tol if m > 0 else -tol)
+        fb = f(b)
+    return b
+
+
+def _sign_change_roots(f_vec, x, y, budget, xtol, reject_poles=True):
+    """Refina con Brent cada cambio de signo de `y` sobre la malla `x`."""
+    f_scalar = lambda v: float(f_vec(np.array([v]))[0])
+    finite = np.isfinite(y)
+    exact = np.flatnonzero(finite & (y == 0.0))
+    pair = finite[:-1] & finite[1:] & (np.sign(y[:-1]) * np.sign(y[1:]) < 0)
+    idx = np.flatnonzero(pair)
+
+    scale = np.nanmax(np.abs(y[finite])) if finite.any() else 1.0
+    found = [float(v) for v in x[exact]]
+    truncated = False
+    for i in idx:
+        if budget.expired():
+            truncated = True
+            break
+        r = brent(f_scalar, x[i], x[i + 1], y[i], y[i + 1], xtol=xtol)
+        fr = f_scalar(r)
+        # Un polo (1/x, tan x) tambien cambia de signo: |f| no se anula ahi
+        if reject_poles and not (np.isfinite(fr) and abs(fr) <= 1e-6 * max(1.0, scale)):
+            if abs(fr) > min(abs(y[i]), abs(y[i + 1])):
+                continue
+        found.append(float(r))
+    return sorted(found), truncated
+
+
+def find_roots(f: Callable, a: float, b: float, samples: int = DEFAULT_SAMPLES,
+               xtol: float = 1e-12, time_budget_ms: Optional[float] = DEFAULT_BUDGET_MS) -> RootsResult:
+    """Raices reales de `f` en [a, b]: cambios de signo en malla densa + Brent."""
+    budget = _Budget(time_budget_ms)
+    f_vec = vectorize(f)
+    x = np.linspace(a, b, max(int(samples), 3))
+    y = f_vec(x)
+    roots, truncated = _sign_change_roots(f_vec, x, y, budget, xtol)
+    return RootsResult(roots=roots, truncated=truncated, elapsed_ms=budget.elapsed_ms())
+
+
+def numeric_derivative(f_vec: Callable, x: np.ndarray) -> np.ndarray:
+    """Diferencia central con paso relativo ~ cbrt(eps)."""
+    h = 6e-6 * np.maximum(1.0, np.abs(x))
+    return (f_vec(x + h) - f_vec(x - h)) / (2.0 * h)
+
+
+def find_extrema(f: Callable, a: float, b: float, samples: int = DEFAULT_SAMPLES,
+                 xtol: float = 1e-10, time_budget_ms: Optional[float] = DEFAULT_BUDGET_MS) -> ExtremaResult:
+    """Maximos/minimos locales en [a, b]: raices de la derivada numerica."""
+    budget = _Budget(time_budget_ms)
+    f_vec = vectorize(f)
+    df_vec = lambda v: numeric_derivative(f_vec, v)
+    x = np.linspace(a, b, max(int(samples), 3))
+    dy = df_vec(x)
+    crit, truncated = _sign_change_roots(df_vec, x, dy, budget, xtol, reject_poles=False)
+
+    out = []
+    if crit:
+        c = np.asarray(crit)
+        yc = f_vec(c)
+        h = 1e-4 * max(1.0, abs(b - a))
+        left, right = f_vec(c - h), f_vec(c + h)
+        for xc, yv, yl, yr in zip(c, yc, left, right):
+            if not np.isfinite(yv):
+                continue  # Cambio de signo de f' en un polo, no un extremo
+            if yv >= yl and yv >= yr:
+                out.append((float(xc), float(yv), "max"))
+            elif yv <= yl and yv <= yr:
+                out.append((float(xc), float(yv), "min"))
+    return ExtremaResult(extrema=out, truncated=truncated, elapsed_ms=budget.elapsed_ms())
+
+
+# ─── Gauss-Kronrod 7-15 ────────────────────────────────────────────────────────
+
+_XGK = np.array([
+    0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245, 0.0,
+])
+_WGK = np.array([
+    0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649, 0.209482141084727828012999174891714,
+])
+_WG = np.array([
+    0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975, 0.417959183673469387755102040816327,
+])
+
+_NODES = np.concatenate([-_XGK[:-1], _XGK[::-1]])          # 15 nodos en [-1, 1]
+_WK = np.concatenate([_WGK[:-1], _WGK[::-1]])
+_WG15 = np.zeros(15)
+_WG15[[1, 3, 5]] = _WG[:3]
+_WG15[7] = _WG[3]
+_WG15[[9, 11, 13]] = _WG[2::-1]
+
+
+def _gk15(f_vec, lo: np.ndarray, hi: np.ndarray):
+    """Kronrod y error |K - G| para un lote de intervalos (una sola llamada a f)."""
+    mid, half = 0.5 * (lo + hi), 0.5 * (hi - lo)
+    fx = f_vec((mid[:, None] + half[:, None] * _NODES[None, :]).ravel()).reshape(len(lo), 15)
+    k = half * (fx @ _WK)
+    g = half * (fx @ _WG15)
+    return k, np.abs(k - g)
+
+
+def integrate_area(f: Callable, a: float, b: float, abs_tol: float = 1e-10, rel_tol: float = 1e-10,
+                   max_intervals: int = 2000,
+                   time_budget_ms: Optional[float] = DEFAULT_BUDGET_MS) -> AreaResult:
+    """Integral definida de `f` en [a, b] con Gauss-Kronrod adaptativo por lotes."""
+    budget = _Budget(time_budget_ms)
+    f_vec = vectorize(f)
+    if a == b:
+        return AreaResult(area=0.0, abs_error=0.0, elapsed_ms=budget.elapsed_ms())
+    sign = 1.0
+    if a > b:
+        a, b, sign = b, a, -1.0
+
+    lo = np.linspace(a, b, 9)[:-1]
+    hi = np.linspace(a, b, 9)[1:]
+    k, err = _gk15(f_vec, lo, hi)
+    evals = 15 * len(lo)
+    truncated = False
+    while True:
+        total, total_err = k.sum(), err.sum()
+        if not np.isfinite(total):
+            break
+        if total_err <= max(abs_tol, rel_tol * abs(total)):
+            break
+        if len(lo) >= max_intervals or budget.expired():
+            truncated = True
+            break
+        # Subdividir los intervalos con error por encima del promedio
+        split = err >= min(err.max(), total_err / len(err))
+        mid = 0.5 * (lo[split] + hi[split])
+        new_lo = np.concatenate([lo[split], mid])
+        new_hi = np.concatenate([mid, hi[split]])
+        nk, nerr = _gk15(f_vec, new_lo, new_hi)
+        evals += 15 * len(new_lo)
+        keep = ~split
+        lo = np.concatenate([lo[keep], new_lo])
+        hi = np.concatenate([hi[keep], new_hi])
+        k = np.concatenate([k[keep], nk])
+        err = np.concatenate([err[keep], nerr])
+
+    total, total_err = float(k.sum()), float(err.sum())
+    if not math.isfinite(total):
+        total_err = float("inf")
+    return AreaResult(area=sign * total, abs_error=total_err, evaluations=evals,
+                      truncated=truncated, elapsed_ms=budget.elapsed_ms())
@@ -759,65 +759,55 @@ class GraphingWidget(QWidget):
             return self.functions[-1][2]  # Last function if none selected
         return None
     
-    def _find_roots(self):
-        """Find roots of selected function."""
+    def _get_selected_callable(self):
+        """Returns the selected function compiled with lambdify (numpy)."""
         expr = self._get_selected_function()
         if expr is None:
+            return None
+        from sympy import lambdify, Symbol
+        return lambdify(Symbol('x'), expr, modules=['numpy'])
+    
+    def _find_roots(self):
+        """Find roots of selected function (numeric, time-bounded)."""
+        f = self._get_selected_callable()
+        if f is None:
             self.analysis_output.setText("No function selected")
             return
         try:
-            from sympy import solve, Symbol, N
-            roots = solve(expr, Symbol('x'))
-            # Evaluate numerically and filter real roots in range
-            real_roots = []
-            for r in roots[:10]:  # Limit to 10
-                try:
-                    val = complex(N(r))
-                    if abs(val.imag) < 1e-10:
-                        real_roots.append(f"{val.real:.4f}")
-                except:
-                    real_roots.append(str(r))
-            self.analysis_output.setText(f"Roots: {', '.join(real_roots) if real_roots else 'None found'}")
+            from src.core.numeric_analysis import find_roots
+            res = find_roots(f, self.x_min, self.x_max)
+            roots = [f"{r:.4f}" for r in res.roots[:10]]
+            more = " …" if res.truncated or len(res.roots) > 10 else ""
+            self.analysis_output.setText(f"Roots: {', '.join(roots) + more if roots else 'None found'}")
         except Exception as e:
             self.analysis_output.setText(f"Error: {str(e)}")
     
     def _find_extrema(self):
-        """Find local extrema of selected function."""
-        expr = self._get_selected_function()
-        if expr is None:
+        """Find local extrema of selected function (numeric derivative)."""
+        f = self._get_selected_callable()
+        if f is None:
             self.analysis_output.setText("No function selected")
             return
         try:
-            from sympy import diff, solve, Symbol, N
-            x = Symbol('x')
-            deriv = diff(expr, x)
-            critical = solve(deriv, x)
-            
-            results = []
-            for c in critical[:10]:
-                try:
-                    cx = float(N(c))
-                    if self.x_min <= cx <= self.x_max:
-                        cy = float(N(expr.subs(x, c)))
-                        results.append(f"({cx:.2f}, {cy:.2f})")
-                except:
-                    pass
-            self.analysis_output.setText(f"Extrema: {', '.join(results) if results else 'None in range'}")
+            from src.core.numeric_analysis import find_extrema
+            res = find_extrema(f, self.x_min, self.x_max)
+            results = [f"{kind} ({cx:.2f}, {cy:.2f})" for cx, cy, kind in res.extrema[:10]]
+            more = " …" if res.truncated or len(res.extrema) > 10 else ""
+            self.analysis_output.setText(f"Extrema: {', '.join(results) + more if results else 'None in range'}")
         except Exception as e:
             self.analysis_output.setText(f"Error: {str(e)}")
     
     def _calc_area(self):
-        """Calculate definite integral (area under curve)."""
-        expr = self._get_selected_function()
-        if expr is None:
+        """Calculate definite integral (adaptive Gauss-Kronrod)."""
+        f = self._get_selected_callable()
+        if f is None:
             self.analysis_output.setText("No function selected")
             return
         try:
-            from sympy import integrate, Symbol, N
-            x = Symbol('x')
-            result = integrate(expr, (x, self.x_min, self.x_max))
-            area = float(N(result))
-            self.analysis_output.setText(f"Area [{self.x_min}, {self.x_max}]: {area:.4f}")
+            from src.core.numeric_analysis import integrate_area
+            res = integrate_area(f, self.x_min, self.x_max)
+            approx = " (approx.)" if res.truncated else ""
+            self.analysis_output.setText(f"Area [{self.x_min}, {self.x_max}]: {res.area:.4f}{approx}")
         except Exception as e:
             self.analysis_output.setText(f"Error: {str(e)}")
     